@@ -9,6 +9,7 @@ import argparse
 from point_cloud import wavefront
 from visualization import graphics
 import utilities
+import telemetry
 
 view = (0, 25, 3.32, np.array([-0.04, -0.015, -0.029]))
 # load the bumpy castalia
@@ -19,7 +20,7 @@ graphics.mayavi_view(mfig, *view)
 graphics.mayavi_savefig(mfig, '/tmp/castalia_bump_true.jpg', magnification=4)
 
 # load the refinement final version
-with h5py.File('./data/exploration/refine/20180619_castalia_refinement.hdf5', 'r') as hf:
+with telemetry.File('./data/exploration/refine/20180619_castalia_refinement.hdf5', 'r') as hf:
     # oriignal vertices
     est_initial_vertices = hf['simulation_parameters/estimate_asteroid/initial_vertices'][()]
     num_vert = est_initial_vertices.shape[0]
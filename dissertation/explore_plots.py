@@ -15,6 +15,7 @@ import datetime
 from point_cloud import wavefront
 from visualization import graphics, publication
 import utilities
+import telemetry
 
 from lib import stats
 
@@ -29,7 +30,7 @@ def exploration_generate_plots(data_path, img_path='/tmp/diss_explore',
     if not os.path.exists(img_path):
         os.makedirs(img_path)
 
-    with h5py.File(data_path, 'r') as hf:
+    with telemetry.File(data_path, 'r') as hf:
         rv = hf['reconstructed_vertex']
         rw = hf['reconstructed_weight']
         
@@ -91,7 +92,7 @@ def exploration_generate_plots(data_path, img_path='/tmp/diss_explore',
 def plot_uncertainty(filename, img_path="/tmp/diss_explore", show=True):
     """Compute the sum of uncertainty and plot as function of time"""
 
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         rv = hf['reconstructed_vertex']
         rw = hf['reconstructed_weight']
 
@@ -123,7 +124,7 @@ def plot_state_trajectory(filename):
     """
 
     # load the hdf5
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         state_group = hf['state']
 
         # get all the keys for the groups
@@ -145,7 +146,7 @@ def plot_state_trajectory(filename):
 def plot_volume(filename, img_path="/tmp/diss_explore", show=True):
     """Compute the volume of the asteroid at each time step
     """
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         rv_group = hf['reconstructed_vertex']
         f_initial = hf['initial_faces'][()]
 
@@ -171,7 +172,7 @@ def save_animation(filename, output_path, mesh_weight=False, magnification=4):
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         rv = hf['reconstructed_vertex']
         rw = hf['reconstructed_weight']
         
@@ -2,12 +2,14 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import logging
+import os
 
 import numpy as np
 import scipy.io
 
 from kinematics import attitude
 from point_cloud import wavefront, polyhedron
+from dynamics import harmonics, gravity_grid, shape_cache
 
 # TODO: Implement the ability to input a filename for OBJ shape files
 # TODO: Implement a Cython/C++ version of both of these methods
@@ -33,9 +35,13 @@ class Asteroid(object):
         C22 - spherical harmoning coefficient
     """
     G = 6.673e-20
-    def __init__(self, name, num_faces, shape_flag='mat'):
+    def __init__(self, name, num_faces, shape_flag='mat',
+                 cache_dir=shape_cache.CACHE_DIR):
         """Initialize the asteroid instance with it's properties
 
+        The polyhedron parameters are loaded from cache_dir when this shape
+        was seen before, and saved there otherwise. cache_dir=None always
+        recomputes them
         """
         self.logger = logging.getLogger(__name__)
 
@@ -102,7 +108,11 @@ class Asteroid(object):
         
         self.__initasteroid()
         # compute a bunch of parameters for the polyhedron model
-        self.asteroid_grav = self.polyhedron_shape_input()
+        if cache_dir is None:
+            self.asteroid_grav = self.polyhedron_shape_input()
+        else:
+            self.asteroid_grav = shape_cache.cached_shape_input(
+                self.name, self.V, self.F, self.polyhedron_shape_input, cache_dir)
     
     def __initasteroid(self):
         """Initialize the asteroid properties
@@ -179,7 +189,7 @@ class Asteroid(object):
 
         Adds attributes to the class - polyhedron gravity model
         """
-        print("Computing polyhedron shape parameters")
+        self.logger.info('Computing polyhedron shape parameters')
 
         invalid = -1
 
@@ -280,89 +290,270 @@ class Asteroid(object):
             U_grad - gravitational attraction - distance / time**2
             U_grad_mat - gravitational gradient matrix
             Ulaplace - laplacian
+
+        After enable_harmonics, states outside of harmonic_radius use the
+        spherical harmonic model instead. After enable_grid, states the grid
+        covers are interpolated
         """
-        F = self.F
-        V = self.V
+        state = np.reshape(state, (1, 3))
+        if self.use_harmonics(state)[0]:
+            U, U_grad, U_grad_mat, Ulaplace = harmonics.potential_batch(
+                state, self.harmonic_param)
+        elif self.use_grid(state)[0]:
+            U, U_grad, U_grad_mat, Ulaplace = gravity_grid.potential_batch(
+                state, self.gravity_grid)
+        else:
+            U, U_grad, U_grad_mat, Ulaplace = polyhedron.potential_batch(
+                state, self.potential_param, self.G, self.sigma)
+
+        return (U[0], U_grad[0], U_grad_mat[0], Ulaplace[0])
+    
+    def polyhedron_potential_batch(self, states, chunk_size=None):
+        r"""Polyhedron potential at many points
+
+        U, U_grad, U_grad_mat, Ulaplace = ast.polyhedron_potential_batch(states)
+
+        Parameters
+        ----------
+        states : (m, 3) numpy array
+            Positions in the asteroid body fixed frame in km
+        chunk_size : int
+            Number of points to evaluate together. The default limits the 
+            size of the temporary arrays
+
+        Returns
+        -------
+        U : (m,) numpy array
+            gravitational potential - distance**2 / time**2
+        U_grad : (m, 3) numpy array
+            gravitational attraction - distance / time**2
+        U_grad_mat : (m, 3, 3) numpy array
+            gravitational gradient matrix
+        Ulaplace : (m,) numpy array
+            laplacian
+
+        See Also
+        --------
+        polyhedron.potential_batch : vectorized potential function
+
+        Author
+        ------
+        Shankar Kulumani		GWU		skulumani@gwu.edu
+        """
+        states = np.atleast_2d(states)
+        far = self.use_harmonics(states)
+        grid = np.logical_and(self.use_grid(states), np.logical_not(far))
+        exact = np.logical_not(np.logical_or(far, grid))
+        if np.all(exact):
+            return polyhedron.potential_batch(states, self.potential_param,
+                                              self.G, self.sigma, chunk_size)
+
+        out = (np.zeros(states.shape[0]), np.zeros((states.shape[0], 3)),
+               np.zeros((states.shape[0], 3, 3)), np.zeros(states.shape[0]))
+        backends = ((far, lambda s: harmonics.potential_batch(s, self.harmonic_param)),
+                    (grid, lambda s: gravity_grid.potential_batch(s, self.gravity_grid)),
+                    (exact, lambda s: polyhedron.potential_batch(s, self.potential_param,
+                                                                 self.G, self.sigma,
+                                                                 chunk_size)))
+        for mask, potential in backends:
+            if np.any(mask):
+                for o, value in zip(out, potential(states[mask])):
+                    o[mask] = value
+
+        return out
+
+    def enable_harmonics(self, degree=16, radius_factor=1.5):
+        r"""Use a spherical harmonic model far from the asteroid
+
+        err = ast.enable_harmonics(degree=16, radius_factor=1.5)
 
-        Fa = self.asteroid_grav['Fa']
-        Fb = self.asteroid_grav['Fb']
-        Fc = self.asteroid_grav['Fc']
+        Parameters
+        ----------
+        degree : int
+            Maximum degree and order of the expansion
+        radius_factor : float
+            Points farther than radius_factor times the Brillouin radius 
+            use the expansion. Must be greater than 1. The coefficients are 
+            fit on this sphere as well
 
-        e1 = self.asteroid_grav['e1']
-        e2 = self.asteroid_grav['e2']
-        e3 = self.asteroid_grav['e3']
+        Returns
+        -------
+        err : float
+            Largest relative error of the attraction on the switching sphere 
 
-        e1_face_map = self.asteroid_grav['e1_face_map']
-        e2_face_map = self.asteroid_grav['e2_face_map']
-        e3_face_map = self.asteroid_grav['e3_face_map']
+        Notes
+        -----
+        The coefficients are fit to the polyhedron model once and kept until
+        the shape changes. The truncation error falls off roughly like 
+        (1 / radius_factor)**degree, so raise either one for more accuracy.
+        Inside of the switching sphere the exact polyhedron is used.
 
+        See Also
+        --------
+        harmonics.fit_coefficients : least squares fit to the polyhedron
 
-        e1_vertex_map = self.asteroid_grav['e1_vertex_map']
-        e2_vertex_map = self.asteroid_grav['e2_vertex_map']
-        e3_vertex_map = self.asteroid_grav['e3_vertex_map']
+        Author
+        ------
+        Shankar Kulumani		GWU		skulumani@gwu.edu
+        """
+        if radius_factor <= 1:
+            raise ValueError('radius_factor must be greater than 1')
+        
+        self._harmonic_setting = (degree, radius_factor)
+        self._harmonic_grav = None
+        hparam = self.harmonic_param
+
+        check = self.harmonic_radius * harmonics.fibonacci_sphere(200)
+        U_grad = polyhedron.potential_batch(check, self.potential_param,
+                                            self.G, self.sigma)[1]
+        U_grad_harm = harmonics.potential_batch(check, hparam)[1]
+        self.harmonic_error = np.max(np.linalg.norm(U_grad_harm - U_grad, axis=1)
+                                     / np.linalg.norm(U_grad, axis=1))
         
-        e_vertex_map = self.asteroid_grav['e_vertex_map']
-        unique_index = self.asteroid_grav['unique_index']
+        self.logger.info('Degree {} harmonics outside {} km. Relative error {}'.format(
+            degree, self.harmonic_radius, self.harmonic_error))
+        return self.harmonic_error
 
-        e1_ind1b = self.asteroid_grav['e1_ind1b']
-        e1_ind2b = self.asteroid_grav['e1_ind2b']
-        e1_ind3b = self.asteroid_grav['e1_ind3b']
+    def disable_harmonics(self):
+        """Go back to the polyhedron model everywhere
+        """
+        self._harmonic_setting = None
 
-        e2_ind1b = self.asteroid_grav['e2_ind1b']
-        e2_ind2b = self.asteroid_grav['e2_ind2b']
-        e2_ind3b = self.asteroid_grav['e2_ind3b']
+    def use_harmonics(self, states):
+        """Boolean mask of the points which use the spherical harmonic model
+        """
+        states = np.atleast_2d(states)
+        if getattr(self, '_harmonic_setting', None) is None:
+            return np.zeros(states.shape[0], dtype=bool)
 
-        e3_ind1b = self.asteroid_grav['e3_ind1b']
-        e3_ind2b = self.asteroid_grav['e3_ind2b']
-        e3_ind3b = self.asteroid_grav['e3_ind3b']
+        return np.sum(states**2, axis=1) > self.harmonic_radius**2
 
-        normal_face = self.asteroid_grav['normal_face']
+    @property
+    def harmonic_param(self):
+        """Spherical harmonic coefficients fit to the current polyhedron
 
-        e1_normal = self.asteroid_grav['e1_normal']
-        e2_normal = self.asteroid_grav['e2_normal']
-        e3_normal = self.asteroid_grav['e3_normal']
+        Refit whenever potential_param is regenerated
+        """
+        param = self.potential_param
+        if getattr(self, '_harmonic_grav', None) is not param:
+            degree, radius_factor = self._harmonic_setting
+            brillouin_radius = np.max(np.sqrt(np.sum(param.V**2, axis=0)))
+            self._harmonic_param = harmonics.fit_coefficients(
+                param, self.G, self.sigma, degree,
+                fit_radius=radius_factor * brillouin_radius)
+            self._harmonic_grav = param
+
+        return self._harmonic_param
+
+    @property
+    def harmonic_radius(self):
+        """Radius outside of which the harmonic model is used
+        """
+        return self._harmonic_setting[1] * self.harmonic_param.brillouin_radius
 
-        E1_edge = self.asteroid_grav['E1_edge']
-        E2_edge = self.asteroid_grav['E2_edge']
-        E3_edge = self.asteroid_grav['E3_edge']
+    def enable_grid(self, extent, spacing, filename=None, processes=4):
+        r"""Serve the potential from a precomputed grid around the asteroid
 
-        F_face = self.asteroid_grav['F_face']
+        err = ast.enable_grid(extent, spacing, filename=None)
 
-        num_f = self.asteroid_grav['num_f']
-        num_e = self.asteroid_grav['num_e']
-        num_v = self.asteroid_grav['num_v']
+        Parameters
+        ----------
+        extent : float
+            Half width in km of the cube, centered on the asteroid, which is
+            sampled
+        spacing : float
+            Distance between grid nodes in km
+        filename : str
+            npz file used as a cache. It is loaded if it matches this
+            asteroid, grid size, G and sigma, otherwise the grid is built and 
+            written there
+        processes : int
+            Number of processes used to sample the polyhedron
 
-        G = self.G
-        sigma = self.sigma
-        
-        # distance from state to each vertex
-        r_v = V - np.tile(state, (num_v, 1))
+        Returns
+        -------
+        err : float
+            Largest relative attraction error measured at cell midpoints
 
-        # function to compute laplacia factor (wf)
-        w_face = polyhedron.laplacian_factor(r_v, Fa, Fb, Fc)
+        Notes
+        -----
+        Points outside the cube, inside the body, or close enough to the 
+        surface that the interpolation stencil touches the body use the
+        polyhedron instead. Points which use the harmonic model are not 
+        affected.
 
-        # check if point is inside or outside the body
-        # zero when outside body and -G*sigma*4 pi on the inside
-        inside_check = np.sum(w_face)
-        if np.isclose(inside_check, 0):  # outside the body
-            L1_edge, L2_edge, L3_edge = polyhedron.edge_factor(r_v, e1, e2, e3, e1_vertex_map, e2_vertex_map, e3_vertex_map)
-            
-            # compute the contribution of the each face
-            U_face, U_grad_face, U_grad_mat_face  = polyhedron.face_contribution(r_v, Fa, F_face, w_face)
-            U_edge, U_grad_edge, U_grad_mat_edge = polyhedron.edge_contribution(state, e_vertex_map, unique_index, V, E1_edge, E2_edge, E3_edge, L1_edge, L2_edge, L3_edge)
-            # combine edge and face summations
-            U = 1 / 2 * G * sigma * U_edge - 1 / 2 * G * sigma * U_face
-            U_grad = -G * sigma * U_grad_edge + G * sigma * U_grad_face
-            U_grad_mat = G * sigma * U_grad_mat_edge - G * sigma * U_grad_mat_face
-            Ulaplace = -G * sigma * np.sum(w_face)
-        else:
-            U = 0
-            U_grad = np.zeros(3)
-            U_grad_mat = np.zeros((3, 3))
-            Ulaplace = 0
-        #     print("INSIDE ASTEROID!")
+        See Also
+        --------
+        gravity_grid.build_grid : sample and check the grid
+
+        Author
+        ------
+        Shankar Kulumani		GWU		skulumani@gwu.edu
+        """
+        self._grid_setting = (extent, spacing, filename, processes)
+        self._grid_param = None
+        grid = self.gravity_grid
+
+        self.logger.info('Gravity grid {} nodes per side. Relative error {}'.format(
+            grid.values.shape[0], grid.error_bound))
+        return grid.error_bound
+
+    def disable_grid(self):
+        """Stop using the gravity grid
+        """
+        self._grid_setting = None
+
+    def use_grid(self, states):
+        """Boolean mask of the points which are interpolated from the grid
+        """
+        states = np.atleast_2d(states)
+        if getattr(self, '_grid_setting', None) is None:
+            return np.zeros(states.shape[0], dtype=bool)
+
+        return gravity_grid.contains(states, self.gravity_grid)
+
+    @property
+    def gravity_grid(self):
+        """Gravity grid matching the current polyhedron
+
+        Loaded from or built into the cache file whenever potential_param 
+        is regenerated
+        """
+        param = self.potential_param
+        if getattr(self, '_grid_param', None) is not param:
+            extent, spacing, filename, processes = self._grid_setting
+            key = gravity_grid.grid_key(param, self.G, self.sigma, extent, spacing)
+
+            grid = None
+            if filename is not None and os.path.isfile(filename):
+                grid = gravity_grid.load_grid(filename)
+                if grid.key != key:
+                    self.logger.info('Gravity grid {} is out of date'.format(filename))
+                    grid = None
+
+            if grid is None:
+                self.logger.info('Building gravity grid')
+                grid = gravity_grid.build_grid(param, self.G, self.sigma, extent,
+                                               spacing, processes)
+                if filename is not None:
+                    gravity_grid.save_grid(filename, grid)
+
+            self._gravity_grid = grid
+            self._grid_param = param
+
+        return self._gravity_grid
+
+    @property
+    def potential_param(self):
+        """Contiguous polyhedron parameters used by the potential functions
+
+        These are regenerated whenever asteroid_grav is replaced
+        """
+        if getattr(self, '_potential_grav', None) is not self.asteroid_grav:
+            self._potential_param = polyhedron.potential_parameters(self.asteroid_grav)
+            self._potential_grav = self.asteroid_grav
 
-        return (U, U_grad, U_grad_mat, Ulaplace)
+        return self._potential_param
     
     def rotate_vertices(self, t):
         """New method to rotate the asteroid vertices
@@ -3,6 +3,7 @@ import pdb
 import numpy as np
 import scipy.linalg
 from kinematics import attitude, sphere
+from dynamics import dumbbell
 
 def attitude_controller(time, state, ext_moment, dum, ast, des_att_tuple):
     r"""Geometric attitude controller on SO(3)
@@ -71,7 +72,7 @@ def attitude_controller(time, state, ext_moment, dum, ast, des_att_tuple):
     eR = 1/2 * attitude.vee_map(Rd.T.dot(R) - R.T.dot(Rd))
     eW = ang_vel - R.T.dot(Rd).dot(ang_vel_d)
     # compute attitude input
-    u_m = (-dum.kR*eR -dum.kW*eW + np.cross(ang_vel,dum.J.dot(ang_vel)) 
+    u_m = (-dum.kR*eR -dum.kW*eW + dumbbell.cross(ang_vel, dum.J.dot(ang_vel)) 
             -dum.J.dot( attitude.hat_map(ang_vel).dot(R.T).dot(Rd).dot(ang_vel_d)-
                 R.T.dot(Rd).dot(ang_vel_d_dot)) - ext_moment)
     return u_m
@@ -925,3 +926,108 @@ def approaching_translation(time, ast, final_pos=[0.550, 0, 0],
     # output
     return inertial_pos, inertial_vel, inertial_accel 
 
+
+class ExploreGuidance(object):
+    r"""Zero order hold of the exploration commands of the C++ Controller
+
+    guidance = ExploreGuidance(complete_controller, est_ast_rmesh, ast)
+    guidance.step(t, state)
+    Rd = guidance.get_Rd()
+
+    Planning with Controller.explore_asteroid searches over every vertex of
+    the reconstructed mesh, which is far too slow to repeat at every stage
+    of the integrator. This runs it at most once per period, outside of the
+    equations of motion, and holds the desired states in between. It has
+    the same get_* methods as the Controller so the equations of motion can
+    be given either.
+
+    Parameters
+    ----------
+    complete_controller : Controller
+        C++ controller from the bindings
+    est_ast_rmesh : ReconstructMesh
+        Estimated shape used to choose the next view
+    ast : Asteroid
+        Asteroid used to rotate the state into the asteroid frame
+    est_ast : Asteroid
+        Estimated asteroid. If given the control cost version of
+        explore_asteroid is used, which takes the inertial state
+    period : float
+        Seconds between plans
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+
+    def __init__(self, complete_controller, est_ast_rmesh, ast, est_ast=None,
+                 period=1.0):
+        self.controller = complete_controller
+        self.est_ast_rmesh = est_ast_rmesh
+        self.ast = ast
+        self.est_ast = est_ast
+        self.period = period
+
+        self.t_update = None
+        self.num_updates = 0
+
+    def update(self, t, state):
+        """Plan from the state at t and hold the new commands
+        """
+        if self.est_ast is None:
+            Ra = self.ast.rot_ast2int(t)
+            R_sc2ast = Ra.T.dot(state[6:15].reshape((3, 3)))
+            state_ast = np.hstack((Ra.T.dot(state[0:3]), Ra.T.dot(state[3:6]),
+                                   R_sc2ast.reshape(-1), state[15:18]))
+            self.controller.explore_asteroid(state_ast, self.est_ast_rmesh)
+        else:
+            self.controller.explore_asteroid(t, state, self.est_ast_rmesh, self.est_ast)
+
+        self._Rd = np.array(self.controller.get_Rd())
+        self._Rd_dot = np.array(self.controller.get_Rd_dot())
+        self._ang_vel_d = np.array(self.controller.get_ang_vel_d())
+        self._ang_vel_d_dot = np.array(self.controller.get_ang_vel_d_dot())
+        self._posd = np.array(self.controller.get_posd())
+        self._veld = np.array(self.controller.get_veld())
+        self._acceld = np.array(self.controller.get_acceld())
+
+        self.t_update = t
+        self.num_updates += 1
+
+    def step(self, t, state):
+        """Plan again if a period has passed since the last plan
+
+        Returns True if the commands were updated
+        """
+        # allow for round off in t accumulated from the integrator
+        if self.t_update is None or t - self.t_update >= self.period * (1 - 1e-9):
+            self.update(t, state)
+            return True
+        return False
+
+    def commands(self):
+        """Held commands in the order of ControlledDumbbell.set_command
+        """
+        return (self._Rd, self._Rd_dot, self._ang_vel_d, self._ang_vel_d_dot,
+                self._posd, self._veld, self._acceld)
+
+    def get_Rd(self):
+        return self._Rd
+
+    def get_Rd_dot(self):
+        return self._Rd_dot
+
+    def get_ang_vel_d(self):
+        return self._ang_vel_d
+
+    def get_ang_vel_d_dot(self):
+        return self._ang_vel_d_dot
+
+    def get_posd(self):
+        return self._posd
+
+    def get_veld(self):
+        return self._veld
+
+    def get_acceld(self):
+        return self._acceld
@@ -6,6 +6,18 @@ import scipy.linalg
 import kinematics.attitude as attitude
 import pdb
 
+def cross(a, b):
+    """Cross product of two (3,) arrays
+
+    np.cross handles broadcasting over arbitrary shapes, and that overhead
+    is an order of magnitude more than the product itself for a single pair
+    of vectors. The EOMs take several of these every evaluation.
+    """
+    return np.array([a[1]*b[2] - a[2]*b[1],
+                     a[2]*b[0] - a[0]*b[2],
+                     a[0]*b[1] - a[1]*b[0]])
+
+
 class Dumbbell(object):
     r"""Dumbbell object
 
@@ -66,6 +78,11 @@ class Dumbbell(object):
         self.J = self.Jm1 + self.Jm2 + self.m1 *(np.inner(self.zeta1,self.zeta1)*np.eye(3,3) - np.outer(self.zeta1,self.zeta1)) + self.m2 * (np.inner(self.zeta2,self.zeta2)*np.eye(3,3) - np.outer(self.zeta2,self.zeta2))
         self.Jd = self.m1*np.outer(self.zeta1,self.zeta1) + self.m2*np.outer(self.zeta2,self.zeta2) + self.Jm1/2 + self.Jm2/2
 
+        # constant for the life of the dumbbell so the EOMs never invert J or form these hat maps
+        self.Jinv = np.linalg.inv(self.J)
+        self.zeta1_hat = attitude.hat_map(self.zeta1)
+        self.zeta2_hat = attitude.hat_map(self.zeta2)
+
         # controller parameters
         OS_translation = 5/100
         Tp_translation = 20
@@ -87,106 +104,109 @@ class Dumbbell(object):
         self.kx =  (self.m1 + self.m2) * self.wn_translation**2
         self.kv = (self.m1 + self.m2) * 2 * self.zeta_translation * self.wn_translation
 
-    def eoms_inertial_ode(self, t, state, ast):
-        """Inertial dumbbell equations of motion about an asteroid
-        
+    def inertial_loads(self, t, state, ast):
+        """Gravitational force and moment for the inertial EOMs
+
         Inputs:
-            t - 
-            state -
-            ast - Asteroid class object holding the asteroid gravitational model and
-            other useful parameters
+            t - current simulation time
+            state - (18,) inertial state of the dumbbell
+            ast - Asteroid class object with omega and polyhedron_potential
+
+        Outputs:
+            F - (3,) total gravitational force in the inertial frame
+            M - (3,) total gravitational moment in the dumbbell frame
         """
-        # unpack the state
         pos = state[0:3] # location of the center of mass in the inertial frame
-        vel = state[3:6] # vel of com in inertial frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to inertial frame
-        ang_vel = state[15:18] # angular velocity of sc wrt inertial frame defined in body frame
+        R = state[6:15].reshape((3, 3)) # sc body frame to inertial frame
 
         Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
 
-        # unpack parameters for the dumbbell
-        J = self.J
-
-        rho1 = self.zeta1
-        rho2 = self.zeta2
-
         # position of each mass in the asteroid frame
-        z1 = Ra.T.dot(pos + R.dot(rho1))
-        z2 = Ra.T.dot(pos + R.dot(rho2))
-
-        z = Ra.T.dot(pos) # position of COM in asteroid frame
+        z1 = Ra.T.dot(pos + R.dot(self.zeta1))
+        z2 = Ra.T.dot(pos + R.dot(self.zeta2))
 
         # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
+        (_, U1_grad, _, _) = ast.polyhedron_potential(z1)
+        (_, U2_grad, _, _) = ast.polyhedron_potential(z2)
 
-        F1 = self.m1*Ra.dot(U1_grad)
-        F2 = self.m2*Ra.dot(U2_grad)
+        F = Ra.dot(self.m1*U1_grad + self.m2*U2_grad)
 
-        M1 = self.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-        M2 = self.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
-        # M1 = np.zeros(3)
-        # M2 = np.zeros_like(3)
+        R_ast2sc = R.T.dot(Ra) # asteroid frame to sc body frame
+        M = (self.m1 * self.zeta1_hat.dot(R_ast2sc.dot(U1_grad))
+             + self.m2 * self.zeta2_hat.dot(R_ast2sc.dot(U2_grad)))
 
-        pos_dot = vel
-        vel_dot = 1/(self.m1+self.m2) *(F1 + F2)
-        R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-        ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2)
+        return F, M
 
-        statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
-
-        return statedot
-    def eoms_inertial(self, state,t, ast):
-        """Inertial dumbbell equations of motion about an asteroid
-        
-        Inputs:
-            t - 
-            state -
-            ast - Asteroid class object holding the asteroid gravitational model and
-            other useful parameters
+    def _inertial_derivative(self, state, force, moment, out):
+        """Fill out with the inertial state derivative under a total force and moment
         """
-        # unpack the state
-        pos = state[0:3] # location of the center of mass in the inertial frame
-        vel = state[3:6] # vel of com in inertial frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to inertial frame
+        R = state[6:15].reshape((3, 3)) # sc body frame to inertial frame
         ang_vel = state[15:18] # angular velocity of sc wrt inertial frame defined in body frame
 
-        Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
+        out[0:3] = state[3:6]
+        np.multiply(force, 1/(self.m1 + self.m2), out=out[3:6])
+        out[6:15] = np.dot(R, attitude.hat_map(ang_vel)).ravel()
+        out[15:18] = np.dot(self.Jinv, moment - cross(ang_vel, self.J.dot(ang_vel)))
 
-        # unpack parameters for the dumbbell
-        J = self.J
+        return out
 
-        rho1 = self.zeta1
-        rho2 = self.zeta2
+    def relative_loads(self, state, ast):
+        """Gravitational force and moment for the relative EOMs
 
-        # position of each mass in the asteroid frame
-        z1 = Ra.T.dot(pos + R.dot(rho1))
-        z2 = Ra.T.dot(pos + R.dot(rho2))
+        Both are expressed in the asteroid fixed frame
+        """
+        pos = state[0:3] # location of the COM of dumbbell in asteroid fixed frame
+        R = state[6:15].reshape((3, 3)) # sc body frame to asteroid body frame R = R_A^T R_1
 
-        z = Ra.T.dot(pos) # position of COM in asteroid frame
+        # the position of each mass from the COM in the asteroid frame
+        rho1 = R.dot(self.zeta1)
+        rho2 = R.dot(self.zeta2)
 
         # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
+        (_, U1_grad, _, _) = ast.polyhedron_potential(pos + rho1)
+        (_, U2_grad, _, _) = ast.polyhedron_potential(pos + rho2)
 
-        F1 = self.m1*Ra.dot(U1_grad)
-        F2 = self.m2*Ra.dot(U2_grad)
+        F = self.m1*U1_grad + self.m2*U2_grad
+        M = self.m1*cross(rho1, U1_grad) + self.m2*cross(rho2, U2_grad)
 
-        M1 = self.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-        M2 = self.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
-        # M1 = np.zeros(3)
-        # M2 = np.zeros_like(3)
+        return F, M
 
-        pos_dot = vel
-        vel_dot = 1/(self.m1+self.m2) *(F1 + F2)
-        R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-        ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2)
+    def eoms_inertial_ode(self, t, state, ast, out=None):
+        """Inertial dumbbell equations of motion about an asteroid
+        
+        Inputs:
+            t - 
+            state -
+            ast - Asteroid class object holding the asteroid gravitational model and
+            other useful parameters
+            out - optional (18,) float array to hold the derivative.
+            Reusing it between calls avoids allocating a new state vector
+
+        Output:
+            statedot - (18,) derivative of the state, which is out if given
+        """
+        if out is None:
+            out = np.empty(18)
+
+        F, M = self.inertial_loads(t, state, ast)
+
+        return self._inertial_derivative(state, F, M, out)
 
-        statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
+    def eoms_inertial(self, state, t, ast, out=None):
+        """Inertial dumbbell equations of motion about an asteroid
+        
+        The argument order of eoms_inertial_ode swapped for scipy.integrate.odeint
 
-        return statedot
+        Inputs:
+            t - 
+            state -
+            ast - Asteroid class object holding the asteroid gravitational model and
+            other useful parameters
+            out - optional (18,) array to hold the derivative
+        """
+        return self.eoms_inertial_ode(t, state, ast, out)
 
-    def eoms_relative(self, state, t, ast):
+    def eoms_relative(self, state, t, ast, out=None):
         """Relative EOMS defined in the rotating asteroid frame
 
         This function defines the motion of a dumbbell spacecraft in orbit around an asteroid.
@@ -201,62 +221,14 @@ class Dumbbell(object):
                 R - state[6:15] rotation matrix which converts vectors from the dumbbell frame to the asteroid frame
                 w - state[15:18] rad/sec angular velocity of the dumbbell wrt inertial frame and defined in the asteroid frame
             ast - asteroid object
+            out - optional (18,) array to hold the derivative
 
         Output:
             state_dot - (18,) derivative of state. The order is the same as the input state.
         """
-        
-        # unpack the state
-        pos = state[0:3] # location of the COM of dumbbell in asteroid fixed frame
-        vel = state[3:6] # vel of com wrt to asteroid expressed in the asteroid fixed frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to asteroid body frame R = R_A^T R_1
-        w = state[15:18] # angular velocity of sc wrt inertial frame and expressed in asteroid fixed frame
-
-        Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
-
-        # unpack parameters for the dumbbell
-        m1 = self.m1
-        m2 = self.m2
-        m = m1 + m2
-        J = self.J
-        Jr = R.dot(J).dot(R.T)
-        Wa = ast.omega*np.array([0,0,1]) # angular velocity vector of asteroid
-
-        # the position of each mass in the dumbbell body frame
-        rho1 = self.zeta1
-        rho2 = self.zeta2
-
-        # position of each mass in the asteroid frame
-        z1 = pos + R.dot(rho1)
-        z2 = pos + R.dot(rho2)
-
-        z = pos # position of COM in asteroid frame
-
-        # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
+        return self.eoms_relative_ode(t, state, ast, out)
 
-        # force due to each mass expressed in asteroid body frame
-        F1 = m1*U1_grad
-        F2 = m2*U2_grad
-
-        M1 = m1*attitude.hat_map(R.dot(rho1)).dot(U1_grad) 
-        M2 = m2*attitude.hat_map(R.dot(rho2)).dot(U2_grad) 
-
-        # M1 = np.zeros(3)
-        # M2 = np.zeros_like(M1)
-        # state derivatives
-        pos_dot = vel - attitude.hat_map(Wa).dot(pos)
-        vel_dot = 1/m * (F1 + F2 - m * attitude.hat_map(Wa).dot(vel))
-        # vel_dot = 1/m * (F_com) 
-        R_dot = attitude.hat_map(w).dot(R) - attitude.hat_map(Wa).dot(R)
-        R_dot = R_dot.reshape(9)
-        w_dot = np.linalg.inv(Jr).dot(M1 + M2 - Jr.dot(attitude.hat_map(Wa)).dot(w))
-        state_dot = np.hstack((pos_dot, vel_dot, R_dot, w_dot))
-        
-        return state_dot
-
-    def eoms_relative_ode(self, t, state, ast):
+    def eoms_relative_ode(self, t, state, ast, out=None):
         """Relative EOMS defined in the rotating asteroid frame
 
         This function defines the motion of a dumbbell spacecraft in orbit around an asteroid.
@@ -271,66 +243,42 @@ class Dumbbell(object):
                 R - state[6:15] rotation matrix which converts vectors from the dumbbell frame to the asteroid frame
                 w - state[15:18] rad/sec angular velocity of the dumbbell wrt inertial frame and defined in the asteroid frame
             ast - asteroid object
+            out - optional (18,) float array to hold the derivative
 
         Output:
             state_dot - (18,) derivative of state. The order is the same as the input state.
+
+        Notes:
+            The inverse of Jr = R J R^T is R J^-1 R^T, so the inverse inertia is
+            never computed from the state
         """
-        
+        if out is None:
+            out = np.empty(18)
+
         # unpack the state
         pos = state[0:3] # location of the COM of dumbbell in asteroid fixed frame
         vel = state[3:6] # vel of com wrt to asteroid expressed in the asteroid fixed frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to asteroid body frame R = R_A^T R_1
+        R = state[6:15].reshape((3, 3)) # sc body frame to asteroid body frame R = R_A^T R_1
         w = state[15:18] # angular velocity of sc wrt inertial frame and expressed in asteroid fixed frame
 
-        Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
-
-        # unpack parameters for the dumbbell
-        m1 = self.m1
-        m2 = self.m2
-        m = m1 + m2
-        J = self.J
-        Jr = R.dot(J).dot(R.T)
-        Wa = ast.omega*np.array([0,0,1]) # angular velocity vector of asteroid
-
-        # the position of each mass in the dumbbell body frame
-        rho1 = self.zeta1
-        rho2 = self.zeta2
-
-        # position of each mass in the asteroid frame
-        z1 = pos + R.dot(rho1)
-        z2 = pos + R.dot(rho2)
-
-        z = pos # position of COM in asteroid frame
+        Wa = np.array([0, 0, ast.omega]) # angular velocity vector of asteroid
 
-        # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
-
-        # force due to each mass expressed in asteroid body frame
-        F1 = m1*U1_grad
-        F2 = m2*U2_grad
-
-        M1 = m1*attitude.hat_map(R.dot(rho1)).dot(U1_grad) 
-        M2 = m2*attitude.hat_map(R.dot(rho2)).dot(U2_grad) 
+        F, M = self.relative_loads(state, ast)
 
-        # M1 = np.zeros(3)
-        # M2 = np.zeros_like(M1)
         # state derivatives
-        pos_dot = vel - attitude.hat_map(Wa).dot(pos)
-        vel_dot = 1/m * (F1 + F2 - m * attitude.hat_map(Wa).dot(vel))
-        # vel_dot = 1/m * (F_com) 
-        R_dot = attitude.hat_map(w).dot(R) - attitude.hat_map(Wa).dot(R)
-        R_dot = R_dot.reshape(9)
-        w_dot = np.linalg.inv(Jr).dot(M1 + M2 - Jr.dot(attitude.hat_map(Wa)).dot(w))
-        state_dot = np.hstack((pos_dot, vel_dot, R_dot, w_dot))
+        out[0:3] = vel - cross(Wa, pos)
+        out[3:6] = F/(self.m1 + self.m2) - cross(Wa, vel)
+        out[6:15] = np.dot(attitude.hat_map(w - Wa), R).ravel()
+        out[15:18] = R.dot(self.Jinv.dot(R.T.dot(M))) - cross(Wa, w)
         
-        return state_dot
-    def eoms_hamilton_relative_ode(self, t, state, ast):
+        return out
+
+    def eoms_hamilton_relative_ode(self, t, state, ast, out=None):
         """Hamiltonian form of Relative EOMS defined in the rotating asteroid frame
 
         This function defines the motion of a dumbbell spacecraft in orbit around an asteroid.
         The EOMS are defined relative to the asteroid itself, which is in a state of constant rotation.
-        You need to use this function with scipy.integrate.odeint
+        You need to use this function with scipy.integrate.ode class
 
         Inputs:
             t - current time of simulation (sec)
@@ -340,60 +288,36 @@ class Dumbbell(object):
                 R - state[6:15] rotation matrix which converts vectors from the dumbbell frame to the asteroid frame
                 ang_mom - state[15:18] J rad/sec angular momentum of the dumbbell wrt inertial frame and defined in the asteroid frame
             ast - asteroid object
+            out - optional (18,) float array to hold the derivative
 
         Output:
             state_dot - (18,) derivative of state. The order is the same as the input state.
         """
-        
+        if out is None:
+            out = np.empty(18)
+
         # unpack the state
         pos = state[0:3] # location of the COM of dumbbell in asteroid fixed frame
         lin_mom = state[3:6] # lin_mom of com wrt to asteroid expressed in the asteroid fixed frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to asteroid body frame R = R_A^T R_1
+        R = state[6:15].reshape((3, 3)) # sc body frame to asteroid body frame R = R_A^T R_1
         ang_mom = state[15:18] # angular momentum of sc wrt inertial frame and expressed in asteroid fixed frame
-        
-        Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
-
-        # unpack parameters for the dumbbell
-        m1 = self.m1
-        m2 = self.m2
-        m = m1 + m2
-        J = self.J
-        Jr = R.dot(J).dot(R.T)
-        Wa = ast.omega*np.array([0,0,1]) # angular velocity vector of asteroid
-
-        # the position of each mass in the dumbbell body frame
-        rho1 = self.zeta1
-        rho2 = self.zeta2
-
-        # position of each mass in the asteroid frame
-        z1 = pos + R.dot(rho1)
-        z2 = pos + R.dot(rho2)
-
-        z = pos # position of COM in asteroid frame
 
-        # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
+        Wa = np.array([0, 0, ast.omega]) # angular velocity vector of asteroid
 
-        # force due to each mass expressed in asteroid body frame
-        F1 = m1*U1_grad
-        F2 = m2*U2_grad
+        F, M = self.relative_loads(state, ast)
 
-        M1 = m1*attitude.hat_map(R.dot(rho1)).dot(U1_grad) 
-        M2 = m2*attitude.hat_map(R.dot(rho2)).dot(U2_grad) 
+        vel = lin_mom / (self.m1 + self.m2)
+        w = R.dot(self.Jinv.dot(R.T.dot(ang_mom)))
 
-        vel = lin_mom / (m1 + m2)
-        w = np.linalg.inv(Jr).dot(ang_mom)
         # state derivatives
-        pos_dot = vel - attitude.hat_map(Wa).dot(pos)
-        lin_mom_dot = F1 + F2 - attitude.hat_map(Wa).dot(lin_mom)
-        R_dot = attitude.hat_map(w).dot(R) - attitude.hat_map(Wa).dot(R)
-        R_dot = R_dot.reshape(9)
-        ang_mom_dot = M1 + M2  - attitude.hat_map(Wa).dot(ang_mom) 
-        state_dot = np.hstack((pos_dot, lin_mom_dot, R_dot, ang_mom_dot))
+        out[0:3] = vel - cross(Wa, pos)
+        out[3:6] = F - cross(Wa, lin_mom)
+        out[6:15] = np.dot(attitude.hat_map(w - Wa), R).ravel()
+        out[15:18] = M - cross(Wa, ang_mom)
         
-        return state_dot
-    def eoms_hamilton_relative(self, state, t, ast):
+        return out
+
+    def eoms_hamilton_relative(self, state, t, ast, out=None):
         """Hamiltonian form of Relative EOMS defined in the rotating asteroid frame
 
         This function defines the motion of a dumbbell spacecraft in orbit around an asteroid.
@@ -408,61 +332,14 @@ class Dumbbell(object):
                 R - state[6:15] rotation matrix which converts vectors from the dumbbell frame to the asteroid frame
                 ang_mom - state[15:18] J rad/sec angular momentum of the dumbbell wrt inertial frame and defined in the asteroid frame
             ast - asteroid object
+            out - optional (18,) array to hold the derivative
 
         Output:
             state_dot - (18,) derivative of state. The order is the same as the input state.
         """
-        
-        # unpack the state
-        pos = state[0:3] # location of the COM of dumbbell in asteroid fixed frame
-        lin_mom = state[3:6] # lin_mom of com wrt to asteroid expressed in the asteroid fixed frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to asteroid body frame R = R_A^T R_1
-        ang_mom = state[15:18] # angular momentum of sc wrt inertial frame and expressed in asteroid fixed frame
-        
-        Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
-
-        # unpack parameters for the dumbbell
-        m1 = self.m1
-        m2 = self.m2
-        m = m1 + m2
-        J = self.J
-        Jr = R.dot(J).dot(R.T)
-        Wa = ast.omega*np.array([0,0,1]) # angular velocity vector of asteroid
+        return self.eoms_hamilton_relative_ode(t, state, ast, out)
 
-        # the position of each mass in the dumbbell body frame
-        rho1 = self.zeta1
-        rho2 = self.zeta2
-
-        # position of each mass in the asteroid frame
-        z1 = pos + R.dot(rho1)
-        z2 = pos + R.dot(rho2)
-
-        z = pos # position of COM in asteroid frame
-
-        # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
-
-        # force due to each mass expressed in asteroid body frame
-        F1 = m1*U1_grad
-        F2 = m2*U2_grad
-
-        M1 = m1*attitude.hat_map(R.dot(rho1)).dot(U1_grad) 
-        M2 = m2*attitude.hat_map(R.dot(rho2)).dot(U2_grad) 
-
-        vel = lin_mom / (m1 + m2)
-        w = np.linalg.inv(Jr).dot(ang_mom)
-        # state derivatives
-        pos_dot = vel - attitude.hat_map(Wa).dot(pos)
-        lin_mom_dot = F1 + F2 - attitude.hat_map(Wa).dot(lin_mom)
-        R_dot = attitude.hat_map(w).dot(R) - attitude.hat_map(Wa).dot(R)
-        R_dot = R_dot.reshape(9)
-        ang_mom_dot = M1 + M2  - attitude.hat_map(Wa).dot(ang_mom) 
-        state_dot = np.hstack((pos_dot, lin_mom_dot, R_dot, ang_mom_dot))
-        
-        return state_dot
-
-    def eoms_inertial_control_ode(self, t, state, ast):
+    def eoms_inertial_control_ode(self, t, state, ast, out=None):
         """Inertial dumbbell equations of motion about an asteroid with body
         fixed control capability
        
@@ -483,51 +360,20 @@ class Dumbbell(object):
                 dumbbell frame
             ast - Asteroid class object holding the asteroid gravitational
             model and other useful parameters
+            out - optional (18,) float array to hold the derivative
         """
-        # unpack the state
-        pos = state[0:3] # location of the center of mass in the inertial frame
-        vel = state[3:6] # vel of com in inertial frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to inertial frame
-        ang_vel = state[15:18] # angular velocity of sc wrt inertial frame defined in body frame
-
-        Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
-
-        # unpack parameters for the dumbbell
-        J = self.J
-
-        rho1 = self.zeta1
-        rho2 = self.zeta2
+        if out is None:
+            out = np.empty(18)
 
-        # position of each mass in the asteroid frame
-        z1 = Ra.T.dot(pos + R.dot(rho1))
-        z2 = Ra.T.dot(pos + R.dot(rho2))
-
-        z = Ra.T.dot(pos) # position of COM in asteroid frame
-
-        # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
-
-        F1 = self.m1*Ra.dot(U1_grad)
-        F2 = self.m2*Ra.dot(U2_grad)
-
-        M1 = self.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-        M2 = self.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+        F, M = self.inertial_loads(t, state, ast)
 
         # compute the control input
-        u_m = self.attitude_controller(t, state, M1+M2)
-        u_f = self.translation_controller(t, state, F1+F2)
-
-        pos_dot = vel
-        vel_dot = 1/(self.m1+self.m2) *(F1 + F2 + u_f)
-        R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-        ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
-
-        statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
+        u_m = self.attitude_controller(t, state, M)
+        u_f = self.translation_controller(t, state, F)
 
-        return statedot
+        return self._inertial_derivative(state, F + u_f, M + u_m, out)
 
-    def eoms_inertial_control(self, state,t, ast):
+    def eoms_inertial_control(self, state, t, ast, out=None):
         """Inertial dumbbell equations of motion about an asteroid with body fixed control capability
         
         Inputs:
@@ -543,49 +389,9 @@ class Dumbbell(object):
                     and represented in the dumbbell frame
             ast - Asteroid class object holding the asteroid gravitational model and
                 other useful parameters
+            out - optional (18,) array to hold the derivative
         """
-        # unpack the state
-        pos = state[0:3] # location of the center of mass in the inertial frame
-        vel = state[3:6] # vel of com in inertial frame
-        R = np.reshape(state[6:15],(3,3)) # sc body frame to inertial frame
-        ang_vel = state[15:18] # angular velocity of sc wrt inertial frame defined in body frame
-
-        Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
-
-        # unpack parameters for the dumbbell
-        J = self.J
-
-        rho1 = self.zeta1
-        rho2 = self.zeta2
-
-        # position of each mass in the asteroid frame
-        z1 = Ra.T.dot(pos + R.dot(rho1))
-        z2 = Ra.T.dot(pos + R.dot(rho2))
-
-        z = Ra.T.dot(pos) # position of COM in asteroid frame
-
-        # compute the potential at this state
-        (U1, U1_grad, U1_grad_mat, U1laplace) = ast.polyhedron_potential(z1)
-        (U2, U2_grad, U2_grad_mat, U2laplace) = ast.polyhedron_potential(z2)
-
-        F1 = self.m1*Ra.dot(U1_grad)
-        F2 = self.m2*Ra.dot(U2_grad)
-
-        M1 = self.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-        M2 = self.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
-
-        # compute the control input
-        u_m = self.attitude_controller(t, state, M1+M2)
-        u_f = self.translation_controller(t, state, F1+F2)
-
-        pos_dot = vel
-        vel_dot = 1/(self.m1+self.m2) *(F1 + F2 + u_f)
-        R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-        ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
-
-        statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
-
-        return statedot
+        return self.eoms_inertial_control_ode(t, state, ast, out)
 
     def inertial_energy(self,time,state, ast):
         """Compute the kinetic and potential energy of the dumbbell given the current state
@@ -713,7 +519,7 @@ class Dumbbell(object):
         eR = 1/2 * attitude.vee_map(Rd.T.dot(R) - R.T.dot(Rd))
         eW = ang_vel - R.T.dot(Rd).dot(ang_vel_d)
         # compute attitude input
-        u_m = (-self.kR*eR - self.kW*eW + np.cross(ang_vel, self.J.dot(ang_vel)) 
+        u_m = (-self.kR*eR - self.kW*eW + cross(ang_vel, self.J.dot(ang_vel)) 
                 - self.J.dot( attitude.hat_map(ang_vel).dot(R.T).dot(Rd).dot(ang_vel_d)-
                     R.T.dot(Rd).dot(ang_vel_d_dot)) - ext_moment)
         return u_m
@@ -0,0 +1,291 @@
+"""Propagate many dumbbells around the same asteroid together
+
+Monte Carlo studies and searches around a periodic orbit need thousands of
+trajectories from nearby initial conditions. Instead of integrating each
+one with its own odeint call, K states are stacked into a (K, 18) array and
+the equations of motion are evaluated for all of them at once, with a
+single batched gravity call for the 2K masses.
+
+The stacked state is handed to odeint as one system of 18K equations. Each
+dumbbell only depends on its own 18 states so the Jacobian is block
+diagonal, and telling odeint its bandwidth keeps the cost of a Jacobian
+the same for any K. The error test is a max norm over all of the states,
+so each trajectory is at least as accurate as when it is integrated alone.
+
+Larger ensembles are split into batches which are sent to a process pool
+and the trajectories are written to one chunked HDF5 array.
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from multiprocessing import Pool
+
+import h5py
+import numpy as np
+from scipy import integrate
+
+from kinematics import attitude
+
+def hat_map_batch(vec):
+    """Skew symmetric matrix of each row of a (K, 3) array
+    """
+    vec = np.asarray(vec)
+    hat = np.zeros(vec.shape[:-1] + (3, 3))
+    hat[..., 0, 1] = -vec[..., 2]
+    hat[..., 0, 2] = vec[..., 1]
+    hat[..., 1, 0] = vec[..., 2]
+    hat[..., 1, 2] = -vec[..., 0]
+    hat[..., 2, 0] = -vec[..., 1]
+    hat[..., 2, 1] = vec[..., 0]
+    return hat
+
+def eoms_inertial_batch(t, states, dum, ast):
+    r"""Inertial dumbbell equations of motion for K states at once
+
+    state_dot = eoms_inertial_batch(t, states, dum, ast)
+
+    Parameters
+    ----------
+    t : float
+        Current simulation time
+    states : (K, 18) numpy array
+        Each row is the state used by dum.eoms_inertial_ode
+        pos - position of the center of mass in the inertial frame
+        vel - velocity of the center of mass in the inertial frame
+        R - dumbbell frame to inertial frame, row major
+        ang_vel - angular velocity in the dumbbell frame
+    dum : dumbbell.Dumbbell
+        Dumbbell shared by all of the states
+    ast : asteroid.Asteroid
+        Needs omega and polyhedron_potential_batch
+
+    Returns
+    -------
+    state_dot : (K, 18) numpy array
+        Row k is dum.eoms_inertial_ode(t, states[k], ast)
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    states = np.atleast_2d(states)
+    num = states.shape[0]
+
+    pos = states[:, 0:3]
+    R = states[:, 6:15].reshape((num, 3, 3))
+    ang_vel = states[:, 15:18]
+
+    Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
+
+    # position of both masses of every dumbbell in the asteroid frame
+    # row vectors so x.dot(Ra) is Ra^T x
+    z1 = (pos + R.dot(dum.zeta1)).dot(Ra)
+    z2 = (pos + R.dot(dum.zeta2)).dot(Ra)
+    U_grad = ast.polyhedron_potential_batch(np.concatenate((z1, z2)))[1]
+    U1_grad, U2_grad = U_grad[:num], U_grad[num:]
+
+    F = (dum.m1*U1_grad + dum.m2*U2_grad).dot(Ra.T)
+
+    # gravity of each mass rotated into the dumbbell frame R^T Ra U_grad
+    g1 = np.einsum('kji,kj->ki', R, U1_grad.dot(Ra.T))
+    g2 = np.einsum('kji,kj->ki', R, U2_grad.dot(Ra.T))
+    M = dum.m1*g1.dot(dum.zeta1_hat.T) + dum.m2*g2.dot(dum.zeta2_hat.T)
+
+    state_dot = np.empty((num, 18))
+    state_dot[:, 0:3] = states[:, 3:6]
+    state_dot[:, 3:6] = F / (dum.m1 + dum.m2)
+    state_dot[:, 6:15] = np.matmul(R, hat_map_batch(ang_vel)).reshape((num, 9))
+    state_dot[:, 15:18] = (M - np.cross(ang_vel, ang_vel.dot(dum.J.T))).dot(dum.Jinv.T)
+
+    return state_dot
+
+def eoms_hamilton_relative_batch(t, states, dum, ast):
+    r"""Hamiltonian relative dumbbell equations of motion for K states at once
+
+    state_dot = eoms_hamilton_relative_batch(t, states, dum, ast)
+
+    Parameters
+    ----------
+    t : float
+        Current simulation time
+    states : (K, 18) numpy array
+        Each row is the state used by dum.eoms_hamilton_relative_ode
+        pos - position of the center of mass in the asteroid frame
+        lin_mom - linear momentum in the asteroid frame
+        R - dumbbell frame to asteroid frame, row major
+        ang_mom - angular momentum in the asteroid frame
+    dum : dumbbell.Dumbbell
+        Dumbbell shared by all of the states
+    ast : asteroid.Asteroid
+        Needs omega and polyhedron_potential_batch
+
+    Returns
+    -------
+    state_dot : (K, 18) numpy array
+        Row k is dum.eoms_hamilton_relative_ode(t, states[k], ast)
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    states = np.atleast_2d(states)
+    num = states.shape[0]
+
+    pos = states[:, 0:3]
+    lin_mom = states[:, 3:6]
+    R = states[:, 6:15].reshape((num, 3, 3))
+    ang_mom = states[:, 15:18]
+
+    Wa = np.array([0, 0, ast.omega]) # angular velocity vector of asteroid
+
+    # each mass from the center of mass in the asteroid frame
+    rho1 = R.dot(dum.zeta1)
+    rho2 = R.dot(dum.zeta2)
+    U_grad = ast.polyhedron_potential_batch(np.concatenate((pos + rho1, pos + rho2)))[1]
+    U1_grad, U2_grad = U_grad[:num], U_grad[num:]
+
+    F = dum.m1*U1_grad + dum.m2*U2_grad
+    M = dum.m1*np.cross(rho1, U1_grad) + dum.m2*np.cross(rho2, U2_grad)
+
+    # w = R J^-1 R^T ang_mom
+    w = np.einsum('kij,kj->ki', R, np.einsum('kji,kj->ki', R, ang_mom).dot(dum.Jinv.T))
+
+    state_dot = np.empty((num, 18))
+    state_dot[:, 0:3] = lin_mom / (dum.m1 + dum.m2) - np.cross(Wa, pos)
+    state_dot[:, 3:6] = F - np.cross(Wa, lin_mom)
+    state_dot[:, 6:15] = np.matmul(hat_map_batch(w - Wa), R).reshape((num, 9))
+    state_dot[:, 15:18] = M - np.cross(Wa, ang_mom)
+
+    return state_dot
+
+EOMS_BATCH = {'inertial': eoms_inertial_batch,
+              'hamilton_relative': eoms_hamilton_relative_batch}
+
+def propagate_batch(initial_states, time, ast, dum, eoms='inertial',
+                    AbsTol=1e-9, RelTol=1e-9):
+    r"""Integrate K initial conditions together
+
+    states = propagate_batch(initial_states, time, ast, dum)
+
+    Parameters
+    ----------
+    initial_states : (K, 18) numpy array
+        Initial state of each dumbbell
+    time : (n,) numpy array
+        Output times, starting at the time of initial_states
+    ast : asteroid.Asteroid
+        Asteroid shared by every dumbbell
+    dum : dumbbell.Dumbbell
+        Dumbbell shared by every trajectory
+    eoms : str
+        'inertial' for the states of dum.eoms_inertial or
+        'hamilton_relative' for dum.eoms_hamilton_relative
+    AbsTol, RelTol : float
+        odeint tolerances, applied to every state
+
+    Returns
+    -------
+    states : (K, n, 18) numpy array
+        Trajectory of each dumbbell
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    initial_states = np.atleast_2d(initial_states)
+    num = initial_states.shape[0]
+    eoms_batch = EOMS_BATCH[eoms]
+
+    def eoms_flat(state, t):
+        return eoms_batch(t, state.reshape((num, 18)), dum, ast).reshape(-1)
+
+    # the Jacobian is block diagonal with 18x18 blocks
+    states = integrate.odeint(eoms_flat, initial_states.reshape(-1), time,
+                              atol=AbsTol, rtol=RelTol, ml=17, mu=17)
+
+    return states.reshape((len(time), num, 18)).transpose((1, 0, 2))
+
+# everything the workers share, set once per process by _init_worker
+_worker = {}
+
+def _init_worker(time, ast, dum, eoms, AbsTol, RelTol):
+    _worker.update(time=time, ast=ast, dum=dum, eoms=eoms, AbsTol=AbsTol, RelTol=RelTol)
+
+def _propagate_chunk(args):
+    """Propagate one batch for Pool.imap_unordered
+    """
+    start, initial_states = args
+    return start, propagate_batch(initial_states, **_worker)
+
+def propagate_ensemble(filename, initial_states, time, ast, dum, eoms='inertial',
+                       batch_size=64, processes=1, AbsTol=1e-9, RelTol=1e-9,
+                       compression='gzip'):
+    r"""Propagate an ensemble of initial conditions into an HDF5 file
+
+    propagate_ensemble(filename, initial_states, time, ast, dum, processes=4)
+
+    Parameters
+    ----------
+    filename : str
+        HDF5 file which is created, or overwritten
+    initial_states : (K, 18) numpy array
+        Initial state of each dumbbell
+    time : (n,) numpy array
+        Output times, starting at the time of initial_states
+    ast, dum, eoms, AbsTol, RelTol
+        As in propagate_batch
+    batch_size : int
+        Number of dumbbells integrated together by each call of
+        propagate_batch. All of a batch share the step size, so very
+        different initial conditions are better off in smaller batches
+    processes : int
+        Number of worker processes. 1 runs every batch in this process
+    compression : str
+        h5py compression filter of the state array
+
+    Notes
+    -----
+    The file holds
+
+        state - (K, n, 18) trajectory of each dumbbell, chunked by dumbbell
+        time - (n,) output times
+        initial_state - (K, 18)
+
+    and the eoms and tolerances as attributes of state. Batches are written
+    as they finish so the parent process only holds one at a time.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    initial_states = np.atleast_2d(initial_states)
+    time = np.asarray(time)
+    if eoms not in EOMS_BATCH:
+        raise ValueError('eoms must be one of {}'.format(sorted(EOMS_BATCH)))
+
+    num = initial_states.shape[0]
+    chunks = [(start, initial_states[start:start + batch_size])
+              for start in range(0, num, max(1, batch_size))]
+
+    with h5py.File(filename, 'w') as hf:
+        hf.create_dataset('time', data=time)
+        hf.create_dataset('initial_state', data=initial_states)
+        data = hf.create_dataset('state', shape=(num, len(time), 18), dtype='f8',
+                                 chunks=(1, min(len(time), 4096), 18),
+                                 compression=compression)
+        data.attrs['eoms'] = eoms
+        data.attrs['AbsTol'] = AbsTol
+        data.attrs['RelTol'] = RelTol
+
+        setting = (time, ast, dum, eoms, AbsTol, RelTol)
+        if processes > 1:
+            with Pool(processes, initializer=_init_worker, initargs=setting) as p:
+                for start, states in p.imap_unordered(_propagate_chunk, chunks):
+                    data[start:start + states.shape[0]] = states
+        else:
+            _init_worker(*setting)
+            for start, states in map(_propagate_chunk, chunks):
+                data[start:start + states.shape[0]] = states
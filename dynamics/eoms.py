@@ -1,7 +1,7 @@
 """Equations of motion of a dumbbell 
 
 """
-from dynamics import controller
+from dynamics import controller, dumbbell, lgvi
 import numpy as np
 from kinematics import attitude
 from eom_comparison import transform
@@ -50,8 +50,6 @@ def eoms_controlled_relative_blender_ode(t, state, dum, ast):
     m1 = dum.m1
     m2 = dum.m2
     m = m1 + m2
-    J = dum.J
-    Jr = R.dot(J).dot(R.T)
     Wa = ast.omega*np.array([0,0,1]) # angular velocity vector of asteroid
 
     # the position of each mass in the dumbbell body frame
@@ -89,7 +87,7 @@ def eoms_controlled_relative_blender_ode(t, state, dum, ast):
     # vel_dot = 1/m * (F_com) 
     R_dot = attitude.hat_map(w).dot(R) - attitude.hat_map(Wa).dot(R)
     R_dot = R_dot.reshape(9)
-    w_dot = np.linalg.inv(Jr).dot(M1 + M2 - Jr.dot(attitude.hat_map(Wa)).dot(w) + u_m)
+    w_dot = R.dot(dum.Jinv).dot(R.T).dot(M1 + M2 + u_m) - attitude.hat_map(Wa).dot(w)
     state_dot = np.hstack((pos_dot, vel_dot, R_dot, w_dot))
     
     return state_dot
@@ -144,8 +142,8 @@ def eoms_controlled_inertial_circumnavigate(t, state, dum, ast, tf, loops):
     F1 = dum.m1*Ra.dot(U1_grad)
     F2 = dum.m2*Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    M1 = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad))
     
     # generate image at this current state only at a specifc time
     # blender.driver(pos, R, ast.omega * t, [5, 0, 1], 'test' + str.zfill(str(t), 4))
@@ -163,7 +161,7 @@ def eoms_controlled_inertial_circumnavigate(t, state, dum, ast, tf, loops):
     pos_dot = vel
     vel_dot = 1/(dum.m1+dum.m2) *(F1 + F2 + u_f)
     R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
+    ang_vel_dot = dum.Jinv.dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
 
     statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
 
@@ -219,8 +217,8 @@ def eoms_controlled_inertial_lissajous(t, state, dum, ast, tf, loops):
     F1 = dum.m1*Ra.dot(U1_grad)
     F2 = dum.m2*Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    M1 = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad))
     
     # generate image at this current state only at a specifc time
     # blender.driver(pos, R, ast.omega * t, [5, 0, 1], 'test' + str.zfill(str(t), 4))
@@ -238,7 +236,7 @@ def eoms_controlled_inertial_lissajous(t, state, dum, ast, tf, loops):
     pos_dot = vel
     vel_dot = 1/(dum.m1+dum.m2) *(F1 + F2 + u_f)
     R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
+    ang_vel_dot = dum.Jinv.dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
 
     statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
 
@@ -294,8 +292,8 @@ def eoms_controlled_inertial_quarter_equatorial(t, state, dum, ast, tf, loops):
     F1 = dum.m1*Ra.dot(U1_grad)
     F2 = dum.m2*Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    M1 = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad))
     
     # generate image at this current state only at a specifc time
     # blender.driver(pos, R, ast.omega * t, [5, 0, 1], 'test' + str.zfill(str(t), 4))
@@ -313,19 +311,21 @@ def eoms_controlled_inertial_quarter_equatorial(t, state, dum, ast, tf, loops):
     pos_dot = vel
     vel_dot = 1/(dum.m1+dum.m2) *(F1 + F2 + u_f)
     R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
+    ang_vel_dot = dum.Jinv.dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
 
     statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
 
     return statedot
 
 def inertial_eoms_driver(initial_state, time, ast, dum, AbsTol=1e-9,
-                         RelTol=1e-9):
+                         RelTol=1e-9, method='odeint', step=None):
     """ODEINT Inertial EOMs driver
     
     This function will simulate the inertial equations of motion  using
     scipy.integrate.odeint and then convert them into the inertial and
-    asteroid frames.
+    asteroid frames. With method='lgvi' the fixed step Lie group variational
+    integrator in dynamics.lgvi is used instead, which keeps R orthogonal and
+    the energy error bounded with steps far larger than odeint would take.
 
     Parameters
     ----------
@@ -341,6 +341,9 @@ def inertial_eoms_driver(initial_state, time, ast, dum, AbsTol=1e-9,
     time - (n,) numpy ndarray representing the simulation time span
     ast - asteroid object instance
     dum - dumbbell object instance
+    AbsTol, RelTol - odeint tolerances. Not used by the lgvi
+    method - 'odeint' or 'lgvi'
+    step - largest lgvi step in sec. Defaults to the spacing of time
 
     Returns
     -------
@@ -375,7 +378,12 @@ def inertial_eoms_driver(initial_state, time, ast, dum, AbsTol=1e-9,
 
         This output is exactly what dum.eoms_inertial will output without any alduteration
     """
-    body_state = integrate.odeint(dum.eoms_inertial, initial_state, time, args=(ast,), atol=AbsTol, rtol=RelTol)
+    if method == 'odeint':
+        body_state = integrate.odeint(dum.eoms_inertial, initial_state, time, args=(ast,), atol=AbsTol, rtol=RelTol)
+    elif method == 'lgvi':
+        body_state = lgvi.integrate_inertial(initial_state, time, ast, dum, step)
+    else:
+        raise ValueError("method must be 'odeint' or 'lgvi'")
 
     # convert to inertial and asteroid frames
     inertial_state = transform.eoms_inertial_to_inertial(time, body_state, ast, dum)
@@ -383,12 +391,14 @@ def inertial_eoms_driver(initial_state, time, ast, dum, AbsTol=1e-9,
 
     return (time, inertial_state, asteroid_state, body_state)
 
-def hamilton_eoms_driver(initial_state, time, ast, dum):
+def hamilton_eoms_driver(initial_state, time, ast, dum, AbsTol=1e-9,
+                         RelTol=1e-9, method='odeint', step=None):
     """ODEINT Hamilton Relative EOMs driver
     
     This function will simulate the relative hamiltonian equations of motion  using
     scipy.integrate.odeint and then convert them into the inertial and
-    asteroid frames.
+    asteroid frames. method='lgvi' takes fixed geometric steps with
+    dynamics.lgvi instead.
 
     Parameters
     ----------
@@ -404,6 +414,9 @@ def hamilton_eoms_driver(initial_state, time, ast, dum):
     time - (n,) numpy ndarray representing the simulation time span
     ast - asteroid object instance
     dum - dumbbell object instance
+    AbsTol, RelTol - odeint tolerances. Not used by the lgvi
+    method - 'odeint' or 'lgvi'
+    step - largest lgvi step in sec. Defaults to the spacing of time
 
     Returns
     -------
@@ -438,7 +451,12 @@ def hamilton_eoms_driver(initial_state, time, ast, dum):
 
         This output is exactly what dum.eoms_hamilton_relative  will output without any alduteration
     """
-    ast_state = integrate.odeint(dum.eoms_hamilton_relative, initial_state, time, args=(ast,), atol=AbsTol, rtol=RelTol)
+    if method == 'odeint':
+        ast_state = integrate.odeint(dum.eoms_hamilton_relative, initial_state, time, args=(ast,), atol=AbsTol, rtol=RelTol)
+    elif method == 'lgvi':
+        ast_state = lgvi.integrate_hamilton_relative(initial_state, time, ast, dum, step)
+    else:
+        raise ValueError("method must be 'odeint' or 'lgvi'")
 
     # convert to inertial and asteroid frames
     inertial_state = transform.eoms_hamilton_relative_to_inertial(time, ast_state, ast, dum)
@@ -497,8 +515,8 @@ def eoms_controlled_inertial(t, state, ast, dum, des_att_func, des_tran_func):
     F1 = dum.m1*Ra.dot(U1_grad)
     F2 = dum.m2*Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    M1 = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad))
     
     # generate image at this current state only at a specifc time
     # blender.driver(pos, R, ast.omega * t, [5, 0, 1], 'test' + str.zfill(str(t), 4))
@@ -516,7 +534,7 @@ def eoms_controlled_inertial(t, state, ast, dum, des_att_func, des_tran_func):
     pos_dot = vel
     vel_dot = 1/(dum.m1+dum.m2) *(F1 + F2 + u_f)
     R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
+    ang_vel_dot = dum.Jinv.dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
 
     statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
 
@@ -546,7 +564,51 @@ def eoms_controlled_inertial_pybind(t, state, ast, dum, complete_controller, est
     ast : asteroid object (from C++ bindings)
     dum : dumbbell object (from Python)
     complete_controller : controller object (from C++)
+
+    Notes
+    -----
+    The exploration plan is recomputed at every call, so at every stage of
+    the integrator. eoms_controlled_inertial_held with an ExploreGuidance
+    plans once per step instead
     """ 
+    pos = state[0:3] # location of the center of mass in the inertial frame
+    vel = state[3:6] # vel of com in inertial frame
+    R = np.reshape(state[6:15],(3,3)) # sc body frame to inertial frame
+    ang_vel = state[15:18] # angular velocity of sc wrt inertial frame defined in body frame
+
+    Ra = ast.rot_ast2int(t) # asteroid body frame to inertial frame
+
+    # compute the desired states for exploration
+    # need to convert the state to the asteroid fixed frame here
+    pos_ast = Ra.T.dot(pos)
+    vel_ast = Ra.T.dot(vel)
+    R_sc2ast = Ra.T.dot(R)
+    ang_vel_ast = ang_vel
+    
+    state_ast = np.hstack((pos_ast, vel_ast, R_sc2ast.reshape(-1), ang_vel_ast))
+    complete_controller.explore_asteroid(state_ast, est_ast_rmesh)
+
+    return eoms_controlled_inertial_held(t, state, ast, dum, complete_controller)
+
+def eoms_controlled_inertial_held(t, state, ast, dum, guidance, out=None):
+    """Inertial dumbbell equations of motion tracking held exploration commands
+
+    The same dynamics and tracking controllers as
+    eoms_controlled_inertial_pybind without the planning. The desired states
+    come from guidance and stay fixed in the asteroid frame until it is
+    updated outside of the integrator
+
+    Arguments
+    ---------
+    t : current simulation time step
+    state : (18, ) numpy array of the state in the inertial frame
+    ast : asteroid object (from C++ bindings)
+    dum : dumbbell object (from Python)
+    guidance : controller.ExploreGuidance or C++ Controller
+        Desired states from get_Rd, get_posd, etc. in the asteroid frame
+    out : optional (18, ) float array for the derivative, which
+        is returned
+    """
     # unpack the state
     pos = state[0:3] # location of the center of mass in the inertial frame
     vel = state[3:6] # vel of com in inertial frame
@@ -579,35 +641,27 @@ def eoms_controlled_inertial_pybind(t, state, ast, dum, complete_controller, est
     F1 = dum.m1 * Ra.dot(U1_grad)
     F2 = dum.m2 * Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
-
-    # compute the desired states for exploration
-    # need to convert the state to the asteroid fixed frame here
-    pos_ast = Ra.T.dot(pos)
-    vel_ast = Ra.T.dot(vel)
-    R_sc2ast = Ra.T.dot(R)
-    ang_vel_ast = ang_vel
-    
-    state_ast = np.hstack((pos_ast, vel_ast, R_sc2ast.reshape(-1), ang_vel_ast))
-    complete_controller.explore_asteroid(state_ast, est_ast_rmesh)
+    R_ast2sc = R.T.dot(Ra) # asteroid frame to sc body frame
+    M1 = dum.m1 * dum.zeta1_hat.dot(R_ast2sc.dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R_ast2sc.dot(U2_grad))
 
     # need to convert these to the inertial frame
-    des_att_tuple = (Ra.dot(complete_controller.get_Rd()), Ra.dot(complete_controller.get_Rd_dot()),
-                     complete_controller.get_ang_vel_d(), complete_controller.get_ang_vel_d_dot())
-    des_tran_tuple = (Ra.dot(complete_controller.get_posd()), Ra.dot(complete_controller.get_veld()),
-                      Ra.dot(complete_controller.get_acceld()))
+    des_att_tuple = (Ra.dot(guidance.get_Rd()), Ra.dot(guidance.get_Rd_dot()),
+                     guidance.get_ang_vel_d(), guidance.get_ang_vel_d_dot())
+    des_tran_tuple = (Ra.dot(guidance.get_posd()), Ra.dot(guidance.get_veld()),
+                      Ra.dot(guidance.get_acceld()))
     u_m = controller.attitude_controller(t, state, M1 + M2, dum, ast, des_att_tuple)
     u_f = controller.translation_controller(t, state, F1 + F2, dum, ast, des_tran_tuple)
 
-    pos_dot = vel
-    vel_dot = 1 / (dum.m1 + dum.m2) * (F1 + F2 + u_f)
-    R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel, J.dot(ang_vel)) + M1 + M2 + u_m)
+    if out is None:
+        out = np.empty(18)
 
-    state_dot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
+    out[0:3] = vel
+    np.multiply(F1 + F2 + u_f, 1 / (dum.m1 + dum.m2), out=out[3:6])
+    out[6:15] = np.dot(R, attitude.hat_map(ang_vel)).ravel()
+    out[15:18] = np.dot(dum.Jinv, -dumbbell.cross(ang_vel, J.dot(ang_vel)) + M1 + M2 + u_m)
 
-    return state_dot
+    return out
 
 
 def eoms_controlled_inertial_control_cost_pybind(t, state, true_ast, dum, 
@@ -636,7 +690,34 @@ def eoms_controlled_inertial_control_cost_pybind(t, state, true_ast, dum,
     ast : asteroid object (from C++ bindings)
     dum : dumbbell object (from Python)
     complete_controller : controller object (from C++)
-    """ 
+
+    Notes
+    -----
+    Plans at every call like eoms_controlled_inertial_pybind. See
+    eoms_controlled_inertial_control_cost_held for the version with the
+    plan held between steps
+    """
+    # compute the desired states for exploration
+    complete_controller.explore_asteroid(t, state, est_ast_rmesh, est_ast)
+
+    return eoms_controlled_inertial_control_cost_held(t, state, true_ast, dum,
+                                                      complete_controller, est_ast)
+
+def eoms_controlled_inertial_control_cost_held(t, state, true_ast, dum, guidance, est_ast,
+                                                out=None):
+    """Control cost equations of motion tracking held exploration commands
+
+    Arguments
+    ---------
+    t : current simulation time step
+    state : (18, ) numpy array of the state in the inertial frame
+    true_ast : asteroid object (from C++ bindings) for the dynamics
+    dum : dumbbell object (from Python)
+    guidance : controller.ExploreGuidance or C++ Controller
+        Desired states from get_Rd, get_posd, etc. in the asteroid frame
+    est_ast : estimated asteroid used by the tracking controllers
+    out : optional (18, ) float array for the derivative
+    """
     # unpack the state
     pos = state[0:3] # location of the center of mass in the inertial frame
     vel = state[3:6] # vel of com in inertial frame
@@ -669,8 +750,9 @@ def eoms_controlled_inertial_control_cost_pybind(t, state, true_ast, dum,
     F1 = dum.m1 * Ra.dot(U1_grad)
     F2 = dum.m2 * Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    R_ast2sc = R.T.dot(Ra) # asteroid frame to sc body frame
+    M1 = dum.m1 * dum.zeta1_hat.dot(R_ast2sc.dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R_ast2sc.dot(U2_grad))
     
     # compute the external force and moment using the asteroid estimate
     est_ast.polyhedron_potential(z1)
@@ -684,30 +766,28 @@ def eoms_controlled_inertial_control_cost_pybind(t, state, true_ast, dum,
     F1_est = dum.m1 * Ra.dot(U1_grad_est)
     F2_est = dum.m2 * Ra.dot(U2_grad_est)
 
-    M1_est = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad_est))
-    M2_est = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad_est))
+    M1_est = dum.m1 * dum.zeta1_hat.dot(R_ast2sc.dot(U1_grad_est))
+    M2_est = dum.m2 * dum.zeta2_hat.dot(R_ast2sc.dot(U2_grad_est))
 
-    # compute the desired states for exploration
-    complete_controller.explore_asteroid(t, state, est_ast_rmesh, est_ast)
-    
     # Need to convert to the inertial frame for use in the controller
-    des_att_tuple = (Ra.dot(complete_controller.get_Rd()), Ra.dot(complete_controller.get_Rd_dot()),
-                     Ra.dot(complete_controller.get_ang_vel_d()), Ra.dot(complete_controller.get_ang_vel_d_dot()))
-    des_tran_tuple = (Ra.dot(complete_controller.get_posd()), Ra.dot(complete_controller.get_veld()),
-                      Ra.dot(complete_controller.get_acceld()))
+    des_att_tuple = (Ra.dot(guidance.get_Rd()), Ra.dot(guidance.get_Rd_dot()),
+                     Ra.dot(guidance.get_ang_vel_d()), Ra.dot(guidance.get_ang_vel_d_dot()))
+    des_tran_tuple = (Ra.dot(guidance.get_posd()), Ra.dot(guidance.get_veld()),
+                      Ra.dot(guidance.get_acceld()))
     
     #  need to pass in the estimated external torque and moment
     u_m = controller.attitude_controller(t, state, M1_est+M2_est, dum, est_ast, des_att_tuple)
     u_f = controller.translation_controller(t, state, F1_est+F2_est, dum, est_ast, des_tran_tuple)
 
-    pos_dot = vel
-    vel_dot = 1 / (dum.m1 + dum.m2) * (F1 + F2 + u_f)
-    R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel, J.dot(ang_vel)) + M1 + M2 + u_m)
+    if out is None:
+        out = np.empty(18)
 
-    state_dot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
+    out[0:3] = vel
+    np.multiply(F1 + F2 + u_f, 1 / (dum.m1 + dum.m2), out=out[3:6])
+    out[6:15] = np.dot(R, attitude.hat_map(ang_vel)).ravel()
+    out[15:18] = np.dot(dum.Jinv, -dumbbell.cross(ang_vel, J.dot(ang_vel)) + M1 + M2 + u_m)
 
-    return state_dot
+    return out
 
 # TODO Update this function for use in exploration_sim.py land option
 def eoms_controlled_land_pybind(t, state, true_ast, dum, est_ast,
@@ -771,8 +851,8 @@ def eoms_controlled_land_pybind(t, state, true_ast, dum, est_ast,
     F1 = dum.m1*Ra.dot(U1_grad)
     F2 = dum.m2*Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    M1 = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad))
 
     # compute the external force and moment using the asteroid estimate
     est_ast.polyhedron_potential(z1)
@@ -786,8 +866,8 @@ def eoms_controlled_land_pybind(t, state, true_ast, dum, est_ast,
     F1_est = dum.m1 * Ra.dot(U1_grad_est)
     F2_est = dum.m2 * Ra.dot(U2_grad_est)
 
-    M1_est = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad_est))
-    M2_est = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad_est))
+    M1_est = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad_est))
+    M2_est = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad_est))
     
     # compute the control input
     u_m = controller.attitude_land_controller(t, state, M1_est + M2_est, dum, est_ast)
@@ -798,7 +878,7 @@ def eoms_controlled_land_pybind(t, state, true_ast, dum, est_ast,
     pos_dot = vel
     vel_dot = 1/(dum.m1+dum.m2) *(F1 + F2 + u_f)
     R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
+    ang_vel_dot = dum.Jinv.dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
 
     statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
 
@@ -865,8 +945,8 @@ def eoms_controlled_inertial_refinement_pybind(t, state, true_ast, dum,
     F1 = dum.m1 * Ra.dot(U1_grad)
     F2 = dum.m2 * Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    M1 = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad))
     
     # compute the external force and moment using the asteroid estimate
     est_ast.polyhedron_potential(z1)
@@ -880,8 +960,8 @@ def eoms_controlled_inertial_refinement_pybind(t, state, true_ast, dum,
     F1_est = dum.m1 * Ra.dot(U1_grad_est)
     F2_est = dum.m2 * Ra.dot(U2_grad_est)
 
-    M1_est = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad_est))
-    M2_est = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad_est))
+    M1_est = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad_est))
+    M2_est = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad_est))
 
     # compute the desired states for exploration
     complete_controller.refinement(t, state, est_ast_rmesh, est_ast, desired_landing_site)
@@ -899,7 +979,7 @@ def eoms_controlled_inertial_refinement_pybind(t, state, true_ast, dum,
     pos_dot = vel
     vel_dot = 1 / (dum.m1 + dum.m2) * (F1 + F2 + u_f)
     R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel, J.dot(ang_vel)) + M1 + M2 + u_m)
+    ang_vel_dot = dum.Jinv.dot(-np.cross(ang_vel, J.dot(ang_vel)) + M1 + M2 + u_m)
 
     state_dot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
 
@@ -959,8 +1039,8 @@ def eoms_controlled_blender_traverse_then_land(t, state, dum, ast):
     F1 = dum.m1*Ra.dot(U1_grad)
     F2 = dum.m2*Ra.dot(U2_grad)
 
-    M1 = dum.m1 * attitude.hat_map(rho1).dot(R.T.dot(Ra).dot(U1_grad))
-    M2 = dum.m2 * attitude.hat_map(rho2).dot(R.T.dot(Ra).dot(U2_grad))
+    M1 = dum.m1 * dum.zeta1_hat.dot(R.T.dot(Ra).dot(U1_grad))
+    M2 = dum.m2 * dum.zeta2_hat.dot(R.T.dot(Ra).dot(U2_grad))
     
     # generate image at this current state only at a specifc time
     # blender.driver(pos, R, ast.omega * t, [5, 0, 1], 'test' + str.zfill(str(t), 4))
@@ -975,7 +1055,7 @@ def eoms_controlled_blender_traverse_then_land(t, state, dum, ast):
     pos_dot = vel
     vel_dot = 1/(dum.m1+dum.m2) *(F1 + F2 + u_f)
     R_dot = R.dot(attitude.hat_map(ang_vel)).reshape(9)
-    ang_vel_dot = np.linalg.inv(J).dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
+    ang_vel_dot = dum.Jinv.dot(-np.cross(ang_vel,J.dot(ang_vel)) + M1 + M2 + u_m)
 
     statedot = np.hstack((pos_dot, vel_dot, R_dot, ang_vel_dot))
 
@@ -0,0 +1,255 @@
+"""Precomputed gravity field on a uniform grid in the body frame
+
+The polyhedron potential, attraction, and gradient matrix are sampled once
+on a uniform grid and then served with Catmull-Rom tricubic interpolation,
+so each lookup touches the 4x4x4 neighboring nodes no matter how many faces
+the shape model has.
+
+A lookup is only trusted when every node of its stencil is outside of the
+body. Points near the surface, inside, or outside the grid should fall back
+to the polyhedron model.
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+from collections import namedtuple
+from multiprocessing import Pool
+
+import numpy as np
+
+from point_cloud import polyhedron
+
+GRAVITY_GRID = namedtuple('GRAVITY_GRID', ['origin', 'spacing', 'values',
+                                           'cell_valid', 'error_bound', 'key'])
+
+def grid_key(param, G, sigma, extent, spacing):
+    """Hash of everything which changes the sampled field
+
+    Used to decide if a grid saved to disk still matches the asteroid
+    """
+    sha = hashlib.sha1()
+    for arr in (param.V, param.Fa, param.Fb, param.Fc,
+                np.array([G, sigma, extent, spacing])):
+        sha.update(np.ascontiguousarray(arr).tobytes())
+
+    return sha.hexdigest()
+
+def _sample_chunk(args):
+    """Polyhedron potential on one chunk of nodes for Pool.map
+    """
+    states, param, G, sigma = args
+    U, U_grad, U_grad_mat, _ = polyhedron.potential_batch(states, param, G, sigma)
+    return np.concatenate((U[:, np.newaxis], U_grad,
+                           U_grad_mat.reshape((-1, 9))[:, (0, 1, 2, 4, 5, 8)]), axis=1)
+
+def _stencil_valid(node_valid):
+    """True for each cell whose 4x4x4 stencil of nodes is all valid
+
+    Counts the valid nodes of every stencil with a cumulative sum along
+    each axis in turn
+    """
+    count = node_valid.astype(np.intp)
+    for axis in range(count.ndim):
+        total = np.cumsum(np.moveaxis(count, axis, 0), axis=0)
+        total = np.concatenate((np.zeros((1,) + total.shape[1:], dtype=total.dtype), total))
+        count = np.moveaxis(total[4:] - total[:-4], 0, axis)
+
+    return count == 4**node_valid.ndim
+
+def build_grid(param, G, sigma, extent, spacing, processes=4,
+               num_check=2000, seed=0):
+    r"""Sample the polyhedron potential on a uniform grid
+
+    grid = build_grid(param, G, sigma, extent, spacing)
+
+    Parameters
+    ----------
+    param : POTENTIAL_PARAM namedtuple
+        Output of polyhedron.potential_parameters
+    G : float
+        Gravitational constant
+    sigma : float
+        Density of the body
+    extent : float
+        Half width of the cube centered at the origin, in km
+    spacing : float
+        Distance between nodes, in km
+    processes : int
+        Number of worker processes used to sample the nodes. 1 runs in
+        this process
+    num_check : int
+        Number of cell midpoints used to estimate the interpolation error
+    seed : int, RandomState or None
+        Picks the checked cells, so the same seed reports the same
+        error_bound
+
+    Returns
+    -------
+    grid : GRAVITY_GRID namedtuple
+        origin - (3,) position of node (0, 0, 0)
+        spacing - node spacing
+        values - (n, n, n, 10) U, U_grad, and the upper triangle of
+            U_grad_mat (xx, xy, xz, yy, yz, zz) at each node
+        cell_valid - (n-3, n-3, n-3) True if all 64 nodes around the cell
+            are outside of the body. Cell i has its lower corner at node i+1
+        error_bound - largest relative attraction error at the checked
+            cell midpoints
+        key - hash from grid_key
+
+    Notes
+    -----
+    Cell midpoints are farthest from the nodes so they are where the
+    interpolation error peaks. The error is measured on a random subset of
+    the valid cells rather than all of them.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    num_nodes = int(np.ceil(2 * extent / spacing)) + 1
+    origin = -np.full(3, extent)
+    axis = origin[0] + spacing * np.arange(num_nodes)
+    nodes = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape((-1, 3))
+
+    chunks = [(chunk, param, G, sigma) for chunk in
+              np.array_split(nodes, max(1, nodes.shape[0] // 1000))]
+    if processes > 1:
+        with Pool(processes) as p:
+            values = p.map(_sample_chunk, chunks)
+    else:
+        values = list(map(_sample_chunk, chunks))
+    values = np.concatenate(values).reshape((num_nodes, num_nodes, num_nodes, 10))
+
+    # polyhedron.potential_batch is zero inside and U > 0 everywhere outside
+    node_valid = values[..., 0] > 0
+    cell_valid = _stencil_valid(node_valid)
+
+    grid = GRAVITY_GRID(origin=origin, spacing=spacing, values=values,
+                        cell_valid=cell_valid, error_bound=np.inf,
+                        key=grid_key(param, G, sigma, extent, spacing))
+
+    # measure the error at the center of a subset of the valid cells
+    cells = np.argwhere(cell_valid)
+    if cells.shape[0] > 0:
+        rng = seed if isinstance(seed, np.random.RandomState) else np.random.RandomState(seed)
+        check = cells[rng.choice(cells.shape[0], min(num_check, cells.shape[0]),
+                                 replace=False)]
+        check = origin + spacing * (check + 1.5)
+        U_grad_true = polyhedron.potential_batch(check, param, G, sigma)[1]
+        U_grad = potential_batch(check, grid)[1]
+        error_bound = np.max(np.linalg.norm(U_grad - U_grad_true, axis=1)
+                             / np.linalg.norm(U_grad_true, axis=1))
+        grid = grid._replace(error_bound=error_bound)
+
+    return grid
+
+def _cell_index(states, grid):
+    """Lower corner node index and fractional position inside the cell
+    """
+    pos = (np.atleast_2d(states) - grid.origin) / grid.spacing
+    index = np.floor(pos).astype(np.intp)
+    return index, pos - index
+
+def contains(states, grid):
+    r"""Boolean mask of the points the grid can interpolate
+
+    mask = contains(states, grid)
+
+    Parameters
+    ----------
+    states : (m, 3) array
+        Positions in the body fixed frame
+    grid : GRAVITY_GRID namedtuple
+        Output of build_grid or load_grid
+
+    Returns
+    -------
+    mask : (m,) bool array
+        True if the point is inside the grid and the whole interpolation
+        stencil is outside of the body
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    index, _ = _cell_index(states, grid)
+    index = index - 1
+    inside = np.all((index >= 0) & (index < np.array(grid.cell_valid.shape)), axis=1)
+    mask = np.zeros(index.shape[0], dtype=bool)
+    ii = index[inside]
+    mask[inside] = grid.cell_valid[ii[:, 0], ii[:, 1], ii[:, 2]]
+    return mask
+
+def _catmull_rom(t):
+    """Catmull-Rom weights of the four nodes around t in [0, 1)
+    """
+    t2 = t * t
+    t3 = t2 * t
+    return 0.5 * np.stack((-t3 + 2 * t2 - t,
+                           3 * t3 - 5 * t2 + 2,
+                           -3 * t3 + 4 * t2 + t,
+                           t3 - t2), axis=-1)
+
+def potential_batch(states, grid):
+    r"""Interpolated potential at many points
+
+    U, U_grad, U_grad_mat, Ulaplace = potential_batch(states, grid)
+
+    Parameters
+    ----------
+    states : (m, 3) array
+        Positions in the body fixed frame in km. All must pass contains
+    grid : GRAVITY_GRID namedtuple
+        Output of build_grid or load_grid
+
+    Returns
+    -------
+    U : (m,) array
+        Gravitational potential
+    U_grad : (m, 3) array
+        Gravitational attraction
+    U_grad_mat : (m, 3, 3) array
+        Gravitational gradient matrix
+    Ulaplace : (m,) array
+        Laplacian, the trace of U_grad_mat
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    index, t = _cell_index(states, grid)
+    num_points = index.shape[0]
+    w = _catmull_rom(t)
+
+    offset = np.arange(-1, 3)
+    ix = index[:, 0, np.newaxis, np.newaxis, np.newaxis] + offset[:, np.newaxis, np.newaxis]
+    iy = index[:, 1, np.newaxis, np.newaxis, np.newaxis] + offset[:, np.newaxis]
+    iz = index[:, 2, np.newaxis, np.newaxis, np.newaxis] + offset
+    stencil = grid.values[ix, iy, iz]
+
+    out = np.einsum('ma,mb,mc,mabck->mk', w[:, 0], w[:, 1], w[:, 2], stencil)
+
+    U = out[:, 0]
+    U_grad = out[:, 1:4]
+    U_grad_mat = out[:, (4, 5, 6, 5, 7, 8, 6, 8, 9)].reshape((num_points, 3, 3))
+    Ulaplace = out[:, 4] + out[:, 7] + out[:, 9]
+
+    return U, U_grad, U_grad_mat, Ulaplace
+
+def save_grid(filename, grid):
+    """Save a gravity grid to a npz file
+    """
+    np.savez(filename, **grid._asdict())
+
+def load_grid(filename):
+    """Load a gravity grid saved by save_grid
+    """
+    with np.load(filename) as data:
+        return GRAVITY_GRID(origin=data['origin'], spacing=float(data['spacing']),
+                            values=data['values'], cell_valid=data['cell_valid'],
+                            error_bound=float(data['error_bound']),
+                            key=str(data['key']))
@@ -0,0 +1,325 @@
+"""Spherical harmonic gravity model fit to the polyhedron potential
+
+Outside the Brillouin sphere (the smallest sphere centered at the origin
+which contains the body) the exterior potential of the polyhedron is
+exactly represented by a spherical harmonic series. Truncating the series
+at a modest degree gives a far field model whose cost does not depend on
+the number of faces of the shape model.
+
+The solid harmonics are computed with the Cunningham recursion in complex
+form, E_nm = V_nm + i W_nm, and the derivatives use the ladder relations
+
+    (d/dx + i d/dy) E_nm = - E_{n+1, m+1} / R
+    (d/dx - i d/dy) E_nm = (n-m+2)(n-m+1) E_{n+1, m-1} / R
+    d/dz E_nm = -(n-m+1) E_{n+1, m} / R
+
+so the potential, attraction, and gradient matrix are all linear in the
+table of E_nm up to degree n+2. These linear maps are built once when the
+coefficients are fit.
+
+References
+----------
+Montenbruck, O. and Gill, E. Satellite Orbits, Section 3.2
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import namedtuple
+from math import factorial
+
+import numpy as np
+
+from point_cloud import polyhedron
+
+HARMONIC_PARAM = namedtuple('HARMONIC_PARAM', ['degree', 'R', 'C', 'S',
+                                               'brillouin_radius', 'A'])
+
+# order of the ten outputs stacked in HARMONIC_PARAM.A
+_OUTPUTS = ('U', 'x', 'y', 'z', 'xx', 'xy', 'xz', 'yy', 'yz', 'zz')
+
+def solid_harmonics(states, R, degree):
+    r"""Unnormalized exterior solid harmonics
+
+    E = solid_harmonics(states, R, degree)
+
+    Parameters
+    ----------
+    states : (m, 3) array
+        Positions in the body fixed frame
+    R : float
+        Reference radius
+    degree : int
+        Maximum degree n of the table
+
+    Returns
+    -------
+    E : (m, degree+1, degree+1) complex array
+        E[:, n, m] = V_nm + i W_nm for 0 <= m <= n, zero above the diagonal
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    states = np.atleast_2d(states)
+    num_points = states.shape[0]
+
+    if num_points == 1:
+        return _solid_harmonics_point(states[0, :], R, degree)
+
+    r2 = np.sum(states**2, axis=1)
+    rho = R / r2
+    z_rho = states[:, 2] * rho
+    xy_rho = (states[:, 0] + 1j * states[:, 1]) * rho
+    rho_R = R * rho
+
+    # recursion coefficients of the zonal/tesseral terms, zero where m >= n
+    n = np.arange(degree + 1)[:, np.newaxis]
+    m = np.arange(degree + 1)[np.newaxis, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = np.where(m < n, (2 * n - 1) / (n - m), 0)[:, :, np.newaxis]
+        b = np.where(m < n - 1, (n + m - 1) / (n - m), 0)[:, :, np.newaxis]
+
+    # built as (n, m, points) so each degree is one contiguous block
+    E = np.zeros((degree + 1, degree + 1, num_points), dtype=np.complex128)
+    E[0, 0] = R / np.sqrt(r2)
+
+    for k in range(1, degree + 1):
+        E[k] = a[k] * z_rho * E[k-1] - b[k] * rho_R * E[k-2]
+        E[k, k] = (2 * k - 1) * xy_rho * E[k-1, k-1]
+
+    return np.moveaxis(E, 2, 0)
+
+def _solid_harmonics_point(state, R, degree):
+    """Same recursion as solid_harmonics for a single point
+
+    Plain python scalars are quicker than numpy for one point since the 
+    recursion is a loop over the degree
+    """
+    x, y, z = (float(ii) for ii in state)
+    r2 = x * x + y * y + z * z
+    rho = R / r2
+    z_rho = z * rho
+    xy_rho = complex(x, y) * rho
+    rho_R = R * rho
+
+    E = [[0j] * (degree + 1) for ii in range(degree + 1)]
+    E[0][0] = complex(R / np.sqrt(r2))
+    
+    for n in range(1, degree + 1):
+        En, E1, E2 = E[n], E[n-1], E[n-2]
+        for m in range(n):
+            En[m] = ((2 * n - 1) * z_rho * E1[m]
+                     - (n + m - 1) * rho_R * E2[m]) / (n - m)
+        En[n] = (2 * n - 1) * xy_rho * E1[n-1]
+
+    return np.array(E)[np.newaxis, :, :]
+
+def _ladder(terms, op, R):
+    """Apply one derivative operator to a list of (coef, n, m) terms
+
+    op is '+' for d/dx + i d/dy, '-' for d/dx - i d/dy, and 'z'
+    """
+    out = []
+    for coef, n, m in terms:
+        if op == '+':
+            out.append((-coef / R, n + 1, m + 1))
+        elif op == '-':
+            out.append((coef * (n - m + 2) * (n - m + 1) / R, n + 1, m - 1))
+        else:
+            out.append((-coef * (n - m + 1) / R, n + 1, m))
+
+    return out
+
+def _output_terms(K, n, m, R):
+    """Terms of each output quantity for the single harmonic Re(K E_nm)
+
+    Returns a dict of lists of (coef, n, m). The value of the quantity is
+    the real part of the sum of coef * E_nm over the list.
+    """
+    base = [(K, n, m)]
+    P, M, Z = (_ladder(base, op, R) for op in '+-z')
+    PP, PM, MM = _ladder(P, '+', R), _ladder(P, '-', R), _ladder(M, '-', R)
+    PZ, MZ, ZZ = _ladder(P, 'z', R), _ladder(M, 'z', R), _ladder(Z, 'z', R)
+
+    def scale(terms, s):
+        return [(c * s, nn, mm) for c, nn, mm in terms]
+
+    # d/dx = (D+ + D-)/2 and d/dy = (D+ - D-)/(2i)
+    return {'U': base,
+            'x': scale(P, 0.5) + scale(M, 0.5),
+            'y': scale(P, -0.5j) + scale(M, 0.5j),
+            'z': Z,
+            'xx': scale(PP, 0.25) + scale(PM, 0.5) + scale(MM, 0.25),
+            'xy': scale(PP, -0.25j) + scale(MM, 0.25j),
+            'xz': scale(PZ, 0.5) + scale(MZ, 0.5),
+            'yy': scale(PP, -0.25) + scale(PM, 0.5) + scale(MM, -0.25),
+            'yz': scale(PZ, -0.5j) + scale(MZ, 0.5j),
+            'zz': ZZ}
+
+def _output_matrix(C, S, R, degree):
+    """Linear map from the E table (degree + 2) to the ten outputs
+
+    Negative orders are folded back with
+    E_{n,-m} = (-1)^m (n-m)!/(n+m)! conj(E_nm). Since only the real part
+    is kept, coef * conj(E) contributes conj(coef) * E.
+    """
+    size = degree + 3
+    A = np.zeros((len(_OUTPUTS), size, size), dtype=np.complex128)
+
+    for n in range(degree + 1):
+        for m in range(n + 1):
+            K = C[n, m] - 1j * S[n, m]
+            if K == 0:
+                continue
+            terms = _output_terms(K, n, m, R)
+            for ii, key in enumerate(_OUTPUTS):
+                for coef, nn, mm in terms[key]:
+                    if mm < 0:
+                        coef = np.conj(coef * (-1)**mm * factorial(nn + mm)
+                                       / factorial(nn - mm))
+                        mm = -mm
+                    A[ii, nn, mm] += coef
+
+    return A.reshape((len(_OUTPUTS), size**2))
+
+def fit_coefficients(param, G, sigma, degree=12, fit_radius=None,
+                     num_samples=None):
+    r"""Fit spherical harmonic coefficients to the polyhedron potential
+
+    hparam = fit_coefficients(param, G, sigma, degree=12)
+
+    Parameters
+    ----------
+    param : POTENTIAL_PARAM namedtuple
+        Output of polyhedron.potential_parameters
+    G : float
+        Gravitational constant
+    sigma : float
+        Density of the body
+    degree : int
+        Maximum degree and order of the expansion
+    fit_radius : float
+        Radius of the sphere the polyhedron potential is sampled on.
+        Defaults to 1.05 times the Brillouin radius
+    num_samples : int
+        Number of sample points. Defaults to four times the number of
+        coefficients
+
+    Returns
+    -------
+    hparam : HARMONIC_PARAM namedtuple
+        degree - maximum degree
+        R - reference radius, the Brillouin radius
+        C, S - (degree+1, degree+1) unnormalized coefficients, so that
+            U = sum C_nm V_nm + S_nm W_nm (the factor mu/R is included)
+        brillouin_radius - radius of the smallest sphere holding the body
+        A - (10, (degree+3)**2) map from the solid harmonic table to the
+            potential, attraction, and gradient matrix
+
+    Notes
+    -----
+    The fit is a linear least squares problem on points spread uniformly
+    (Fibonacci lattice) over a sphere outside the body. The columns are
+    scaled to unit norm since the unnormalized harmonics span many orders
+    of magnitude.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    brillouin_radius = np.max(np.sqrt(np.sum(param.V**2, axis=0)))
+    R = brillouin_radius
+    if fit_radius is None:
+        fit_radius = 1.05 * brillouin_radius
+
+    n_idx, m_idx = np.tril_indices(degree + 1)
+    num_coef = n_idx.shape[0] + np.count_nonzero(m_idx)
+    if num_samples is None:
+        num_samples = 4 * num_coef
+
+    samples = fit_radius * fibonacci_sphere(num_samples)
+    U_samples = polyhedron.potential_batch(samples, param, G, sigma)[0]
+
+    E = solid_harmonics(samples, R, degree)[:, n_idx, m_idx]
+    basis = np.concatenate((E.real, E.imag[:, m_idx > 0]), axis=1)
+    scale = np.linalg.norm(basis, axis=0)
+    x = np.linalg.lstsq(basis / scale, U_samples, rcond=None)[0] / scale
+
+    C = np.zeros((degree + 1, degree + 1))
+    S = np.zeros((degree + 1, degree + 1))
+    C[n_idx, m_idx] = x[:n_idx.shape[0]]
+    S[n_idx[m_idx > 0], m_idx[m_idx > 0]] = x[n_idx.shape[0]:]
+
+    return HARMONIC_PARAM(degree=degree, R=R, C=C, S=S,
+                          brillouin_radius=brillouin_radius,
+                          A=_output_matrix(C, S, R, degree))
+
+def potential_batch(states, hparam):
+    r"""Spherical harmonic potential at many points
+
+    U, U_grad, U_grad_mat, Ulaplace = potential_batch(states, hparam)
+
+    Parameters
+    ----------
+    states : (m, 3) array
+        Positions in the asteroid body fixed frame in km. These should be
+        outside of hparam.brillouin_radius for the series to converge
+    hparam : HARMONIC_PARAM namedtuple
+        Output of fit_coefficients
+
+    Returns
+    -------
+    U : (m,) array
+        Gravitational potential
+    U_grad : (m, 3) array
+        Gravitational attraction
+    U_grad_mat : (m, 3, 3) array
+        Gravitational gradient matrix
+    Ulaplace : (m,) array
+        Laplacian, the trace of U_grad_mat
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    states = np.atleast_2d(states)
+    num_points = states.shape[0]
+
+    E = solid_harmonics(states, hparam.R, hparam.degree + 2)
+    out = np.real(E.reshape((num_points, -1)).dot(hparam.A.T))
+
+    U = out[:, 0]
+    U_grad = out[:, 1:4]
+    U_grad_mat = out[:, (4, 5, 6, 5, 7, 8, 6, 8, 9)].reshape((num_points, 3, 3))
+    Ulaplace = out[:, 4] + out[:, 7] + out[:, 9]
+
+    return U, U_grad, U_grad_mat, Ulaplace
+
+def fibonacci_sphere(num_points):
+    r"""Nearly uniform unit vectors on the sphere
+
+    u = fibonacci_sphere(num_points)
+
+    Parameters
+    ----------
+    num_points : int
+        Number of points
+
+    Returns
+    -------
+    u : (num_points, 3) array
+        Unit vectors on a Fibonacci lattice
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    ii = np.arange(num_points) + 0.5
+    z = 1 - 2 * ii / num_points
+    phi = np.pi * (3 - np.sqrt(5)) * ii
+    rho = np.sqrt(1 - z**2)
+
+    return np.stack((rho * np.cos(phi), rho * np.sin(phi), z), axis=1)
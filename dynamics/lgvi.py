@@ -0,0 +1,246 @@
+"""Lie group variational integrator for the dumbbell
+
+A fixed step geometric integrator for the dumbbell in the gravity field of
+an asteroid. The discrete equations come from a discretization of
+Hamilton's principle on SE(3) rather than of the equations of motion, so
+
+    * R is updated by multiplying with a rotation and stays orthogonal to
+      round off no matter how large the step
+    * the method is symplectic and momentum preserving, so the energy
+      error stays bounded over long runs instead of drifting
+
+It is second order, so the energy oscillates with an amplitude which goes
+as the step squared. Each step needs the gravity at one new position of
+both masses, which makes long propagations far cheaper than odeint at the
+tolerances needed to hold the energy.
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+
+References
+----------
+This derivation is based on the following works:
+
+.. [1] LEE, Taeyoung, LEOK, Melvin y MCCLAMROCH, N Harris. "Lie Group
+Variational Integrators for the Full Body Problem". Computer Methods in
+Applied Mechanics and Engineering. 2007, vol 196, no. 29, p. 2907--2924.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+
+from kinematics import attitude
+
+def cayley_solve(g, J, tol=1e-15, max_iter=20):
+    r"""Rotation which solves the discrete rigid body equation
+
+    F = cayley_solve(g, J)
+
+    Parameters
+    ----------
+    g : (3,) numpy array
+        h times the body angular momentum, plus the impulse of the moment
+    J : (3, 3) numpy array
+        Standard moment of inertia
+    tol : float
+        Newton iterations stop when the step in f is smaller than this
+    max_iter : int
+        Largest number of Newton iterations
+
+    Returns
+    -------
+    F : (3, 3) numpy array
+        Rotation with hat(g) = F Jd - Jd F^T, where J = tr(Jd) I - Jd
+
+    Notes
+    -----
+    F is written with the Cayley transform F = (I + f^)(I - f^)^-1, for
+    which the implicit equation becomes
+
+        g + g x f + (g . f) f - 2 J f = 0
+
+    This is solved for f by Newton's method, starting from the linear
+    solution.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    f = np.linalg.solve(2*J, g)
+    for ii in range(max_iter):
+        phi = g + np.cross(g, f) + g.dot(f)*f - 2*J.dot(f)
+        dphi = attitude.hat_map(g) + g.dot(f)*np.eye(3) + np.outer(f, g) - 2*J
+        df = np.linalg.solve(dphi, phi)
+        f = f - df
+        if np.max(np.abs(df)) < tol * max(1, np.max(np.abs(f))):
+            break
+    else:
+        raise RuntimeError('Cayley parameters did not converge in {} iterations'.format(max_iter))
+
+    f_hat = attitude.hat_map(f)
+    return (np.eye(3) + f_hat).dot(np.linalg.inv(np.eye(3) - f_hat))
+
+def inertial_step(t, state, h, dum, ast, loads=None):
+    r"""Advance the inertial dumbbell state by one step
+
+    state, loads = inertial_step(t, state, h, dum, ast, loads=None)
+
+    Parameters
+    ----------
+    t : float
+        Time of state
+    state : (18,) numpy array
+        State used by dum.eoms_inertial, with the angular velocity in the
+        dumbbell frame
+    h : float
+        Step size in sec
+    dum : dumbbell.Dumbbell
+        Dumbbell instance
+    ast : asteroid.Asteroid
+        Asteroid instance
+    loads : tuple
+        Force and moment at (t, state) from dum.inertial_loads. They are
+        computed if not given
+
+    Returns
+    -------
+    state : (18,) numpy array
+        State at t + h
+    loads : tuple
+        Force and moment at t + h to hand to the next step
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    if loads is None:
+        loads = dum.inertial_loads(t, state, ast)
+    force, moment = loads
+
+    m = dum.m1 + dum.m2
+    pos = state[0:3]
+    vel = state[3:6]
+    R = state[6:15].reshape((3, 3))
+    ang_mom = dum.J.dot(state[15:18]) # angular momentum in the dumbbell frame
+
+    g = ang_mom + h/2*moment
+    F = cayley_solve(h*g, dum.J)
+
+    next_state = np.empty(18)
+    next_state[0:3] = pos + h*vel + h**2/(2*m)*force
+    next_state[6:15] = R.dot(F).reshape(9)
+
+    next_loads = dum.inertial_loads(t + h, next_state, ast)
+    next_force, next_moment = next_loads
+
+    next_state[3:6] = vel + h/(2*m)*(force + next_force)
+    next_state[15:18] = dum.Jinv.dot(F.T.dot(g) + h/2*next_moment)
+
+    return next_state, next_loads
+
+def integrate_inertial(initial_state, time, ast, dum, step=None):
+    r"""Propagate the inertial dumbbell state with fixed steps
+
+    state = integrate_inertial(initial_state, time, ast, dum, step=None)
+
+    Parameters
+    ----------
+    initial_state : (18,) numpy array
+        State at time[0] used by dum.eoms_inertial
+    time : (n,) numpy array
+        Increasing output times
+    ast : asteroid.Asteroid
+        Asteroid instance
+    dum : dumbbell.Dumbbell
+        Dumbbell instance
+    step : float
+        Largest step size. Each output interval is split into the fewest
+        equal steps no larger than this. The default steps from one output
+        time to the next
+
+    Returns
+    -------
+    state : (n, 18) numpy array
+        State at each time, the same as the odeint output of dum.eoms_inertial
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    time = np.asarray(time, dtype=float)
+    if np.any(np.diff(time) <= 0):
+        raise ValueError('time must be increasing')
+    if step is not None and step <= 0:
+        raise ValueError('step must be positive')
+
+    states = np.empty((len(time), 18))
+    states[0] = initial_state
+
+    loads = None
+    for ii in range(1, len(time)):
+        dt = time[ii] - time[ii-1]
+        num_steps = 1 if step is None else int(np.ceil(dt / step * (1 - 1e-12)))
+        h = dt / num_steps
+
+        state = states[ii-1]
+        for jj in range(num_steps):
+            state, loads = inertial_step(time[ii-1] + jj*h, state, h, dum, ast, loads)
+        states[ii] = state
+
+    return states
+
+def hamilton_relative_to_inertial(t, state, ast, dum):
+    """Hamiltonian relative state to the state of the inertial EOMs at time t
+    """
+    Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
+    R = state[6:15].reshape((3, 3)) # sc body frame to asteroid frame
+
+    return np.hstack((Ra.dot(state[0:3]), Ra.dot(state[3:6]) / (dum.m1 + dum.m2),
+                      Ra.dot(R).reshape(9), dum.Jinv.dot(R.T.dot(state[15:18]))))
+
+def inertial_to_hamilton_relative(t, state, ast, dum):
+    """State of the inertial EOMs to the Hamiltonian relative state at time t
+    """
+    Ra = attitude.rot3(ast.omega*t, 'c') # asteroid body frame to inertial frame
+    R = Ra.T.dot(state[6:15].reshape((3, 3))) # sc body frame to asteroid frame
+
+    return np.hstack((Ra.T.dot(state[0:3]), (dum.m1 + dum.m2) * Ra.T.dot(state[3:6]),
+                      R.reshape(9), R.dot(dum.J).dot(state[15:18])))
+
+def integrate_hamilton_relative(initial_state, time, ast, dum, step=None):
+    r"""Propagate the Hamiltonian relative dumbbell state with fixed steps
+
+    state = integrate_hamilton_relative(initial_state, time, ast, dum, step=None)
+
+    Parameters
+    ----------
+    initial_state : (18,) numpy array
+        State at time[0] used by dum.eoms_hamilton_relative
+    time, ast, dum, step
+        As in integrate_inertial
+
+    Returns
+    -------
+    state : (n, 18) numpy array
+        State at each time, the same as the odeint output of
+        dum.eoms_hamilton_relative
+
+    Notes
+    -----
+    The relative state is only a change of frame of the inertial one, with
+    the asteroid frame a known function of time. The steps are taken by
+    integrate_inertial and then rotated into the asteroid frame, so both
+    give the same discrete trajectory.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    time = np.asarray(time, dtype=float)
+    inertial_state = integrate_inertial(
+        hamilton_relative_to_inertial(time[0], initial_state, ast, dum),
+        time, ast, dum, step)
+
+    return np.array([inertial_to_hamilton_relative(t, state, ast, dum)
+                     for t, state in zip(time, inertial_state)])
@@ -0,0 +1,180 @@
+"""On disk cache of the polyhedron shape parameters
+
+Asteroid.polyhedron_shape_input is a pure function of the vertices and
+faces, but it is expensive for large shape models and it is recomputed by
+every process of a parameter sweep. The results are saved here in a
+directory named by a hash of (name, V, F), with one .npy file per array so
+that they can be memory mapped on load. Each process then only pages in
+the arrays it actually reads, and the pages are shared between processes.
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# bump whenever polyhedron_shape_input changes what it returns
+CACHE_VERSION = 1
+CACHE_DIR = os.environ.get('ASTEROID_SHAPE_CACHE', os.path.join('.', 'data', 'cache'))
+
+logger = logging.getLogger(__name__)
+
+def shape_key(name, V, F):
+    """Hex digest identifying the shape model
+    """
+    sha = hashlib.sha1()
+    sha.update('{} {}'.format(CACHE_VERSION, name).encode('utf-8'))
+    for arr in (V, F):
+        arr = np.ascontiguousarray(arr)
+        sha.update('{} {}'.format(arr.dtype.str, arr.shape).encode('utf-8'))
+        sha.update(arr.tobytes())
+
+    return sha.hexdigest()
+
+def save(directory, asteroid_grav):
+    r"""Write the shape parameters to a cache directory
+
+    save(directory, asteroid_grav)
+
+    Parameters
+    ----------
+    directory : str
+        Directory to create. It is written to a temporary directory first
+        and then renamed, so other processes never see a partial cache
+    asteroid_grav : dict
+        Output of Asteroid.polyhedron_shape_input
+
+    Notes
+    -----
+    Arrays are saved as is. Tuples of arrays are split into one file per
+    entry, and lists of lists (vertex_face_map) are flattened into the
+    values and the offset of each list. Python scalars go in index.json.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+
+    index = {}
+    for key, value in asteroid_grav.items():
+        if isinstance(value, np.ndarray):
+            np.save(os.path.join(tmp, key + '.npy'), value)
+            index[key] = ['array']
+        elif isinstance(value, tuple):
+            for ii, arr in enumerate(value):
+                np.save(os.path.join(tmp, '{}.{}.npy'.format(key, ii)), np.asarray(arr))
+            index[key] = ['tuple', len(value)]
+        elif isinstance(value, list):
+            lengths = np.array([len(row) for row in value], dtype=np.intp)
+            offset = np.concatenate(([0], np.cumsum(lengths)))
+            data = np.concatenate([np.asarray(row, dtype=np.intp) for row in value]
+                                  + [np.zeros(0, dtype=np.intp)])
+            np.save(os.path.join(tmp, key + '.data.npy'), data)
+            np.save(os.path.join(tmp, key + '.offset.npy'), offset)
+            index[key] = ['ragged']
+        else:
+            index[key] = ['scalar', value]
+
+    with open(os.path.join(tmp, 'index.json'), 'w') as f:
+        json.dump(index, f)
+
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        # another process finished the same cache first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def load(directory, mmap_mode='r'):
+    r"""Read shape parameters written by save
+
+    asteroid_grav = load(directory)
+
+    Parameters
+    ----------
+    directory : str
+        Cache directory
+    mmap_mode : str or None
+        Passed to numpy.load. The default maps the arrays read only
+
+    Returns
+    -------
+    asteroid_grav : dict
+        Same keys and structure as Asteroid.polyhedron_shape_input
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    with open(os.path.join(directory, 'index.json'), 'r') as f:
+        index = json.load(f)
+
+    def array(filename):
+        return np.load(os.path.join(directory, filename), mmap_mode=mmap_mode)
+
+    asteroid_grav = {}
+    for key, info in index.items():
+        if info[0] == 'array':
+            asteroid_grav[key] = array(key + '.npy')
+        elif info[0] == 'tuple':
+            asteroid_grav[key] = tuple(array('{}.{}.npy'.format(key, ii))
+                                       for ii in range(info[1]))
+        elif info[0] == 'ragged':
+            data = np.load(os.path.join(directory, key + '.data.npy'))
+            offset = np.load(os.path.join(directory, key + '.offset.npy'))
+            asteroid_grav[key] = [data[start:stop].tolist()
+                                  for start, stop in zip(offset[:-1], offset[1:])]
+        else:
+            asteroid_grav[key] = info[1]
+
+    return asteroid_grav
+
+def cached_shape_input(name, V, F, compute, cache_dir=CACHE_DIR):
+    r"""Load the shape parameters from the cache or compute and save them
+
+    asteroid_grav = cached_shape_input(name, V, F, compute)
+
+    Parameters
+    ----------
+    name : str
+        Asteroid name, part of the key
+    V, F : numpy arrays
+        Vertices and faces of the shape model
+    compute : callable
+        Called with no arguments on a cache miss. Returns the dict to save
+    cache_dir : str
+        Root directory of the cache
+
+    Returns
+    -------
+    asteroid_grav : dict
+        Shape parameters
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    directory = os.path.join(cache_dir, '{}_{}'.format(name, shape_key(name, V, F)))
+    if os.path.isfile(os.path.join(directory, 'index.json')):
+        logger.debug('Loading shape parameters from {}'.format(directory))
+        return load(directory)
+
+    asteroid_grav = compute()
+    try:
+        save(directory, asteroid_grav)
+        logger.info('Saved shape parameters to {}'.format(directory))
+    except OSError as err:
+        logger.warning('Unable to cache shape parameters: {}'.format(err))
+
+    return asteroid_grav
@@ -36,11 +36,16 @@ from dynamics import dumbbell, eoms, controller
 from point_cloud import wavefront
 from kinematics import attitude
 import utilities
+import telemetry
 from visualization import graphics, animation, publication
 
 compression = 'gzip'
 compression_opts = 9
 max_steps = 15000
+# written as keyframes plus the rows which changed each step
+mesh_series = ('reconstructed_vertex', 'reconstructed_face', 'reconstructed_weight')
+# seconds between exploration plans, held constant in between
+guidance_period = 1.0
 
 def initialize_asteroid(output_filename, ast_name="castalia"):
     """Initialize all the things for the simulation
@@ -217,7 +222,7 @@ def initialize_refinement(output_filename, ast_name="castalia"):
     logger.info("Initializing Refinement : {} ".format(ast_name))    
 
     # open the file and recreate the objects
-    with h5py.File(output_filename, 'r') as hf:
+    with telemetry.File(output_filename, 'r') as hf:
         state_keys = np.array(utilities.sorted_nicely(list(hf['state'].keys())))
         explore_tf = hf['time'][()][-1]
         # explore_tf = int(state_keys[-1])
@@ -371,8 +376,11 @@ def initialize_castalia(output_filename):
             est_ast_rmesh, est_ast, lidar, caster, max_angle, 
             dum, AbsTol, RelTol)
 
-def simulate(output_filename="/tmp/exploration_sim.hdf5"):
+def simulate(output_filename="/tmp/exploration_sim.hdf5", native_eoms=False):
     """Actually run the simulation around the asteroid
+
+    native_eoms integrates the compiled lib.eoms.ControlledDumbbell rather
+    than eoms.eoms_controlled_inertial_held
     """
     logger = logging.getLogger(__name__)
 
@@ -399,88 +407,76 @@ def simulate(output_filename="/tmp/exploration_sim.hdf5"):
         hf.create_dataset("initial_state", data=initial_state, compression=compression,
                           compression_opts=compression_opts)
 
-        v_group = hf.create_group("reconstructed_vertex")
-        f_group = hf.create_group("reconstructed_face")
-        w_group = hf.create_group("reconstructed_weight")
-        state_group = hf.create_group("state")
-        targets_group = hf.create_group("targets")
-        Ra_group = hf.create_group("Ra")
-        inertial_intersections_group = hf.create_group("inertial_intersections")
-        asteroid_intersections_group = hf.create_group("asteroid_intersections")
-
-        
-        # initialize the ODE function
-        system = integrate.ode(eoms.eoms_controlled_inertial_pybind)
-        system.set_integrator("lsoda", atol=AbsTol, rtol=RelTol, nsteps=10000)
-        system.set_initial_value(initial_state, t0)
-        system.set_f_params(true_ast, dum, complete_controller, est_ast_rmesh)
+        # every quantity is one extendable dataset with a row per step,
+        # written on a background thread and flushed when the block exits
+        with telemetry.AsyncWriter(telemetry.TimeSeriesWriter(hf, compression=compression,
+                                                              compression_opts=compression_opts,
+                                                              delta=mesh_series)) as writer:
+
+            # plan outside of the ODE function and hold the commands for it
+            guidance = controller.ExploreGuidance(complete_controller, est_ast_rmesh, true_ast,
+                                                  period=guidance_period)
+
+            # LSODA since the attitude loop on the small dumbbell inertia is stiff
+            if native_eoms:
+                from lib import eoms as eoms_cpp
+                rhs = eoms_cpp.ControlledDumbbell(true_ast,
+                                                  eoms_cpp.Dumbbell(dum.m1, dum.m2, dum.l))
+                system = integrate.ode(rhs)
+            else:
+                system = integrate.ode(eoms.eoms_controlled_inertial_held)
+                system.set_f_params(true_ast, dum, guidance)
+            system.set_integrator("lsoda", atol=AbsTol, rtol=RelTol, nsteps=10000)
+            system.set_initial_value(initial_state, t0)
         
-        point_cloud = defaultdict(list)
+            point_cloud = defaultdict(list)
 
-        ii = 1
-        while system.successful() and system.t < tf:
-            # integrate the system
-            t = (system.t + dt)
-            state = system.integrate(system.t + dt)
+            ii = 1
+            while system.successful() and system.t < tf:
+                if guidance.step(system.t, system.y) and native_eoms:
+                    rhs.set_command(*guidance.commands())
+                # integrate the system
+                t = (system.t + dt)
+                state = system.integrate(system.t + dt)
 
-            logger.info("Step: {} Time: {}".format(ii, t))
+                logger.info("Step: {} Time: {}".format(ii, t))
             
-            if not (np.floor(t) % 1):
-                # logger.info("RayCasting at t: {}".format(t))
-                targets = lidar.define_targets(state[0:3],
-                                               state[6:15].reshape((3, 3)),
-                                               np.linalg.norm(state[0:3]))
-                # update the asteroid inside the caster
-                nv = true_ast.rotate_vertices(t)
-                Ra = true_ast.rot_ast2int(t)
-                
-                # this also updates true_ast (both point to same data) 
-                caster.update_mesh(nv, true_ast.get_faces())
-
-                # do the raycasting
-                intersections = caster.castarray(state[0:3], targets)
-
-                # reconstruct the mesh with new measurements
-                # convert the intersections to the asteroid frame
-                ast_ints = []
-                for pt in intersections:
-                    if np.linalg.norm(pt) < 1e-9:
-                        logger.info("No intersection for this point")
-                        pt_ast = np.array([np.nan, np.nan, np.nan])
-                    else:
-                        pt_ast = Ra.T.dot(pt)
-
-                    ast_ints.append(pt_ast)
-                
-                # convert the intersections to the asteroid frame
-                ast_ints = np.array(ast_ints)
-                est_ast_rmesh.update(ast_ints, max_angle)
-
-                # save data to HDF5
-
-            v_group.create_dataset(str(ii), data=est_ast_rmesh.get_verts(), compression=compression,
-                                   compression_opts=compression_opts)
-            f_group.create_dataset(str(ii), data=est_ast_rmesh.get_faces(), compression=compression,
-                                   compression_opts=compression_opts)
-            w_group.create_dataset(str(ii), data=est_ast_rmesh.get_weights(), compression=compression,
-                                   compression_opts=compression_opts)
-
-            state_group.create_dataset(str(ii), data=state, compression=compression,
-                                       compression_opts=compression_opts)
-            targets_group.create_dataset(str(ii), data=targets, compression=compression,
-                                         compression_opts=compression_opts)
-            Ra_group.create_dataset(str(ii), data=Ra, compression=compression,
-                                    compression_opts=compression_opts)
-            inertial_intersections_group.create_dataset(str(ii), data=intersections, compression=compression,
-                                                        compression_opts=compression_opts)
-            asteroid_intersections_group.create_dataset(str(ii), data=ast_ints, compression=compression,
-                                                        compression_opts=compression_opts)
+                if not (np.floor(t) % 1):
+                    # logger.info("RayCasting at t: {}".format(t))
+                    targets = lidar.define_targets(state[0:3],
+                                                   state[6:15].reshape((3, 3)),
+                                                   np.linalg.norm(state[0:3]))
+                    # update the asteroid inside the caster
+                    Ra = true_ast.rot_ast2int(t)
+                    caster.update_mesh(true_ast.rotate_vertices(t), true_ast.get_faces())
+
+                    # do the raycasting. Misses are zero rows
+                    intersections = caster.castarray(state[0:3], targets)
+                    hit = np.linalg.norm(intersections, axis=1) >= 1e-9
+                    # convert the intersections to the asteroid frame, NaN for the misses
+                    ast_ints = np.where(hit[:, np.newaxis], intersections.dot(Ra), np.nan)
+                    if not np.all(hit):
+                        logger.info("No intersection for {} points".format(np.sum(~hit)))
+                    est_ast_rmesh.update(ast_ints, max_angle)
+
+                    # save data to HDF5
+
+                writer.append(ii, reconstructed_vertex=est_ast_rmesh.get_verts(),
+                              reconstructed_face=est_ast_rmesh.get_faces(),
+                              reconstructed_weight=est_ast_rmesh.get_weights(),
+                              state=state, targets=targets, Ra=Ra,
+                              inertial_intersections=intersections,
+                              asteroid_intersections=ast_ints)
             
-            ii += 1
+                ii += 1
+
 
 def simulate_control(output_filename="/tmp/exploration_sim.hdf5", 
-                     asteroid_name="castalia"):
+                     asteroid_name="castalia", native_eoms=False):
     """Run the simulation with the control cost added in
+
+    native_eoms integrates the compiled lib.eoms.ControlledDumbbell rather
+    than eoms.eoms_controlled_inertial_control_cost_held
     """
     logger = logging.getLogger(__name__)
     
@@ -527,84 +523,71 @@ def simulate_control(output_filename="/tmp/exploration_sim.hdf5",
         hf.create_dataset("initial_state", data=initial_state, compression=compression,
                           compression_opts=compression_opts)
 
-        v_group = hf.create_group("reconstructed_vertex")
-        f_group = hf.create_group("reconstructed_face")
-        w_group = hf.create_group("reconstructed_weight")
-        state_group = hf.create_group("state")
-        targets_group = hf.create_group("targets")
-        Ra_group = hf.create_group("Ra")
-        inertial_intersections_group = hf.create_group("inertial_intersections")
-        asteroid_intersections_group = hf.create_group("asteroid_intersections")
-
-        # initialize the ODE function
-        system = integrate.ode(eoms.eoms_controlled_inertial_control_cost_pybind)
-        system.set_integrator("lsoda", atol=AbsTol, rtol=RelTol, nsteps=10000)
-        # system.set_integrator("vode", nsteps=5000, method='bdf')
-        system.set_initial_value(initial_state, t0)
-        system.set_f_params(true_ast, dum, complete_controller, est_ast_rmesh, est_ast)
+        # every quantity is one extendable dataset with a row per step,
+        # written on a background thread and flushed when the block exits
+        with telemetry.AsyncWriter(telemetry.TimeSeriesWriter(hf, compression=compression,
+                                                              compression_opts=compression_opts,
+                                                              delta=mesh_series)) as writer:
+
+            # plan outside of the ODE function and hold the commands for it
+            guidance = controller.ExploreGuidance(complete_controller, est_ast_rmesh, true_ast,
+                                                  est_ast=est_ast, period=guidance_period)
+
+            if native_eoms:
+                from lib import eoms as eoms_cpp
+                rhs = eoms_cpp.ControlledDumbbell(true_ast,
+                                                  eoms_cpp.Dumbbell(dum.m1, dum.m2, dum.l),
+                                                  est_ast)
+                system = integrate.ode(rhs)
+            else:
+                system = integrate.ode(eoms.eoms_controlled_inertial_control_cost_held)
+                system.set_f_params(true_ast, dum, guidance, est_ast)
+            system.set_integrator("lsoda", atol=AbsTol, rtol=RelTol, nsteps=10000)
+            # system.set_integrator("vode", nsteps=5000, method='bdf')
+            system.set_initial_value(initial_state, t0)
         
-        point_cloud = defaultdict(list)
-
-        ii = 1
-        while system.successful() and system.t < tf:
-            t = system.t + dt
-            # TODO Make sure the asteroid (est and truth) are being rotated by ROT3(t)
-            state = system.integrate(system.t + dt)
-
-            logger.info("Step: {} Time: {} Pos: {} Uncertainty: {}".format(ii, t,
-                                                                           state[0:3],
-                                                                           np.sum(est_ast_rmesh.get_weights())))
-
-            if not (np.floor(t) % 1):
-                targets = lidar.define_targets(state[0:3],
-                                               state[6:15].reshape((3, 3)),
-                                               np.linalg.norm(state[0:3]))
-
-                # update the asteroid inside the caster
-                nv = true_ast.rotate_vertices(t)
-                Ra = true_ast.rot_ast2int(t)
-                
-                caster.update_mesh(nv, true_ast.get_faces())
-
-                # do the raycasting
-                intersections = caster.castarray(state[0:3], targets)
-
-                # reconstruct the mesh with new measurements
-                # convert the intersections to the asteroid frame
-                ast_ints = []
-                for pt in intersections:
-                    if np.linalg.norm(pt) < 1e-9:
-                        logger.info("No intersection for this point")
-                        pt_ast = np.array([np.nan, np.nan, np.nan])
-                    else:
-                        pt_ast = Ra.T.dot(pt)
-
-                    ast_ints.append(pt_ast)
+            point_cloud = defaultdict(list)
+
+            ii = 1
+            while system.successful() and system.t < tf:
+                if guidance.step(system.t, system.y) and native_eoms:
+                    rhs.set_command(*guidance.commands())
+                t = system.t + dt
+                # TODO Make sure the asteroid (est and truth) are being rotated by ROT3(t)
+                state = system.integrate(system.t + dt)
+
+                logger.info("Step: {} Time: {} Pos: {} Uncertainty: {}".format(ii, t,
+                                                                               state[0:3],
+                                                                               np.sum(est_ast_rmesh.get_weights())))
+
+                if not (np.floor(t) % 1):
+                    targets = lidar.define_targets(state[0:3],
+                                                   state[6:15].reshape((3, 3)),
+                                                   np.linalg.norm(state[0:3]))
+
+                    # update the asteroid inside the caster
+                    Ra = true_ast.rot_ast2int(t)
+                    caster.update_mesh(true_ast.rotate_vertices(t), true_ast.get_faces())
+
+                    # do the raycasting. Misses are zero rows
+                    intersections = caster.castarray(state[0:3], targets)
+                    hit = np.linalg.norm(intersections, axis=1) >= 1e-9
+                    # convert the intersections to the asteroid frame, NaN for the misses
+                    ast_ints = np.where(hit[:, np.newaxis], intersections.dot(Ra), np.nan)
+                    if not np.all(hit):
+                        logger.info("No intersection for {} points".format(np.sum(~hit)))
                 
-                ast_ints = np.array(ast_ints)
-                
-                # this updates the estimated asteroid mesh used in both rmesh and est_ast
-                est_ast_rmesh.update(ast_ints, max_angle)
-
-            v_group.create_dataset(str(ii), data=est_ast_rmesh.get_verts(), compression=compression,
-                                   compression_opts=compression_opts)
-            f_group.create_dataset(str(ii), data=est_ast_rmesh.get_faces(), compression=compression,
-                                   compression_opts=compression_opts)
-            w_group.create_dataset(str(ii), data=est_ast_rmesh.get_weights(), compression=compression,
-                                   compression_opts=compression_opts)
-
-            state_group.create_dataset(str(ii), data=state, compression=compression,
-                                       compression_opts=compression_opts)
-            targets_group.create_dataset(str(ii), data=targets, compression=compression,
-                                         compression_opts=compression_opts)
-            Ra_group.create_dataset(str(ii), data=Ra, compression=compression,
-                                    compression_opts=compression_opts)
-            inertial_intersections_group.create_dataset(str(ii), data=intersections, compression=compression,
-                                                        compression_opts=compression_opts)
-            asteroid_intersections_group.create_dataset(str(ii), data=ast_ints, compression=compression,
-                                                        compression_opts=compression_opts)
+                    # this updates the estimated asteroid mesh used in both rmesh and est_ast
+                    est_ast_rmesh.update(ast_ints, max_angle)
+
+                writer.append(ii, reconstructed_vertex=est_ast_rmesh.get_verts(),
+                              reconstructed_face=est_ast_rmesh.get_faces(),
+                              reconstructed_weight=est_ast_rmesh.get_weights(),
+                              state=state, targets=targets, Ra=Ra,
+                              inertial_intersections=intersections,
+                              asteroid_intersections=ast_ints)
             
-            ii += 1
+                ii += 1
         
         logger.info("Exploration complete")
 
@@ -615,7 +598,7 @@ def save_animation(filename, move_cam=False, mesh_weight=False,
                    output_path=tempfile.mkdtemp()):
     """Given a HDF5 file from simulate this will animate teh motion
     """
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         # get the inertial state and asteroid mesh object
         time = hf['time'][()]
         state_group = hf['state']
@@ -703,7 +686,7 @@ def animate(filename, move_cam=False, mesh_weight=False, save_animation=False):
     """Given a HDF5 file from simulate this will animate teh motion
     """
     # TODO Animate the changing of the mesh itself as a function of time
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         # get the inertial state and asteroid mesh object
         # time = hf['time'][()]
         state_group = hf['state']
@@ -776,7 +759,7 @@ def animate_refinement(filename, move_cam=False, mesh_weight=False, save_animati
     """Given a HDF5 file from simulate this will animate teh motion
     """
     # TODO Animate the changing of the mesh itself as a function of time
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         # get the inertial state and asteroid mesh object
         # time = hf['time'][()]
         state_group = hf['refinement/state']
@@ -848,7 +831,7 @@ def animate_refinement(filename, move_cam=False, mesh_weight=False, save_animati
 def animate_landing(filename, move_cam=False, mesh_weight=False):
     """Animation for the landing portion of simulation
     """
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         time = hf['landing/time'][()]
         state_group = hf['landing/state']
         state_keys = np.array(utilities.sorted_nicely(list(state_group.keys())))
@@ -898,7 +881,7 @@ def save_animate_landing(filename,output_path,move_cam=False, mesh_weight=False)
     """Save the landing animation
     """
 
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         time = hf['landing/time'][()]
         state_group = hf['landing/state']
         state_keys = np.array(utilities.sorted_nicely(list(state_group.keys())))
@@ -964,7 +947,7 @@ def save_animate_refinement(filename, output_path, move_cam=False, mesh_weight=F
     """Save the refinement animation
     """
     # TODO Animate the changing of the mesh itself as a function of time
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         # get the inertial state and asteroid mesh object
         # time = hf['time'][()]
         state_group = hf['refinement/state']
@@ -1072,7 +1055,7 @@ def refine_landing_area(filename, asteroid_name, desired_landing_site):
     v_bumpy, f_bumpy = wavefront.read_obj('./data/shape_model/CASTALIA/castalia_bump.obj') 
     
     # define the initial condition as teh terminal state of the exploration sim
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         state_keys = np.array(utilities.sorted_nicely(list(hf['state'].keys())))
         explore_tf = hf['time'][()][-1]
         explore_state = hf['state/' + str(explore_tf)][()]
@@ -1094,95 +1077,69 @@ def refine_landing_area(filename, asteroid_name, desired_landing_site):
         refinement_group.create_dataset("time", data=time, compression=compression,
                                         compression_opts=compression_opts)
         refinement_group.create_dataset("initial_state", data=initial_state)
-        v_group = refinement_group.create_group("reconstructed_vertex")
-        f_group = refinement_group.create_group("reconstructed_face")
-        w_group = refinement_group.create_group("reconstructed_weight")
-        state_group = refinement_group.create_group("state")
-        targets_group = refinement_group.create_group("targets")
-        Ra_group = refinement_group.create_group("Ra")
-        inertial_intersections_group = refinement_group.create_group("inertial_intersections")
-        asteroid_intersections_group = refinement_group.create_group("asteroid_intersections")
-
-        logger.info("Estimated asteroid has {} vertices and {} faces".format(
-            est_ast_rmesh.get_verts().shape[0],
-            est_ast_rmesh.get_faces().shape[0]))
-            
-        logger.info("Now refining the faces close to the landing site")
-        # perform remeshing over the landing area and take a bunch of measurements 
-        est_ast_meshdata.remesh_faces_in_view(desired_landing_site, np.deg2rad(40),
-                                              0.02)
-        logger.info("Estimated asteroid has {} vertices and {} faces".format(
-            est_ast_rmesh.get_verts().shape[0],
-            est_ast_rmesh.get_faces().shape[0]))
-        logger.info("Now starting dynamic simulation and taking measurements again again")
-        complete_controller.set_vertices_in_view(est_ast_rmesh, desired_landing_site,
-                                                 np.deg2rad(40))
-
-        system = integrate.ode(eoms.eoms_controlled_inertial_refinement_pybind)
-        # system = integrate.ode(eoms.eoms_controlled_inertial_control_cost_pybind)
-        system.set_integrator("lsoda", atol=explore_AbsTol, rtol=explore_RelTol, nsteps=10000)
-        system.set_initial_value(initial_state, t0)
-        system.set_f_params(true_ast, dum, complete_controller, est_ast_rmesh, 
-                            est_ast, desired_landing_site)
-        # system.set_f_params(true_ast, dum, complete_controller, est_ast_rmesh, est_ast)
-        # TODO make sure that at this point the new faces have a high weight
-        ii = 1
-        while system.successful() and system.t < tf:
-            t = system.t + dt
-            state = system.integrate(system.t + dt)
-            logger.info("Step: {} Time: {} Pos: {} Uncertainty: {}".format(ii, t,
-                                                                           state[0:3],
-                                                                           np.sum(est_ast_rmesh.get_weights())))
-
-            targets = lidar.define_targets(state[0:3],
-                                            state[6:15].reshape((3, 3)),
-                                            np.linalg.norm(state[0:3]))
-
-            # update the asteroid inside the caster
-            nv = true_ast.rotate_vertices(t)
-            Ra = true_ast.rot_ast2int(t)
-            nv = Ra.dot(v_bumpy.T).T        
-            caster.update_mesh(nv, f_bumpy)
-
-            # do the raycasting
-            intersections = caster.castarray(state[0:3], targets)
-
-            # reconstruct the mesh with new measurements
-            # convert the intersections to the asteroid frame
-            ast_ints = []
-            for pt in intersections:
-                if np.linalg.norm(pt) < 1e-9:
-                    logger.info("No intersection for this point")
-                    pt_ast = np.array([np.nan, np.nan, np.nan])
-                else:
-                    pt_ast = Ra.T.dot(pt)
-
-                ast_ints.append(pt_ast)
+        with telemetry.AsyncWriter(telemetry.TimeSeriesWriter(refinement_group, compression=compression,
+                                                              compression_opts=compression_opts,
+                                                              delta=mesh_series)) as writer:
+
+            logger.info("Estimated asteroid has {} vertices and {} faces".format(
+                est_ast_rmesh.get_verts().shape[0],
+                est_ast_rmesh.get_faces().shape[0]))
             
-            ast_ints = np.array(ast_ints)
+            logger.info("Now refining the faces close to the landing site")
+            # perform remeshing over the landing area and take a bunch of measurements 
+            est_ast_meshdata.remesh_faces_in_view(desired_landing_site, np.deg2rad(40),
+                                                  0.02)
+            logger.info("Estimated asteroid has {} vertices and {} faces".format(
+                est_ast_rmesh.get_verts().shape[0],
+                est_ast_rmesh.get_faces().shape[0]))
+            logger.info("Now starting dynamic simulation and taking measurements again again")
+            complete_controller.set_vertices_in_view(est_ast_rmesh, desired_landing_site,
+                                                     np.deg2rad(40))
+
+            system = integrate.ode(eoms.eoms_controlled_inertial_refinement_pybind)
+            # system = integrate.ode(eoms.eoms_controlled_inertial_control_cost_pybind)
+            system.set_integrator("lsoda", atol=explore_AbsTol, rtol=explore_RelTol, nsteps=10000)
+            system.set_initial_value(initial_state, t0)
+            system.set_f_params(true_ast, dum, complete_controller, est_ast_rmesh, 
+                                est_ast, desired_landing_site)
+            # system.set_f_params(true_ast, dum, complete_controller, est_ast_rmesh, est_ast)
+            # TODO make sure that at this point the new faces have a high weight
+            ii = 1
+            while system.successful() and system.t < tf:
+                t = system.t + dt
+                state = system.integrate(system.t + dt)
+                logger.info("Step: {} Time: {} Pos: {} Uncertainty: {}".format(ii, t,
+                                                                               state[0:3],
+                                                                               np.sum(est_ast_rmesh.get_weights())))
+
+                targets = lidar.define_targets(state[0:3],
+                                                state[6:15].reshape((3, 3)),
+                                                np.linalg.norm(state[0:3]))
+
+                # update the bumpy asteroid inside the caster
+                Ra = true_ast.rot_ast2int(t)
+                caster.update_mesh(Ra.dot(v_bumpy.T).T, f_bumpy)
+
+                # do the raycasting. Misses are zero rows
+                intersections = caster.castarray(state[0:3], targets)
+                hit = np.linalg.norm(intersections, axis=1) >= 1e-9
+                # convert the intersections to the asteroid frame, NaN for the misses
+                ast_ints = np.where(hit[:, np.newaxis], intersections.dot(Ra), np.nan)
+                if not np.all(hit):
+                    logger.info("No intersection for {} points".format(np.sum(~hit)))
             
-            # this updates the estimated asteroid mesh used in both rmesh and est_ast
-            est_ast_rmesh.update(ast_ints, max_angle)
+                # this updates the estimated asteroid mesh used in both rmesh and est_ast
+                est_ast_rmesh.update(ast_ints, max_angle)
             
-            v_group.create_dataset(str(ii), data=est_ast_rmesh.get_verts(), compression=compression,
-                                   compression_opts=compression_opts)
-            f_group.create_dataset(str(ii), data=est_ast_rmesh.get_faces(), compression=compression,
-                                   compression_opts=compression_opts)
-            w_group.create_dataset(str(ii), data=est_ast_rmesh.get_weights(), compression=compression,
-                                   compression_opts=compression_opts)
-
-            state_group.create_dataset(str(ii), data=state, compression=compression,
-                                       compression_opts=compression_opts)
-            targets_group.create_dataset(str(ii), data=targets, compression=compression,
-                                         compression_opts=compression_opts)
-            Ra_group.create_dataset(str(ii), data=Ra, compression=compression,
-                                    compression_opts=compression_opts)
-            inertial_intersections_group.create_dataset(str(ii), data=intersections, compression=compression,
-                                                        compression_opts=compression_opts)
-            asteroid_intersections_group.create_dataset(str(ii), data=ast_ints, compression=compression,
-                                                        compression_opts=compression_opts)
+                writer.append(ii, reconstructed_vertex=est_ast_rmesh.get_verts(),
+                              reconstructed_face=est_ast_rmesh.get_faces(),
+                              reconstructed_weight=est_ast_rmesh.get_weights(),
+                              state=state, targets=targets, Ra=Ra,
+                              inertial_intersections=intersections,
+                              asteroid_intersections=ast_ints)
             
-            ii += 1
+                ii += 1
+
 
     logger.info("Refinement complete")
 
@@ -1205,7 +1162,7 @@ def kinematics_refine_landing_area(filename, asteroid_name, desired_landing_site
 
     v_bumpy, f_bumpy = wavefront.read_obj('./data/shape_model/CASTALIA/castalia_bump_2.obj') 
     # define the initial condition as teh terminal state of the exploration sim
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         state_keys = np.array(utilities.sorted_nicely(list(hf['state'].keys())))
         explore_tf = hf['time'][()][-1]
         explore_state = hf['state/' + str(explore_tf)][()]
@@ -1228,99 +1185,73 @@ def kinematics_refine_landing_area(filename, asteroid_name, desired_landing_site
         refinement_group.create_dataset("time", data=time, compression=compression,
                                         compression_opts=compression_opts)
         refinement_group.create_dataset("initial_state", data=initial_state)
-        v_group = refinement_group.create_group("reconstructed_vertex")
-        f_group = refinement_group.create_group("reconstructed_face")
-        w_group = refinement_group.create_group("reconstructed_weight")
-        state_group = refinement_group.create_group("state")
-        targets_group = refinement_group.create_group("targets")
-        Ra_group = refinement_group.create_group("Ra")
-        inertial_intersections_group = refinement_group.create_group("inertial_intersections")
-        asteroid_intersections_group = refinement_group.create_group("asteroid_intersections")
-
-        logger.info("Estimated asteroid has {} vertices and {} faces".format(
-            est_ast_rmesh.get_verts().shape[0],
-            est_ast_rmesh.get_faces().shape[0]))
-            
-        logger.info("Now refining the faces close to the landing site")
-        # perform remeshing over the landing area and take a bunch of measurements 
-        est_ast_meshdata.remesh_faces_in_view(desired_landing_site, np.deg2rad(20),
-                                              0.01)
-        logger.info("Estimated asteroid has {} vertices and {} faces".format(
-            est_ast_rmesh.get_verts().shape[0],
-            est_ast_rmesh.get_faces().shape[0]))
-        logger.info("Now starting dynamic simulation and taking measurements again again")
-        complete_controller.set_vertices_in_view(est_ast_rmesh, desired_landing_site,
-                                                 np.deg2rad(25))
-        state = initial_state;
-        for ii, t in enumerate(time):
-            Ra = true_ast.rot_ast2int(t)
-            # compute next state to go to
-            complete_controller.refinement(t, state, est_ast_rmesh, est_ast, desired_landing_site)
-            # update the state
-            state[0:3] = Ra.dot(desired_landing_site) * 4
-            # state[0:3] = complete_controller.get_posd()
-            state[3:6] = complete_controller.get_veld()
-            state[6:15] = complete_controller.get_Rd().reshape(-1)
-            state[15:18] = complete_controller.get_ang_vel_d()
-
-            logger.info("Step: {} Time: {} Pos: {} Uncertainty: {}".format(ii, t,
-                                                                           state[0:3],
-                                                                           np.sum(est_ast_rmesh.get_weights())))
-
-            targets = lidar.define_targets(state[0:3],
-                                           state[6:15].reshape((3, 3)),
-                                           np.linalg.norm(state[0:3]))
-            # target = lidar.define_target(state[0:3], state[6:15].reshape((3, 3)),
-            #                              np.linalg.norm(state[0:3]))
-
-            # update the asteroid inside the caster
-            nv = Ra.dot(v_bumpy.T).T
-            
-            caster.update_mesh(nv,f_bumpy)
-
-            # do the raycasting
-            intersections = caster.castarray(state[0:3], targets)
-            ast_ints = []
-            for pt in intersections:
-                if np.linalg.norm(pt) < 1e-9:
-                    logger.info("No intersection for this point")
-                    pt_ast = np.array([np.nan, np.nan, np.nan])
-                else:
-                    pt_ast = Ra.T.dot(pt)
-
-                ast_ints.append(pt_ast)
-            
-            ast_ints = np.array(ast_ints)
-            # this updates the estimated asteroid mesh used in both rmesh and est_ast
-            est_ast_rmesh.update(ast_ints, max_angle, meas_weight=1.0, vert_weight=1.0)
-            # intersection = caster.castray(state[0:3], target)
-            # ast_int = Ra.T.dot(intersection)            
-            # est_ast_rmesh.single_update(ast_int, max_angle) 
-
-            v_group.create_dataset(str(t), data=est_ast_rmesh.get_verts(), compression=compression,
-                                   compression_opts=compression_opts)
-            f_group.create_dataset(str(t), data=est_ast_rmesh.get_faces(), compression=compression,
-                                   compression_opts=compression_opts)
-            w_group.create_dataset(str(t), data=est_ast_rmesh.get_weights(), compression=compression,
-                                   compression_opts=compression_opts)
-
-            state_group.create_dataset(str(t), data=state, compression=compression,
-                                       compression_opts=compression_opts)
-            targets_group.create_dataset(str(t), data=targets, compression=compression,
-                                         compression_opts=compression_opts)
-            # targets_group.create_dataset(str(ii), data=target, compression=compression,
-            #                              compression_opts=compression_opts)
-            Ra_group.create_dataset(str(t), data=Ra, compression=compression,
-                                    compression_opts=compression_opts)
-            inertial_intersections_group.create_dataset(str(t), data=intersections, compression=compression,
-                                                        compression_opts=compression_opts)
-            asteroid_intersections_group.create_dataset(str(t), data=ast_ints, compression=compression,
-                                                        compression_opts=compression_opts)
-            # inertial_intersections_group.create_dataset(str(ii), data=intersection, compression=compression,
-            #                                             compression_opts=compression_opts)
-            # asteroid_intersections_group.create_dataset(str(ii), data=ast_int, compression=compression,
-            #                                             compression_opts=compression_opts)
+        with telemetry.AsyncWriter(telemetry.TimeSeriesWriter(refinement_group, compression=compression,
+                                                              compression_opts=compression_opts,
+                                                              delta=mesh_series)) as writer:
+
+            logger.info("Estimated asteroid has {} vertices and {} faces".format(
+                est_ast_rmesh.get_verts().shape[0],
+                est_ast_rmesh.get_faces().shape[0]))
             
+            logger.info("Now refining the faces close to the landing site")
+            # perform remeshing over the landing area and take a bunch of measurements 
+            est_ast_meshdata.remesh_faces_in_view(desired_landing_site, np.deg2rad(20),
+                                                  0.01)
+            logger.info("Estimated asteroid has {} vertices and {} faces".format(
+                est_ast_rmesh.get_verts().shape[0],
+                est_ast_rmesh.get_faces().shape[0]))
+            logger.info("Now starting dynamic simulation and taking measurements again again")
+            complete_controller.set_vertices_in_view(est_ast_rmesh, desired_landing_site,
+                                                     np.deg2rad(25))
+            state = initial_state;
+            for ii, t in enumerate(time):
+                Ra = true_ast.rot_ast2int(t)
+                # compute next state to go to
+                complete_controller.refinement(t, state, est_ast_rmesh, est_ast, desired_landing_site)
+                # update the state
+                state[0:3] = Ra.dot(desired_landing_site) * 4
+                # state[0:3] = complete_controller.get_posd()
+                state[3:6] = complete_controller.get_veld()
+                state[6:15] = complete_controller.get_Rd().reshape(-1)
+                state[15:18] = complete_controller.get_ang_vel_d()
+
+                logger.info("Step: {} Time: {} Pos: {} Uncertainty: {}".format(ii, t,
+                                                                               state[0:3],
+                                                                               np.sum(est_ast_rmesh.get_weights())))
+
+                targets = lidar.define_targets(state[0:3],
+                                               state[6:15].reshape((3, 3)),
+                                               np.linalg.norm(state[0:3]))
+                # target = lidar.define_target(state[0:3], state[6:15].reshape((3, 3)),
+                #                              np.linalg.norm(state[0:3]))
+
+                # update the bumpy asteroid inside the caster
+                caster.update_mesh(Ra.dot(v_bumpy.T).T, f_bumpy)
+
+                # do the raycasting. Misses are zero rows
+                intersections = caster.castarray(state[0:3], targets)
+                hit = np.linalg.norm(intersections, axis=1) >= 1e-9
+                # convert the intersections to the asteroid frame, NaN for the misses
+                ast_ints = np.where(hit[:, np.newaxis], intersections.dot(Ra), np.nan)
+                if not np.all(hit):
+                    logger.info("No intersection for {} points".format(np.sum(~hit)))
+                # this updates the estimated asteroid mesh used in both rmesh and est_ast
+                est_ast_rmesh.update(ast_ints, max_angle, meas_weight=1.0, vert_weight=1.0)
+                # intersection = caster.castray(state[0:3], target)
+                # ast_int = Ra.T.dot(intersection)            
+                # est_ast_rmesh.single_update(ast_int, max_angle) 
+
+                writer.append(t, reconstructed_vertex=est_ast_rmesh.get_verts(),
+                              reconstructed_face=est_ast_rmesh.get_faces(),
+                              reconstructed_weight=est_ast_rmesh.get_weights(),
+                              state=state, targets=targets, Ra=Ra,
+                              inertial_intersections=intersections,
+                              asteroid_intersections=ast_ints)
+                # inertial_intersections_group.create_dataset(str(ii), data=intersection, compression=compression,
+                #                                             compression_opts=compression_opts)
+                # asteroid_intersections_group.create_dataset(str(ii), data=ast_int, compression=compression,
+                #                                             compression_opts=compression_opts)
+
 
     logger.info("Refinement complete")
 
@@ -1335,7 +1266,7 @@ def landing(filename, desired_landing_site):
     
     # TODO Look at blender_sim
     # get all the terminal states from the exploration stage
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         state_keys = np.array(utilities.sorted_nicely(list(hf['refinement/state'].keys())))
         explore_tf = hf['refinement/time'][()][-1]
         explore_state = hf['refinement/state/' + str(explore_tf)][()]
@@ -1386,27 +1317,25 @@ def landing(filename, desired_landing_site):
         hf.create_dataset("landing/weight", data=explore_w, compression=compression,
                           compression_opts=compression_opts)
 
-        state_group = hf.create_group("landing/state")
-        Ra_group = hf.create_group("landing/Ra")
+        with telemetry.AsyncWriter(telemetry.TimeSeriesWriter(hf['landing'], compression=compression,
+                                                              compression_opts=compression_opts)) as writer:
 
-        # define the system EOMS and simulate
-        system = integrate.ode(eoms.eoms_controlled_land_pybind)
-        system.set_integrator("lsoda", atol=explore_AbsTol, rtol=explore_RelTol,  nsteps=10000)
-        system.set_initial_value(initial_state, t0)
-        system.set_f_params(true_ast, dum, est_ast, desired_landing_site, t0, initial_state[0:3])
+            # define the system EOMS and simulate
+            system = integrate.ode(eoms.eoms_controlled_land_pybind)
+            system.set_integrator("lsoda", atol=explore_AbsTol, rtol=explore_RelTol,  nsteps=10000)
+            system.set_initial_value(initial_state, t0)
+            system.set_f_params(true_ast, dum, est_ast, desired_landing_site, t0, initial_state[0:3])
         
-        ii = 1
-        while system.successful() and system.t < tf:
-            t = system.t + dt
-            state = system.integrate(system.t + dt)
+            ii = 1
+            while system.successful() and system.t < tf:
+                t = system.t + dt
+                state = system.integrate(system.t + dt)
 
-            logger.info("Step: {} Time: {} Pos: {}".format(ii, t, state[0:3]))
+                logger.info("Step: {} Time: {} Pos: {}".format(ii, t, state[0:3]))
             
-            state_group.create_dataset(str(t), data=state, compression=compression,
-                                       compression_opts=compression_opts)
-            Ra_group.create_dataset(str(t), data=est_ast.rot_ast2int(t), compression=compression,
-                                    compression_opts=compression_opts)
-            ii+=1
+                writer.append(t, state=state, Ra=est_ast.rot_ast2int(t))
+                ii+=1
+
 
 def reconstruct_images(filename, output_path="/tmp/reconstruct_images", 
                        magnification=1, show=True):
@@ -1421,7 +1350,7 @@ def reconstruct_images(filename, output_path="/tmp/reconstruct_images",
         os.makedirs(output_path)
     
     logger.info('Opening {}'.format(filename))
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         rv = hf['reconstructed_vertex']
         rf = hf['reconstructed_face']
         rw = hf['reconstructed_weight']
@@ -1520,7 +1449,7 @@ def plot_uncertainty(filename, img_path, show=True):
     logger = logging.getLogger(__name__)
     logger.info("Uncertainty plot as funciton of time")
 
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         rv = hf['reconstructed_vertex']
         rf = hf['reconstructed_face']
         rw = hf['reconstructed_weight']
@@ -1553,7 +1482,7 @@ def animate_uncertainty(filename):
     """Create a 2D projection of the uncertainty of the surface as a function of 
     time
     """
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         rv = hf['reconstructed_vertex']
         rw = hf['reconstructed_weight']
         
@@ -1577,7 +1506,7 @@ def plot_state_trajectory(filename, img_path, show=False):
     This plots the data from the exploration step
     """
 
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         state_group = hf['state']
         Ra_group = hf['Ra']
         rv = hf['reconstructed_vertex']
@@ -1627,7 +1556,7 @@ def plot_state_trajectory(filename, img_path, show=False):
 def plot_volume(filename, img_path, show=True):
     """Compute the volume of the asteroid at each time step
     """
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         rv_group = hf['reconstructed_vertex']
         rf_group = hf['reconstructed_face']
 
@@ -1658,7 +1587,7 @@ def refine_site_plots(input_filename, img_path, show=False):
 
     # generate a surface slope map for each face of an asteroid
     # load a asteroid
-    with h5py.File(input_filename, 'r') as hf:
+    with telemetry.File(input_filename, 'r') as hf:
         state_keys = np.array(utilities.sorted_nicely(list(hf['state'].keys())))
         explore_tf = hf['time'][()][-1]
         explore_name = hf['simulation_parameters/true_asteroid/name'][()]
@@ -1770,7 +1699,7 @@ def landing_site_plots(input_filename, img_path, show=False):
 
     # generate a surface slope map for each face of an asteroid
     # load a asteroid
-    with h5py.File(input_filename, 'r') as hf:
+    with telemetry.File(input_filename, 'r') as hf:
         state_keys = np.array(utilities.sorted_nicely(list(hf['refinement/state'].keys())))
         explore_tf = hf['refinement/time'][()][-1]
         explore_name = hf['simulation_parameters/true_asteroid/name'][()]
@@ -1942,6 +1871,8 @@ if __name__ == "__main__":
     group = parser.add_mutually_exclusive_group()
     # group.add_argument("-s", "--simulate", help="Run the exploration simulation",
     #                    action="store_true")
+    parser.add_argument("--native_eoms", help="For use with the -c, --control_sim option. Integrate the compiled equations of motion",
+                        action="store_true")
     group.add_argument("-c", "--control_sim", help="Exploration with a control cost component",
                        action="store_true")
     group.add_argument("-a", "--animate", help="Animate the data from the exploration sim",
@@ -1981,7 +1912,7 @@ if __name__ == "__main__":
                         
 
     if args.control_sim:
-        simulate_control(args.simulation_data, args.name)
+        simulate_control(args.simulation_data, args.name, native_eoms=args.native_eoms)
     elif args.reconstruct:
         reconstruct_images(args.simulation_data,output_path=args.reconstruct , magnification=args.magnification,
                            show=args.show)
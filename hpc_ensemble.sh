@@ -0,0 +1,24 @@
+#!/bin/bash
+
+# set output and error output filenames, %j will be replaced by Slurm with the jobid
+#SBATCH -o dbens_%j.out
+#SBATCH -e dbens_%j.err 
+
+#SBATCH --mail-type=ALL
+#SBATCH --mail-user=skulumani@gwu.edu
+
+#SBATCH -N 1
+#SBATCH -c 16
+#SBATCH -p short
+
+# set the correct directory - cloned via git
+#SBATCH -D /home/skulumani/asteroid_dumbbell
+
+#SBATCH -J dbens
+#SBATCH --export=NONE
+
+#SBATCH -t 00-06:00:00
+
+module load anaconda/4.2.0
+
+python3 inertial_driver.py castalia 64 1e4 1e3 castalia_64_1e4_ensemble.hdf5 -m 2 -k 4096 -p 16
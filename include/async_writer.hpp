@@ -0,0 +1,110 @@
+/**
+    Background thread for writing simulation output
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+#ifndef ASYNC_WRITER_H
+#define ASYNC_WRITER_H
+
+#include <Eigen/Dense>
+
+#include <condition_variable>
+#include <deque>
+#include <exception>
+#include <functional>
+#include <mutex>
+#include <string>
+#include <thread>
+
+/** @class AsyncWriter
+
+    @brief Run writes on a worker thread so the simulation loop does not wait
+
+    Each call to write copies the data and queues the write to an
+    HDF5::Group (or anything else with a write(name, data) member). The
+    queue is bounded, so a loop producing data faster than it can be
+    written blocks instead of using up memory. The destructor drains the
+    queue, so declaring the writer after the groups it writes to makes it
+    flush before they are closed, including when an exception unwinds the
+    loop.
+
+    Only the worker touches the groups once writes are queued. Anything
+    else written to the same file from the calling thread should be done
+    before the first write or after close.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+class AsyncWriter {
+    public:
+        /** @fn AsyncWriter(const std::size_t& max_queue)
+
+            Start the worker thread
+
+            @param max_queue Number of writes which can wait in the queue
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        explicit AsyncWriter(const std::size_t& max_queue = 64);
+        virtual ~AsyncWriter( void );
+
+        AsyncWriter(const AsyncWriter&) = delete;
+        AsyncWriter& operator=(const AsyncWriter&) = delete;
+
+        /** @fn void write(Group& group, const std::string& name, const Eigen::MatrixBase<Derived>& data)
+
+            Copy data and queue group.write(name, data). The group must
+            outlive the writer
+
+            @param group HDF5::Group to write into
+            @param name Name of the dataset
+            @param data Eigen matrix, copied before this returns
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        template<typename Group, typename Derived>
+        void write(Group& group, const std::string& name,
+                   const Eigen::MatrixBase<Derived>& data) {
+            typename Derived::PlainObject snapshot(data);
+            push([&group, name, snapshot]() { group.write(name, snapshot); });
+        }
+
+        /** @fn void push(std::function<void( void )> task)
+
+            Queue any task for the worker. Blocks while the queue is full and
+            rethrows an exception from an earlier task
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void push(std::function<void( void )> task);
+
+        /** @fn void close( void )
+
+            Finish every queued task and stop the worker. Rethrows the first
+            exception thrown by a task. Calling it again does nothing
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void close( void );
+
+        std::size_t size( void );
+
+    private:
+        void run( void );
+        void rethrow( void );
+
+        std::deque<std::function<void( void )> > queue;
+        std::size_t max_queue;
+        std::mutex mutex;
+        std::condition_variable not_empty, not_full;
+        bool closing = false;
+        std::exception_ptr error; /**< First exception thrown by a task */
+        std::thread worker;
+};
+
+#endif
@@ -8,6 +8,7 @@
 
 #include <memory>
 #include <cmath>
+#include <tuple>
 
 // Use the dD spatial searching package for finding nearest vertices/primitives
 class MeshDistance {
@@ -23,6 +24,27 @@ class MeshDistance {
         Vertex_point_pmap vppmap;
 };
 
+/** @struct RayCastResult
+
+    @brief Everything known about a bundle of ray casts
+
+    Each member has one row per ray. Rays which miss the mesh have a false 
+    hit, a face of -1, and NaN everywhere else, so they drop out of any 
+    later computation rather than looking like a point at the origin.
+    castbundle uses the same encoding. Only the older castray and 
+    castarray return a zero row for a miss.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+struct RayCastResult {
+    Eigen::Array<bool, Eigen::Dynamic, 1> hit; /**< True if the ray hit the mesh */
+    Eigen::Matrix<double, Eigen::Dynamic, 3> intersections; /**< First intersection in the output frame */
+    Eigen::VectorXi faces; /**< Face_index of the face that was hit */
+    Eigen::VectorXd ranges; /**< Distance from the source to the intersection */
+    Eigen::VectorXd incidence; /**< Angle between the ray and the face normal in rad */
+};
+
 class RayCaster {
     public:
         RayCaster( void );
@@ -41,19 +63,88 @@ class RayCaster {
         bool intersection(const Eigen::Ref<const Eigen::Vector3d>& psource,
                           const Eigen::Ref<const Eigen::Vector3d>& ptarget);
 
-        // cast ray function
+        // cast ray function. A miss is a zero row, unlike castbundle and cast
         Eigen::Matrix<double, 1, 3> castray(const Eigen::Ref<const Eigen::Vector3d>& psource,
-                const Eigen::Ref<const Eigen::Vector3d>& ptarget);
+                const Eigen::Ref<const Eigen::Vector3d>& ptarget) const;
 
-        // cast many rays function
+        // cast many rays from one source. Misses are zero rows like castray
         Eigen::Matrix<double, Eigen::Dynamic, 3> castarray(const Eigen::Ref<const Eigen::Vector3d> &psource,
-                                                           const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> > &targets);
+                                                           const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> > &targets) const;
+        
+        /** @fn castbundle(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+         *                 const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets) const
+                
+            Cast a bundle of N rays from each of M sources. The rays are
+            spread over OpenMP threads.
+
+            @param sources M x 3 ray origins
+            @param targets (M N) x 3 points on each ray. Rows m N to 
+                (m + 1) N - 1 belong to source m
+            @returns intersections (M N) x 3 first intersection of each ray,
+                NaN if it misses (castray and castarray give zero instead)
+            @returns faces (M N) index of the face that was hit, -1 on a miss
+            @returns ranges (M N) distance from the source to the 
+                intersection, NaN on a miss
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        std::tuple<Eigen::Matrix<double, Eigen::Dynamic, 3>,
+                   Eigen::VectorXi,
+                   Eigen::VectorXd> castbundle(
+                           const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                           const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets) const;
+
+        /** @fn RayCastResult cast(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+         *                        const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets,
+         *                        const Eigen::Ref<const Eigen::Matrix3d>& R_out) const
+                
+            Cast a bundle of rays like castbundle but return a RayCastResult.
+            Misses are encoded the same way as in castbundle.
+            The intersections are rotated into the caller's frame, so for 
+            example R_out = Ra^T gives points in the asteroid fixed frame.
+            The incidence angle is 0 for a ray along the face normal and 
+            pi/2 for a grazing ray.
+
+            @param sources M x 3 ray origins
+            @param targets (M N) x 3 points on each ray
+            @param R_out Rotation from the frame of the rays to the output 
+                frame. Identity if omitted
+            @returns result RayCastResult with (M N) rows
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        RayCastResult cast(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                           const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets,
+                           const Eigen::Ref<const Eigen::Matrix3d>& R_out) const;
+        RayCastResult cast(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                           const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets) const;
     
         // update the raycaster with a new mesh ptr
         void update_mesh(std::shared_ptr<const MeshData> mesh_in);
         void update_mesh(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& V_in,
                          const Eigen::Ref<const Eigen::Matrix<int, Eigen::Dynamic, 3> >& F_in);
 
+        /** @fn void set_pose(const Eigen::Ref<const Eigen::Matrix3d>& Ra_in)
+                
+            Set the rotation of the mesh. The mesh is kept in its own 
+            (asteroid fixed) frame and every ray, point, and intersection is
+            rotated instead, so a rigid body can be moved without rebuilding
+            the AABB tree. The inputs and outputs of castray, castarray, 
+            intersection, and minimum_distance are all in the rotated frame.
+            The default is the identity.
+
+            @param Ra_in Rotation from the mesh frame to the frame of the rays
+                (v_rotated = Ra * v)
+            @returns None
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void set_pose(const Eigen::Ref<const Eigen::Matrix3d>& Ra_in) { Ra = Ra_in; }
+        Eigen::Matrix3d get_pose( void ) const { return Ra; }
+
         /**
             Compute the minimum distance to the mesh
 
@@ -67,9 +158,18 @@ class RayCaster {
 
         void minimum_primitive(const Eigen::Ref<const Eigen::Vector3d> &pt);
     private:
+        // insert the faces of mesh into a fresh tree and build it
+        void build_tree( void );
+        
+        // first intersection along a ray, everything in the mesh frame
+        bool first_hit(const Eigen::Ref<const Eigen::Vector3d>& source,
+                const Eigen::Ref<const Eigen::Vector3d>& target,
+                Eigen::Ref<Eigen::Vector3d> pint, int& face) const;
+
         // needs the mesh to operate on
         std::shared_ptr<const MeshData> mesh;
         AABB_Tree tree; // holds the AABB tree for CGAL distance computations
+        Eigen::Matrix3d Ra = Eigen::Matrix3d::Identity(); /**< Rotation of the mesh */
 };
 
 #endif
@@ -0,0 +1,189 @@
+/**
+    Equations of motion of the controlled dumbbell and an integrator for them
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+#ifndef EOMS_H
+#define EOMS_H
+
+#include <Eigen/Dense>
+
+#include <functional>
+#include <limits>
+#include <memory>
+
+class Asteroid;
+
+/** @class Dumbbell
+
+    @brief Two spherical masses on a rigid link
+
+    The same model and tracking gains as dynamics/dumbbell.py, so the
+    attributes match those of the Python Dumbbell
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+class Dumbbell {
+    public:
+        /** @fn Dumbbell(const double& m1, const double& m2, const double& l)
+
+            @param m1 Mass in kg of the first sphere
+            @param m2 Mass in kg of the second sphere
+            @param l Length in km of the link between them
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        Dumbbell(const double& m1_in = 100.0, const double& m2_in = 100.0,
+                 const double& l_in = 0.003);
+        virtual ~Dumbbell( void ) {}
+
+        double m1, m2; /**< Mass of each sphere - kg */
+        double l; /**< Length of the link - km */
+        double r1 = 0.001, r2 = 0.001; /**< Radius of each sphere - km */
+
+        Eigen::Vector3d zeta1, zeta2; /**< Position of each mass from the center of mass in the body frame */
+        Eigen::Matrix3d J; /**< Moment of inertia about the center of mass */
+        Eigen::Matrix3d Jinv;
+
+        double kR, kW; /**< Attitude tracking gains */
+        double kx, kv; /**< Translation tracking gains */
+};
+
+/** @struct DesiredState
+
+    @brief Commands from the Controller held between plans
+
+    All of them are in the asteroid fixed frame, as given by the getters of
+    the Controller
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+struct DesiredState {
+    Eigen::Matrix3d Rd = Eigen::Matrix3d::Identity();
+    Eigen::Matrix3d Rd_dot = Eigen::Matrix3d::Zero();
+    Eigen::Vector3d ang_vel_d = Eigen::Vector3d::Zero();
+    Eigen::Vector3d ang_vel_d_dot = Eigen::Vector3d::Zero();
+    Eigen::Vector3d posd = Eigen::Vector3d::Zero();
+    Eigen::Vector3d veld = Eigen::Vector3d::Zero();
+    Eigen::Vector3d acceld = Eigen::Vector3d::Zero();
+};
+
+/** @class ControlledDumbbell
+
+    @brief Inertial equations of motion of the dumbbell tracking a held command
+
+    The compiled version of eoms_controlled_inertial_held in
+    dynamics/eoms.py. The gravity of the true asteroid acts on both masses
+    and the geometric attitude and translation controllers of
+    dynamics/controller.py track the DesiredState. When an estimated
+    asteroid is given the controllers cancel its gravity instead, and the
+    desired angular velocity is rotated to the inertial frame, as in
+    eoms_controlled_inertial_control_cost_held.
+
+    The state is the 18 vector used everywhere else: position, velocity,
+    row major R (body to inertial) and angular velocity in the body frame.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+class ControlledDumbbell {
+    public:
+        typedef Eigen::Matrix<double, 18, 1> StateVector;
+
+        ControlledDumbbell(std::shared_ptr<Asteroid> true_ast_in,
+                           const Dumbbell& dum_in,
+                           std::shared_ptr<Asteroid> est_ast_in = nullptr);
+        virtual ~ControlledDumbbell( void ) {}
+
+        /** @fn StateVector operator()(const double& t, const Eigen::Ref<const StateVector>& state)
+
+            Derivative of the state at time t
+
+            @param t Simulation time in sec
+            @param state 18 state vector in the inertial frame
+            @returns state_dot Derivative of the state
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        StateVector operator()(const double& t, const Eigen::Ref<const StateVector>& state);
+
+        void set_command(const DesiredState& command_in) { command = command_in; }
+        DesiredState get_command( void ) const { return command; }
+
+        Dumbbell get_dumbbell( void ) const { return dum; }
+
+    private:
+        std::shared_ptr<Asteroid> true_ast;
+        std::shared_ptr<Asteroid> est_ast;
+        Dumbbell dum;
+        DesiredState command;
+};
+
+/** @class DormandPrince
+
+    @brief Adaptive Runge-Kutta 5(4) integrator with dense output
+
+    The Dormand-Prince pair with the error control and fourth order
+    continuous extension of DOPRI5 (Hairer, Norsett and Wanner). The step
+    size only depends on the tolerances, so asking for many output times
+    costs no more function evaluations than asking for the last one.
+
+    It is an explicit method. The tracking gains on the small inertia of
+    the default dumbbell make the attitude loop stiff, and for that
+    ControlledDumbbell is better given to LSODA as the right hand side.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+class DormandPrince {
+    public:
+        typedef std::function<Eigen::VectorXd(const double&, const Eigen::Ref<const Eigen::VectorXd>&)> Function;
+
+        DormandPrince(const double& AbsTol_in = 1e-9, const double& RelTol_in = 1e-9,
+                      const double& max_step_in = std::numeric_limits<double>::infinity());
+        virtual ~DormandPrince( void ) {}
+
+        /** @fn Eigen::MatrixXd integrate(const Function& f, const double& t0, const Eigen::Ref<const Eigen::VectorXd>& y0, const Eigen::Ref<const Eigen::VectorXd>& times)
+
+            Integrate from (t0, y0) and return the state at each time
+
+            @param f Right hand side f(t, y)
+            @param t0 Initial time
+            @param y0 Initial state
+            @param times Increasing output times, all at or after t0
+            @returns y Matrix with the state at times(ii) in row ii
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        Eigen::MatrixXd integrate(const Function& f, const double& t0,
+                                  const Eigen::Ref<const Eigen::VectorXd>& y0,
+                                  const Eigen::Ref<const Eigen::VectorXd>& times);
+
+        Eigen::MatrixXd integrate(ControlledDumbbell& eoms, const double& t0,
+                                  const Eigen::Ref<const Eigen::VectorXd>& y0,
+                                  const Eigen::Ref<const Eigen::VectorXd>& times);
+
+        std::size_t get_num_evals( void ) const { return num_evals; }
+        std::size_t get_num_steps( void ) const { return num_steps; }
+        std::size_t get_num_rejected( void ) const { return num_rejected; }
+        double get_step( void ) const { return h; }
+
+    private:
+        double initial_step(const Function& f, const double& t0,
+                            const Eigen::Ref<const Eigen::VectorXd>& y0,
+                            const Eigen::Ref<const Eigen::VectorXd>& f0);
+
+        double AbsTol, RelTol;
+        double max_step;
+        double h = 0; /**< Last accepted step size */
+
+        std::size_t num_evals = 0, num_steps = 0, num_rejected = 0;
+};
+
+#endif
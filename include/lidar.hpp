@@ -9,6 +9,50 @@
 
 #include <Eigen/Dense>
 
+#include <random>
+
+/** @enum ScanPattern
+
+    @brief Layout of the rays across the field of view
+    
+    RASTER is the original num_steps x num_steps grid. SPIRAL walks out from
+    the view axis along an Archimedean spiral with num_steps turns. LISSAJOUS
+    follows a Lissajous figure with frequencies num_steps and num_steps + 1,
+    like a resonant scanning mirror. RANDOM is uniform over the field of 
+    view, drawn from the seed of the Lidar. All of them have num_steps^2 rays
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+enum class ScanPattern {
+    RASTER,
+    SPIRAL,
+    LISSAJOUS,
+    RANDOM
+};
+
+/** @enum RangeNoise
+
+    @brief Error model for the range of each measurement
+    
+    NONE leaves the intersections alone. GAUSSIAN is zero mean with sigma 
+    as the 3 sigma bound, and UNIFORM is spread evenly over [-sigma, sigma].
+    
+    sigma used to be the 3 sigma uncertainty of the view axis, which 
+    nothing read. It is now the range error, in the same units as dist. 
+    NONE is the default, so a Lidar only becomes noisy once a model is 
+    chosen with Lidar::range_noise, and any sigma carried over from older
+    code should be checked against its new meaning first.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+enum class RangeNoise {
+    NONE,
+    GAUSSIAN,
+    UNIFORM
+};
+
 /** @class Lidar
 
     @brief Lidar class allowing for the defination of targets and directions
@@ -66,6 +110,25 @@ class Lidar {
             init();
             return *this;
         }
+
+        inline Lidar& scan_pattern(const ScanPattern &pattern_in) {
+            mpattern = pattern_in;
+            init();
+            return *this;
+        }
+        
+        inline Lidar& range_noise(const RangeNoise &noise_in) {
+            mnoise = noise_in;
+            return *this;
+        }
+        
+        // restarts the range noise and redraws a RANDOM scan pattern
+        inline Lidar& seed(const unsigned int &seed_in) {
+            mseed = seed_in;
+            mgen.seed(mseed);
+            init();
+            return *this;
+        }
         /** @fn Lidar(const Eigen::Ref<const Eigen::Vector3d> &view_axis, const Eigen::Ref<const Eigen::Vector3d> &up_axis, const Eigen::Ref<const Eigen::Vector2d> &fov, const double &sigma, const double &dist, const int &num_steps)
          *
             Construct the lidar object from some view parameters
@@ -73,7 +136,9 @@ class Lidar {
             @param view_axis Eigen vector3d defining the view axis in camera frame
             @param up_axis Eigen vector3d defining the up axis in the camera frame
             @param fov eigen vector2d array of horizontal and vertical field of view in radians
-            @param sigma 3 sigma uncertainty of the view axis (not really used yet)
+            @param sigma 3 sigma range error of the RangeNoise model, same units 
+                as dist. This was the unused view axis uncertainty before
+                RangeNoise, see there
             @param dist distance to scale each unit vector
             @param num_step number of steps across the field of view to define the view arrays
 
@@ -111,16 +176,98 @@ class Lidar {
         Eigen::RowVector3d define_target(const Eigen::Ref<const Eigen::RowVector3d> &pos,
                                                   const Eigen::Ref<const Eigen::Matrix<double, 3, 3> > &R_b2f,
                                                   const double &dist);
+        /** @fn Eigen::Matrix<double, Eigen::Dynamic, 3> define_targets_batch(
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& pos,
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 9, Eigen::RowMajor> >& R_b2f,
+                const Eigen::Ref<const Eigen::VectorXd>& dist) const
+            
+            Targets for T poses. The transposed rotations are stacked side
+            by side so all of the poses are rotated by one matrix product
+
+            @param pos T x 3 position of the sensor for each pose
+            @param R_b2f T x 9 row major body to frame rotation of each pose
+            @param dist T distances to scale the unit vectors
+            @returns targets (T N) x 3, rows t N to (t + 1) N - 1 are 
+                define_targets(pos.row(t), R_b2f.row(t), dist(t)). This is 
+                the order of the targets for T sources in RayCaster::cast
+            @throws std::invalid_argument if R_b2f or dist do not have a 
+                row for each position
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        Eigen::Matrix<double, Eigen::Dynamic, 3> define_targets_batch(
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& pos,
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 9, Eigen::RowMajor> >& R_b2f,
+                const Eigen::Ref<const Eigen::VectorXd>& dist) const;
+        
+        /** @fn Eigen::Matrix<double, Eigen::Dynamic, 3> define_trajectory_targets(
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 18, Eigen::RowMajor> >& state) const
+            
+            Targets along a state history. Each target is scaled by the 
+            distance of the spacecraft from the origin like the simulations
+
+            @param state T x 18 position, velocity, R_b2i, and angular velocity
+            @returns targets (T N) x 3 in the same order as define_targets_batch
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        Eigen::Matrix<double, Eigen::Dynamic, 3> define_trajectory_targets(
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 18, Eigen::RowMajor> >& state) const;
+
+        /** @fn Eigen::VectorXd sample_range_noise(const int& num)
+            
+            Draw range errors from the RangeNoise model. Successive calls
+            continue the random sequence started by seed
+
+            @param num Number of samples
+            @returns noise num range errors, zero for RangeNoise::NONE
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        Eigen::VectorXd sample_range_noise(const int& num);
+        
+        /** @fn Eigen::Matrix<double, Eigen::Dynamic, 3> add_range_noise(
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& intersections)
+            
+            Move each intersection along its ray by a sampled range error.
+            Rays which missed are returned unchanged, both the NaN rows of
+            RayCaster::castbundle and cast and the zero rows of castray and
+            castarray
+
+            @param sources M x 3 positions of the sensor
+            @param intersections (M N) x 3 intersections, N for each source
+                in the same order as RayCaster::cast
+            @returns noisy (M N) x 3 measured points
+            @throws std::invalid_argument if there are no sources or the
+                intersections are not a multiple of them
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        Eigen::Matrix<double, Eigen::Dynamic, 3> add_range_noise(
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& intersections);
+
         // Lidar getters
         Eigen::Vector3d get_view_axis( void ) const;
         Eigen::Vector3d get_up_axis( void ) const;
         Eigen::Matrix<double, Eigen::Dynamic, 3> get_lidar_array( void ) const;
         Eigen::Vector2d get_fov( void ) const;
+        ScanPattern get_scan_pattern( void ) const { return mpattern; }
+        RangeNoise get_range_noise( void ) const { return mnoise; }
+        double get_sigma( void ) const { return msigma; }
+        unsigned int get_seed( void ) const { return mseed; }
 
     private:
         /** @fn void init( void )
                 
-            Initialize some of the Lidar parameters
+            Initialize some of the Lidar parameters. The ray table 
+            mlidar_array is only built here, when the configuration 
+            changes, and reused by every define_targets call
 
             @author Shankar Kulumani
             @version 17 April 2017
@@ -135,6 +282,10 @@ class Lidar {
         double msigma;
         double mdist;
         int mnum_steps;
+        ScanPattern mpattern = ScanPattern::RASTER;
+        RangeNoise mnoise = RangeNoise::NONE;
+        unsigned int mseed = 0;
+        std::mt19937 mgen{mseed}; /**< Generator for the range noise, always started from mseed */
 
 };
 
@@ -5,6 +5,7 @@
 
 #include <Eigen/Dense>
 
+#include <set>
 #include <vector>
 
 // This data holds the polyhedorn and mesh
@@ -136,6 +137,68 @@ class MeshData {
         */
         bool set_vertex(const Vertex_index& vd,
                 const Eigen::Ref<const Eigen::Vector3d>& vec);
+
+        /** @fn bool move_vertex(const Vertex_index& vd,
+         *              const Eigen::Ref<const Eigen::Vector3d>& vec)
+                
+            Update the position of a single vertex but defer the property
+            update. The vertex is marked dirty and the faces, halfedges, and
+            edges around it are only recomputed by update_dirty_properties.
+            Moving many vertices which share faces this way computes each
+            face once rather than once per vertex.
+
+            @param vd Vertex index to modify
+            @param vec Eigen vector of the new vertex position
+            @returns bool True if good
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        bool move_vertex(const Vertex_index& vd,
+                const Eigen::Ref<const Eigen::Vector3d>& vec);
+
+        /** @fn std::size_t update_dirty_properties( void )
+                
+            Recompute the properties of every face, halfedge, and edge 
+            touching a vertex moved by move_vertex, then clear the dirty set
+
+            @returns num_vertices Number of dirty vertices that were flushed
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        std::size_t update_dirty_properties( void );
+        
+        /** @fn std::size_t get_revision( void ) const
+                
+            Counter which changes whenever the mesh is edited by anything
+            other than move_vertex: update_mesh, set_vertex, refine_faces,
+            and remesh_faces. move_vertex is only used for radial updates
+            by ReconstructMesh, so caches of vertex directions stay valid.
+
+            @returns revision Number of edits so far
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        std::size_t get_revision( void ) const { return revision; }
+
+        /** @fn std::size_t get_shape_revision( void ) const
+                
+            Counter which changes whenever any vertex position changes,
+            including move_vertex. Unlike the dirty set it is not reset by
+            update_dirty_properties, so a cache of the shape (e.g. the 
+            GravityKernel of an Asteroid) can tell it is stale even after 
+            someone else has flushed the moved vertices.
+
+            @returns shape_revision Number of shape changes so far
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        std::size_t get_shape_revision( void ) const { return shape_revision; }
+        bool has_dirty_vertices( void ) const { return !dirty_vertices.empty(); }
+        std::size_t number_of_dirty_vertices( void ) const { return dirty_vertices.size(); }
         
         /** @fn Eigen::RowVector3i get_face_vertices(const Index& index) const;
                 
@@ -345,6 +408,10 @@ class MeshData {
 
 
         bool remesh_faces(const std::vector<Face_index>& face_vec);
+
+        std::set<Vertex_index> dirty_vertices; /**< Moved without a property update */
+        std::size_t revision = 0; /**< Bumped by every edit except move_vertex */
+        std::size_t shape_revision = 0; /**< Bumped by every edit including move_vertex */
 };
 
 
@@ -17,6 +17,7 @@
 #include <tuple>
 #include <memory>
 #include <string>
+#include <limits>
 
 /** @class MeshParam
 
@@ -57,6 +58,9 @@ class MeshParam {
             @version 3 May 2018
         */
         void edge_dyad( void );
+        
+        // edge dyad of edge (0, 1, 2) of a face from the normals of both faces sharing it
+        Eigen::Matrix3d face_edge_dyad(const int& face, const int& edge) const;
 
     public:
         MeshParam( void ) {};
@@ -73,12 +77,49 @@ class MeshParam {
         Eigen::MatrixXd get_verts( void ) const { return mesh->get_verts(); }
         Eigen::MatrixXi get_faces( void ) const { return mesh->get_faces(); }
         
+        /** @fn void update_mesh(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& V_in,
+         *                      const Eigen::Ref<const Eigen::Matrix<int, Eigen::Dynamic, 3> >& F_in)
+                
+            Replace the mesh and recompute every parameter. This is always
+            a full O(F log F) rebuild, including the sorted edge maps. 
+            Vertices moved by reconstruction should use 
+            update_moved_vertices instead.
+
+            @param V_in Vertices
+            @param F_in Faces
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
         void update_mesh(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& V_in,
                          const Eigen::Ref<const Eigen::Matrix<int, Eigen::Dynamic, 3> >& F_in);
+        
+        /** @fn std::vector<int> update_moved_vertices( void )
+                
+            Catch up with vertices moved by MeshData::move_vertex, e.g. by
+            a ReconstructMesh sharing the mesh. The moved vertices are the
+            ones which differ from verts, so this works even after the 
+            dirty set of the mesh was flushed. A move keeps the 
+            connectivity, so only the faces around the moved vertices and 
+            the edge dyads of those faces and their neighbors are 
+            recomputed. Any other edit of the mesh (mesh_revision differs 
+            from MeshData::get_revision) needs update_mesh or a new 
+            MeshParam instead.
+
+            @returns faces Sorted indices of the faces which moved
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        std::vector<int> update_moved_vertices( void );
 
         // define all the member variables
         std::size_t num_v, num_f, num_e;
         
+        Eigen::Matrix<double, Eigen::Dynamic, 3> verts; /**< Vertices the parameters were computed from */
+        std::size_t mesh_revision = 0; /**< MeshData::get_revision when last built */
+        std::vector<std::vector<int> > vf_map; /**< Faces around each vertex */
+        
         // Try to get rid of and use indexing instead
         Eigen::Matrix<int, Eigen::Dynamic, 1> Fa, Fb, Fc;
         Eigen::Matrix<double, Eigen::Dynamic, 3> e1, e2, e3;
@@ -90,7 +131,11 @@ class MeshParam {
         
         // required unique_index, e_vertex_map
         Eigen::MatrixXi unique_index; /**< Unique indices of e_vertex_map_sorted */
+        Eigen::MatrixXi edge_index; /**< Unique edge of each row of e_vertex_map_stacked */
         Eigen::MatrixXi e_vertex_map, e_vertex_map_stacked, e_vertex_map_sorted;
+        
+        // face, then the matching row of e1, e2, e3_vertex_map or -1
+        Eigen::MatrixXi e1_face_map, e2_face_map, e3_face_map;
 
         Eigen::Matrix<double, Eigen::Dynamic, 3> normal_face,
                                                  e1_normal,
@@ -104,6 +149,158 @@ class MeshParam {
 
 };
 
+/** @struct PotentialResult
+
+    @brief Output of a single polyhedron potential evaluation
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+struct PotentialResult {
+    double U = 0; /**< Potential - km^2/sec^2 */
+    Eigen::Vector3d U_grad = Eigen::Vector3d::Zero(); /**< Acceleration - km/sec^2 */
+    Eigen::Matrix3d U_grad_mat = Eigen::Matrix3d::Zero(); /**< Gradient matrix - 1/sec^2 */
+    double Ulaplace = 0; /**< Laplacian */
+    bool inside = false; /**< True if the point is inside the body */
+};
+
+/** @enum ThreadPolicy
+
+    @brief How a single potential evaluation uses threads
+    
+    SERIAL never starts any threads. PARALLEL_FACES opens one OpenMP region
+    per evaluation and splits the faces and edges across the team, which is
+    worth it for large meshes evaluated one point at a time. 
+    CALLER_MANAGED keeps each evaluation serial and leaves the threading to 
+    the caller, e.g. polyhedron_potential_batch runs its points in parallel
+    or a thread pool integrating many trajectories.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+enum class ThreadPolicy {
+    SERIAL,
+    PARALLEL_FACES,
+    CALLER_MANAGED
+};
+
+/** @struct PotentialSums
+
+    @brief Running face and edge summations of the polyhedron potential
+
+    Each thread accumulates over its own block of faces/edges and the 
+    blocks are added together before forming the final result.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+struct PotentialSums {
+    double w_sum = 0, U_face = 0, U_edge = 0;
+    Eigen::Vector3d U_grad_face = Eigen::Vector3d::Zero();
+    Eigen::Vector3d U_grad_edge = Eigen::Vector3d::Zero();
+    Eigen::Matrix3d U_mat_face = Eigen::Matrix3d::Zero();
+    Eigen::Matrix3d U_mat_edge = Eigen::Matrix3d::Zero();
+
+    PotentialSums& operator+=(const PotentialSums& other);
+    
+    // zero when outside the body and 4 pi inside
+    bool inside( void ) const { return w_sum >= 1e-10; }
+    
+    PotentialResult result(const double& G, const double& sigma) const;
+};
+
+/** @class GravityKernel
+
+    @brief Flat copy of a polyhedron for fast potential evaluation
+    
+    All of the data needed by the polyhedron potential is copied out of 
+    MeshParam into contiguous structure of array buffers. Each column of the
+    Eigen matrices below holds a single component for every face/edge so the
+    inner loops are simple strided free loops which the compiler can 
+    vectorize. The face dyad is F = n n^T so only the face normal is stored.
+
+    The kernel is a snapshot of the mesh. It must be rebuilt if the mesh is
+    edited, or updated with update_faces if vertices were only moved.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+class GravityKernel {
+    private:
+        std::size_t num_f, num_e;
+
+        Eigen::Matrix<double, Eigen::Dynamic, 9> face_vertex; /**< ax, ay, az, bx, by, bz, cx, cy, cz */
+        Eigen::Matrix<double, Eigen::Dynamic, 3> face_normal; /**< nx, ny, nz */
+
+        Eigen::Matrix<double, Eigen::Dynamic, 6> edge_vertex; /**< Both endpoints of each unique edge */
+        Eigen::Matrix<double, Eigen::Dynamic, 9> edge_dyad; /**< E_00, E_01, ..., E_22 */
+        Eigen::VectorXd edge_length;
+        
+        // copy a single face/edge out of MeshParam
+        void set_face(const MeshParam& param, const std::size_t& ii);
+        void set_edge(const MeshParam& param, const std::size_t& ii);
+
+        // accumulate faces/edges [begin, end) into sums
+        void face_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+                const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const;
+        void edge_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+                const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const;
+
+    public:
+        GravityKernel( void ) {};
+        virtual ~GravityKernel( void ) {};
+        
+        /** @fn GravityKernel(const MeshParam& param)
+                
+            Copy the face and unique edge data out of MeshParam
+
+            @param param MeshParam of the polyhedron
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        GravityKernel(const MeshParam& param);
+        
+        /** @fn void update_faces(const MeshParam& param, const std::vector<int>& faces)
+                
+            Copy the given faces, and every edge of them, out of MeshParam
+            again after MeshParam::update_moved_vertices
+
+            @param param MeshParam the kernel was built from
+            @param faces Faces returned by update_moved_vertices
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void update_faces(const MeshParam& param, const std::vector<int>& faces);
+        
+        /** @fn PotentialResult evaluate(const Eigen::Ref<const Eigen::Vector3d>& state,
+         *                              const double& G, const double& sigma,
+         *                              const ThreadPolicy& policy) const
+                
+            Compute the polyhedron potential at the given state. The face 
+            factor, edge factor and their contributions are all computed in
+            a single pass over the faces and edges.
+
+            @param state Position in the body fixed frame in km
+            @param G Gravitational constant
+            @param sigma Density
+            @param policy Threading policy for this evaluation
+            @returns result PotentialResult 
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        PotentialResult evaluate(const Eigen::Ref<const Eigen::Vector3d>& state,
+                const double& G, const double& sigma,
+                const ThreadPolicy& policy=ThreadPolicy::SERIAL) const;
+
+        std::size_t number_of_faces( void ) const { return num_f; }
+        std::size_t number_of_edges( void ) const { return num_e; }
+};
+
+class GravityGrid;
+
 class Asteroid {
     private: 
         // member variables to hold the potential
@@ -115,6 +312,13 @@ class Asteroid {
         double omega; /**< Rotation rate - rad/sec */
 
         std::shared_ptr<MeshData> mesh_data;
+        // caches of the shape, only brought up to date by refresh
+        std::shared_ptr<MeshParam> param; /**< Parameters the kernel was copied from */
+        std::shared_ptr<GravityKernel> kernel; /**< Optional flat copy of mesh_data */
+        std::size_t kernel_revision = 0; /**< Shape revision of mesh_data in kernel */
+        std::shared_ptr<const GravityGrid> grid; /**< Optional interpolated field */
+        std::size_t grid_revision = 0; /**< Shape revision of mesh_data in grid */
+        ThreadPolicy policy = ThreadPolicy::CALLER_MANAGED;
 
         double mU; 
         Eigen::Vector3d mU_grad;
@@ -123,10 +327,11 @@ class Asteroid {
 
         void init_asteroid( void );
         
-        std::tuple<double, Eigen::Vector3d, Eigen::Matrix3d> face_contribution(
-                const Eigen::Ref<const Eigen::Vector3d>& state) const;
-        std::tuple<double, Eigen::Vector3d, Eigen::Matrix3d> edge_contribution(
-                const Eigen::Ref<const Eigen::Vector3d>& state) const;
+        // accumulate faces/edges [begin, end) of the surface mesh into sums
+        void face_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+                const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const;
+        void edge_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+                const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const;
 
     public:
         Asteroid ( void ) {};
@@ -140,7 +345,9 @@ class Asteroid {
 
         /** @fn void polyhedron_potential(const Eigen::Ref<const Eigen::Vector3d>& state)
                 
-            Compute the polyhedron potential at the given state
+            Compute the polyhedron potential at the given state. This calls
+            refresh first, so vertices moved by a ReconstructMesh sharing 
+            the mesh are always accounted for.
 
             @param state Eigen Vector3d defining the state in the asteroid body fixed frame in km
             @returns None
@@ -150,6 +357,89 @@ class Asteroid {
         */
         void polyhedron_potential(const Eigen::Ref<const Eigen::Vector3d>& state);
         
+        /** @fn PotentialResult evaluate_potential(const Eigen::Ref<const Eigen::Vector3d>& state) const
+                
+            Reentrant version of polyhedron_potential. The L and w factors 
+            are computed inline rather than stored in the mesh property maps
+            and all the outputs are returned. Many threads can call this on 
+            the same Asteroid at once, as long as no one modifies the mesh
+            or calls refresh meanwhile. Nothing is written, so moved 
+            vertices are not flushed and the mesh must have no dirty 
+            vertices. A GravityKernel or GravityGrid built for an older 
+            shape of the mesh is skipped until the next refresh.
+            Threads are used according to the ThreadPolicy of the asteroid.
+
+            @param state Eigen Vector3d defining the state in the asteroid body fixed frame in km
+            @returns result PotentialResult with the potential, acceleration,
+                gradient matrix and laplacian
+            @throws std::runtime_error if the mesh has dirty vertices or
+                removed elements which were not collected, and no current
+                GravityKernel or GravityGrid covers the state
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        PotentialResult evaluate_potential(const Eigen::Ref<const Eigen::Vector3d>& state) const;
+
+        /** @fn polyhedron_potential_batch(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& states) const
+                
+            Compute the polyhedron potential at many points at once. With the
+            default CALLER_MANAGED policy the points are distributed over 
+            OpenMP threads, otherwise they are evaluated in order and the 
+            policy applies to each evaluation. Like evaluate_potential it 
+            only reads the asteroid, so call refresh after the mesh is 
+            edited or a stale GravityKernel or GravityGrid is skipped.
+
+            @param states N x 3 positions in the asteroid body fixed frame in km
+            @returns U N vector of potentials
+            @returns U_grad N x 3 accelerations
+            @returns U_grad_mat N x 9 gradient matrices, each row is the 
+                row major flattening of the 3x3 matrix
+            @returns Ulaplace N vector of laplacians
+            @throws std::runtime_error if the mesh has dirty vertices or
+                removed elements which were not collected
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        std::tuple<Eigen::VectorXd,
+                   Eigen::Matrix<double, Eigen::Dynamic, 3>,
+                   Eigen::Matrix<double, Eigen::Dynamic, 9>,
+                   Eigen::VectorXd> polyhedron_potential_batch(
+                           const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& states) const;
+        
+        /** @fn void check_mesh( void ) const
+                
+            Check that the const evaluations can walk the mesh. Anything
+            which runs evaluate_potential on many threads calls this first,
+            since an exception must not leave an OpenMP region.
+
+            @throws std::runtime_error if the mesh has dirty vertices or
+                removed elements which were not collected
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void check_mesh( void ) const;
+
+        /** @fn void refresh( void )
+                
+            Bring the asteroid up to date with its mesh: flush vertices 
+            moved with MeshData::move_vertex, bring a GravityKernel up to 
+            date and drop a GravityGrid built for an older shape. If the 
+            vertices were only moved the kernel is updated around them, 
+            which apart from an O(V) scan for the moved vertices costs in 
+            proportion to their number, otherwise it is rebuilt. The const 
+            evaluations never do this themselves, so they can run on many
+            threads at once. Call it after the mesh is edited and before 
+            evaluate_potential or polyhedron_potential_batch, and never 
+            while another thread is evaluating this asteroid.
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void refresh( void );
+
         /** @fn bool surface_slope( void )
                 
             Compute the surface slope for each face of the surface mesh
@@ -161,7 +451,7 @@ class Asteroid {
             @version 10 June 2018
         */
         Eigen::VectorXd surface_slope( void ) ;
-        double compute_face_slope(const Face_index& fd);
+        double compute_face_slope(const Face_index& fd) const;
         Eigen::Vector3d land_in_view(const Eigen::Ref<const Eigen::Vector3d>& cur_ast_pos,
                 const double& max_fov=0.52);
 
@@ -172,9 +462,70 @@ class Asteroid {
         // set the rotation of the asteroid by modifying the connected meshdata
         void update_rotation(const double& time);
 
+        /** @fn void build_gravity_kernel( void )
+                
+            Build a GravityKernel from the current mesh. After this 
+            evaluate_potential (and everything that calls it) uses the 
+            kernel instead of walking the CGAL mesh. The kernel remembers
+            the shape revision of the mesh. Once the mesh is edited, by 
+            update_rotation or through anything sharing it, refresh (and so
+            polyhedron_potential) rebuilds it and the const evaluations 
+            fall back to the mesh until then.
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void build_gravity_kernel( void );
+        void clear_gravity_kernel( void ) { kernel.reset(); param.reset(); }
+        bool has_gravity_kernel( void ) const { return kernel != nullptr; }
+
+        /** @fn double build_gravity_grid(const double& extent, const double& spacing)
+                
+            Sample the polyhedron potential on a uniform grid and use it for
+            every later evaluate_potential call it covers. Points outside 
+            the grid, or close enough to the surface that the interpolation
+            stencil reaches inside the body, still use the polyhedron. The
+            grid is dropped, rather than resampled, as soon as the mesh is
+            edited (update_rotation, a ReconstructMesh sharing the mesh) or
+            G or sigma change.
+
+            @param extent Half width of the sampled cube in km
+            @param spacing Distance between nodes in km
+            @returns error_bound Largest relative acceleration error at the
+                checked cell midpoints
+            @throws std::runtime_error if the mesh has removed elements 
+                which were not collected
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        double build_gravity_grid(const double& extent, const double& spacing);
+        
+        /** @fn void load_gravity_grid(const std::string& filename)
+                
+            Use a grid written by save_gravity_grid. The file holds the key
+            of the asteroid it was sampled from, which has to match this 
+            one.
+
+            @param filename HDF5 file
+            @throws std::runtime_error if the grid was built for a different
+                shape, orientation, G or sigma
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void load_gravity_grid(const std::string& filename);
+        void save_gravity_grid(const std::string& filename) const;
+        void clear_gravity_grid( void ) { grid.reset(); }
+        bool has_gravity_grid( void ) const { return grid != nullptr; }
+
+        void set_thread_policy(const ThreadPolicy& policy_in) { policy = policy_in; }
+        ThreadPolicy get_thread_policy( void ) const { return policy; }
+
         // Setters
-        void set_grav_constant(const double& G_in) { G = G_in;}
-        void set_sigma(const double& sigma_in) { sigma = sigma_in; }
+        // the grid holds sampled values which depend on both
+        void set_grav_constant(const double& G_in) { G = G_in; grid.reset(); }
+        void set_sigma(const double& sigma_in) { sigma = sigma_in; grid.reset(); }
 
         // Getters for the potential variables
         double get_potential( void ) { return mU; }
@@ -194,6 +545,107 @@ class Asteroid {
 
 
 };
+/** @class GravityGrid
+
+    @brief Polyhedron potential sampled on a uniform grid
+
+    The potential, acceleration and the six unique gradient matrix terms 
+    are stored at every node and interpolated with Catmull-Rom tricubic 
+    weights, so an evaluation reads 64 nodes no matter the size of the 
+    shape model. A cell can only be used if all 64 nodes of its stencil 
+    are outside of the body.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+class GravityGrid {
+    private:
+        Eigen::Vector3d origin; /**< Position of node (0, 0, 0) */
+        double spacing;
+        int num_nodes; /**< Nodes along each side */
+        
+        // U, Ux, Uy, Uz, Uxx, Uxy, Uxz, Uyy, Uyz, Uzz in each column
+        Eigen::Matrix<double, 10, Eigen::Dynamic> values;
+        Eigen::Vector4d key = Eigen::Vector4d::Zero(); /**< asteroid_key of the sampled Asteroid */
+        // true if every node around the cell is outside of the body
+        std::vector<bool> cell_valid;
+        double error_bound = std::numeric_limits<double>::infinity();
+
+        void build_cell_valid( void );
+        std::size_t node_index(const int& ix, const int& iy, const int& iz) const {
+            return (static_cast<std::size_t>(ix) * num_nodes + iy) * num_nodes + iz;
+        }
+        // cell of the point and the position within the cell. False outside the grid
+        bool cell_index(const Eigen::Ref<const Eigen::Vector3d>& state,
+                Eigen::Vector3i& index, Eigen::Vector3d& t) const;
+
+    public:
+        GravityGrid( void ) {};
+        virtual ~GravityGrid( void ) {};
+        
+        /** @fn GravityGrid(const Asteroid& ast, const double& extent, const double& spacing)
+                
+            Sample ast.evaluate_potential at every node, in parallel, and
+            measure the interpolation error at up to 2000 cell midpoints
+
+            @param ast Asteroid to sample
+            @param extent Half width of the cube centered at the origin in km
+            @param spacing Distance between nodes in km
+            @throws std::runtime_error from Asteroid::check_mesh
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        GravityGrid(const Asteroid& ast, const double& extent, const double& spacing);
+        
+        /** @fn GravityGrid(const std::string& filename)
+                
+            Load a grid written by save
+
+            @param filename HDF5 file
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        GravityGrid(const std::string& filename);
+        void save(const std::string& filename) const;
+        
+        bool contains(const Eigen::Ref<const Eigen::Vector3d>& state) const;
+
+        /** @fn PotentialResult evaluate(const Eigen::Ref<const Eigen::Vector3d>& state) const
+                
+            Interpolate the potential. Only valid where contains is true
+
+            @param state Position in the body fixed frame in km
+            @returns result PotentialResult 
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        PotentialResult evaluate(const Eigen::Ref<const Eigen::Vector3d>& state) const;
+        
+        /** @fn static Eigen::Vector4d asteroid_key(const Asteroid& ast)
+                
+            Identify everything which changes the sampled field: a 64 bit
+            FNV-1a hash of the vertices and faces, split into two 32 bit 
+            halves so they are exact as doubles, then G and sigma. The 
+            vertices are in the body frame, so a rotated mesh has a 
+            different key.
+
+            @param ast Asteroid
+            @returns key hash_high, hash_low, G, sigma
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        static Eigen::Vector4d asteroid_key(const Asteroid& ast);
+        Eigen::Vector4d get_key( void ) const { return key; }
+
+        double get_error_bound( void ) const { return error_bound; }
+        double get_spacing( void ) const { return spacing; }
+        int get_num_nodes( void ) const { return num_nodes; }
+};
+
 // declare some shit
 std::vector<std::vector<int> > vertex_face_map(const Eigen::Ref<const Eigen::MatrixXd> &V,
                                                 const Eigen::Ref<const Eigen::MatrixXi> &F);
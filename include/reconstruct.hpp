@@ -5,6 +5,69 @@
 
 #include <Eigen/Dense>
 #include <memory>
+#include <vector>
+
+/** @class UnitSphereGrid
+
+    @brief Bucket grid over the directions of the mesh vertices
+
+    The unit vectors of the vertices are binned into a uniform grid of 
+    cubes covering [-1, 1]^3. A cone of half angle theta around a direction
+    is a ball of radius 2 sin(theta / 2) around its unit vector, so only the
+    cubes overlapping that ball have to be searched. 
+    ReconstructMesh::update_parallel uses it to find the vertices near each
+    measurement. Vertices only move radially so the grid does not change 
+    during an update.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+class UnitSphereGrid {
+    public:
+        UnitSphereGrid( void ) {}
+        virtual ~UnitSphereGrid( void ) {}
+        
+        /** @fn UnitSphereGrid(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& uvec)
+                
+            Bin the unit vectors. The cube size is picked so that each 
+            occupied cube holds a few vectors when they are spread evenly
+
+            @param uvec N x 3 unit vectors, row i is returned as index i
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        UnitSphereGrid(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& uvec);
+        
+        /** @fn std::vector<int> query(const Eigen::Ref<const Eigen::Vector3d>& uvec,
+         *                            const double& max_angle) const
+                
+            Indices of every vector which could be within max_angle of uvec.
+            This is a superset, the caller still has to check the angle. 
+            When the search would cover more cubes than there are vectors 
+            every index is returned instead.
+
+            @param uvec Unit vector at the center of the cone
+            @param max_angle Half angle of the cone in rad
+            @returns index Candidate rows of the input uvec, in increasing order
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        std::vector<int> query(const Eigen::Ref<const Eigen::Vector3d>& uvec,
+                const double& max_angle) const;
+        
+        std::size_t size( void ) const { return index.size(); }
+
+    private:
+        int cell(const double& x) const;
+
+        int num_cells = 0; /**< Cubes along each axis */
+        double cell_size = 2.0;
+        std::vector<int> offset; /**< index[offset[c]:offset[c+1]] are the vectors in cube c */
+        std::vector<int> index;
+};
+
 /** @class ReconstructMesh
 
     @brief Mesh reconstruction using radial vertex adjustment for an asteroid
@@ -36,7 +99,8 @@ class ReconstructMesh {
          *                         const double & max_angle)
                 
             Update mesh by taking a single measurement, in the asteroid fixed frame,
-            and moving the vertices that are close to it (angular seperation)
+            and moving the vertices that are close to it (angular seperation).
+            Only the faces and edges around the moved vertices are recomputed.
 
             @param pt_in Row vector of measurement in the asteroid frame
             @param max_angle Max angular seperation between the measurement and 
@@ -53,8 +117,9 @@ class ReconstructMesh {
         /** @fn void update(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& pts,
          *                  const double& max_angle)
                 
-            Incorporate many points by treating each one in sequence using 
-            single_update
+            Incorporate many points by treating each one in sequence like
+            single_update. The mesh properties around all of the moved 
+            vertices are recomputed once at the end rather than per point.
 
             @param pots Array of measurements, nx3, in the asteroid frame
             @param max_angle Max angular seperation between the measurement and 
@@ -70,6 +135,29 @@ class ReconstructMesh {
                 const double& meas_weight=1.0,
                 const double& vert_weight=1.0);
 
+        /** @fn void update_parallel(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& pts,
+         *                           const double& max_angle)
+                
+            Same result as update, bit for bit, computed with OpenMP. A 
+            vertex is only changed by the measurements within max_angle of
+            it, so the measurements are grouped by the vertices they touch 
+            and each vertex replays its own measurements in the order of pts.
+            The vertices are then independent and are updated concurrently.
+
+            @param pts Array of measurements, nx3, in the asteroid frame
+            @param max_angle Max angular seperation between the measurement and 
+                associated vertices
+            @returns None
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void update_parallel(
+                const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& pts,
+                const double& max_angle,
+                const double& meas_weight=1.0,
+                const double& vert_weight=1.0);
+
         // functions to access the private members
         Eigen::MatrixXd get_verts( void ) const;
         Eigen::MatrixXi get_faces( void ) const;
@@ -84,9 +172,31 @@ class ReconstructMesh {
         std::shared_ptr<MeshData> get_mesh( void ) const { return mesh; }
         
         void update_meshdata( void );
+        
+        /** @fn void build_vertex_index( void )
+                
+            Rebuild the UnitSphereGrid of vertex directions used by 
+            update_parallel to find the vertices near each measurement. It 
+            is rebuilt automatically when the revision of the mesh changes, 
+            so calling this is only needed after moving vertices some other 
+            way.
+
+            @author Shankar Kulumani
+            @version 16 October 2026
+        */
+        void build_vertex_index( void );
 
     private:
         
+        // move the vertices near pt without updating the mesh properties
+        void move_vertices(const Eigen::Ref<const Eigen::RowVector3d> &pt,
+                const double &max_angle,
+                const double& meas_weight,
+                const double& vert_weight);
+        
+        // rebuild vertex_index if the mesh changed since it was built
+        void refresh_vertex_index( void );
+
         double maximum_weight(const Eigen::Ref<const Eigen::Vector3d>& v_in);
         bool initialize_weight( void );
         bool set_all_weights( const Eigen::Ref<const Eigen::VectorXd>& w_in );
@@ -95,6 +205,10 @@ class ReconstructMesh {
         double get_weight(const Vertex_index& vd) const;
 
         Eigen::VectorXd weights; /**< Weight for each vertex */
+        
+        UnitSphereGrid vertex_index; /**< Directions of the vertices */
+        std::size_t vertex_index_revision = 0; /**< Mesh revision the index was built for */
+        bool vertex_index_built = false;
 
         std::shared_ptr<MeshData> mesh; /**< MeshData holding vertices */
 };
@@ -1,6 +1,7 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 import dynamics.asteroid as asteroid
 import dynamics.dumbbell as dumbbell
+import dynamics.ensemble as ensemble
 import kinematics.attitude as attitude
 from visualization import plotting
 from eom_comparison import transform
@@ -174,19 +175,45 @@ if __name__ == '__main__':
     parser.add_argument('num_faces', help='Integer - Number of faces in polyhedron model', type=int)
     parser.add_argument('tf', help='Float - Terminal time for simulation', type=float)
     parser.add_argument('num_steps', help='Float - Number of steps in integration', type=float)
-    parser.add_argument('file_name', help='String - Filename for npz archive', type=str)
-    parser.add_argument("-m", "--mode", type=int, choices=[0, 1],
-                    help="Choose which inertial energy mode to run. 0 - inertial energy, 1 - \Delta E behavior")
+    parser.add_argument('file_name', help='String - Filename for npz archive, or HDF5 file in mode 2', type=str)
+    parser.add_argument("-m", "--mode", type=int, choices=[0, 1, 2],
+                    help="Choose which inertial energy mode to run. 0 - inertial energy, 1 - \Delta E behavior, 2 - ensemble around the initial state")
+    parser.add_argument("-k", "--num_ensemble", type=int, default=1000,
+                    help="Number of perturbed initial conditions in mode 2")
+    parser.add_argument("--sigma_pos", type=float, default=1e-3,
+                    help="Standard deviation in km of the initial position perturbation")
+    parser.add_argument("--sigma_vel", type=float, default=1e-6,
+                    help="Standard deviation in km/sec of the initial velocity perturbation")
+    parser.add_argument("--seed", type=int, default=None,
+                    help="Seed for the perturbations")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                    help="Number of processes used in mode 2")
+    parser.add_argument("-b", "--batch_size", type=int, default=64,
+                    help="Number of trajectories integrated together in mode 2")
+    parser.add_argument("-d", "--degree", type=int, default=0,
+                    help="Degree of the spherical harmonic far field model. 0 - polyhedron everywhere")
+    parser.add_argument("-r", "--radius_factor", type=float, default=1.5,
+                    help="Use the harmonic model beyond this multiple of the Brillouin radius")
+    parser.add_argument("-g", "--grid_spacing", type=float, default=0,
+                    help="Node spacing in km of the interpolated gravity grid. 0 - no grid")
+    parser.add_argument("--grid_extent", type=float, default=2.0,
+                    help="Half width in km of the gravity grid")
+    parser.add_argument("--grid_file", type=str, default=None,
+                    help="npz cache for the gravity grid, reused by later runs")
     args = parser.parse_args()
     
     print("Starting the simulation...")
 
     # instantiate the asteroid and dumbbell objects
     ast = asteroid.Asteroid(args.ast_name, args.num_faces)
+    if args.degree > 0:
+        ast.enable_harmonics(args.degree, args.radius_factor)
+    if args.grid_spacing > 0:
+        ast.enable_grid(args.grid_extent, args.grid_spacing, args.grid_file)
     dum = dumbbell.Dumbbell(m1=500, m2=500, l=0.003)
 
     # initialize simulation parameters
-    time = np.linspace(0, args.tf, args.num_steps)
+    time = np.linspace(0, args.tf, int(args.num_steps))
     initial_pos = periodic_pos # km for center of mass in body frame
     initial_vel = periodic_vel + attitude.hat_map(ast.omega*np.array([0,0,1])).dot(initial_pos)
     initial_R = attitude.rot2(0).reshape(9) # transforms from dumbbell body frame to the inertial frame
@@ -236,6 +263,19 @@ if __name__ == '__main__':
                 inertial_state_dict=inertial_state_dict, asteroid_state_dict=asteroid_state_dict, 
                 ast=ast, dum=dum)
         print("All finished!")
+    elif args.mode == 2:
+
+        print("Propagating %s perturbed initial conditions." % args.num_ensemble)
+
+        rng = np.random.RandomState(args.seed)
+        initial_states = np.tile(initial_state, (args.num_ensemble, 1))
+        initial_states[:, 0:3] += args.sigma_pos * rng.randn(args.num_ensemble, 3)
+        initial_states[:, 3:6] += args.sigma_vel * rng.randn(args.num_ensemble, 3)
+
+        ensemble.propagate_ensemble(args.file_name, initial_states, time, ast, dum,
+                                    eoms='inertial', batch_size=args.batch_size,
+                                    processes=args.processes)
+        print("All finished!")
     else:
         print("Missing mode argument")
 
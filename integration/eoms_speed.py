@@ -0,0 +1,169 @@
+"""Right hand side evaluations per second of the dumbbell equations of motion
+
+Times every EOM variant of dynamics.dumbbell and the held exploration EOMs of
+dynamics.eoms, both allocating a new derivative and writing into a reused
+buffer. With --ref the same variants are loaded from an older revision of the
+repository and timed first, to compare before and after a change
+
+    PYTHONPATH=. python integration/eoms_speed.py --ref HEAD~1
+
+The default point mass gravity is cheap so the timings are dominated by the
+EOMs themselves. Use --polyhedron to time with the castalia polyhedron model
+instead
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import subprocess
+import timeit
+import types
+
+import numpy as np
+
+from dynamics import asteroid, dumbbell, eoms
+from kinematics import attitude
+
+class PointMass(object):
+    """Point mass asteroid with the interface of both asteroid models
+
+    The tuple return of polyhedron_potential matches dynamics.asteroid and the
+    getters match the C++ Asteroid used by dynamics.eoms
+    """
+    def __init__(self, mu=1e-9, omega=2*np.pi/(4.07*3600)):
+        self.mu = mu
+        self.omega = omega
+
+    def polyhedron_potential(self, z):
+        r = np.linalg.norm(z)
+        self.U = self.mu / r
+        self.U_grad = -self.mu / r**3 * z
+        return (self.U, self.U_grad, None, None)
+
+    def get_potential(self):
+        return self.U
+
+    def get_acceleration(self):
+        return self.U_grad
+
+    def rot_ast2int(self, t):
+        return attitude.rot3(self.omega * t, 'c')
+
+class PolyhedronAsteroid(asteroid.Asteroid):
+    """Python polyhedron model with the C++ getters used by dynamics.eoms
+    """
+    def polyhedron_potential(self, z):
+        self.result = super(PolyhedronAsteroid, self).polyhedron_potential(z)
+        return self.result
+
+    def get_potential(self):
+        return self.result[0]
+
+    def get_acceleration(self):
+        return self.result[1]
+
+    def rot_ast2int(self, t):
+        return attitude.rot3(self.omega * t, 'c')
+
+class HeldCommand(object):
+    """Constant commands with the getters of controller.ExploreGuidance
+    """
+    def get_Rd(self):
+        return np.eye(3)
+
+    def get_Rd_dot(self):
+        return np.zeros((3, 3))
+
+    def get_ang_vel_d(self):
+        return np.zeros(3)
+
+    def get_ang_vel_d_dot(self):
+        return np.zeros(3)
+
+    def get_posd(self):
+        return np.array([1.5, 0, 0])
+
+    def get_veld(self):
+        return np.zeros(3)
+
+    def get_acceld(self):
+        return np.zeros(3)
+
+def load_revision(rev, path, name):
+    """Import a module of the repository as it was at git revision rev
+    """
+    source = subprocess.check_output(['git', 'show', '{}:{}'.format(rev, path)])
+    module = types.ModuleType(name)
+    module.__file__ = path
+    exec(compile(source, path, 'exec'), module.__dict__)
+    return module
+
+def variants(dumbbell_module, eoms_module, ast):
+    """Each EOM as f(t, state, out) with out ignored by versions without it
+    """
+    dum = dumbbell_module.Dumbbell()
+    guidance = HeldCommand()
+
+    def call(func, *args):
+        try:
+            func(*(args + (np.empty(18),)))
+        except TypeError:
+            return lambda t, state, out: func(t, state, *args)
+        return lambda t, state, out: func(t, state, *(args + (out,)))
+
+    return [('eoms_inertial_ode', call(dum.eoms_inertial_ode, ast)),
+            ('eoms_relative_ode', call(dum.eoms_relative_ode, ast)),
+            ('eoms_hamilton_relative_ode', call(dum.eoms_hamilton_relative_ode, ast)),
+            ('eoms_inertial_control_ode', call(dum.eoms_inertial_control_ode, ast)),
+            ('eoms_controlled_inertial_held',
+             call(eoms_module.eoms_controlled_inertial_held, ast, dum, guidance)),
+            ('eoms_controlled_inertial_control_cost_held',
+             call(eoms_module.eoms_controlled_inertial_control_cost_held, ast, dum,
+                  guidance, ast))]
+
+def evals_per_sec(func, t, state, out, duration):
+    """Best rate of a few repeats, each about duration seconds long
+    """
+    number = 1
+    while timeit.timeit(lambda: func(t, state, out), number=number) < duration / 10:
+        number *= 2
+    best = min(timeit.repeat(lambda: func(t, state, out), number=number, repeat=5))
+    return number / best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--ref', help='git revision to time before the working tree')
+    parser.add_argument('--polyhedron', action='store_true',
+                        help='use the castalia polyhedron instead of a point mass')
+    parser.add_argument('--duration', type=float, default=0.2,
+                        help='length of each repeat in sec')
+    args = parser.parse_args()
+
+    ast = PolyhedronAsteroid('castalia', 32) if args.polyhedron else PointMass()
+
+    R = attitude.rot1(0.3).dot(attitude.rot3(1.1))
+    state = np.hstack((np.array([1.5, 0.3, 0.2]), np.array([0, 1e-4, 2e-4]),
+                       R.reshape(9), np.array([1e-3, -2e-3, 5e-4])))
+    t = 10.0
+
+    current = variants(dumbbell, eoms, ast)
+    if args.ref:
+        before = dict(variants(load_revision(args.ref, 'dynamics/dumbbell.py', 'dumbbell_ref'),
+                               load_revision(args.ref, 'dynamics/eoms.py', 'eoms_ref'),
+                               ast))
+        print('{:45} {:>12} {:>12} {:>12} {:>8}'.format('evals/sec', args.ref, 'new', 'new + out', 'speedup'))
+    else:
+        before = {}
+        print('{:45} {:>12} {:>12}'.format('evals/sec', 'new', 'new + out'))
+
+    for name, func in current:
+        alloc = evals_per_sec(func, t, state, None, args.duration)
+        reuse = evals_per_sec(func, t, state, np.empty(18), args.duration)
+        if name in before:
+            ref = evals_per_sec(before[name], t, state, None, args.duration)
+            print('{:45} {:12.0f} {:12.0f} {:12.0f} {:8.2f}'.format(name, ref, alloc, reuse, reuse / ref))
+        else:
+            print('{:45} {:12.0f} {:12.0f}'.format(name, alloc, reuse))
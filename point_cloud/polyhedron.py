@@ -22,6 +22,15 @@ Shankar Kulumani		GWU		skulumani@gwu.edu
 import numpy as np
 import pdb
 from multiprocessing import Pool
+from collections import namedtuple
+
+# contiguous arrays required to evaluate the potential at many points
+POTENTIAL_PARAM = namedtuple('POTENTIAL_PARAM', ['V', 'Fa', 'Fb', 'Fc',
+                                                 'F_face', 'e_vertex_map',
+                                                 'E_edge', 'e_length'])
+
+# size of the (points x faces) temporaries in a single chunk of potential_batch
+BATCH_ELEMENTS = 2**16
 
 def face_contribution_loop(r_v, Fa, F_face, w_face):
     U_face = 0
@@ -278,3 +287,154 @@ def map_edge_factor(r_v, e1, e2, e3, e1_vertex_map, e2_vertex_map, e3_vertex_map
    
     return L_edges[0], L_edges[1], L_edges[2]
 
+
+def potential_parameters(asteroid_grav):
+    r"""Pack the polyhedron parameters into contiguous arrays
+
+    param = potential_parameters(asteroid_grav)
+
+    Parameters
+    ----------
+    asteroid_grav : dict
+        Polyhedron parameters from Asteroid.polyhedron_shape_input
+
+    Returns
+    -------
+    param : POTENTIAL_PARAM namedtuple
+        V - (3, v) vertices stored component by component
+        Fa, Fb, Fc - (f,) vertex indices of each face
+        F_face - (3, 3, f) face dyads
+        e_vertex_map - (e, 2) vertex indices of each unique edge
+        E_edge - (3, 3, e) edge dyads of each unique edge
+        e_length - (e,) length of each unique edge
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    V = np.asarray(asteroid_grav['V'], dtype=np.float64)
+    e_vertex_map = np.ascontiguousarray(asteroid_grav['e_vertex_map'], dtype=np.intp)
+    unique_index = np.asarray(asteroid_grav['unique_index']).ravel()
+
+    E_all = np.concatenate((asteroid_grav['E1_edge'], asteroid_grav['E2_edge'],
+                            asteroid_grav['E3_edge']), axis=2)
+
+    e_length = np.sqrt(np.sum((V[e_vertex_map[:, 1], :]
+                               - V[e_vertex_map[:, 0], :])**2, axis=1))
+
+    return POTENTIAL_PARAM(V=np.ascontiguousarray(V.T),
+                           Fa=np.ascontiguousarray(asteroid_grav['Fa'], dtype=np.intp),
+                           Fb=np.ascontiguousarray(asteroid_grav['Fb'], dtype=np.intp),
+                           Fc=np.ascontiguousarray(asteroid_grav['Fc'], dtype=np.intp),
+                           F_face=np.ascontiguousarray(asteroid_grav['F_face']),
+                           e_vertex_map=e_vertex_map,
+                           E_edge=np.ascontiguousarray(E_all[:, :, unique_index]),
+                           e_length=e_length)
+
+def potential_batch(states, param, G, sigma, chunk_size=None):
+    r"""Polyhedron potential at many points
+
+    U, U_grad, U_grad_mat, Ulaplace = potential_batch(states, param, G, sigma)
+
+    Parameters
+    ----------
+    states : (m, 3) array
+        Positions in the asteroid body fixed frame in km
+    param : POTENTIAL_PARAM namedtuple
+        Output of potential_parameters
+    G : float
+        Gravitational constant
+    sigma : float
+        Density of the body
+    chunk_size : int
+        Number of points evaluated together. Defaults to as many as keep
+        each temporary (m, f) array under BATCH_ELEMENTS values
+
+    Returns
+    -------
+    U : (m,) array
+        Gravitational potential
+    U_grad : (m, 3) array
+        Gravitational attraction
+    U_grad_mat : (m, 3, 3) array
+        Gravitational gradient matrix
+    Ulaplace : (m,) array
+        Laplacian. Points inside the body are set to zero for all outputs
+
+    Notes
+    -----
+    Each chunk broadcasts the points against every face and edge at once
+    instead of looping over the points. The vectors are kept as separate
+    x, y, z rows so every operation works on contiguous memory.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    states = np.atleast_2d(states)
+    num_points = states.shape[0]
+    num_f = param.Fa.shape[0]
+    num_e = param.e_vertex_map.shape[0]
+
+    if chunk_size is None:
+        chunk_size = max(1, BATCH_ELEMENTS // max(num_f, num_e))
+
+    U = np.zeros(num_points)
+    U_grad = np.zeros((num_points, 3))
+    U_grad_mat = np.zeros((num_points, 3, 3))
+    Ulaplace = np.zeros(num_points)
+
+    F_face_flat = param.F_face.reshape((9, num_f))
+    E_edge_flat = param.E_edge.reshape((9, num_e))
+    ei, ej = param.e_vertex_map[:, 0], param.e_vertex_map[:, 1]
+    
+    for start in range(0, num_points, chunk_size):
+        stop = min(start + chunk_size, num_points)
+        
+        # vector from each point to every vertex (m, 3, v)
+        r_v = param.V[np.newaxis, :, :] - states[start:stop, :, np.newaxis]
+        r_v_norm = np.sqrt(np.einsum('mjv,mjv->mv', r_v, r_v))
+        
+        # face factor w (m, f)
+        ri, rj, rk = r_v[:, :, param.Fa], r_v[:, :, param.Fb], r_v[:, :, param.Fc]
+        ri_norm = r_v_norm[:, param.Fa]
+        rj_norm = r_v_norm[:, param.Fb]
+        rk_norm = r_v_norm[:, param.Fc]
+
+        num = (ri[:, 0] * (rj[:, 1] * rk[:, 2] - rj[:, 2] * rk[:, 1])
+               + ri[:, 1] * (rj[:, 2] * rk[:, 0] - rj[:, 0] * rk[:, 2])
+               + ri[:, 2] * (rj[:, 0] * rk[:, 1] - rj[:, 1] * rk[:, 0]))
+        den = (ri_norm * rj_norm * rk_norm 
+               + ri_norm * np.einsum('mjf,mjf->mf', rj, rk)
+               + rj_norm * np.einsum('mjf,mjf->mf', rk, ri)
+               + rk_norm * np.einsum('mjf,mjf->mf', ri, rj))
+        w_face = 2.0 * np.arctan2(num, den)
+        w_sum = np.sum(w_face, axis=1)
+
+        # edge factor L (m, e)
+        re = r_v[:, :, ei]
+        rij_norm = r_v_norm[:, ei] + r_v_norm[:, ej]
+        L_edge = np.log((rij_norm + param.e_length) / (rij_norm - param.e_length))
+
+        # r^T F and r^T E for each face/edge
+        radotF = np.einsum('jkf,mjf->mkf', param.F_face, ri)
+        redotE = np.einsum('jke,mje->mke', param.E_edge, re)
+
+        U_face = np.einsum('mkf,mkf,mf->m', radotF, ri, w_face)
+        U_edge = np.einsum('mke,mke,me->m', redotE, re, L_edge)
+        U_grad_face = np.einsum('mkf,mf->mk', radotF, w_face)
+        U_grad_edge = np.einsum('mke,me->mk', redotE, L_edge)
+        U_grad_mat_face = w_face.dot(F_face_flat.T).reshape((-1, 3, 3))
+        U_grad_mat_edge = L_edge.dot(E_edge_flat.T).reshape((-1, 3, 3))
+        
+        # zero when outside body and -G*sigma*4 pi on the inside
+        outside = np.isclose(w_sum, 0)
+
+        U[start:stop] = np.where(outside, 1 / 2 * G * sigma * (U_edge - U_face), 0)
+        U_grad[start:stop] = np.where(outside[:, np.newaxis],
+                                      G * sigma * (-U_grad_edge + U_grad_face), 0)
+        U_grad_mat[start:stop] = np.where(outside[:, np.newaxis, np.newaxis],
+                                          G * sigma * (U_grad_mat_edge - U_grad_mat_face), 0)
+        Ulaplace[start:stop] = np.where(outside, -G * sigma * w_sum, 0)
+
+    return U, U_grad, U_grad_mat, Ulaplace
@@ -309,3 +309,64 @@ class Lidar(object):
         """
         targets = pos + dist * self.rotate_fov(R_b2f.reshape((3,3)))
         return targets
+
+    def define_targets_batch(self, pos, R_b2f, dist):
+        r"""Targets for many poses at once
+
+        targets = lidar.define_targets_batch(pos, R_b2f, dist)
+
+        Parameters
+        ----------
+        pos : (T, 3) array
+            Position of the sensor at each pose
+        R_b2f : (T, 9) or (T, 3, 3) array
+            Body to frame rotation at each pose. Rows of 9 are the row major
+            matrix, as stored in the state vector
+        dist : float or (T,) array
+            Distance to scale the unit vectors, for all or for each pose
+
+        Returns
+        -------
+        targets : (T, N, 3) array
+            targets[t] is define_targets(pos[t], R_b2f[t], dist[t]).
+            targets.reshape((-1, 3)) is ordered by pose, as expected by the
+            T sources of RayCaster.cast
+
+        Author
+        ------
+        Shankar Kulumani		GWU		skulumani@gwu.edu
+        """
+        pos = np.atleast_2d(pos)
+        R_b2f = np.reshape(R_b2f, (-1, 3, 3))
+        dist = np.broadcast_to(dist, (pos.shape[0],))
+
+        targets = np.einsum('tij,nj->tni', R_b2f, self.lidar_arr)
+        return pos[:, np.newaxis, :] + dist[:, np.newaxis, np.newaxis] * targets
+
+    def define_trajectory_targets(self, state, dist=None):
+        r"""Targets along a saved state history
+
+        targets = lidar.define_trajectory_targets(state)
+
+        Parameters
+        ----------
+        state : (T, 18) array
+            Position, velocity, R_b2i and angular velocity at each step
+        dist : float or (T,) array
+            Distance to scale the unit vectors. Defaults to the distance of
+            the spacecraft from the origin, as used in the simulations
+
+        Returns
+        -------
+        targets : (T, N, 3) array
+            Targets for each step in the inertial frame
+
+        Author
+        ------
+        Shankar Kulumani		GWU		skulumani@gwu.edu
+        """
+        state = np.atleast_2d(state)
+        if dist is None:
+            dist = np.linalg.norm(state[:, 0:3], axis=1)
+
+        return self.define_targets_batch(state[:, 0:3], state[:, 6:15], dist)
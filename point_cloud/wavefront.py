@@ -869,12 +869,18 @@ def vertex_face_map(V, F):
     ------
     Shankar Kulumani		GWU		skulumani@gwu.edu
     """
-    vertex_face_map = [list() for _ in range(V.shape[0])]
-    # loop through F
-    for face,verts in enumerate(F):
-        for v in verts:
-            vertex_face_map[v].append(face)
-     
+    # a stable sort of the flattened faces groups the faces of each vertex
+    # together while keeping them in increasing order
+    F = np.asarray(F)
+    faces = (np.argsort(F.ravel(), kind='mergesort') // F.shape[1]).tolist()
+    counts = np.bincount(F.ravel(), minlength=V.shape[0]).tolist()
+
+    vertex_face_map = []
+    start = 0
+    for count in counts:
+        vertex_face_map.append(faces[start:start + count])
+        start += count
+
     return vertex_face_map
 
 def normal_face(V, F):
@@ -1043,13 +1049,13 @@ def polyhedron_parameters(V, F):
     e3_vertex_map = np.vstack((Fa, Fc)).T
     
     e_vertex_map_stacked = np.vstack((e1_vertex_map, e2_vertex_map, e3_vertex_map))
-    # sort the columns so the lowest vertex is in the first column
-    e_vertex_map, unique_index = np.unique(np.sort(np.vstack((e1_vertex_map,
-                                                              e2_vertex_map,
-                                                              e3_vertex_map)),
-                                                   axis=1),
-                                           axis=0,
-                                           return_index=True)
+    # sort the columns so the lowest vertex is in the first column. Each
+    # (low, high) pair packs into one integer with the same ordering as the
+    # rows, so unique runs on a flat array instead of with axis=0
+    e_sorted = np.sort(e_vertex_map_stacked, axis=1)
+    e_key = e_sorted[:, 0].astype(np.int64) * num_v + e_sorted[:, 1]
+    _, unique_index = np.unique(e_key, return_index=True)
+    e_vertex_map = e_sorted[unique_index, :]
     
     # Normalize edge vectors
     # e1_norm=e1./repmat(sqrt(e1(:,1).^2+e1(:,2).^2+e1(:,3).^2),1,3);
@@ -1089,9 +1095,9 @@ def polyhedron_parameters(V, F):
 
     (e1_ind1b, e1_ind2b, e1_ind3b,
     e2_ind1b, e2_ind2b, e2_ind3b,
-    e3_ind1b, e3_ind2b, e3_ind3b) = search_edge_vertex_map(e1_vertex_map,
-                                                                        e2_vertex_map, 
-                                                                        e3_vertex_map)
+    e3_ind1b, e3_ind2b, e3_ind3b) = match_edge_vertex_map(e1_vertex_map,
+                                                          e2_vertex_map,
+                                                          e3_vertex_map, num_v)
     # build the edge face maps
     e1_face_map, e2_face_map, e3_face_map = build_edge_face_map(e1_ind1b, e1_ind2b, e1_ind3b,
                                                                             e2_ind1b, e2_ind2b, e2_ind3b,
@@ -1311,6 +1317,73 @@ def search_edge_vertex_map(e1_vertex_map, e2_vertex_map, e3_vertex_map):
             e2_ind1b, e2_ind2b, e2_ind3b,
             e3_ind1b, e3_ind2b, e3_ind3b)
 
+def match_edge_vertex_map(e1_vertex_map, e2_vertex_map, e3_vertex_map,
+                          num_v=None):
+    r"""Find the reversed edge of every edge with a single sort
+
+    (e1_ind1b, e1_ind2b, e1_ind3b,
+     e2_ind1b, e2_ind2b, e2_ind3b,
+     e3_ind1b, e3_ind2b, e3_ind3b) = match_edge_vertex_map(e1_vertex_map,
+                                                           e2_vertex_map,
+                                                           e3_vertex_map)
+
+    Parameters
+    ----------
+    e1_vertex_map, e2_vertex_map, e3_vertex_map : numpy array f x 2
+        Start and end vertex of the e1, e2, e3 edge of each face
+    num_v : int
+        Number of vertices. Defaults to one more than the largest index
+
+    Returns
+    -------
+    eX_indYb : numpy array (f,)
+        Nine arrays in the same order as search_edge_vertex_map.
+        eX_indYb[i] is the face whose eY edge runs opposite to the eX edge
+        of face i, or -1 if it is some other edge of that face
+
+    Notes
+    -----
+    Each directed edge is packed into the integer start * num_v + end. The
+    reversed edge is then found by a binary search of the sorted keys,
+    which is O(f log f) time and O(f) memory. search_edge_vertex_map
+    compares every pair of edges and needs an f x f array for each pair.
+
+    See Also
+    --------
+    search_edge_vertex_map : pairwise version with the same output
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+    invalid = -1
+    num_f = e1_vertex_map.shape[0]
+    edges = np.vstack((e1_vertex_map, e2_vertex_map,
+                       e3_vertex_map)).astype(np.int64)
+    if num_v is None:
+        num_v = np.max(edges) + 1
+
+    key = edges[:, 0] * num_v + edges[:, 1]
+    reverse_key = edges[:, 1] * num_v + edges[:, 0]
+
+    order = np.argsort(key)
+    loc = np.minimum(np.searchsorted(key, reverse_key, sorter=order),
+                     key.shape[0] - 1)
+    match = order[loc]
+    found = key[match] == reverse_key
+
+    # the stacked index of the match gives its edge type and face
+    match_edge = np.where(found, match // num_f, invalid)
+    match_face = match % num_f
+
+    ind = []
+    for a in range(3):
+        rows = slice(a * num_f, (a + 1) * num_f)
+        for b in range(3):
+            ind.append(np.where(match_edge[rows] == b, match_face[rows], invalid))
+
+    return tuple(ind)
+
 # TODO Add documentation for this function and the face map
 def build_edge_face_map(e1_ind1b, e1_ind2b, e1_ind3b,
                         e2_ind1b, e2_ind2b, e2_ind3b,
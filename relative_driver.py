@@ -1,6 +1,7 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 import dynamics.asteroid as asteroid
 import dynamics.dumbbell as dumbbell
+import dynamics.ensemble as ensemble
 import kinematics.attitude as attitude
 from visualization import plotting
 from eom_comparison import transform
@@ -165,9 +166,21 @@ if __name__ == '__main__':
     parser.add_argument('num_faces', help='Integer - Number of faces in polyhedron model', type=int)
     parser.add_argument('tf', help='Float - Terminal time for simulation', type=float)
     parser.add_argument('num_steps', help='Float - Number of steps in integration', type=float)
-    parser.add_argument('file_name', help='String - Filename for npz archive', type=str)
-    parser.add_argument("-m", "--mode", type=int, choices=[0, 1],
-                    help="Choose which relative energy mode to run. 0 - relative energy, 1 - \Delta E behavior")
+    parser.add_argument('file_name', help='String - Filename for npz archive, or HDF5 file in mode 2', type=str)
+    parser.add_argument("-m", "--mode", type=int, choices=[0, 1, 2],
+                    help="Choose which relative energy mode to run. 0 - relative energy, 1 - \Delta E behavior, 2 - ensemble around the initial state")
+    parser.add_argument("-k", "--num_ensemble", type=int, default=1000,
+                    help="Number of perturbed initial conditions in mode 2")
+    parser.add_argument("--sigma_pos", type=float, default=1e-3,
+                    help="Standard deviation in km of the initial position perturbation")
+    parser.add_argument("--sigma_vel", type=float, default=1e-6,
+                    help="Standard deviation in km/sec of the initial velocity perturbation")
+    parser.add_argument("--seed", type=int, default=None,
+                    help="Seed for the perturbations")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                    help="Number of processes used in mode 2")
+    parser.add_argument("-b", "--batch_size", type=int, default=64,
+                    help="Number of trajectories integrated together in mode 2")
     args = parser.parse_args()
 
     print("Starting the simulation...")
@@ -177,7 +190,7 @@ if __name__ == '__main__':
     dum = dumbbell.Dumbbell(m1=500, m2=500, l=0.003)
 
     # initialize simulation parameters
-    time = np.linspace(0, args.tf, args.num_steps)
+    time = np.linspace(0, args.tf, int(args.num_steps))
     initial_pos = periodic_pos
     initial_R = attitude.rot2(0).reshape(9)
     initial_w = np.array([0.01, 0.01, 0.01])
@@ -229,5 +242,18 @@ if __name__ == '__main__':
                 ast=ast, dum=dum)
         
         print("All finished!")
+    elif args.mode == 2:
+
+        print("Propagating %s perturbed initial conditions." % args.num_ensemble)
+
+        rng = np.random.RandomState(args.seed)
+        initial_states = np.tile(initial_ham_state, (args.num_ensemble, 1))
+        initial_states[:, 0:3] += args.sigma_pos * rng.randn(args.num_ensemble, 3)
+        initial_states[:, 3:6] += (dum.m1 + dum.m2) * args.sigma_vel * rng.randn(args.num_ensemble, 3)
+
+        ensemble.propagate_ensemble(args.file_name, initial_states, time, ast, dum,
+                                    eoms='hamilton_relative', batch_size=args.batch_size,
+                                    processes=args.processes)
+        print("All finished!")
     else:
         print("Missing mode argument.")
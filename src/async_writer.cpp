@@ -0,0 +1,89 @@
+#include "async_writer.hpp"
+
+#include <iostream>
+#include <stdexcept>
+
+AsyncWriter::AsyncWriter(const std::size_t& max_queue_in)
+    : max_queue(max_queue_in > 0 ? max_queue_in : 1) {
+    worker = std::thread(&AsyncWriter::run, this);
+}
+
+AsyncWriter::~AsyncWriter( void ) {
+    try {
+        close();
+    } catch (const std::exception& err) {
+        std::cerr << "AsyncWriter: " << err.what() << std::endl;
+    } catch (...) {
+        std::cerr << "AsyncWriter: unknown error while writing" << std::endl;
+    }
+}
+
+void AsyncWriter::push(std::function<void( void )> task) {
+    std::unique_lock<std::mutex> lock(mutex);
+    if (closing) {
+        throw std::logic_error("AsyncWriter is closed");
+    }
+    not_full.wait(lock, [this]{ return queue.size() < max_queue || error; });
+    if (error) {
+        lock.unlock();
+        rethrow();
+    }
+    queue.push_back(std::move(task));
+    not_empty.notify_one();
+}
+
+void AsyncWriter::close( void ) {
+    {
+        std::lock_guard<std::mutex> lock(mutex);
+        closing = true;
+    }
+    not_empty.notify_one();
+    if (worker.joinable()) {
+        worker.join();
+    }
+    rethrow();
+}
+
+std::size_t AsyncWriter::size( void ) {
+    std::lock_guard<std::mutex> lock(mutex);
+    return queue.size();
+}
+
+void AsyncWriter::run( void ) {
+    while (true) {
+        std::function<void( void )> task;
+        {
+            std::unique_lock<std::mutex> lock(mutex);
+            not_empty.wait(lock, [this]{ return !queue.empty() || closing; });
+            if (queue.empty()) {
+                return;
+            }
+            task = std::move(queue.front());
+            queue.pop_front();
+        }
+        not_full.notify_one();
+
+        try {
+            task();
+        } catch (...) {
+            // keep the first error and drop the rest of the queue
+            std::lock_guard<std::mutex> lock(mutex);
+            if (!error) {
+                error = std::current_exception();
+            }
+            queue.clear();
+            not_full.notify_all();
+        }
+    }
+}
+
+void AsyncWriter::rethrow( void ) {
+    std::exception_ptr err;
+    {
+        std::lock_guard<std::mutex> lock(mutex);
+        std::swap(err, error);
+    }
+    if (err) {
+        std::rethrow_exception(err);
+    }
+}
@@ -2,7 +2,11 @@
 
 #include <Eigen/Dense>
 
+#include <algorithm>
 #include <cmath>
+#include <limits>
+#include <stdexcept>
+#include <tuple>
 
 // Raycaster class
 RayCaster::RayCaster( void ) {
@@ -12,9 +16,7 @@ RayCaster::RayCaster( void ) {
 RayCaster::RayCaster(std::shared_ptr<const MeshData> mesh_in) {
     // assign copy of pointer to object instance
     this->mesh = mesh_in;
-    this->tree.insert(faces(this->mesh->surface_mesh).first,
-            faces(this->mesh->surface_mesh).second,
-            this->mesh->surface_mesh);
+    build_tree();
     tree.accelerate_distance_queries();
 }
 
@@ -23,26 +25,20 @@ RayCaster::RayCaster(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic
     // create mesh pionter
     mesh = std::make_shared<MeshData>(V_in, F_in);
     // update caster objects
-    this->tree.insert(faces(this->mesh->surface_mesh).first,
-            faces(this->mesh->surface_mesh).second,
-            this->mesh->surface_mesh);
+    build_tree();
     tree.accelerate_distance_queries();
 }
 
 void RayCaster::init_mesh(std::shared_ptr<const MeshData> mesh_in) {
     mesh = mesh_in;
-    this->tree.insert(faces(this->mesh->surface_mesh).first,
-            faces(this->mesh->surface_mesh).second,
-            this->mesh->surface_mesh);
+    build_tree();
 }
 
 void RayCaster::init_mesh(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& V_in,
                           const Eigen::Ref<const Eigen::Matrix<int, Eigen::Dynamic, 3> >& F_in) {
     mesh = std::make_shared<MeshData>(V_in, F_in);
     // update caster objects
-    this->tree.insert(faces(this->mesh->surface_mesh).first,
-            faces(this->mesh->surface_mesh).second,
-            this->mesh->surface_mesh);
+    build_tree();
 }
 
 void RayCaster::accelerate( void ) {
@@ -52,10 +48,7 @@ void RayCaster::accelerate( void ) {
 void RayCaster::update_mesh(std::shared_ptr<const MeshData> mesh_in) {
     this->mesh.reset();
     mesh = mesh_in;
-    this->tree.clear();
-    this->tree.insert(faces(this->mesh->surface_mesh).first,
-            faces(this->mesh->surface_mesh).second,
-            this->mesh->surface_mesh);
+    build_tree();
     tree.accelerate_distance_queries();
 }
 
@@ -66,30 +59,39 @@ void RayCaster::update_mesh(const Eigen::Ref<const Eigen::Matrix<double, Eigen::
     mesh = std::make_shared<const MeshData>(V_in, F_in);
 
     // update caster
+    build_tree();
+    tree.accelerate_distance_queries();
+}
+
+void RayCaster::build_tree( void ) {
     this->tree.clear();
     this->tree.insert(faces(this->mesh->surface_mesh).first,
             faces(this->mesh->surface_mesh).second,
             this->mesh->surface_mesh);
-    tree.accelerate_distance_queries();
+    // CGAL otherwise builds the tree lazily inside the first query, which
+    // would be a race once rays are cast from many threads
+    this->tree.build();
 }
 
 bool RayCaster::intersection(const Eigen::Ref<const Eigen::Vector3d>& psource,
                              const Eigen::Ref<const Eigen::Vector3d>& ptarget) {
     
-    Point a(psource(0), psource(1), psource(2));
-    Point b(ptarget(0), ptarget(1), ptarget(2));
+    // the tree is in the mesh frame
+    const Eigen::Vector3d source = Ra.transpose() * psource;
+    const Eigen::Vector3d target = Ra.transpose() * ptarget;
+    Point a(source(0), source(1), source(2));
+    Point b(target(0), target(1), target(2));
     Ray ray_query(a, b);
 
     return tree.do_intersect(ray_query);
 }
 
-Eigen::Matrix<double, 1, 3> RayCaster::castray(const Eigen::Ref<const Eigen::Vector3d>& psource, const Eigen::Ref<const Eigen::Vector3d>& ptarget) {
-    // TODO Also look at closest_point_and_primitive
-    // create a Point object
-    Point a(psource(0),psource(1),psource(2));
-    Point b(ptarget(0), ptarget(1), ptarget(2));
+bool RayCaster::first_hit(const Eigen::Ref<const Eigen::Vector3d>& source,
+                          const Eigen::Ref<const Eigen::Vector3d>& target,
+                          Eigen::Ref<Eigen::Vector3d> pint, int& face) const {
+    Point a(source(0), source(1), source(2));
+    Point b(target(0), target(1), target(2));
     Ray ray_query(a, b);
-    Eigen::Matrix<double, 1, 3> pint(3);
 
     // May need to add a skip function here https://doc.cgal.org/latest/AABB_tree/AABB_tree_2AABB_ray_shooting_example_8cpp-example.html
     Ray_intersection intersection = this->tree.first_intersection(ray_query);
@@ -97,23 +99,33 @@ Eigen::Matrix<double, 1, 3> RayCaster::castray(const Eigen::Ref<const Eigen::Vec
         // get intersection object
         const Point* p = boost::get<Point>(&(intersection->first));
         if (p) {
-            // output from function
             pint << CGAL::to_double(p->x()), CGAL::to_double(p->y()), CGAL::to_double(p->z());
-        } else {
-            return pint.setZero();
+            face = (int)intersection->second;
+            return true;
         }
+    }
 
+    face = -1;
+    return false;
+}
+
+Eigen::Matrix<double, 1, 3> RayCaster::castray(const Eigen::Ref<const Eigen::Vector3d>& psource, 
+                                               const Eigen::Ref<const Eigen::Vector3d>& ptarget) const {
+    // TODO Also look at closest_point_and_primitive
+    // the tree is in the mesh frame
+    Eigen::Vector3d pint;
+    int face;
+    if (first_hit(Ra.transpose() * psource, Ra.transpose() * ptarget, pint, face)) {
+        // back to the frame of the ray
+        return (Ra * pint).transpose();
     } else {
-        return pint.setZero();
+        return Eigen::RowVector3d::Zero();
     }
-
-    return pint;
 }
 
 Eigen::Matrix<double, Eigen::Dynamic, 3> RayCaster::castarray(const Eigen::Ref<const Eigen::Vector3d> &psource,
-                                                              const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> > &targets) {
-    
-
+                                                              const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> > &targets) const {
+    // serial, one castray per target. cast is the parallel version
     int num_targets = targets.rows();
 
     Eigen::Matrix<double, Eigen::Dynamic, 3> all_intersections(num_targets, 3);
@@ -125,11 +137,77 @@ Eigen::Matrix<double, Eigen::Dynamic, 3> RayCaster::castarray(const Eigen::Ref<c
     return all_intersections;
 }
 
+std::tuple<Eigen::Matrix<double, Eigen::Dynamic, 3>,
+           Eigen::VectorXi,
+           Eigen::VectorXd> RayCaster::castbundle(
+                   const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                   const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets) const {
+    RayCastResult result = cast(sources, targets);
+    return std::make_tuple(result.intersections, result.faces, result.ranges);
+}
+
+RayCastResult RayCaster::cast(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                              const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets) const {
+    return cast(sources, targets, Eigen::Matrix3d::Identity());
+}
+
+RayCastResult RayCaster::cast(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+                              const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& targets,
+                              const Eigen::Ref<const Eigen::Matrix3d>& R_out) const {
+    const int num_sources = sources.rows();
+    const int num_rays = targets.rows();
+    if (num_sources == 0 || num_rays % num_sources != 0) {
+        throw std::invalid_argument("Number of targets must be a multiple of the number of sources");
+    }
+    const int rays_per_source = num_rays / num_sources;
+    const double nan = std::numeric_limits<double>::quiet_NaN();
+
+    // rotate everything into the mesh frame once, and straight from the 
+    // mesh frame to the output frame on the way out
+    const Eigen::Matrix<double, Eigen::Dynamic, 3> sources_mesh = sources * Ra;
+    const Eigen::Matrix<double, Eigen::Dynamic, 3> targets_mesh = targets * Ra;
+    const Eigen::Matrix3d R_mesh2out = R_out * Ra;
+
+    RayCastResult result;
+    result.hit.resize(num_rays);
+    result.intersections.resize(num_rays, 3);
+    result.faces.resize(num_rays);
+    result.ranges.resize(num_rays);
+    result.incidence.resize(num_rays);
+    
+    // the tree is only read here so the rays are independent
+    #pragma omp parallel for schedule(dynamic, 16) if(num_rays > 16)
+    for (int ii = 0; ii < num_rays; ++ii) {
+        const Eigen::Vector3d source = sources_mesh.row(ii / rays_per_source).transpose();
+        const Eigen::Vector3d target = targets_mesh.row(ii).transpose();
+        Eigen::Vector3d pint;
+        int face;
+        
+        result.hit(ii) = first_hit(source, target, pint, face);
+        result.faces(ii) = face;
+        if (result.hit(ii)) {
+            const Eigen::Vector3d normal = mesh->get_face_normal(Face_index(face));
+            const double cos_incidence = std::abs((target - source).normalized().dot(normal));
+
+            result.intersections.row(ii) = (R_mesh2out * pint).transpose();
+            result.ranges(ii) = (pint - source).norm();
+            result.incidence(ii) = std::acos(std::min(cos_incidence, 1.0));
+        } else {
+            result.intersections.row(ii).fill(nan);
+            result.ranges(ii) = nan;
+            result.incidence(ii) = nan;
+        }
+    }
+
+    return result;
+}
+
 // TODO Modify this to compute distance instead of doing raycasting
 double RayCaster::minimum_distance(const Eigen::Ref<const Eigen::Vector3d> &pt) {
 
-    // create a Point object
-    Point a(pt(0), pt(1), pt(2));
+    // create a Point object. Distance is the same in either frame
+    const Eigen::Vector3d pt_mesh = Ra.transpose() * pt;
+    Point a(pt_mesh(0), pt_mesh(1), pt_mesh(2));
     
     return sqrt(CGAL::to_double(tree.squared_distance(a)));
  }
@@ -21,6 +21,14 @@ PYBIND11_MODULE(cgal, m) {
         .def("update_mesh", &MeshDistance::update_mesh, "Update the mesh",
                 pybind11::arg("mesh"));
 
+    pybind11::class_<RayCastResult>(m, "RayCastResult")
+        .def(pybind11::init<>())
+        .def_readonly("hit", &RayCastResult::hit, "True if the ray hit the mesh")
+        .def_readonly("intersections", &RayCastResult::intersections, "First intersection, NaN on a miss")
+        .def_readonly("faces", &RayCastResult::faces, "Index of the face that was hit, -1 on a miss")
+        .def_readonly("ranges", &RayCastResult::ranges, "Distance from the source to the intersection")
+        .def_readonly("incidence", &RayCastResult::incidence, "Angle between the ray and the face normal");
+
     pybind11::class_<RayCaster, std::shared_ptr<RayCaster>>(m, "RayCaster")
         .def(pybind11::init<std::shared_ptr<const MeshData>>(), "RayCaster constructor",
                 pybind11::arg("shared_ptr to MeshData object"))
@@ -36,12 +44,40 @@ PYBIND11_MODULE(cgal, m) {
                 pybind11::arg("psource"), pybind11::arg("ptarget"))
         .def("minimum_distance", &RayCaster::minimum_distance, "Minimum distance from point to mesh",
                 pybind11::arg("pt"))
-        .def("castarray", &RayCaster::castarray, "Cast many rays to the targets",
+        .def("castarray", &RayCaster::castarray, "Cast many rays to the targets. Misses are zero rows",
                 pybind11::arg("psource"), pybind11::arg("targets"))
+        .def("castbundle", &RayCaster::castbundle, "Cast N rays from each of M sources and return the intersections, faces, and ranges. Misses are NaN with face -1",
+                pybind11::arg("sources"), pybind11::arg("targets"),
+                pybind11::call_guard<pybind11::gil_scoped_release>())
+        .def("cast", (RayCastResult (RayCaster::*)(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >&,
+                                                   const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >&,
+                                                   const Eigen::Ref<const Eigen::Matrix3d>&) const) &RayCaster::cast,
+                "Cast N rays from each of M sources and return a RayCastResult in the R_out frame",
+                pybind11::arg("sources"), pybind11::arg("targets"), pybind11::arg("R_out"),
+                pybind11::call_guard<pybind11::gil_scoped_release>())
+        .def("cast", (RayCastResult (RayCaster::*)(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >&,
+                                                   const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >&) const) &RayCaster::cast,
+                "Cast N rays from each of M sources and return a RayCastResult",
+                pybind11::arg("sources"), pybind11::arg("targets"),
+                pybind11::call_guard<pybind11::gil_scoped_release>())
         .def("accelerate", &RayCaster::accelerate, "Call the distance acceleration setup")
+        .def("set_pose", &RayCaster::set_pose, "Set the rotation of the mesh, v_rotated = Ra v",
+                pybind11::arg("Ra"))
+        .def("get_pose", &RayCaster::get_pose, "Get the rotation of the mesh")
         .def("intersection", &RayCaster::intersection, "Check for intersection between source and target",
                 pybind11::arg("psource"), pybind11::arg("ptarget"));
 
+    pybind11::enum_<ScanPattern>(m, "ScanPattern")
+        .value("RASTER", ScanPattern::RASTER)
+        .value("SPIRAL", ScanPattern::SPIRAL)
+        .value("LISSAJOUS", ScanPattern::LISSAJOUS)
+        .value("RANDOM", ScanPattern::RANDOM);
+
+    pybind11::enum_<RangeNoise>(m, "RangeNoise")
+        .value("NONE", RangeNoise::NONE)
+        .value("GAUSSIAN", RangeNoise::GAUSSIAN)
+        .value("UNIFORM", RangeNoise::UNIFORM);
+
     pybind11::class_<Lidar, std::shared_ptr<Lidar>>(m, "Lidar")
         .def(pybind11::init<>(), "Lidar constructor")
         .def("view_axis", &Lidar::view_axis, "Set the view axis",
@@ -58,16 +94,37 @@ PYBIND11_MODULE(cgal, m) {
                 pybind11::arg("Distance for the raycasting"))
         .def("num_steps", &Lidar::num_steps, "Set the number of steps for FOV",
                 pybind11::arg("num_steps"))
+        .def("scan_pattern", &Lidar::scan_pattern, "Set the layout of the rays",
+                pybind11::arg("ScanPattern"))
+        .def("range_noise", &Lidar::range_noise, "Set the range error model",
+                pybind11::arg("RangeNoise"))
+        .def("seed", &Lidar::seed, "Seed the range noise and RANDOM scan pattern",
+                pybind11::arg("seed"))
+        .def("sample_range_noise", &Lidar::sample_range_noise, "Draw range errors",
+                pybind11::arg("num"))
+        .def("add_range_noise", &Lidar::add_range_noise,
+                "Move the intersections along their rays by a range error",
+                pybind11::arg("sources"), pybind11::arg("intersections"))
         .def("rotate_fov", &Lidar::rotate_fov, "Rotate teh FOV by a R",
                 pybind11::arg("R_body2frame"))
         .def("define_targets", &Lidar::define_targets, "Define the targets for the LIDAR",
                 pybind11::arg("pos"), pybind11::arg("R_b2f"), pybind11::arg("dist"))
+        .def("define_targets_batch", &Lidar::define_targets_batch,
+                "Targets for T poses, stacked into (T N) x 3",
+                pybind11::arg("pos"), pybind11::arg("R_b2f"), pybind11::arg("dist"))
+        .def("define_trajectory_targets", &Lidar::define_trajectory_targets,
+                "Targets for a T x 18 state history, stacked into (T N) x 3",
+                pybind11::arg("state"))
         .def("define_target", &Lidar::define_target, "Define the target for the LIDAR",
                 pybind11::arg("pos"), pybind11::arg("R_b2f"), pybind11::arg("dist"))
         .def("get_view_axis", &Lidar::get_view_axis, "Return the view axis")
         .def("get_up_axis", &Lidar::get_up_axis, "Return the up axis")
         .def("get_lidar_array", &Lidar::get_lidar_array, "Return teh LIDAR array")
-        .def("get_fov", &Lidar::get_fov, "Return the FOV");
+        .def("get_fov", &Lidar::get_fov, "Return the FOV")
+        .def("get_scan_pattern", &Lidar::get_scan_pattern, "Return the ScanPattern")
+        .def("get_range_noise", &Lidar::get_range_noise, "Return the RangeNoise")
+        .def("get_sigma", &Lidar::get_sigma, "Return the 3 sigma range error")
+        .def("get_seed", &Lidar::get_seed, "Return the seed of the range noise and RANDOM scan pattern");
         
 }
 
@@ -0,0 +1,267 @@
+#include "eoms.hpp"
+#include "potential.hpp"
+#include "geodesic.hpp"
+
+#include <algorithm>
+#include <cmath>
+#include <stdexcept>
+
+static Eigen::Matrix3d hat_map(const Eigen::Ref<const Eigen::Vector3d>& x) {
+    Eigen::Matrix3d x_hat;
+    x_hat << 0, -x(2), x(1),
+             x(2), 0, -x(0),
+             -x(1), x(0), 0;
+    return x_hat;
+}
+
+static Eigen::Vector3d vee_map(const Eigen::Ref<const Eigen::Matrix3d>& x_hat) {
+    return (Eigen::Vector3d() << x_hat(2, 1), x_hat(0, 2), x_hat(1, 0)).finished();
+}
+
+Dumbbell::Dumbbell(const double& m1_in, const double& m2_in, const double& l_in)
+    : m1(m1_in), m2(m2_in), l(l_in) {
+    const double mratio = m2 / (m1 + m2);
+    const double lcg1 = mratio * l;
+    const double lcg2 = l - lcg1;
+    zeta1 << -lcg1, 0, 0;
+    zeta2 << lcg2, 0, 0;
+
+    const Eigen::Matrix3d I = Eigen::Matrix3d::Identity();
+    const Eigen::Matrix3d Jm1 = 2.0 / 5 * m1 * r1 * r1 * I;
+    const Eigen::Matrix3d Jm2 = 2.0 / 5 * m2 * r2 * r2 * I;
+    J = Jm1 + Jm2
+        + m1 * (zeta1.dot(zeta1) * I - zeta1 * zeta1.transpose())
+        + m2 * (zeta2.dot(zeta2) * I - zeta2 * zeta2.transpose());
+    Jinv = J.inverse();
+
+    // 5 percent overshoot with settling times of 200 and 2 sec
+    const double OS = 5.0 / 100;
+    const double zeta = -std::log(OS) / std::sqrt(kPI * kPI + std::log(OS) * std::log(OS));
+    const double wn_translation = 4.0 / zeta / 200;
+    const double wn_rotation = 4.0 / zeta / 2;
+
+    kR = wn_rotation * wn_rotation;
+    kW = 2 * zeta * wn_rotation;
+    kx = (m1 + m2) * wn_translation * wn_translation;
+    kv = (m1 + m2) * 2 * zeta * wn_translation;
+}
+
+ControlledDumbbell::ControlledDumbbell(std::shared_ptr<Asteroid> true_ast_in,
+                                       const Dumbbell& dum_in,
+                                       std::shared_ptr<Asteroid> est_ast_in)
+    : true_ast(true_ast_in), est_ast(est_ast_in), dum(dum_in) {
+}
+
+ControlledDumbbell::StateVector ControlledDumbbell::operator()(const double& t,
+        const Eigen::Ref<const StateVector>& state) {
+    const Eigen::Vector3d pos = state.segment<3>(0);
+    const Eigen::Vector3d vel = state.segment<3>(3);
+    const Eigen::Matrix3d R = Eigen::Map<const Eigen::Matrix<double, 3, 3, Eigen::RowMajor> >(state.data() + 6);
+    const Eigen::Vector3d ang_vel = state.segment<3>(15);
+
+    const Eigen::Matrix3d Ra = true_ast->rot_ast2int(t);
+    const double m = dum.m1 + dum.m2;
+
+    // position of each mass in the asteroid frame
+    const Eigen::Vector3d z1 = Ra.transpose() * (pos + R * dum.zeta1);
+    const Eigen::Vector3d z2 = Ra.transpose() * (pos + R * dum.zeta2);
+
+    true_ast->polyhedron_potential(z1);
+    const Eigen::Vector3d U1_grad = true_ast->get_acceleration();
+    true_ast->polyhedron_potential(z2);
+    const Eigen::Vector3d U2_grad = true_ast->get_acceleration();
+
+    const Eigen::Vector3d F = dum.m1 * Ra * U1_grad + dum.m2 * Ra * U2_grad;
+    const Eigen::Vector3d M = dum.m1 * hat_map(dum.zeta1) * (R.transpose() * Ra * U1_grad)
+        + dum.m2 * hat_map(dum.zeta2) * (R.transpose() * Ra * U2_grad);
+
+    // force and moment cancelled by the controllers
+    Eigen::Vector3d F_est = F, M_est = M;
+    Eigen::Vector3d ang_vel_d = command.ang_vel_d, ang_vel_d_dot = command.ang_vel_d_dot;
+    if (est_ast) {
+        est_ast->polyhedron_potential(z1);
+        const Eigen::Vector3d U1_grad_est = est_ast->get_acceleration();
+        est_ast->polyhedron_potential(z2);
+        const Eigen::Vector3d U2_grad_est = est_ast->get_acceleration();
+
+        F_est = dum.m1 * Ra * U1_grad_est + dum.m2 * Ra * U2_grad_est;
+        M_est = dum.m1 * hat_map(dum.zeta1) * (R.transpose() * Ra * U1_grad_est)
+            + dum.m2 * hat_map(dum.zeta2) * (R.transpose() * Ra * U2_grad_est);
+
+        ang_vel_d = Ra * ang_vel_d;
+        ang_vel_d_dot = Ra * ang_vel_d_dot;
+    }
+
+    // attitude_controller
+    const Eigen::Matrix3d Rd = Ra * command.Rd;
+    const Eigen::Matrix3d RtRd = R.transpose() * Rd;
+    const Eigen::Vector3d eR = 0.5 * vee_map(Rd.transpose() * R - RtRd);
+    const Eigen::Vector3d eW = ang_vel - RtRd * ang_vel_d;
+    const Eigen::Vector3d Jw = dum.J * ang_vel;
+    const Eigen::Vector3d u_m = -dum.kR * eR - dum.kW * eW + ang_vel.cross(Jw)
+        - dum.J * (hat_map(ang_vel) * RtRd * ang_vel_d - RtRd * ang_vel_d_dot) - M_est;
+
+    // translation_controller
+    const Eigen::Vector3d ex = pos - Ra * command.posd;
+    const Eigen::Vector3d ev = vel - Ra * command.veld;
+    const Eigen::Vector3d u_f = -dum.kx * ex - dum.kv * ev - F_est + m * Ra * command.acceld;
+
+    StateVector state_dot;
+    state_dot.segment<3>(0) = vel;
+    state_dot.segment<3>(3) = (F + u_f) / m;
+    Eigen::Map<Eigen::Matrix<double, 3, 3, Eigen::RowMajor> >(state_dot.data() + 6) = R * hat_map(ang_vel);
+    state_dot.segment<3>(15) = dum.Jinv * (-ang_vel.cross(Jw) + M + u_m);
+    return state_dot;
+}
+
+// Dormand-Prince 5(4) coefficients
+namespace {
+    const double c2 = 1.0 / 5, c3 = 3.0 / 10, c4 = 4.0 / 5, c5 = 8.0 / 9;
+    const double a21 = 1.0 / 5;
+    const double a31 = 3.0 / 40, a32 = 9.0 / 40;
+    const double a41 = 44.0 / 45, a42 = -56.0 / 15, a43 = 32.0 / 9;
+    const double a51 = 19372.0 / 6561, a52 = -25360.0 / 2187, a53 = 64448.0 / 6561,
+                 a54 = -212.0 / 729;
+    const double a61 = 9017.0 / 3168, a62 = -355.0 / 33, a63 = 46732.0 / 5247,
+                 a64 = 49.0 / 176, a65 = -5103.0 / 18656;
+    const double a71 = 35.0 / 384, a73 = 500.0 / 1113, a74 = 125.0 / 192,
+                 a75 = -2187.0 / 6784, a76 = 11.0 / 84;
+    // difference between the fifth and fourth order solutions
+    const double e1 = 71.0 / 57600, e3 = -71.0 / 16695, e4 = 71.0 / 1920,
+                 e5 = -17253.0 / 339200, e6 = 22.0 / 525, e7 = -1.0 / 40;
+    // dense output
+    const double d1 = -12715105075.0 / 11282082432, d3 = 87487479700.0 / 32700410799,
+                 d4 = -10690763975.0 / 1880347072, d5 = 701980252875.0 / 199316789632,
+                 d6 = -1453857185.0 / 822651844, d7 = 69997945.0 / 29380423;
+}
+
+DormandPrince::DormandPrince(const double& AbsTol_in, const double& RelTol_in,
+                             const double& max_step_in)
+    : AbsTol(AbsTol_in), RelTol(RelTol_in), max_step(max_step_in) {
+}
+
+double DormandPrince::initial_step(const Function& f, const double& t0,
+                                   const Eigen::Ref<const Eigen::VectorXd>& y0,
+                                   const Eigen::Ref<const Eigen::VectorXd>& f0) {
+    const Eigen::ArrayXd scale = AbsTol + RelTol * y0.array().abs();
+    const double n = static_cast<double>(y0.size());
+    const double d0 = std::sqrt((y0.array() / scale).square().sum() / n);
+    const double d1 = std::sqrt((f0.array() / scale).square().sum() / n);
+    double h0 = (d0 < 1e-5 || d1 < 1e-5) ? 1e-6 : 0.01 * d0 / d1;
+    h0 = std::min(h0, max_step);
+
+    const Eigen::VectorXd f1 = f(t0 + h0, y0 + h0 * f0);
+    ++num_evals;
+    const double d2 = std::sqrt(((f1 - f0).array() / scale).square().sum() / n) / h0;
+
+    const double dmax = std::max(d1, d2);
+    const double h1 = (dmax <= 1e-15) ? std::max(1e-6, h0 * 1e-3) : std::pow(0.01 / dmax, 1.0 / 5);
+    return std::min(std::min(100 * h0, h1), max_step);
+}
+
+Eigen::MatrixXd DormandPrince::integrate(const Function& f, const double& t0,
+                                         const Eigen::Ref<const Eigen::VectorXd>& y0,
+                                         const Eigen::Ref<const Eigen::VectorXd>& times) {
+    const Eigen::Index num_out = times.size();
+    Eigen::MatrixXd out(num_out, y0.size());
+    num_evals = num_steps = num_rejected = 0;
+
+    Eigen::Index next = 0;
+    while (next < num_out && times(next) <= t0) {
+        if (times(next) < t0) {
+            throw std::invalid_argument("DormandPrince: output times must not be before t0");
+        }
+        out.row(next++) = y0.transpose();
+    }
+    if (next == num_out) {
+        return out;
+    }
+
+    double t = t0;
+    Eigen::VectorXd y = y0;
+    Eigen::VectorXd k1 = f(t, y);
+    ++num_evals;
+
+    // keep the step of the last call, since the outer loop calls this for
+    // one output step at a time
+    if (!(h > 0)) {
+        h = initial_step(f, t, y, k1);
+    }
+    h = std::min(h, max_step);
+
+    const double tf = times(num_out - 1);
+    Eigen::VectorXd k2, k3, k4, k5, k6, k7, y_new, err;
+    bool last_rejected = false;
+    while (next < num_out) {
+        const double min_step = 16 * std::numeric_limits<double>::epsilon() * std::abs(t);
+        if (h < min_step) {
+            throw std::runtime_error("DormandPrince: step size underflow");
+        }
+        // do not overshoot the last output by a sliver
+        const double step = (t + 1.01 * h >= tf) ? tf - t : h;
+
+        k2 = f(t + c2 * step, y + step * a21 * k1);
+        k3 = f(t + c3 * step, y + step * (a31 * k1 + a32 * k2));
+        k4 = f(t + c4 * step, y + step * (a41 * k1 + a42 * k2 + a43 * k3));
+        k5 = f(t + c5 * step, y + step * (a51 * k1 + a52 * k2 + a53 * k3 + a54 * k4));
+        k6 = f(t + step, y + step * (a61 * k1 + a62 * k2 + a63 * k3 + a64 * k4 + a65 * k5));
+        y_new = y + step * (a71 * k1 + a73 * k3 + a74 * k4 + a75 * k5 + a76 * k6);
+        k7 = f(t + step, y_new);
+        num_evals += 6;
+
+        err = step * (e1 * k1 + e3 * k3 + e4 * k4 + e5 * k5 + e6 * k6 + e7 * k7);
+        const Eigen::ArrayXd scale = AbsTol + RelTol * y.array().abs().max(y_new.array().abs());
+        const double err_norm = std::sqrt((err.array() / scale).square().sum() / static_cast<double>(y.size()));
+
+        double factor = (err_norm == 0) ? 10.0 : 0.9 * std::pow(err_norm, -1.0 / 5);
+        if (err_norm > 1) {
+            h = step * std::max(0.2, factor);
+            ++num_rejected;
+            last_rejected = true;
+            continue;
+        }
+
+        // accepted step. Interpolate every output inside of it
+        const double t_new = (step == tf - t) ? tf : t + step;
+        if (next < num_out && times(next) <= t_new) {
+            const Eigen::VectorXd dy = y_new - y;
+            const Eigen::VectorXd bspl = step * k1 - dy;
+            const Eigen::VectorXd rcont4 = dy - step * k7 - bspl;
+            const Eigen::VectorXd rcont5 = step * (d1 * k1 + d3 * k3 + d4 * k4 + d5 * k5 + d6 * k6 + d7 * k7);
+            while (next < num_out && times(next) <= t_new) {
+                const double theta = (times(next) - t) / step;
+                const double theta1 = 1 - theta;
+                out.row(next++) = (y + theta * (dy + theta1 * (bspl + theta * (rcont4 + theta1 * rcont5)))).transpose();
+            }
+        }
+
+        // no growth right after a rejection
+        factor = std::min(last_rejected ? 1.0 : 10.0, std::max(0.2, factor));
+        if (step == h) {
+            h = std::min(step * factor, max_step);
+        } else if (factor < 1) {
+            // the step was shortened to land on tf, keep h unless it failed
+            h = std::min(h, step * factor);
+        }
+        last_rejected = false;
+
+        t = t_new;
+        y = y_new;
+        k1 = k7;
+        ++num_steps;
+    }
+
+    return out;
+}
+
+Eigen::MatrixXd DormandPrince::integrate(ControlledDumbbell& eoms, const double& t0,
+                                         const Eigen::Ref<const Eigen::VectorXd>& y0,
+                                         const Eigen::Ref<const Eigen::VectorXd>& times) {
+    if (y0.size() != 18) {
+        throw std::invalid_argument("DormandPrince: the dumbbell state has 18 elements");
+    }
+    return integrate([&eoms](const double& t, const Eigen::Ref<const Eigen::VectorXd>& y) {
+                Eigen::VectorXd y_dot = eoms(t, y);
+                return y_dot;
+            }, t0, y0, times);
+}
@@ -0,0 +1,82 @@
+/**
+    Bindings for the compiled equations of motion
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+#include "eoms.hpp"
+#include "potential.hpp"
+
+#include <pybind11/pybind11.h>
+#include <pybind11/eigen.h>
+#include <pybind11/functional.h>
+
+PYBIND11_MODULE(eoms, m) {
+    m.doc() = "Controlled dumbbell equations of motion and integrator in C++";
+
+    pybind11::class_<Dumbbell>(m, "Dumbbell")
+        .def(pybind11::init<const double&, const double&, const double&>(),
+                "Dumbbell with the same model and gains as dynamics.dumbbell.Dumbbell",
+                pybind11::arg("m1") = 100.0, pybind11::arg("m2") = 100.0,
+                pybind11::arg("l") = 0.003)
+        .def_readonly("m1", &Dumbbell::m1)
+        .def_readonly("m2", &Dumbbell::m2)
+        .def_readonly("l", &Dumbbell::l)
+        .def_readonly("zeta1", &Dumbbell::zeta1)
+        .def_readonly("zeta2", &Dumbbell::zeta2)
+        .def_readonly("J", &Dumbbell::J)
+        .def_readonly("kR", &Dumbbell::kR)
+        .def_readonly("kW", &Dumbbell::kW)
+        .def_readonly("kx", &Dumbbell::kx)
+        .def_readonly("kv", &Dumbbell::kv);
+
+    pybind11::class_<ControlledDumbbell>(m, "ControlledDumbbell")
+        .def(pybind11::init<std::shared_ptr<Asteroid>, const Dumbbell&, std::shared_ptr<Asteroid> >(),
+                "Equations of motion tracking a held command. Giving est_ast matches eoms_controlled_inertial_control_cost_held",
+                pybind11::arg("true_ast"), pybind11::arg("dumbbell"),
+                pybind11::arg("est_ast") = nullptr)
+        .def("__call__", &ControlledDumbbell::operator(),
+                "Derivative of the state, so it can be used directly by scipy.integrate.ode",
+                pybind11::arg("t"), pybind11::arg("state"))
+        .def("set_command", [](ControlledDumbbell& eoms,
+                    const Eigen::Matrix3d& Rd, const Eigen::Matrix3d& Rd_dot,
+                    const Eigen::Vector3d& ang_vel_d, const Eigen::Vector3d& ang_vel_d_dot,
+                    const Eigen::Vector3d& posd, const Eigen::Vector3d& veld,
+                    const Eigen::Vector3d& acceld) {
+                DesiredState command;
+                command.Rd = Rd;
+                command.Rd_dot = Rd_dot;
+                command.ang_vel_d = ang_vel_d;
+                command.ang_vel_d_dot = ang_vel_d_dot;
+                command.posd = posd;
+                command.veld = veld;
+                command.acceld = acceld;
+                eoms.set_command(command);
+            }, "Hold new commands, all in the asteroid fixed frame",
+            pybind11::arg("Rd"), pybind11::arg("Rd_dot"), pybind11::arg("ang_vel_d"),
+            pybind11::arg("ang_vel_d_dot"), pybind11::arg("posd"), pybind11::arg("veld"),
+            pybind11::arg("acceld"))
+        .def("get_dumbbell", &ControlledDumbbell::get_dumbbell);
+
+    pybind11::class_<DormandPrince>(m, "DormandPrince")
+        .def(pybind11::init<const double&, const double&, const double&>(),
+                "Adaptive Runge-Kutta 5(4) integrator with dense output",
+                pybind11::arg("AbsTol") = 1e-9, pybind11::arg("RelTol") = 1e-9,
+                pybind11::arg("max_step") = std::numeric_limits<double>::infinity())
+        .def("integrate", (Eigen::MatrixXd (DormandPrince::*)(ControlledDumbbell&, const double&,
+                        const Eigen::Ref<const Eigen::VectorXd>&,
+                        const Eigen::Ref<const Eigen::VectorXd>&)) &DormandPrince::integrate,
+                "Integrate the compiled equations of motion and return the state at each time",
+                pybind11::arg("eoms"), pybind11::arg("t0"), pybind11::arg("state0"),
+                pybind11::arg("times"))
+        .def("integrate", (Eigen::MatrixXd (DormandPrince::*)(const DormandPrince::Function&,
+                        const double&, const Eigen::Ref<const Eigen::VectorXd>&,
+                        const Eigen::Ref<const Eigen::VectorXd>&)) &DormandPrince::integrate,
+                "Integrate any f(t, y) and return the state at each time",
+                pybind11::arg("f"), pybind11::arg("t0"), pybind11::arg("y0"),
+                pybind11::arg("times"))
+        .def("get_num_evals", &DormandPrince::get_num_evals)
+        .def("get_num_steps", &DormandPrince::get_num_steps)
+        .def("get_num_rejected", &DormandPrince::get_num_rejected)
+        .def("get_step", &DormandPrince::get_step);
+}
@@ -9,6 +9,7 @@
 #include "controller.hpp"
 #include "state.hpp"
 #include "hdf5.hpp"
+#include "async_writer.hpp"
 
 #include "input_parser.hpp"
 
@@ -149,6 +150,10 @@ int main(int argc, char* argv[])
 
     hf->write("initial_state", state_ptr->get_state()); 
 
+    // per step output goes through a background thread. The writer is 
+    // declared after the groups so it is destroyed, and drained, first
+    AsyncWriter writer;
+
     // LOOP HERE
     double sum_weights = rmesh_ptr->get_weights().sum();
     int ii = 0;
@@ -168,13 +173,11 @@ int main(int argc, char* argv[])
         // update the state ptr with the newly calculated state
         state_ptr->update_state(new_state_ptr);
         // save the data (raycast interseciton, position of sat, ast estimate, targets) to hdf5
-        reconstructed_vertex_group.write(std::to_string(ii),
-                rmesh_ptr->get_verts());
-        reconstructed_weight_group.write(std::to_string(ii),
-                rmesh_ptr->get_weights());
-        state_group.write(std::to_string(ii), state_ptr->get_state());
-        targets_group.write(std::to_string(ii), target);
-        intersections_group.write(std::to_string(ii), intersection);
+        writer.write(reconstructed_vertex_group, std::to_string(ii), rmesh_ptr->get_verts());
+        writer.write(reconstructed_weight_group, std::to_string(ii), rmesh_ptr->get_weights());
+        writer.write(state_group, std::to_string(ii), state_ptr->get_state());
+        writer.write(targets_group, std::to_string(ii), target);
+        writer.write(intersections_group, std::to_string(ii), intersection);
         // compute and save volume
         sum_weights = rmesh_ptr->get_weights().sum();
         ii += 1;
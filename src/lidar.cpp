@@ -1,9 +1,11 @@
 #include "lidar.hpp"
+#include "geodesic.hpp"
 
 #include <Eigen/Dense>
 
 #include <cmath>
 #include <iostream>
+#include <stdexcept>
 
 Lidar::Lidar( void ) {
 	mview_axis << 1, 0, 0;
@@ -33,16 +35,47 @@ void Lidar::init( void ) {
 	hsteps = Eigen::VectorXd::LinSpaced(mnum_steps, -H, H);
 	wsteps = Eigen::VectorXd::LinSpaced(mnum_steps, -W, W);
 
-	// define  all the unit vectors for the sensor
-	mlidar_array.resize(pow(mnum_steps, 2), 3);
-	Eigen::RowVector3d lidar_vec;
-	for (int ii = 0; ii < hsteps.size(); ++ii) {
-		for (int jj = 0; jj < wsteps.size(); ++jj) {
-			lidar_vec = c + hsteps(ii) * mup_axis + wsteps(jj) * mright_axis;
-			mlidar_array.row(ii *  mnum_steps + jj) << lidar_vec / lidar_vec.norm();
+	// position of each ray in the fustrum, along up and right
+	const int num_rays = mnum_steps * mnum_steps;
+	Eigen::ArrayXd h(num_rays), w(num_rays);
+	switch (mpattern) {
+		case ScanPattern::RASTER: {
+			for (int ii = 0; ii < hsteps.size(); ++ii) {
+				h.segment(ii * mnum_steps, mnum_steps).setConstant(hsteps(ii));
+				w.segment(ii * mnum_steps, mnum_steps) = wsteps;
+			}
+			break;
+		}
+		case ScanPattern::SPIRAL: {
+			Eigen::ArrayXd radius = Eigen::ArrayXd::LinSpaced(num_rays, 0, 1);
+			Eigen::ArrayXd angle = 2 * kPI * mnum_steps * radius;
+			h = H * radius * angle.sin();
+			w = W * radius * angle.cos();
+			break;
+		}
+		case ScanPattern::LISSAJOUS: {
+			Eigen::ArrayXd time = Eigen::ArrayXd::LinSpaced(num_rays, 0, 2 * kPI * (num_rays - 1) / num_rays);
+			h = H * (mnum_steps * time).sin();
+			w = W * ((mnum_steps + 1) * time + kPI / 2).sin();
+			break;
+		}
+		case ScanPattern::RANDOM: {
+			// separate from mgen so the table does not depend on the noise drawn
+			std::mt19937 gen(mseed);
+			std::uniform_real_distribution<double> uniform(-1.0, 1.0);
+			for (int ii = 0; ii < num_rays; ++ii) {
+				h(ii) = H * uniform(gen);
+				w(ii) = W * uniform(gen);
+			}
+			break;
 		}
 	}
 
+	// define  all the unit vectors for the sensor
+	mlidar_array.resize(num_rays, 3);
+	mlidar_array = (h.matrix() * mup_axis.transpose()).rowwise() + c.transpose();
+	mlidar_array += w.matrix() * mright_axis.transpose();
+	mlidar_array.rowwise().normalize();
 }
 
 Eigen::Matrix<double, Eigen::Dynamic, 3> Lidar::rotate_fov(const Eigen::Ref<const Eigen::Matrix<double, 3, 3> > &R_body2frame) {
@@ -69,6 +102,77 @@ Eigen::RowVector3d Lidar::define_target(const Eigen::Ref<const Eigen::RowVector3
     return target;
 }
 
+Eigen::Matrix<double, Eigen::Dynamic, 3> Lidar::define_targets_batch(
+        const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& pos,
+        const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 9, Eigen::RowMajor> >& R_b2f,
+        const Eigen::Ref<const Eigen::VectorXd>& dist) const {
+    const int num_poses = pos.rows();
+    const int num_rays = mlidar_array.rows();
+    if (R_b2f.rows() != num_poses || dist.size() != num_poses) {
+        throw std::invalid_argument("Number of rotations and distances must match the number of positions");
+    }
+    
+    // a row major R read in column major order is R^T
+    Eigen::Matrix<double, 3, Eigen::Dynamic> R_stack(3, 3 * num_poses);
+    for (int ii = 0; ii < num_poses; ++ii) {
+        R_stack.middleCols<3>(3 * ii) = Eigen::Map<const Eigen::Matrix3d>(R_b2f.row(ii).data());
+    }
+    // column block ii is the lidar array rotated by pose ii
+    Eigen::MatrixXd rotated = mlidar_array * R_stack;
+
+    Eigen::Matrix<double, Eigen::Dynamic, 3> targets(num_poses * num_rays, 3);
+    for (int ii = 0; ii < num_poses; ++ii) {
+        targets.middleRows(ii * num_rays, num_rays) 
+            = (dist(ii) * rotated.middleCols<3>(3 * ii)).rowwise() + pos.row(ii);
+    }
+    return targets;
+}
+
+Eigen::Matrix<double, Eigen::Dynamic, 3> Lidar::define_trajectory_targets(
+        const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 18, Eigen::RowMajor> >& state) const {
+    return define_targets_batch(state.leftCols<3>(), state.middleCols<9>(6),
+            state.leftCols<3>().rowwise().norm());
+}
+
+Eigen::VectorXd Lidar::sample_range_noise(const int& num) {
+    Eigen::VectorXd noise = Eigen::VectorXd::Zero(num);
+    if (mnoise == RangeNoise::GAUSSIAN) {
+        std::normal_distribution<double> normal(0.0, msigma / 3.0);
+        for (int ii = 0; ii < num; ++ii) {
+            noise(ii) = normal(mgen);
+        }
+    } else if (mnoise == RangeNoise::UNIFORM) {
+        std::uniform_real_distribution<double> uniform(-msigma, msigma);
+        for (int ii = 0; ii < num; ++ii) {
+            noise(ii) = uniform(mgen);
+        }
+    }
+    return noise;
+}
+
+Eigen::Matrix<double, Eigen::Dynamic, 3> Lidar::add_range_noise(
+        const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& sources,
+        const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& intersections) {
+    const int num_sources = sources.rows();
+    if (num_sources == 0 || intersections.rows() % num_sources != 0) {
+        throw std::invalid_argument("Number of intersections must be a multiple of the number of sources");
+    }
+    const int num_rays = intersections.rows() / num_sources;
+    
+    // one sample per ray, hit or not, so the sequence only depends on the seed
+    Eigen::VectorXd noise = sample_range_noise(intersections.rows());
+    Eigen::Matrix<double, Eigen::Dynamic, 3> measured = intersections;
+    for (int ii = 0; ii < intersections.rows(); ++ii) {
+        // misses are NaN from castbundle/cast and zero from castray/castarray
+        if (!intersections.row(ii).allFinite() || intersections.row(ii).isZero(0)) {
+            continue;
+        }
+        const Eigen::RowVector3d ray = intersections.row(ii) - sources.row(ii / num_rays);
+        measured.row(ii) += noise(ii) * ray.normalized();
+    }
+    return measured;
+}
+
 Eigen::Vector3d Lidar::get_view_axis( void ) const {
     return mview_axis;
 }
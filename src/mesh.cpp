@@ -189,6 +189,9 @@ void MeshData::update_mesh(const Eigen::Ref<const Eigen::MatrixXd> &V,
     // update the polyhedron and surface mesh
     // clear the mesh
     this->surface_mesh.clear();
+    this->dirty_vertices.clear();
+    ++revision;
+    ++shape_revision;
 
     this->build_surface_mesh(V, F);
 }
@@ -399,6 +402,8 @@ bool MeshData::set_vertex(const Vertex_index& vd,
     
     Point p = Kernel::Point_3(vec(0), vec(1), vec(2));
     surface_mesh.point(vd) = p;
+    ++revision;
+    ++shape_revision;
 
     // update the mesh properties associated with this vertex index
     std::vector<Face_index> face_vec = get_faces_with_vertex(vd);
@@ -408,13 +413,53 @@ bool MeshData::set_vertex(const Vertex_index& vd,
     update_face_properties(face_vec);
     update_halfedge_properties(halfedge_vec);
     update_edge_properties(edge_vec);
+    return true;
+}
+
+bool MeshData::move_vertex(const Vertex_index& vd,
+        const Eigen::Ref<const Eigen::Vector3d>& vec) {
+    surface_mesh.point(vd) = Kernel::Point_3(vec(0), vec(1), vec(2));
+    dirty_vertices.insert(vd);
+    ++shape_revision;
+    return true;
+}
+
+std::size_t MeshData::update_dirty_properties( void ) {
+    // neighboring dirty vertices share faces and edges so collect them first
+    std::set<Face_index> face_set;
+    for (Vertex_index vd : dirty_vertices) {
+        for (Face_index fd : get_faces_with_vertex(vd)) {
+            face_set.insert(fd);
+        }
+    }
+    
+    // every halfedge of a changed face depends on its normal, including the
+    // one across from the moved vertex, and so does the edge dyad
+    std::set<Halfedge_index> halfedge_set;
+    std::set<Edge_index> edge_set;
+    for (Face_index fd : face_set) {
+        for (Halfedge_index hd : halfedges_around_face(surface_mesh.halfedge(fd), surface_mesh)) {
+            halfedge_set.insert(hd);
+            edge_set.insert(surface_mesh.edge(hd));
+        }
+    }
+    
+    // halfedge and edge properties use the face normals so faces go first
+    update_face_properties(std::vector<Face_index>(face_set.begin(), face_set.end()));
+    update_halfedge_properties(std::vector<Halfedge_index>(halfedge_set.begin(), halfedge_set.end()));
+    update_edge_properties(std::vector<Edge_index>(edge_set.begin(), edge_set.end()));
+    
+    std::size_t num_vertices = dirty_vertices.size();
+    dirty_vertices.clear();
+    return num_vertices;
 }
 
 bool MeshData::refine_faces(const std::vector<Face_index>& face_vec,
         std::vector<Face_index>& new_faces,
         std::vector<Vertex_index>& new_vertices,
         const int& density) {
-    
+    ++revision;
+    ++shape_revision;
     CGAL::Polygon_mesh_processing::refine(
             surface_mesh,
             face_vec,
@@ -433,7 +478,8 @@ bool MeshData::refine_faces(const std::vector<Face_index>& face_vec,
 bool MeshData::remesh_faces(const std::vector<Face_index>& face_vec,
         const double& target_edge_length,
         const int& number_of_iterations) {
-
+    ++revision;
+    ++shape_revision;
     CGAL::Polygon_mesh_processing::isotropic_remeshing(
             face_vec,
             target_edge_length,
@@ -22,6 +22,12 @@ PYBIND11_MODULE(mesh_data, m) {
                 py::arg("asteroid frame position"), py::arg("maximum fov angle (radians)"),
                 py::arg("desired edge length (km)"))
         .def("get_all_face_center", &MeshData::get_all_face_center, "Get all the face centers")
-        .def("get_all_face_area", &MeshData::get_all_face_area, "Get all the face areas");
+        .def("get_all_face_area", &MeshData::get_all_face_area, "Get all the face areas")
+        .def("update_dirty_properties", &MeshData::update_dirty_properties, 
+                "Recompute the faces/edges around moved vertices and return how many were moved")
+        .def("number_of_dirty_vertices", &MeshData::number_of_dirty_vertices,
+                "Number of vertices moved since the last property update")
+        .def("get_shape_revision", &MeshData::get_shape_revision,
+                "Counter of every change to the vertex positions");
 
 }
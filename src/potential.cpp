@@ -2,6 +2,7 @@
 #include "mesh.hpp"
 #include "reconstruct.hpp"
 #include "geodesic.hpp"
+#include "hdf5.hpp"
 
 #include <igl/sort.h>
 #include <igl/unique_rows.h>
@@ -17,8 +18,10 @@
 #include <algorithm>
 #include <iostream>
 #include <vector>
+#include <set>
 #include <tuple>
 #include <cassert>
+#include <cstdint>
 #include <cmath>
 #include <string>
 #include <stdexcept>
@@ -55,6 +58,10 @@ void MeshParam::polyhedron_parameters( void ) {
     
     const Eigen::MatrixXd& V = mesh->get_verts();
     const Eigen::MatrixXi& F = mesh->get_faces();
+    
+    verts = V;
+    mesh_revision = mesh->get_revision();
+    vf_map = vertex_face_map(V, F);
 
     num_v = V.rows();
     num_f = F.rows();
@@ -94,9 +101,9 @@ void MeshParam::polyhedron_parameters( void ) {
 
     e_vertex_map_stacked << e1_vertex_map, e2_vertex_map, e3_vertex_map;
     
-    Eigen::MatrixXi IA, IC, sort_index;
+    Eigen::MatrixXi sort_index;
     igl::sort(e_vertex_map_stacked, 2, true, e_vertex_map_sorted, sort_index);
-    igl::unique_rows(e_vertex_map_sorted, e_vertex_map, unique_index, IC);
+    igl::unique_rows(e_vertex_map_sorted, e_vertex_map, unique_index, edge_index);
 
     igl::cross(e1, e2, normal_face);
     normal_face.rowwise().normalize();
@@ -294,6 +301,88 @@ void MeshParam::edge_dyad( void ) {
     }
 
     }
+    
+    // keep the adjacency for update_moved_vertices
+    this->e1_face_map = e1_face_map;
+    this->e2_face_map = e2_face_map;
+    this->e3_face_map = e3_face_map;
+}
+
+Eigen::Matrix3d MeshParam::face_edge_dyad(const int& face, const int& edge) const {
+    const Eigen::MatrixXi& face_map = edge == 0 ? e1_face_map : (edge == 1 ? e2_face_map : e3_face_map);
+    const Eigen::Matrix<double, Eigen::Dynamic, 3>& edge_normal = 
+        edge == 0 ? e1_normal : (edge == 1 ? e2_normal : e3_normal);
+    
+    Eigen::Matrix<double, 1, 3> nA, nA_edge, nB, nB_edge;
+    nA = normal_face.row(face);
+    nA_edge = edge_normal.row(face_map(face, 0));
+    
+    // same search as edge_dyad
+    if (face_map(face, 1) != -1) {
+        nB_edge = e1_normal.row(face_map(face, 1));
+        nB = normal_face.row(face_map(face, 1));
+    } else if (face_map(face, 2) != -1) {
+        nB_edge = e2_normal.row(face_map(face, 2));
+        nB = normal_face.row(face_map(face, 2));
+    } else if (face_map(face, 3) != -1) {
+        nB_edge = e3_normal.row(face_map(face, 3));
+        nB = normal_face.row(face_map(face, 3));
+    } else {
+        nB_edge.setZero();
+        nB.setZero();
+    }
+
+    return nA.transpose() * nA_edge + nB.transpose() * nB_edge;
+}
+
+std::vector<int> MeshParam::update_moved_vertices( void ) {
+    assert(mesh_revision == mesh->get_revision());
+    const Eigen::MatrixXd V = mesh->get_verts();
+
+    std::set<int> face_set;
+    for (std::size_t vv = 0; vv < num_v; ++vv) {
+        if (V.row(vv) != verts.row(vv)) {
+            face_set.insert(vf_map[vv].begin(), vf_map[vv].end());
+        }
+    }
+    verts = V;
+    
+    // same operations as polyhedron_parameters and face_dyad, one face at a time
+    const std::vector<int> faces(face_set.begin(), face_set.end());
+    for (int ii : faces) {
+        const Eigen::Matrix<double, 1, 3> V1 = V.row(Fa(ii)), V2 = V.row(Fb(ii)), V3 = V.row(Fc(ii));
+        e1.row(ii) = V2 - V1;
+        e2.row(ii) = V3 - V2;
+        e3.row(ii) = V1 - V3;
+
+        normal_face.row(ii) = e1.row(ii).cross(e2.row(ii)).normalized();
+        e1_normal.row(ii) = e1.row(ii).cross(normal_face.row(ii)).normalized();
+        e2_normal.row(ii) = e2.row(ii).cross(normal_face.row(ii)).normalized();
+        e3_normal.row(ii) = e3.row(ii).cross(normal_face.row(ii)).normalized();
+        center_face.row(ii) = 1.0 / 3 * (V1 + V2 + V3);
+
+        F_face[ii] = normal_face.row(ii).transpose() * normal_face.row(ii);
+    }
+    
+    // an edge dyad also uses the normals of the face across the edge
+    std::set<int> dyad_set(face_set);
+    for (int ii : faces) {
+        for (const Eigen::MatrixXi* face_map : {&e1_face_map, &e2_face_map, &e3_face_map}) {
+            for (int jj = 1; jj < 4; ++jj) {
+                if ((*face_map)(ii, jj) != -1) {
+                    dyad_set.insert((*face_map)(ii, jj));
+                    break;
+                }
+            }
+        }
+    }
+    for (int ii : dyad_set) {
+        E1_edge[ii] = face_edge_dyad(ii, 0);
+        E2_edge[ii] = face_edge_dyad(ii, 1);
+        E3_edge[ii] = face_edge_dyad(ii, 2);
+    }
+
+    return faces;
 }
 
 void MeshParam::update_mesh(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& V_in,
@@ -306,6 +395,439 @@ void MeshParam::update_mesh(const Eigen::Ref<const Eigen::Matrix<double, Eigen::
     face_dyad();
     edge_dyad();
 }
+// ************************ PotentialSums *************************************
+PotentialSums& PotentialSums::operator+=(const PotentialSums& other) {
+    w_sum += other.w_sum;
+    U_face += other.U_face;
+    U_edge += other.U_edge;
+    U_grad_face += other.U_grad_face;
+    U_grad_edge += other.U_grad_edge;
+    U_mat_face += other.U_mat_face;
+    U_mat_edge += other.U_mat_edge;
+    return *this;
+}
+
+PotentialResult PotentialSums::result(const double& G, const double& sigma) const {
+    PotentialResult result;
+    if (inside()) {
+        result.inside = true;
+        return result;
+    }
+
+    result.U = 1.0 / 2.0 * G * sigma * (U_edge - U_face);
+    result.U_grad = G * sigma * (-U_grad_edge + U_grad_face);
+    result.U_grad_mat = G * sigma * (U_mat_edge - U_mat_face);
+    result.Ulaplace = -G * sigma * w_sum;
+    return result;
+}
+
+/** Run the face and edge summations over [0, num_f) and [0, num_e)
+
+    SERIAL and CALLER_MANAGED do both in the calling thread and skip the
+    edges once the face factors show the point is inside the body.
+    PARALLEL_FACES opens a single parallel region and gives each thread a 
+    contiguous block of faces and of edges. The partial sums are added in
+    thread order so the result does not depend on scheduling.
+*/
+template<typename FaceSums, typename EdgeSums>
+PotentialSums fused_sums(const std::size_t& num_f, const std::size_t& num_e,
+        const ThreadPolicy& policy, FaceSums face_sums, EdgeSums edge_sums) {
+    PotentialSums sums;
+    if (policy != ThreadPolicy::PARALLEL_FACES) {
+        face_sums(0, num_f, sums);
+        if (!sums.inside()) {
+            edge_sums(0, num_e, sums);
+        }
+        return sums;
+    }
+
+    std::vector<PotentialSums, Eigen::aligned_allocator<PotentialSums> > partial(omp_get_max_threads());
+    #pragma omp parallel num_threads(partial.size())
+    {
+        const std::size_t num_threads = omp_get_num_threads();
+        const std::size_t tid = omp_get_thread_num();
+
+        face_sums(num_f * tid / num_threads, num_f * (tid + 1) / num_threads, partial[tid]);
+        edge_sums(num_e * tid / num_threads, num_e * (tid + 1) / num_threads, partial[tid]);
+    }
+
+    for (const PotentialSums& part : partial) {
+        sums += part;
+    }
+    return sums;
+}
+
+// ************************ GravityKernel *************************************
+GravityKernel::GravityKernel(const MeshParam& param) {
+    num_f = param.Fa.size();
+    num_e = param.e_vertex_map.rows();
+
+    face_vertex.resize(num_f, Eigen::NoChange);
+    face_normal.resize(num_f, Eigen::NoChange);
+    for (std::size_t ii = 0; ii < num_f; ++ii) {
+        set_face(param, ii);
+    }
+    
+    edge_vertex.resize(num_e, Eigen::NoChange);
+    edge_dyad.resize(num_e, Eigen::NoChange);
+    edge_length.resize(num_e);
+    for (std::size_t ii = 0; ii < num_e; ++ii) {
+        set_edge(param, ii);
+    }
+}
+
+void GravityKernel::set_face(const MeshParam& param, const std::size_t& ii) {
+    const Eigen::Matrix<double, Eigen::Dynamic, 3>& V = param.verts;
+    face_vertex.row(ii) << V.row(param.Fa(ii)), V.row(param.Fb(ii)), V.row(param.Fc(ii));
+    face_normal.row(ii) = param.normal_face.row(ii);
+}
+
+void GravityKernel::set_edge(const MeshParam& param, const std::size_t& ii) {
+    const Eigen::Matrix<double, Eigen::Dynamic, 3>& V = param.verts;
+    
+    // unique_index points into the stacked E1, E2, E3 edge dyads
+    const int stacked = param.unique_index(ii);
+    Eigen::Matrix3d E;
+    if (stacked < (int)num_f) {
+        E = param.E1_edge[stacked];
+    } else if (stacked < 2 * (int)num_f) {
+        E = param.E2_edge[stacked - num_f];
+    } else {
+        E = param.E3_edge[stacked - 2 * num_f];
+    }
+    
+    edge_vertex.row(ii) << V.row(param.e_vertex_map(ii, 0)), V.row(param.e_vertex_map(ii, 1));
+    edge_dyad.row(ii) << E.row(0), E.row(1), E.row(2);
+    edge_length(ii) = (V.row(param.e_vertex_map(ii, 1)) - V.row(param.e_vertex_map(ii, 0))).norm();
+}
+
+void GravityKernel::update_faces(const MeshParam& param, const std::vector<int>& faces) {
+    // edge_index maps row (edge * num_f + face) of the stacked edges to its unique edge
+    std::set<int> edge_set;
+    for (int ii : faces) {
+        set_face(param, ii);
+        for (int edge = 0; edge < 3; ++edge) {
+            edge_set.insert(param.edge_index(edge * num_f + ii));
+        }
+    }
+    for (int ii : edge_set) {
+        set_edge(param, ii);
+    }
+}
+
+void GravityKernel::face_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+        const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const {
+    const double x = state(0), y = state(1), z = state(2);
+    
+    const double *ax = face_vertex.col(0).data(), *ay = face_vertex.col(1).data(), *az = face_vertex.col(2).data();
+    const double *bx = face_vertex.col(3).data(), *by = face_vertex.col(4).data(), *bz = face_vertex.col(5).data();
+    const double *cx = face_vertex.col(6).data(), *cy = face_vertex.col(7).data(), *cz = face_vertex.col(8).data();
+    const double *nx = face_normal.col(0).data(), *ny = face_normal.col(1).data(), *nz = face_normal.col(2).data();
+
+    double w_sum = 0, U_face = 0;
+    double gfx = 0, gfy = 0, gfz = 0;
+    double f00 = 0, f01 = 0, f02 = 0, f11 = 0, f12 = 0, f22 = 0;
+    
+    #pragma omp simd reduction(+:w_sum, U_face, gfx, gfy, gfz, f00, f01, f02, f11, f12, f22)
+    for (std::size_t ii = begin; ii < end; ++ii) {
+        const double r1x = ax[ii] - x, r1y = ay[ii] - y, r1z = az[ii] - z;
+        const double r2x = bx[ii] - x, r2y = by[ii] - y, r2z = bz[ii] - z;
+        const double r3x = cx[ii] - x, r3y = cy[ii] - y, r3z = cz[ii] - z;
+
+        const double r1 = std::sqrt(r1x * r1x + r1y * r1y + r1z * r1z);
+        const double r2 = std::sqrt(r2x * r2x + r2y * r2y + r2z * r2z);
+        const double r3 = std::sqrt(r3x * r3x + r3y * r3y + r3z * r3z);
+
+        const double num = r1x * (r2y * r3z - r2z * r3y)
+                         + r1y * (r2z * r3x - r2x * r3z)
+                         + r1z * (r2x * r3y - r2y * r3x);
+        const double den = r1 * r2 * r3 
+                         + r1 * (r2x * r3x + r2y * r3y + r2z * r3z)
+                         + r2 * (r3x * r1x + r3y * r1y + r3z * r1z)
+                         + r3 * (r1x * r2x + r1y * r2y + r1z * r2z);
+        const double w = 2.0 * std::atan2(num, den);
+        
+        // F r = n (n . r)
+        const double nr = nx[ii] * r1x + ny[ii] * r1y + nz[ii] * r1z;
+        const double wnr = w * nr;
+
+        w_sum += w;
+        U_face += wnr * nr;
+        gfx += wnr * nx[ii];
+        gfy += wnr * ny[ii];
+        gfz += wnr * nz[ii];
+        f00 += w * nx[ii] * nx[ii];
+        f01 += w * nx[ii] * ny[ii];
+        f02 += w * nx[ii] * nz[ii];
+        f11 += w * ny[ii] * ny[ii];
+        f12 += w * ny[ii] * nz[ii];
+        f22 += w * nz[ii] * nz[ii];
+    }
+
+    sums.w_sum += w_sum;
+    sums.U_face += U_face;
+    sums.U_grad_face += (Eigen::Vector3d() << gfx, gfy, gfz).finished();
+    sums.U_mat_face += (Eigen::Matrix3d() << f00, f01, f02,
+                                             f01, f11, f12,
+                                             f02, f12, f22).finished();
+}
+
+void GravityKernel::edge_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+        const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const {
+    const double x = state(0), y = state(1), z = state(2);
+
+    const double *px = edge_vertex.col(0).data(), *py = edge_vertex.col(1).data(), *pz = edge_vertex.col(2).data();
+    const double *qx = edge_vertex.col(3).data(), *qy = edge_vertex.col(4).data(), *qz = edge_vertex.col(5).data();
+    const double *E00 = edge_dyad.col(0).data(), *E01 = edge_dyad.col(1).data(), *E02 = edge_dyad.col(2).data();
+    const double *E10 = edge_dyad.col(3).data(), *E11 = edge_dyad.col(4).data(), *E12 = edge_dyad.col(5).data();
+    const double *E20 = edge_dyad.col(6).data(), *E21 = edge_dyad.col(7).data(), *E22 = edge_dyad.col(8).data();
+    const double *e = edge_length.data();
+
+    double U_edge = 0;
+    double gex = 0, gey = 0, gez = 0;
+    double e00 = 0, e01 = 0, e02 = 0, e10 = 0, e11 = 0, e12 = 0, e20 = 0, e21 = 0, e22 = 0;
+
+    #pragma omp simd reduction(+:U_edge, gex, gey, gez, e00, e01, e02, e10, e11, e12, e20, e21, e22)
+    for (std::size_t ii = begin; ii < end; ++ii) {
+        const double r1x = px[ii] - x, r1y = py[ii] - y, r1z = pz[ii] - z;
+        const double r2x = qx[ii] - x, r2y = qy[ii] - y, r2z = qz[ii] - z;
+        const double r12 = std::sqrt(r1x * r1x + r1y * r1y + r1z * r1z) 
+                         + std::sqrt(r2x * r2x + r2y * r2y + r2z * r2z);
+        const double L = std::log((r12 + e[ii]) / (r12 - e[ii]));
+        
+        // E r
+        const double Erx = E00[ii] * r1x + E01[ii] * r1y + E02[ii] * r1z;
+        const double Ery = E10[ii] * r1x + E11[ii] * r1y + E12[ii] * r1z;
+        const double Erz = E20[ii] * r1x + E21[ii] * r1y + E22[ii] * r1z;
+
+        U_edge += L * (r1x * Erx + r1y * Ery + r1z * Erz);
+        gex += L * Erx;
+        gey += L * Ery;
+        gez += L * Erz;
+        e00 += L * E00[ii]; e01 += L * E01[ii]; e02 += L * E02[ii];
+        e10 += L * E10[ii]; e11 += L * E11[ii]; e12 += L * E12[ii];
+        e20 += L * E20[ii]; e21 += L * E21[ii]; e22 += L * E22[ii];
+    }
+    
+    sums.U_edge += U_edge;
+    sums.U_grad_edge += (Eigen::Vector3d() << gex, gey, gez).finished();
+    sums.U_mat_edge += (Eigen::Matrix3d() << e00, e01, e02,
+                                             e10, e11, e12,
+                                             e20, e21, e22).finished();
+}
+
+PotentialResult GravityKernel::evaluate(const Eigen::Ref<const Eigen::Vector3d>& state,
+        const double& G, const double& sigma, const ThreadPolicy& policy) const {
+    PotentialSums sums = fused_sums(num_f, num_e, policy,
+            [&](const std::size_t& begin, const std::size_t& end, PotentialSums& partial) {
+                face_sums(state, begin, end, partial);
+            },
+            [&](const std::size_t& begin, const std::size_t& end, PotentialSums& partial) {
+                edge_sums(state, begin, end, partial);
+            });
+    return sums.result(G, sigma);
+}
+
+// ************************ GravityGrid ***************************************
+// Catmull-Rom weights of the four nodes around t in [0, 1)
+static Eigen::Vector4d catmull_rom(const double& t) {
+    const double t2 = t * t, t3 = t2 * t;
+    return 0.5 * Eigen::Vector4d(-t3 + 2 * t2 - t,
+                                 3 * t3 - 5 * t2 + 2,
+                                 -3 * t3 + 4 * t2 + t,
+                                 t3 - t2);
+}
+
+// FNV-1a over the raw bytes of a buffer
+static std::uint64_t fnv1a(const void* data, const std::size_t& num_bytes, std::uint64_t hash) {
+    const unsigned char* bytes = static_cast<const unsigned char*>(data);
+    for (std::size_t ii = 0; ii < num_bytes; ++ii) {
+        hash ^= bytes[ii];
+        hash *= 1099511628211ULL;
+    }
+    return hash;
+}
+
+Eigen::Vector4d GravityGrid::asteroid_key(const Asteroid& ast) {
+    const Eigen::MatrixXd V = ast.get_verts();
+    const Eigen::MatrixXi F = ast.get_faces();
+    std::uint64_t hash = 14695981039346656037ULL;
+    hash = fnv1a(V.data(), sizeof(double) * V.size(), hash);
+    hash = fnv1a(F.data(), sizeof(int) * F.size(), hash);
+    
+    Eigen::Vector4d key;
+    key << static_cast<double>(hash >> 32), static_cast<double>(hash & 0xffffffffULL),
+           ast.get_grav_constant(), ast.get_sigma();
+    return key;
+}
+
+GravityGrid::GravityGrid(const Asteroid& ast, const double& extent, const double& spacing_in) {
+    key = asteroid_key(ast);
+    spacing = spacing_in;
+    num_nodes = static_cast<int>(std::ceil(2 * extent / spacing)) + 1;
+    origin.setConstant(-extent);
+    
+    const std::size_t total = static_cast<std::size_t>(num_nodes) * num_nodes * num_nodes;
+    values.resize(10, total);
+    
+    // an exception from evaluate_potential cannot leave the parallel loop
+    ast.check_mesh();
+    #pragma omp parallel for schedule(dynamic)
+    for (int ix = 0; ix < num_nodes; ++ix) {
+        for (int iy = 0; iy < num_nodes; ++iy) {
+            for (int iz = 0; iz < num_nodes; ++iz) {
+                const Eigen::Vector3d node = origin + spacing * Eigen::Vector3d(ix, iy, iz);
+                const PotentialResult result = ast.evaluate_potential(node);
+                // inside points are stored as zero, same as polyhedron_potential
+                const double scale = result.inside ? 0.0 : 1.0;
+                const Eigen::Matrix3d& M = result.U_grad_mat;
+                values.col(node_index(ix, iy, iz)) << scale * result.U,
+                    scale * result.U_grad,
+                    scale * M(0, 0), scale * M(0, 1), scale * M(0, 2),
+                    scale * M(1, 1), scale * M(1, 2), scale * M(2, 2);
+            }
+        }
+    }
+
+    build_cell_valid();
+    
+    // measure the error at evenly spread valid cell midpoints
+    std::vector<std::size_t> valid_cells;
+    for (std::size_t ii = 0; ii < cell_valid.size(); ++ii) {
+        if (cell_valid[ii]) {
+            valid_cells.push_back(ii);
+        }
+    }
+    if (valid_cells.empty()) {
+        return;
+    }
+    
+    const std::size_t num_cells = num_nodes - 3;
+    const std::size_t stride = std::max<std::size_t>(1, valid_cells.size() / 2000);
+    const int num_check = static_cast<int>((valid_cells.size() + stride - 1) / stride);
+    double max_error = 0;
+    #pragma omp parallel for reduction(max:max_error)
+    for (int ii = 0; ii < num_check; ++ii) {
+        const std::size_t cell = valid_cells[ii * stride];
+        const Eigen::Vector3d corner(cell / (num_cells * num_cells),
+                                     (cell / num_cells) % num_cells,
+                                     cell % num_cells);
+        const Eigen::Vector3d mid = origin + spacing * (corner.array() + 1.5).matrix();
+        const PotentialResult exact = ast.evaluate_potential(mid);
+        const double error = (evaluate(mid).U_grad - exact.U_grad).norm() / exact.U_grad.norm();
+        max_error = std::max(max_error, error);
+    }
+    error_bound = max_error;
+}
+
+GravityGrid::GravityGrid(const std::string& filename) {
+    HDF5::File hf(filename, HDF5::File::ReadOnly);
+    Eigen::MatrixXd values_in;
+    Eigen::Vector3d param;
+    hf.read("values", values_in);
+    hf.read("origin", origin);
+    hf.read("param", param);
+    hf.read("key", key);
+
+    values = values_in;
+    spacing = param(0);
+    num_nodes = static_cast<int>(param(1));
+    error_bound = param(2);
+    
+    if (static_cast<std::size_t>(values.cols()) 
+            != static_cast<std::size_t>(num_nodes) * num_nodes * num_nodes) {
+        throw std::runtime_error("Gravity grid in " + filename + " is the wrong size");
+    }
+    build_cell_valid();
+}
+
+void GravityGrid::save(const std::string& filename) const {
+    HDF5::File hf(filename, HDF5::File::Truncate);
+    Eigen::MatrixXd values_out = values;
+    Eigen::Vector3d param(spacing, num_nodes, error_bound);
+    Eigen::Vector3d origin_out = origin;
+    Eigen::Vector4d key_out = key;
+    hf.write("values", values_out);
+    hf.write("origin", origin_out);
+    hf.write("param", param);
+    hf.write("key", key_out);
+}
+
+void GravityGrid::build_cell_valid( void ) {
+    const int num_cells = std::max(num_nodes - 3, 0);
+    cell_valid.assign(static_cast<std::size_t>(num_cells) * num_cells * num_cells, false);
+
+    // U > 0 everywhere outside of the body and is stored as zero inside
+    for (int cx = 0; cx < num_cells; ++cx) {
+        for (int cy = 0; cy < num_cells; ++cy) {
+            for (int cz = 0; cz < num_cells; ++cz) {
+                bool valid = true;
+                for (int ii = 0; ii < 4 && valid; ++ii) {
+                    for (int jj = 0; jj < 4 && valid; ++jj) {
+                        for (int kk = 0; kk < 4 && valid; ++kk) {
+                            valid = values(0, node_index(cx + ii, cy + jj, cz + kk)) > 0;
+                        }
+                    }
+                }
+                cell_valid[(static_cast<std::size_t>(cx) * num_cells + cy) * num_cells + cz] = valid;
+            }
+        }
+    }
+}
+
+bool GravityGrid::cell_index(const Eigen::Ref<const Eigen::Vector3d>& state,
+        Eigen::Vector3i& index, Eigen::Vector3d& t) const {
+    const Eigen::Vector3d pos = (state - origin) / spacing;
+    for (int ii = 0; ii < 3; ++ii) {
+        const double lower = std::floor(pos(ii));
+        // the stencil needs one node below and two above the cell
+        if (!(lower >= 1 && lower <= num_nodes - 3)) {
+            return false;
+        }
+        index(ii) = static_cast<int>(lower);
+        t(ii) = pos(ii) - lower;
+    }
+    return true;
+}
+
+bool GravityGrid::contains(const Eigen::Ref<const Eigen::Vector3d>& state) const {
+    Eigen::Vector3i index;
+    Eigen::Vector3d t;
+    if (!cell_index(state, index, t)) {
+        return false;
+    }
+    const std::size_t num_cells = num_nodes - 3;
+    return cell_valid[((index(0) - 1) * num_cells + index(1) - 1) * num_cells + index(2) - 1];
+}
+
+PotentialResult GravityGrid::evaluate(const Eigen::Ref<const Eigen::Vector3d>& state) const {
+    Eigen::Vector3i index;
+    Eigen::Vector3d t;
+    PotentialResult result;
+    if (!cell_index(state, index, t)) {
+        return result;
+    }
+    
+    const Eigen::Vector4d wx = catmull_rom(t(0)), wy = catmull_rom(t(1)), wz = catmull_rom(t(2));
+    Eigen::Matrix<double, 10, 1> out = Eigen::Matrix<double, 10, 1>::Zero();
+    for (int ii = 0; ii < 4; ++ii) {
+        for (int jj = 0; jj < 4; ++jj) {
+            const double wxy = wx(ii) * wy(jj);
+            const std::size_t row = node_index(index(0) + ii - 1, index(1) + jj - 1, index(2) - 1);
+            // the four z nodes are consecutive columns
+            out.noalias() += values.middleCols<4>(row) * (wxy * wz);
+        }
+    }
+
+    result.U = out(0);
+    result.U_grad = out.segment<3>(1);
+    result.U_grad_mat << out(4), out(5), out(6),
+                         out(5), out(7), out(8),
+                         out(6), out(8), out(9);
+    result.Ulaplace = out(4) + out(7) + out(9);
+    return result;
+}
+
 // ************************ Asteroid class ************************************
 
 Asteroid::Asteroid(const std::string& name_in,
@@ -407,65 +929,194 @@ void Asteroid::init_asteroid( void ) {
     sigma = sigma / 1000.0 * pow(100.0, 3) * pow(1000.0, 3);
 }
 
-void Asteroid::polyhedron_potential(const Eigen::Ref<const Eigen::Vector3d>& state) {
-    // build L and w
-    bool edge_built, face_built;
-    #pragma omp parallel if(true)
-    {
-        #pragma omp single
-        {
-            #pragma omp task
-            edge_built = mesh_data->build_edge_factor(state);
-
-            #pragma omp task
-            face_built = mesh_data->build_face_factor(state);
+void Asteroid::refresh( void ) {
+    // bring the faces/edges around any moved vertices up to date
+    if (mesh_data->has_dirty_vertices()) {
+        mesh_data->update_dirty_properties();
+    }
+    
+    // moves flushed by someone else (ReconstructMesh::update) leave no dirty
+    // vertices behind but still change the shape revision
+    if (kernel && kernel_revision != mesh_data->get_shape_revision()) {
+        if (param->mesh_revision == mesh_data->get_revision()) {
+            // vertices were only moved so the connectivity still holds
+            kernel->update_faces(*param, param->update_moved_vertices());
+            kernel_revision = mesh_data->get_shape_revision();
+        } else {
+            build_gravity_kernel();
         }
     }
+    // far too expensive to resample on every update
+    if (grid && grid_revision != mesh_data->get_shape_revision()) {
+        grid.reset();
+    }
+}
+
+void Asteroid::polyhedron_potential(const Eigen::Ref<const Eigen::Vector3d>& state) {
+    refresh();
+    PotentialResult result = evaluate_potential(state);
+
+    mU = result.U;
+    mU_grad = result.U_grad;
+    mU_grad_mat = result.U_grad_mat;
+    mUlaplace = result.Ulaplace;
+}
+
+std::tuple<Eigen::VectorXd,
+           Eigen::Matrix<double, Eigen::Dynamic, 3>,
+           Eigen::Matrix<double, Eigen::Dynamic, 9>,
+           Eigen::VectorXd> Asteroid::polyhedron_potential_batch(
+                   const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& states) const {
+    const int num_points = states.rows();
+
+    Eigen::VectorXd U(num_points), Ulaplace(num_points);
+    Eigen::Matrix<double, Eigen::Dynamic, 3> U_grad(num_points, 3);
+    Eigen::Matrix<double, Eigen::Dynamic, 9> U_grad_mat(num_points, 9);
     
-    double w_sum = mesh_data->get_sum_face_factor();
+    // an exception cannot leave the parallel loop below
+    check_mesh();
+
+    // only spread the points over threads if the evaluations themselves are serial
+    #pragma omp parallel for schedule(dynamic) if(policy == ThreadPolicy::CALLER_MANAGED)
+    for (int ii = 0; ii < num_points; ++ii) {
+        PotentialResult result = evaluate_potential(states.row(ii).transpose());
+
+        U(ii) = result.U;
+        U_grad.row(ii) = result.U_grad.transpose();
+        U_grad_mat.row(ii) << result.U_grad_mat.row(0), result.U_grad_mat.row(1), 
+                              result.U_grad_mat.row(2);
+        Ulaplace(ii) = result.Ulaplace;
+    }
 
-    if (w_sum < 1e-10) {
+    return std::make_tuple(U, U_grad, U_grad_mat, Ulaplace);
+}
 
-        std::tuple<double, Eigen::Matrix<double, 3, 1>, Eigen::Matrix<double, 3, 3> > face_grav, edge_grav;
-        // loop over the faces
-        #pragma omp parallel if(true)
-        {
-            #pragma omp single
-            {
-            #pragma omp task
-            face_grav = face_contribution(state);
+void Asteroid::check_mesh( void ) const {
+    // flushing here would write to the shared mesh while other callers read it
+    if (mesh_data->has_dirty_vertices()) {
+        throw std::runtime_error("Mesh has moved vertices, call Asteroid::refresh first");
+    }
+    // index based traversal needs a mesh without removed elements
+    if (mesh_data->surface_mesh.has_garbage()) {
+        throw std::runtime_error("Mesh has removed elements, call collect_garbage first");
+    }
+}
 
-            #pragma omp task
-            edge_grav = edge_contribution(state);
-            }
-        }
+PotentialResult Asteroid::evaluate_potential(const Eigen::Ref<const Eigen::Vector3d>& state) const {
+    if (grid && grid_revision == mesh_data->get_shape_revision() && grid->contains(state)) {
+        return grid->evaluate(state);
+    }
+    if (kernel && kernel_revision == mesh_data->get_shape_revision()) {
+        return kernel->evaluate(state, G, sigma, policy);
+    }
+    
+    check_mesh();
+    PotentialSums sums = fused_sums(mesh_data->number_of_faces(), 
+            mesh_data->number_of_edges(), policy,
+            [&](const std::size_t& begin, const std::size_t& end, PotentialSums& partial) {
+                face_sums(state, begin, end, partial);
+            },
+            [&](const std::size_t& begin, const std::size_t& end, PotentialSums& partial) {
+                edge_sums(state, begin, end, partial);
+            });
+    return sums.result(G, sigma);
+}
 
-        /* #pragma omp parallel shared(r_v) */
-        /* { */
-        /*     #pragma omp task */
-        /*     { */
-        /*         // face contribution */
-        /*         face_grav = face_contribution(r_v, w_face); */
-        /*     } */
-        /*     #pragma omp task */
-        /*     { */
-        /*     // edge contribution */
-        /*     edge_grav = edge_contribution(r_v, L_all); */
-        /*     } */
-        /* } */
+void Asteroid::face_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+        const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const {
+    const Mesh& surface_mesh = mesh_data->surface_mesh;
+    // look up the dyad property map once instead of for every face
+    Mesh::Property_map<Face_index, Eigen::Matrix3d> face_dyad;
+    bool found;
+    std::tie(face_dyad, found) = surface_mesh.property_map<
+        Face_index, Eigen::Matrix3d>("f:face_dyad");
+    assert(found);
+
+    for (std::size_t ii = begin; ii < end; ++ii) {
+        Face_index fd(ii);
+        Halfedge_index h1, h2;
+        h1 = surface_mesh.halfedge(fd);
+        h2 = surface_mesh.next(h1);
+
+        Eigen::Vector3d r1, r2, r3;
+        r1 = mesh_data->get_vertex(surface_mesh.source(h1)).transpose() - state;
+        r2 = mesh_data->get_vertex(surface_mesh.source(h2)).transpose() - state;
+        r3 = mesh_data->get_vertex(surface_mesh.target(h2)).transpose() - state;
         
-        /* // combine them both */
-        mU = 1.0 / 2.0 * G * sigma * (std::get<0>(edge_grav) - std::get<0>(face_grav));
-        mU_grad = G * sigma * (-std::get<1>(edge_grav) + std::get<1>(face_grav));
-        mU_grad_mat = G * sigma * (std::get<2>(edge_grav) - std::get<2>(face_grav));
-        mUlaplace = -G * sigma * w_sum ;
-    } else {
-        mU = 0;
-        mU_grad.setZero();
-        mU_grad_mat.setZero();
-        mUlaplace = 0;
+        double num, den;
+        num = r1.dot(r2.cross(r3));
+        den = r1.norm() * r2.norm() * r3.norm() 
+            + r1.norm() * r2.dot(r3) 
+            + r2.norm() * r3.dot(r1)
+            + r3.norm() * r1.dot(r2);
+        double w_factor = 2.0 * atan2(num, den);
+
+        Eigen::Vector3d F_r = face_dyad[fd] * r1;
+        sums.w_sum += w_factor;
+        sums.U_face += r1.dot(F_r) * w_factor;
+        sums.U_grad_face += F_r * w_factor;
+        sums.U_mat_face += face_dyad[fd] * w_factor;
     }
-    // TODO int return type for inside/outside
+}
+
+void Asteroid::edge_sums(const Eigen::Ref<const Eigen::Vector3d>& state,
+        const std::size_t& begin, const std::size_t& end, PotentialSums& sums) const {
+    const Mesh& surface_mesh = mesh_data->surface_mesh;
+    Mesh::Property_map<Edge_index, Eigen::Matrix3d> edge_dyad;
+    bool found;
+    std::tie(edge_dyad, found) = surface_mesh.property_map<
+        Edge_index, Eigen::Matrix3d>("e:edge_dyad");
+    assert(found);
+
+    for (std::size_t ii = begin; ii < end; ++ii) {
+        Edge_index ed(ii);
+        Eigen::Vector3d vec1, vec2;
+        vec1 = mesh_data->get_vertex(surface_mesh.vertex(ed, 0)).transpose();
+        vec2 = mesh_data->get_vertex(surface_mesh.vertex(ed, 1)).transpose();
+        
+        Eigen::Vector3d r = vec1 - state;
+        double r1 = r.norm();
+        double r2 = (vec2 - state).norm();
+        double e = (vec1 - vec2).norm();
+        double L_factor = std::log((r1 + r2 + e)/(r1 + r2 - e));
+
+        Eigen::Vector3d E_r = edge_dyad[ed] * r;
+        sums.U_edge += r.dot(E_r) * L_factor;
+        sums.U_grad_edge += E_r * L_factor;
+        sums.U_mat_edge += edge_dyad[ed] * L_factor;
+    }
+}
+
+void Asteroid::build_gravity_kernel( void ) {
+    param = std::make_shared<MeshParam>(mesh_data);
+    kernel = std::make_shared<GravityKernel>(*param);
+    kernel_revision = mesh_data->get_shape_revision();
+}
+
+double Asteroid::build_gravity_grid(const double& extent, const double& spacing) {
+    // sample the polyhedron, not the old grid
+    grid.reset();
+    refresh();
+    grid = std::make_shared<const GravityGrid>(*this, extent, spacing);
+    grid_revision = mesh_data->get_shape_revision();
+    return grid->get_error_bound();
+}
+
+void Asteroid::load_gravity_grid(const std::string& filename) {
+    std::shared_ptr<const GravityGrid> loaded = std::make_shared<const GravityGrid>(filename);
+    if (loaded->get_key() != GravityGrid::asteroid_key(*this)) {
+        throw std::runtime_error("Gravity grid in " + filename 
+                + " was sampled from a different shape, orientation, G or sigma");
+    }
+    grid = loaded;
+    grid_revision = mesh_data->get_shape_revision();
+}
+
+void Asteroid::save_gravity_grid(const std::string& filename) const {
+    if (!grid) {
+        throw std::runtime_error("No gravity grid to save");
+    }
+    grid->save(filename);
 }
 
 Eigen::VectorXd Asteroid::surface_slope( void ) {
@@ -482,14 +1133,14 @@ Eigen::VectorXd Asteroid::surface_slope( void ) {
 }
 
 // TODO Think about storing this as a property of the mesh
-double Asteroid::compute_face_slope(const Face_index& fd) {
+double Asteroid::compute_face_slope(const Face_index& fd) const {
     Eigen::Vector3d face_normal = mesh_data->get_face_normal(fd);
     Eigen::Vector3d face_center = mesh_data->get_face_center(fd) + 
         0.001 * mesh_data->get_face_center(fd).normalized();
     
     // compute potential plus the rotational component
-    polyhedron_potential(face_center );
-    Eigen::Vector3d modified_potential = mU_grad +  omega * omega 
+    PotentialResult result = evaluate_potential(face_center);
+    Eigen::Vector3d modified_potential = result.U_grad +  omega * omega 
         * (Eigen::Vector3d()<< face_center(0), face_center(1), 0).finished();
     // take dot product and arccose
     double slope = kPI - std::acos(face_normal.dot(modified_potential.normalized()));
@@ -515,58 +1166,6 @@ Eigen::Vector3d  Asteroid::land_in_view(const Eigen::Ref<const Eigen::Vector3d>&
     return mesh_data->get_face_center(min_fd);
 }
 
-std::tuple<double, Eigen::Vector3d, Eigen::Matrix3d> Asteroid::face_contribution(
-        const Eigen::Ref<const Eigen::Vector3d>& state) const {
-
-    double U = 0;
-    Eigen::Vector3d U_grad = Eigen::Vector3d::Zero();
-    Eigen::Matrix3d U_mat = Eigen::Matrix3d::Zero();
-
-    // loop over the faces and compute gravity
-    for (Face_index fd: mesh_data->faces()) {
-        // get a vector from the face
-        Halfedge_index h1 = mesh_data->surface_mesh.halfedge(fd);
-        Vertex_index v1 = mesh_data->surface_mesh.source(h1);
-        Eigen::Vector3d vec1 = mesh_data->get_vertex(v1);
-        // subtract from current state
-        Eigen::Vector3d r = vec1 - state;
-
-        // get a Face dyad and face factor
-        Eigen::Matrix3d F_dyad = mesh_data->get_face_dyad(fd);
-        
-        double w_factor = mesh_data->get_face_factor(fd);
-        // multiply
-        U += (r.transpose() * F_dyad * r * w_factor).value();
-        U_grad += F_dyad * r * w_factor;
-        U_mat += F_dyad * w_factor;
-    }
-    return std::make_tuple(U, U_grad, U_mat);
-}
-
-std::tuple<double, Eigen::Vector3d, Eigen::Matrix3d> Asteroid::edge_contribution(
-        const Eigen::Ref<const Eigen::Vector3d>& state) const {
-    double U = 0;
-    Eigen::Vector3d U_grad = Eigen::Vector3d::Zero();
-    Eigen::Matrix3d U_mat = Eigen::Matrix3d::Zero();
-    
-    // loop over the edges
-    for (Edge_index ed: mesh_data->edges()) {
-        // get a vector from the edge
-        Vertex_index v1 = mesh_data->surface_mesh.vertex(ed, 0);
-        Eigen::Vector3d vec1 = mesh_data->get_vertex(v1);
-        // compute difference with state
-        Eigen::Vector3d r = vec1 - state;
-        
-        Eigen::Matrix3d E_dyad = mesh_data->get_edge_dyad(ed);
-        double L_factor = mesh_data->get_edge_factor(ed);
-
-        U += (r.transpose() * E_dyad * r * L_factor).value();
-        U_grad += E_dyad * r * L_factor;
-        U_mat += E_dyad * L_factor;
-    }
-    return std::make_tuple(U, U_grad, U_mat);
-}
-
 Eigen::Matrix<double, Eigen::Dynamic, 3> Asteroid::rotate_vertices(const double& time) const {
     
     // define the rotation matrix Ra
@@ -600,6 +1199,11 @@ void Asteroid::update_rotation(const double& time) {
     mesh_data->update_mesh(nv, nf); 
     // update meshparam and asteroid parameters
     init_asteroid();
+    if (kernel) {
+        build_gravity_kernel();
+    }
+    // the grid is in the old body frame and too expensive to resample here
+    grid.reset();
 }
 std::vector<std::vector<int> > vertex_face_map(const Eigen::Ref<const Eigen::MatrixXd> & V, const Eigen::Ref<const Eigen::MatrixXi> &F) {
 
@@ -0,0 +1,115 @@
+#include "potential.hpp"
+#include "loader.hpp"
+#include "mesh.hpp"
+#include "geodesic.hpp"
+
+#include "input_parser.hpp"
+
+#include <Eigen/Dense>
+
+#include <iostream>
+#include <fstream>
+#include <chrono>
+#include <string>
+#include <vector>
+#include <utility>
+#include <cmath>
+
+// time num_evals evaluations on a ring of points around the asteroid
+double time_evaluations(const Asteroid& ast, const int& num_evals,
+        Eigen::Matrix<double, Eigen::Dynamic, 3>& U_grad) {
+    const double radius = 3.0 * ast.get_axes().maxCoeff();
+    U_grad.resize(num_evals, 3);
+
+    std::chrono::steady_clock::time_point begin = std::chrono::steady_clock::now();
+    for (int ii = 0; ii < num_evals; ++ii) {
+        const double angle = 2.0 * kPI * ii / num_evals;
+        Eigen::Vector3d state;
+        state << radius * std::cos(angle), radius * std::sin(angle), 0.1 * radius;
+        U_grad.row(ii) = ast.evaluate_potential(state).U_grad.transpose();
+    }
+    std::chrono::steady_clock::time_point end = std::chrono::steady_clock::now();
+
+    return std::chrono::duration_cast<std::chrono::microseconds>(end - begin).count() 
+        / (double)num_evals;
+}
+
+int main(int argc, char* argv[]) {
+    InputParser input(argc, argv);
+    if (input.option_exists("-h")) {
+        std::cout << "Gravity kernel benchmark: \npotential_benchmark [-i obj_file.obj -n name] [-N num_evals] [-g grid_spacing]" << std::endl;
+        std::cout << "Without -i the castalia, itokawa and eros shape models are used" << std::endl;
+        std::cout << "With -g a GravityGrid with that node spacing (km) is also timed" << std::endl;
+        return 0;
+    }
+    
+    std::vector<std::pair<std::string, std::string> > models;
+    const std::string input_file = input.get_command_option("-i");
+    if (input_file.empty()) {
+        models.push_back(std::make_pair("castalia", "./data/shape_model/CASTALIA/castalia.obj"));
+        models.push_back(std::make_pair("itokawa", "./data/shape_model/ITOKAWA/itokawa_low.obj"));
+        models.push_back(std::make_pair("eros", "./data/shape_model/EROS/eros_low.obj"));
+    } else {
+        const std::string name = input.get_command_option("-n");
+        if (name.empty()) {
+            std::cout << "You need the name: cube, castalia, itokawa" << std::endl;
+            return 1;
+        }
+        models.push_back(std::make_pair(name, input_file));
+    }
+
+    int num_evals = 1000;
+    if (!input.get_command_option("-N").empty()) {
+        num_evals = std::stoi(input.get_command_option("-N"));
+    }
+    
+    for (const auto& model : models) {
+        if (!std::ifstream(model.second).good()) {
+            std::cout << model.first << ": missing " << model.second << ", skipping" << std::endl;
+            continue;
+        }
+
+        std::shared_ptr<MeshData> mesh_data = Loader::load(model.second);
+        Asteroid ast(model.first, mesh_data);
+
+        Eigen::Matrix<double, Eigen::Dynamic, 3> mesh_grad, kernel_grad;
+        double mesh_time = time_evaluations(ast, num_evals, mesh_grad);
+
+        std::chrono::steady_clock::time_point begin = std::chrono::steady_clock::now();
+        ast.build_gravity_kernel();
+        std::chrono::steady_clock::time_point end = std::chrono::steady_clock::now();
+        double kernel_time = time_evaluations(ast, num_evals, kernel_grad);
+        
+        double max_error = ((mesh_grad - kernel_grad).rowwise().norm().array() 
+                / mesh_grad.rowwise().norm().array()).maxCoeff();
+
+        std::cout << model.first << ": " << mesh_data->number_of_faces() << " faces " 
+            << mesh_data->number_of_edges() << " edges" << std::endl;
+        std::cout << "  Surface mesh : " << mesh_time << " microsecond/eval" << std::endl;
+        std::cout << "  Kernel       : " << kernel_time << " microsecond/eval (build " 
+            << std::chrono::duration_cast<std::chrono::milliseconds>(end - begin).count() 
+            << " millisecond)" << std::endl;
+        std::cout << "  Speedup      : " << mesh_time / kernel_time << std::endl;
+        std::cout << "  Max relative acceleration difference : " << max_error << std::endl;
+
+        if (!input.get_command_option("-g").empty()) {
+            const double spacing = std::stod(input.get_command_option("-g"));
+            Eigen::Matrix<double, Eigen::Dynamic, 3> grid_grad;
+
+            begin = std::chrono::steady_clock::now();
+            const double error_bound = ast.build_gravity_grid(
+                    3.5 * ast.get_axes().maxCoeff(), spacing);
+            end = std::chrono::steady_clock::now();
+            double grid_time = time_evaluations(ast, num_evals, grid_grad);
+            double grid_error = ((mesh_grad - grid_grad).rowwise().norm().array() 
+                    / mesh_grad.rowwise().norm().array()).maxCoeff();
+
+            std::cout << "  Grid         : " << grid_time << " microsecond/eval (build " 
+                << std::chrono::duration_cast<std::chrono::milliseconds>(end - begin).count() 
+                << " millisecond)" << std::endl;
+            std::cout << "  Grid error bound : " << error_bound 
+                << " max relative acceleration difference : " << grid_error << std::endl;
+        }
+    }
+    return 0;
+}
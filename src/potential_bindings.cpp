@@ -2,11 +2,27 @@
 
 #include <pybind11/pybind11.h>
 #include <pybind11/eigen.h>
+#include <pybind11/numpy.h>
+
+#include <tuple>
 
 // Define all the stuff inside the Python module for the potential
 PYBIND11_MODULE(asteroid, m) {
     m.doc() = "Asteroid potential function in C++";
     
+    pybind11::enum_<ThreadPolicy>(m, "ThreadPolicy")
+        .value("SERIAL", ThreadPolicy::SERIAL)
+        .value("PARALLEL_FACES", ThreadPolicy::PARALLEL_FACES)
+        .value("CALLER_MANAGED", ThreadPolicy::CALLER_MANAGED);
+
+    pybind11::class_<PotentialResult>(m, "PotentialResult")
+        .def(pybind11::init<>())
+        .def_readonly("U", &PotentialResult::U, "Potential")
+        .def_readonly("U_grad", &PotentialResult::U_grad, "Acceleration")
+        .def_readonly("U_grad_mat", &PotentialResult::U_grad_mat, "Gradient matrix")
+        .def_readonly("Ulaplace", &PotentialResult::Ulaplace, "Laplacian")
+        .def_readonly("inside", &PotentialResult::inside, "True if the point is inside the body");
+
     // Expose the Asteroid class
     pybind11::class_<Asteroid, std::shared_ptr<Asteroid>>(m, "Asteroid")
         .def(pybind11::init<const std::string&,
@@ -30,6 +46,51 @@ PYBIND11_MODULE(asteroid, m) {
                 pybind11::arg("Sigma (density  kg/km^3)"))
         .def("polyhedron_potential", &Asteroid::polyhedron_potential, "Compute polyhedron potential",
                 pybind11::arg("state"))
+        .def("evaluate_potential", &Asteroid::evaluate_potential, 
+                "Compute the polyhedron potential without modifying the asteroid and return a PotentialResult",
+                pybind11::arg("state"), pybind11::call_guard<pybind11::gil_scoped_release>())
+        .def("refresh", &Asteroid::refresh,
+                "Flush moved vertices and rebuild or drop stale gravity caches. Call after editing the mesh and before evaluate_potential or polyhedron_potential_batch")
+        .def("build_gravity_kernel", &Asteroid::build_gravity_kernel, 
+                "Copy the mesh into a flat GravityKernel used by all later potential evaluations")
+        .def("clear_gravity_kernel", &Asteroid::clear_gravity_kernel, "Go back to evaluating on the surface mesh")
+        .def("has_gravity_kernel", &Asteroid::has_gravity_kernel, "True if a GravityKernel is in use")
+        .def("build_gravity_grid", &Asteroid::build_gravity_grid, 
+                "Sample the potential on a grid and interpolate it wherever the grid is valid. Returns the error bound",
+                pybind11::arg("extent"), pybind11::arg("spacing"),
+                pybind11::call_guard<pybind11::gil_scoped_release>())
+        .def("load_gravity_grid", &Asteroid::load_gravity_grid, "Load a gravity grid sampled from this asteroid from an HDF5 file",
+                pybind11::arg("filename"))
+        .def("save_gravity_grid", &Asteroid::save_gravity_grid, "Save the gravity grid to an HDF5 file",
+                pybind11::arg("filename"))
+        .def("clear_gravity_grid", &Asteroid::clear_gravity_grid, "Stop using the gravity grid")
+        .def("has_gravity_grid", &Asteroid::has_gravity_grid, "True if a GravityGrid is in use")
+        .def("set_thread_policy", &Asteroid::set_thread_policy, 
+                "Choose how the potential evaluation uses OpenMP threads",
+                pybind11::arg("policy"))
+        .def("get_thread_policy", &Asteroid::get_thread_policy, "Get the current ThreadPolicy")
+        .def("polyhedron_potential_batch", [](const Asteroid& ast, 
+                    const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& states) {
+                    Eigen::VectorXd U, Ulaplace;
+                    Eigen::Matrix<double, Eigen::Dynamic, 3> U_grad;
+                    Eigen::Matrix<double, Eigen::Dynamic, 9> U_grad_mat;
+                    {
+                        pybind11::gil_scoped_release release;
+                        std::tie(U, U_grad, U_grad_mat, Ulaplace) = ast.polyhedron_potential_batch(states);
+                    }
+                    // reshape the gradient matrices into a N x 3 x 3 array
+                    pybind11::array_t<double> grad_mat({(std::size_t)states.rows(), (std::size_t)3, (std::size_t)3});
+                    auto grad_mat_view = grad_mat.mutable_unchecked<3>();
+                    for (pybind11::ssize_t ii = 0; ii < grad_mat_view.shape(0); ++ii) {
+                        for (int jj = 0; jj < 3; ++jj) {
+                            for (int kk = 0; kk < 3; ++kk) {
+                                grad_mat_view(ii, jj, kk) = U_grad_mat(ii, 3 * jj + kk);
+                            }
+                        }
+                    }
+                    return std::make_tuple(U, U_grad, grad_mat, Ulaplace);
+                }, "Compute polyhedron potential at many points without modifying the asteroid, call refresh first after editing the mesh. Returns U (N), U_grad (N x 3), U_grad_mat (N x 3 x 3), Ulaplace (N)",
+                pybind11::arg("states"))
         .def("get_axes", &Asteroid::get_axes, "Return axes of asteroid")
         .def("rotate_vertices", &Asteroid::rotate_vertices, "Rotate teh asteroid vertices by ROT3",
                 pybind11::arg("time"))
@@ -3,6 +3,7 @@
 #include "geodesic.hpp"
 
 #include <Eigen/Dense>
+#include <algorithm>
 #include <iostream>
 #include <cmath>
 
@@ -82,29 +83,62 @@ void ReconstructMesh::single_update(const Eigen::Ref<const Eigen::RowVector3d> &
                                     const double &max_angle,
                                     const double& mw,
                                     const double& vw) {
+    move_vertices(pt, max_angle, mw, vw);
+    mesh->update_dirty_properties();
+}
+
+// the fusion rule for one vertex and one measurement. update and 
+// update_parallel both go through here so they round identically
+static bool fuse_measurement(const Eigen::Ref<const Eigen::Vector3d>& pt_uvec,
+                             const double& pt_radius,
+                             const Eigen::Vector3d& vert,
+                             const double& weight,
+                             const double& max_angle,
+                             const double& mw,
+                             const double& vw,
+                             Eigen::Vector3d& vert_new,
+                             double& weight_new) {
+    // get a radius vector for this vertex
+    Eigen::Vector3d vert_uvec = vert.normalized();
+    // compute the central angle between vertex and teh measurement
+    double delta_sigma = single_central_angle(pt_uvec, vert_uvec);
+    // check if central angle is less than the max angle
+    if ( delta_sigma >= max_angle) {
+        return false;
+    }
+    // if true then compute new radius and new weight
+    double meas_weight = mw *pow(delta_sigma * pt_radius, 2);
+    double vertex_weight = vw * weight;
+    double radius_new = (vert.norm() * meas_weight 
+            + pt_radius * vertex_weight) / ( vertex_weight + meas_weight ) ;
+    weight_new = (vertex_weight * meas_weight) / ( vertex_weight + meas_weight);
+    vert_new = radius_new * vert_uvec;
+    return true;
+}
+
+void ReconstructMesh::move_vertices(const Eigen::Ref<const Eigen::RowVector3d> &pt,
+                                    const double &max_angle,
+                                    const double& mw,
+                                    const double& vw) {
      
     Eigen::Vector3d pt_uvec = pt.normalized();
     double pt_radius = pt.norm();
-    // loop over all vertices
-    for (Vertex_index vd : mesh->vertices()){
-        // get a radius vector for this vertex
-        Eigen::Vector3d vert_uvec = mesh->get_vertex(vd).normalized();
-        // compute the central angle between vertex and teh measurement
-        double delta_sigma = single_central_angle(pt_uvec, vert_uvec);
-        // check if central angle is less than the max angle
-        if ( delta_sigma < max_angle) {
-            // if true then compute new radius and new weight
-            double meas_weight = mw *pow(delta_sigma * pt_radius, 2);
-            double vertex_weight = vw * get_weight(vd);
-            // modify teh surface mesh with the new data
-            double radius_new = (mesh->get_vertex(vd).norm() * meas_weight 
-                    + pt_radius * vertex_weight) / ( vertex_weight + meas_weight ) ;
-            double weight_new = (vertex_weight * meas_weight) / ( vertex_weight + meas_weight);
-
-            // now update the mesh with new data
-            mesh->set_vertex(vd, radius_new * vert_uvec);
-            set_weight(vd, weight_new);
+    // a missed measurement (NaN) is not close to any vertex
+    if (!pt_uvec.allFinite()) {
+        return;
+    }
 
+    // loop over all vertices. update_parallel uses vertex_index instead, 
+    // so comparing the two also checks the index
+    for (Vertex_index vd : mesh->vertices()) {
+        Eigen::Vector3d vert_new;
+        double weight_new;
+        if (fuse_measurement(pt_uvec, pt_radius, mesh->get_vertex(vd), 
+                    get_weight(vd), max_angle, mw, vw, vert_new, weight_new)) {
+            // now update the mesh with new data. The face/edge properties
+            // are recomputed later, once for all the moved vertices
+            mesh->move_vertex(vd, vert_new);
+            set_weight(vd, weight_new);
         }
     }
 }
@@ -115,8 +149,107 @@ void ReconstructMesh::update(const Eigen::Ref<const Eigen::Matrix<double, Eigen:
     std::size_t num_pts(pts.rows());
     
     for (std::size_t ii = 0; ii < num_pts; ++ii) {
-        single_update(pts.row(ii), max_angle, meas_weight, vert_weight);
+        move_vertices(pts.row(ii), max_angle, meas_weight, vert_weight);
     }
+    mesh->update_dirty_properties();
+}
+
+void ReconstructMesh::update_parallel(
+        const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& pts,
+        const double& max_angle, const double& meas_weight,
+        const double& vert_weight) {
+    const int num_pts = pts.rows();
+    const int num_verts = mesh->number_of_vertices();
+    refresh_vertex_index();
+    
+    // candidate vertices of every measurement
+    Eigen::Matrix<double, Eigen::Dynamic, 3> pt_uvec(num_pts, 3);
+    Eigen::VectorXd pt_radius(num_pts);
+    std::vector<std::vector<int> > candidates(num_pts);
+    #pragma omp parallel for schedule(dynamic, 64) if(num_pts > 64)
+    for (int ii = 0; ii < num_pts; ++ii) {
+        // same type as the argument of move_vertices so it rounds the same
+        Eigen::RowVector3d pt = pts.row(ii);
+        pt_uvec.row(ii) = pt.normalized();
+        pt_radius(ii) = pt.norm();
+        if (pt_uvec.row(ii).allFinite()) {
+            candidates[ii] = vertex_index.query(pt_uvec.row(ii).transpose(), max_angle);
+        }
+    }
+
+    // invert into the measurements seen by each vertex, in the order of pts
+    std::vector<int> offset(num_verts + 1, 0);
+    for (const std::vector<int>& cand : candidates) {
+        for (int vert : cand) {
+            ++offset[vert + 1];
+        }
+    }
+    for (int vv = 0; vv < num_verts; ++vv) {
+        offset[vv + 1] += offset[vv];
+    }
+    std::vector<int> measurement(offset[num_verts]);
+    std::vector<int> fill(offset.begin(), offset.end() - 1);
+    for (int ii = 0; ii < num_pts; ++ii) {
+        for (int vert : candidates[ii]) {
+            measurement[fill[vert]++] = ii;
+        }
+    }
+    
+    // vertices only depend on their own history so they are independent
+    Eigen::VectorXd weights = get_weights();
+    Eigen::Matrix<double, Eigen::Dynamic, 3> verts(num_verts, 3);
+    std::vector<char> moved(num_verts, 0);
+    #pragma omp parallel for schedule(dynamic, 256) if(num_verts > 256)
+    for (int vv = 0; vv < num_verts; ++vv) {
+        if (offset[vv] == offset[vv + 1]) {
+            continue;
+        }
+        Eigen::Vector3d vert = mesh->get_vertex(vv);
+        double weight = weights(vv);
+        for (int jj = offset[vv]; jj < offset[vv + 1]; ++jj) {
+            const int ii = measurement[jj];
+            Eigen::Vector3d vert_new;
+            double weight_new;
+            if (fuse_measurement(pt_uvec.row(ii).transpose(), pt_radius(ii), vert, weight,
+                        max_angle, meas_weight, vert_weight, vert_new, weight_new)) {
+                vert = vert_new;
+                weight = weight_new;
+                moved[vv] = 1;
+            }
+        }
+        verts.row(vv) = vert.transpose();
+        weights(vv) = weight;
+    }
+    
+    // MeshData keeps the moved vertices in a std::set so write back serially
+    for (int vv = 0; vv < num_verts; ++vv) {
+        if (moved[vv]) {
+            Vertex_index vd(vv);
+            mesh->move_vertex(vd, verts.row(vv).transpose());
+            set_weight(vd, weights(vv));
+        }
+    }
+    mesh->update_dirty_properties();
+}
+
+void ReconstructMesh::refresh_vertex_index( void ) {
+    // the vertices only move radially, so the index is still valid unless
+    // the mesh was edited some other way
+    if (!vertex_index_built || vertex_index_revision != mesh->get_revision()
+            || vertex_index.size() != mesh->number_of_vertices()) {
+        build_vertex_index();
+    }
+}
+
+void ReconstructMesh::build_vertex_index( void ) {
+    Eigen::Matrix<double, Eigen::Dynamic, 3> uvec(mesh->number_of_vertices(), 3);
+    for (Vertex_index vd : mesh->vertices()) {
+        uvec.row((int)vd) = mesh->get_vertex(vd).normalized();
+    }
+
+    vertex_index = UnitSphereGrid(uvec);
+    vertex_index_revision = mesh->get_revision();
+    vertex_index_built = true;
 }
 
 void ReconstructMesh::update_meshdata( void ) {
@@ -171,6 +304,72 @@ double ReconstructMesh::get_weight(const Vertex_index& vd) const {
     return weight_property[vd];
 }
 
+// ************************ UnitSphereGrid ************************************
+UnitSphereGrid::UnitSphereGrid(const Eigen::Ref<const Eigen::Matrix<double, Eigen::Dynamic, 3> >& uvec) {
+    const int num_vec = uvec.rows();
+    // evenly spread vectors are about sqrt(4 pi / N) apart, so a cube twice
+    // that size holds a handful of them
+    cell_size = std::min(2.0, std::max(1e-3, 2.0 * std::sqrt(4.0 * kPI / std::max(num_vec, 1))));
+    num_cells = (int)std::ceil(2.0 / cell_size);
+    
+    // counting sort of the vectors by cube
+    std::vector<int> vec_cell(num_vec);
+    offset.assign(num_cells * num_cells * num_cells + 1, 0);
+    for (int ii = 0; ii < num_vec; ++ii) {
+        vec_cell[ii] = (cell(uvec(ii, 0)) * num_cells + cell(uvec(ii, 1))) * num_cells + cell(uvec(ii, 2));
+        ++offset[vec_cell[ii] + 1];
+    }
+    for (std::size_t c = 1; c < offset.size(); ++c) {
+        offset[c] += offset[c - 1];
+    }
+
+    index.resize(num_vec);
+    std::vector<int> next(offset.begin(), offset.end() - 1);
+    for (int ii = 0; ii < num_vec; ++ii) {
+        index[next[vec_cell[ii]]++] = ii;
+    }
+}
+
+int UnitSphereGrid::cell(const double& x) const {
+    return std::min(num_cells - 1, std::max(0, (int)std::floor((x + 1.0) / cell_size)));
+}
+
+std::vector<int> UnitSphereGrid::query(const Eigen::Ref<const Eigen::Vector3d>& uvec,
+        const double& max_angle) const {
+    std::vector<int> candidates;
+    
+    // chord length of the cone plus a little for roundoff in the directions
+    const double chord = 2.0 * std::sin(std::min(max_angle, kPI) / 2.0) + 1e-9;
+    Eigen::Vector3i lo, hi;
+    for (int ii = 0; ii < 3; ++ii) {
+        lo(ii) = cell(uvec(ii) - chord);
+        hi(ii) = cell(uvec(ii) + chord);
+    }
+    
+    // past this point checking every vector is cheaper than the cubes
+    const double num_search = (double)(hi - lo + Eigen::Vector3i::Ones()).prod();
+    if (max_angle >= kPI || num_search >= (double)index.size()) {
+        candidates.resize(index.size());
+        for (std::size_t ii = 0; ii < index.size(); ++ii) {
+            candidates[ii] = ii;
+        }
+        return candidates;
+    }
+
+    for (int ix = lo(0); ix <= hi(0); ++ix) {
+        for (int iy = lo(1); iy <= hi(1); ++iy) {
+            for (int iz = lo(2); iz <= hi(2); ++iz) {
+                const int c = (ix * num_cells + iy) * num_cells + iz;
+                candidates.insert(candidates.end(), index.begin() + offset[c], 
+                        index.begin() + offset[c + 1]);
+            }
+        }
+    }
+
+    std::sort(candidates.begin(), candidates.end());
+    return candidates;
+}
+
 // compute the initial weighting matrix given the vertices
 Eigen::Matrix<double, Eigen::Dynamic, 1> initial_weight(const Eigen::Ref<const Eigen::MatrixXd> &v_in) {
     Eigen::Matrix<double, Eigen::Dynamic, 1> vert_radius(v_in.rows(), 1);
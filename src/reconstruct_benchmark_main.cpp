@@ -0,0 +1,115 @@
+/**
+    Compare ReconstructMesh::update and ReconstructMesh::update_parallel
+
+    Two copies of the shape model are updated with the same lidar like scans,
+    a patch of noisy surface points around a random view direction, and the
+    time of each is printed along with the largest difference between them.
+
+    @author Shankar Kulumani
+    @version 16 October 2026
+*/
+#include "reconstruct.hpp"
+#include "mesh.hpp"
+#include "loader.hpp"
+#include "geodesic.hpp"
+
+#include "input_parser.hpp"
+
+#include <Eigen/Dense>
+
+#include <iostream>
+#include <fstream>
+#include <chrono>
+#include <random>
+#include <string>
+#include <vector>
+
+// points scattered around the surface vertices seen from a random direction
+Eigen::Matrix<double, Eigen::Dynamic, 3> random_scan(
+        const Eigen::Ref<const Eigen::MatrixXd>& verts, const int& num_pts,
+        const double& fov, std::mt19937& gen) {
+    std::normal_distribution<double> normal(0.0, 1.0);
+    Eigen::Vector3d view;
+    view << normal(gen), normal(gen), normal(gen);
+    view.normalize();
+
+    std::vector<int> in_view;
+    for (int ii = 0; ii < verts.rows(); ++ii) {
+        if (single_central_angle(view, verts.row(ii).normalized().transpose()) < fov) {
+            in_view.push_back(ii);
+        }
+    }
+
+    Eigen::Matrix<double, Eigen::Dynamic, 3> pts(num_pts, 3);
+    std::uniform_int_distribution<int> pick(0, in_view.size() - 1);
+    for (int ii = 0; ii < num_pts; ++ii) {
+        Eigen::RowVector3d noise;
+        noise << normal(gen), normal(gen), normal(gen);
+        pts.row(ii) = verts.row(in_view[pick(gen)]) * (1.0 + 0.02 * normal(gen))
+            + 0.01 * noise;
+    }
+    return pts;
+}
+
+int main(int argc, char* argv[]) {
+    InputParser input(argc, argv);
+    if (input.option_exists("-h")) {
+        std::cout << "Reconstruction benchmark: \nreconstruct_benchmark [-i obj_file.obj] [-s num_scans] [-N pts_per_scan] [-a max_angle]" << std::endl;
+        std::cout << "Without -i the castalia shape model is used" << std::endl;
+        return 0;
+    }
+
+    std::string input_file = input.get_command_option("-i");
+    if (input_file.empty()) {
+        input_file = "./data/shape_model/CASTALIA/castalia.obj";
+    }
+    if (!std::ifstream(input_file).good()) {
+        std::cout << "Missing " << input_file << std::endl;
+        return 1;
+    }
+
+    int num_scans = 10;
+    int num_pts = 10000;
+    double max_angle = 0.1;
+    if (!input.get_command_option("-s").empty()) {
+        num_scans = std::stoi(input.get_command_option("-s"));
+    }
+    if (!input.get_command_option("-N").empty()) {
+        num_pts = std::stoi(input.get_command_option("-N"));
+    }
+    if (!input.get_command_option("-a").empty()) {
+        max_angle = std::stod(input.get_command_option("-a"));
+    }
+
+    std::shared_ptr<MeshData> serial_mesh = Loader::load(input_file);
+    std::shared_ptr<MeshData> parallel_mesh = Loader::load(input_file);
+    ReconstructMesh serial(serial_mesh), parallel(parallel_mesh);
+
+    std::mt19937 gen(0);
+    const Eigen::MatrixXd verts = serial_mesh->get_verts();
+    double serial_time = 0, parallel_time = 0;
+    for (int scan = 0; scan < num_scans; ++scan) {
+        Eigen::Matrix<double, Eigen::Dynamic, 3> pts = random_scan(verts, num_pts, 0.5, gen);
+
+        std::chrono::steady_clock::time_point begin = std::chrono::steady_clock::now();
+        serial.update(pts, max_angle);
+        std::chrono::steady_clock::time_point end = std::chrono::steady_clock::now();
+        serial_time += std::chrono::duration_cast<std::chrono::microseconds>(end - begin).count();
+
+        begin = std::chrono::steady_clock::now();
+        parallel.update_parallel(pts, max_angle);
+        end = std::chrono::steady_clock::now();
+        parallel_time += std::chrono::duration_cast<std::chrono::microseconds>(end - begin).count();
+    }
+
+    std::cout << input_file << ": " << serial.number_of_vertices() << " vertices "
+        << num_scans << " scans of " << num_pts << " points, max angle " << max_angle << std::endl;
+    std::cout << "  update          : " << serial_time / num_scans / 1000.0 << " millisecond/scan" << std::endl;
+    std::cout << "  update_parallel : " << parallel_time / num_scans / 1000.0 << " millisecond/scan" << std::endl;
+    std::cout << "  Speedup         : " << serial_time / parallel_time << std::endl;
+    std::cout << "  Max vertex difference : "
+        << (serial.get_verts() - parallel.get_verts()).cwiseAbs().maxCoeff()
+        << " max weight difference : "
+        << (serial.get_weights() - parallel.get_weights()).cwiseAbs().maxCoeff() << std::endl;
+    return 0;
+}
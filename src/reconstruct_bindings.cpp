@@ -30,6 +30,10 @@ PYBIND11_MODULE(reconstruct, m) {
         .def("update", &ReconstructMesh::update, "Update the mesh given many intersections",
                 pybind11::arg("pts"), pybind11::arg("max_angle"), 
                 pybind11::arg("meas_weight") = 1.0, pybind11::arg("vert_weight") = 1.0)
+        .def("update_parallel", &ReconstructMesh::update_parallel,
+                "Same as update but the vertices are updated in parallel",
+                pybind11::arg("pts"), pybind11::arg("max_angle"), 
+                pybind11::arg("meas_weight") = 1.0, pybind11::arg("vert_weight") = 1.0)
         .def("get_verts", &ReconstructMesh::get_verts, "Get the vertices")
         .def("get_faces", &ReconstructMesh::get_faces, "Get the faces")
         .def("get_weights", &ReconstructMesh::get_weights, "Get the weights of the vertices");
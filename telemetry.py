@@ -0,0 +1,583 @@
+"""Time series layout for the simulation output in HDF5
+
+The simulations used to write one small dataset per step, e.g.
+state/1, state/2, ..., so a long run left hundreds of thousands of datasets
+in the file. Here each quantity is a single group holding
+
+    data - (T, ...) array with every step stacked along the first axis
+    key - (T,) label of each step, the step number or time
+
+Both datasets are chunked and extendable so steps are appended in blocks
+by TimeSeriesWriter, optionally from a background thread with AsyncWriter.
+Quantities where each step changes only a few rows, like the vertices of
+the reconstructed mesh, can instead be stored as a delta series
+
+    keyframe - full arrays every so many steps or when the rows change
+    index, value - the rows which changed at each step and their new value
+    delta_end - end of the changes of each step in index and value
+
+The File and Group wrappers serve hf['state/12'] and
+hf['state'].keys() on top of either layout, so code written for the old
+layout keeps working and old files can still be read.
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import atexit
+import threading
+import zlib
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import h5py
+import numpy as np
+
+LAYOUT = 'timeseries'
+DELTA_LAYOUT = 'delta'
+
+def is_timeseries(obj):
+    """True if the h5py object is a group written by TimeSeriesWriter
+    """
+    return (isinstance(obj, h5py.Group)
+            and obj.attrs.get('layout') in (LAYOUT, DELTA_LAYOUT))
+
+def _changed_rows(value, last):
+    """Index of the rows of value which differ from last. NaN equals NaN
+    """
+    same = value == last
+    if value.dtype.kind in 'fc':
+        same |= np.isnan(value) & np.isnan(last)
+    same = same.reshape((value.shape[0], int(np.prod(value.shape[1:]))))
+    return np.flatnonzero(~np.all(same, axis=1))
+
+class TimeSeriesWriter(object):
+    r"""Buffered appends of many quantities to one HDF5 group
+
+    writer = TimeSeriesWriter(group)
+    writer.append(ii, state=state, Ra=Ra)
+    writer.close()
+
+    Parameters
+    ----------
+    group : h5py Group or File
+        Parent of the series. Each keyword given to append becomes a
+        subgroup of this
+    compression, compression_opts :
+        Passed to h5py create_dataset
+    buffer_steps : int
+        Number of steps held in memory before they are written
+    chunk_bytes : int
+        Approximate size of each chunk. A chunk holds several steps of
+        small quantities and a single step of large ones
+    delta : sequence of str
+        Names written as delta series, e.g. the reconstructed vertices,
+        faces and weights
+    keyframe_steps : int
+        Steps between the keyframes of a delta series. Reading a step
+        replays at most this many steps of changes
+
+    Notes
+    -----
+    The shape and dtype of each quantity is fixed by its first step. Later
+    steps are cast to that dtype. A step with a different shape raises a
+    ValueError, so quantities which change size should be split into
+    separate series. The exception is the number of rows of a delta series,
+    which may change at any step and starts a new keyframe.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+
+    def __init__(self, group, compression='gzip', compression_opts=4,
+                 buffer_steps=100, chunk_bytes=2**20, delta=(), keyframe_steps=100):
+        self.group = group
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.buffer_steps = buffer_steps
+        self.chunk_bytes = chunk_bytes
+        self.delta = frozenset(delta)
+        self.keyframe_steps = keyframe_steps
+
+        self._keys = {}
+        self._values = {}
+        self._last = {} # name: (last step of a delta series, steps since its keyframe)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, key, **series):
+        """Add one step to each of the named series
+        """
+        for name, value in series.items():
+            if name in self.delta:
+                value = self._delta_step(name, value)
+            else:
+                value = np.asarray(value)
+            self._keys.setdefault(name, []).append(key)
+            self._values.setdefault(name, []).append(value)
+            if len(self._values[name]) >= self.buffer_steps:
+                self._flush_series(name)
+
+    def flush(self):
+        """Write every buffered step to the file
+        """
+        for name in list(self._values.keys()):
+            self._flush_series(name)
+
+    def close(self):
+        """Flush. The group itself is left open
+        """
+        self.flush()
+
+    def _create_series(self, name, key, value):
+        series = self.group.create_group(name)
+        series.attrs['layout'] = LAYOUT
+
+        step_bytes = max(1, value.nbytes)
+        chunk_steps = int(max(1, min(self.buffer_steps, self.chunk_bytes // step_bytes)))
+        series.create_dataset('data', shape=(0,) + value.shape, maxshape=(None,) + value.shape,
+                              chunks=(chunk_steps,) + value.shape, dtype=value.dtype,
+                              compression=self.compression,
+                              compression_opts=self.compression_opts)
+        series.create_dataset('key', shape=(0,), maxshape=(None,), chunks=(1024,),
+                              dtype=np.asarray(key).dtype)
+        return series
+
+    def _delta_step(self, name, value):
+        """Changes since the last step as (index, rows), or (None, value)
+        for a keyframe
+        """
+        value = np.array(value)
+        last, age = self._last.get(name, (None, 0))
+        if last is not None and value.shape[1:] != last.shape[1:]:
+            raise ValueError('{} has rows of shape {} but the series was created with {}'.format(
+                name, value.shape[1:], last.shape[1:]))
+
+        if last is None or value.shape[0] != last.shape[0] or age >= self.keyframe_steps:
+            self._last[name] = (value, 1)
+            return (None, value)
+
+        index = _changed_rows(value, last)
+        self._last[name] = (value, age + 1)
+        return (index, value[index])
+
+    def _create_delta_series(self, name, key, value):
+        series = self.group.create_group(name)
+        series.attrs['layout'] = DELTA_LAYOUT
+
+        row_bytes = max(1, value.dtype.itemsize * int(np.prod(value.shape[1:])))
+        chunk_rows = int(max(1, min(2**14, self.chunk_bytes // row_bytes)))
+        for dset in ('keyframe', 'value'):
+            series.create_dataset(dset, shape=(0,) + value.shape[1:],
+                                  maxshape=(None,) + value.shape[1:],
+                                  chunks=(chunk_rows,) + value.shape[1:], dtype=value.dtype,
+                                  compression=self.compression,
+                                  compression_opts=self.compression_opts)
+        series.create_dataset('index', shape=(0,), maxshape=(None,), chunks=(chunk_rows,),
+                              dtype=np.int64, compression=self.compression,
+                              compression_opts=self.compression_opts)
+        for dset in ('delta_end', 'keyframe_step', 'keyframe_start'):
+            series.create_dataset(dset, shape=(0,), maxshape=(None,), chunks=(1024,),
+                                  dtype=np.int64)
+        series.create_dataset('key', shape=(0,), maxshape=(None,), chunks=(1024,),
+                              dtype=np.asarray(key).dtype)
+        return series
+
+    def _flush_delta_series(self, name, keys, steps):
+        if name in self.group:
+            series = self.group[name]
+        else:
+            series = self._create_delta_series(name, keys[0], steps[0][1])
+
+        first = series['key'].shape[0]
+        end = series['delta_end'][-1] if first else 0
+        counts = [0 if index is None else index.size for index, _ in steps]
+        self._extend(series['delta_end'], end + np.cumsum(counts))
+
+        changes = [(index, rows) for index, rows in steps if index is not None]
+        if changes:
+            self._extend(series['index'], np.concatenate([index for index, _ in changes]))
+            self._extend(series['value'], np.concatenate([rows for _, rows in changes]))
+
+        frames = [(first + ii, rows) for ii, (index, rows) in enumerate(steps) if index is None]
+        if frames:
+            sizes = [rows.shape[0] for _, rows in frames]
+            start = series['keyframe'].shape[0] + np.cumsum([0] + sizes[:-1])
+            self._extend(series['keyframe_step'], [step for step, _ in frames])
+            self._extend(series['keyframe_start'], start)
+            self._extend(series['keyframe'], np.concatenate([rows for _, rows in frames]))
+
+        self._extend(series['key'], keys)
+
+    def _flush_series(self, name):
+        values = self._values.pop(name, [])
+        keys = self._keys.pop(name, [])
+        if not values:
+            return
+
+        if name in self.delta:
+            self._flush_delta_series(name, keys, values)
+            return
+
+        if name in self.group:
+            series = self.group[name]
+        else:
+            series = self._create_series(name, keys[0], values[0])
+
+        data, key = series['data'], series['key']
+        for value in values:
+            if value.shape != data.shape[1:]:
+                raise ValueError('{} has shape {} but the series was created with {}'.format(
+                    name, value.shape, data.shape[1:]))
+
+        self._extend(data, np.stack(values))
+        self._extend(key, keys)
+
+    def _extend(self, data, rows):
+        """Append rows along the first axis of an extendable dataset
+        """
+        rows = np.asarray(rows)
+        if rows.shape[0] == 0:
+            return
+        start = data.shape[0]
+        data.resize(start + rows.shape[0], axis=0)
+        self._write_rows(data, start, rows)
+
+    def _write_rows(self, data, start, rows):
+        """Write rows to data[start:], compressing whole chunks with zlib
+
+        The HDF5 deflate filter runs while h5py holds the GIL but zlib
+        releases it, so on a background thread the compression of complete
+        chunks overlaps with the simulation. Partial chunks at either end go
+        through h5py as usual. Complete chunks are stored as raw bytes with
+        no conversion by HDF5, so the rows are cast to the dtype of data
+        first.
+        """
+        stop = start + rows.shape[0]
+        chunk_steps = data.chunks[0]
+        first = -(-start // chunk_steps) * chunk_steps
+        last = stop // chunk_steps * chunk_steps
+        if data.compression != 'gzip' or first >= last:
+            data[start:stop] = rows
+            return
+
+        level = 4 if data.compression_opts is None else data.compression_opts
+        rows = np.ascontiguousarray(rows, dtype=data.dtype)
+        if first > start:
+            data[start:first] = rows[:first - start]
+        for offset in range(first, last, chunk_steps):
+            chunk = rows[offset - start:offset - start + chunk_steps]
+            data.id.write_direct_chunk((offset,) + (0,) * (data.ndim - 1),
+                                       zlib.compress(chunk.tobytes(), level))
+        if stop > last:
+            data[last:stop] = rows[last - start:]
+
+class AsyncWriter(object):
+    r"""Run a TimeSeriesWriter on a background thread
+
+    with AsyncWriter(TimeSeriesWriter(group)) as writer:
+        writer.append(ii, state=state, Ra=Ra)
+
+    Parameters
+    ----------
+    writer : TimeSeriesWriter
+        Only used from the background thread until close returns
+    max_queue : int
+        Number of steps which can wait to be written. append blocks while
+        the queue is full
+
+    Notes
+    -----
+    append copies each array before queuing it, so the caller can reuse or
+    modify its arrays right away. close waits for every queued step and
+    then closes the TimeSeriesWriter. It is called on leaving the with
+    block, also after an exception, and at interpreter exit as a last
+    resort. An exception raised by the writer is raised again by the next
+    append or close.
+
+    The file should not be used from the calling thread between the first
+    append and close.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+
+    def __init__(self, writer, max_queue=16):
+        self.writer = writer
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._error = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name='AsyncWriter')
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, key, **series):
+        """Copy one step of each series and queue it for the writer
+        """
+        if self._closed:
+            raise ValueError('AsyncWriter is closed')
+        self._raise()
+        snapshot = {name: np.array(value, copy=True) for name, value in series.items()}
+        self._queue.put((key, snapshot))
+
+    def close(self):
+        """Write everything in the queue and stop the thread
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+        self._raise()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            # after an error the rest of the queue is dropped
+            if self._error is None:
+                try:
+                    self.writer.append(item[0], **item[1])
+                except Exception as err:
+                    self._error = err
+
+        if self._error is None:
+            try:
+                self.writer.close()
+            except Exception as err:
+                self._error = err
+
+    def _raise(self):
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise err
+
+class TimeSeries(object):
+    r"""Per step access to a series, like a group with one dataset per step
+
+    series = TimeSeries(group)
+    state = series['12']
+
+    Parameters
+    ----------
+    group : h5py Group
+        Group written by TimeSeriesWriter
+
+    Notes
+    -----
+    keys() returns str(key) of each step in the order they were written,
+    the same names the old layout used for its datasets. All of the steps
+    are available at once from the data attribute.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self.name = group.name
+        self.data = group['data']
+        self._index = None
+
+    def _lookup(self):
+        if self._index is None:
+            self._index = {str(key): ii for ii, key in enumerate(self.group['key'][()])}
+        return self._index
+
+    def keys(self):
+        return [str(key) for key in self.group['key'][()]]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __contains__(self, key):
+        return str(key) in self._lookup()
+
+    def __getitem__(self, key):
+        try:
+            return self.data[self._lookup()[str(key)]]
+        except KeyError:
+            raise KeyError('{} has no step {}'.format(self.name, key))
+
+class DeltaSeries(object):
+    r"""Per step access to a delta series
+
+    series = DeltaSeries(group)
+    vertices = series['12']
+
+    Parameters
+    ----------
+    group : h5py Group
+        Group written by TimeSeriesWriter for a name in its delta argument
+
+    Notes
+    -----
+    A step is rebuilt from the keyframe before it and the changes since
+    then. The last step rebuilt is kept, so reading the steps in order only
+    replays the changes of each new step.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self.name = group.name
+        self._key = group['key'][()]
+        self._delta_end = group['delta_end'][()]
+        self._keyframe_step = group['keyframe_step'][()]
+        self._keyframe_start = np.append(group['keyframe_start'][()],
+                                         group['keyframe'].shape[0])
+        self._index = None
+        self._cache = None
+
+    def _lookup(self):
+        if self._index is None:
+            self._index = {str(key): ii for ii, key in enumerate(self._key)}
+        return self._index
+
+    def keys(self):
+        return [str(key) for key in self._key]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return self._key.shape[0]
+
+    def __contains__(self, key):
+        return str(key) in self._lookup()
+
+    def __getitem__(self, key):
+        try:
+            step = self._lookup()[str(key)]
+        except KeyError:
+            raise KeyError('{} has no step {}'.format(self.name, key))
+        return self.step(step)
+
+    def step(self, step):
+        """Array at position step, counting from the first step written
+        """
+        frame = np.searchsorted(self._keyframe_step, step, side='right') - 1
+        if self._cache is not None and self._keyframe_step[frame] <= self._cache[0] <= step:
+            done, value = self._cache
+        else:
+            done = self._keyframe_step[frame]
+            value = self.group['keyframe'][self._keyframe_start[frame]:self._keyframe_start[frame + 1]]
+
+        start, stop = self._delta_end[done], self._delta_end[step]
+        if stop > start:
+            index = self.group['index'][start:stop]
+            rows = self.group['value'][start:stop]
+            # a row changed more than once takes its latest value
+            _, latest = np.unique(index[::-1], return_index=True)
+            latest = index.size - 1 - latest
+            value[index[latest]] = rows[latest]
+
+        self._cache = (step, value)
+        return value.copy()
+
+class Group(object):
+    r"""Wrap an h5py Group so time series read like the old layout
+
+    Paths are resolved one name at a time. When a name is a time or delta
+    series the rest of the path is the step, so hf['refinement/state/12'] returns
+    the array of step 12. Other groups are wrapped again and datasets are
+    returned as they are. Anything else is passed to the h5py Group.
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+
+    def __init__(self, group):
+        self._group = group
+        self._series = {}
+
+    def __getattr__(self, attr):
+        return getattr(self._group, attr)
+
+    def __getitem__(self, path):
+        parts = path.strip('/').split('/')
+        obj = self._group
+        for ii, part in enumerate(parts):
+            obj = obj[part]
+            if is_timeseries(obj):
+                if obj.name not in self._series:
+                    if obj.attrs['layout'] == DELTA_LAYOUT:
+                        self._series[obj.name] = DeltaSeries(obj)
+                    else:
+                        self._series[obj.name] = TimeSeries(obj)
+                series = self._series[obj.name]
+                rest = '/'.join(parts[ii + 1:])
+                return series[rest] if rest else series
+
+        if isinstance(obj, h5py.Group):
+            return Group(obj)
+        return obj
+
+    def __contains__(self, path):
+        return path in self._group
+
+    def __iter__(self):
+        return iter(self._group)
+
+    def __len__(self):
+        return len(self._group)
+
+    def __delitem__(self, path):
+        del self._group[path]
+
+    def keys(self):
+        return self._group.keys()
+
+class File(Group):
+    r"""Open an HDF5 file with the time series reader
+
+    with telemetry.File(filename, 'r') as hf:
+        state = hf['state/12']
+
+    Parameters are passed to h5py.File
+
+    Author
+    ------
+    Shankar Kulumani		GWU		skulumani@gwu.edu
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(File, self).__init__(h5py.File(*args, **kwargs))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._group.close()
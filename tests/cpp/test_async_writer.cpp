@@ -0,0 +1,65 @@
+#include "async_writer.hpp"
+
+#include <gtest/gtest.h>
+
+#include <Eigen/Dense>
+
+#include <chrono>
+#include <map>
+#include <stdexcept>
+#include <string>
+#include <thread>
+#include <vector>
+
+// stands in for HDF5::Group
+class FakeGroup {
+    public:
+        template<typename Derived>
+        void write(const std::string& name, const Eigen::MatrixBase<Derived>& data) {
+            std::this_thread::sleep_for(std::chrono::microseconds(100));
+            written[name] = data;
+            order.push_back(name);
+        }
+        
+        std::map<std::string, Eigen::MatrixXd> written;
+        std::vector<std::string> order;
+};
+
+TEST(TestAsyncWriter, WritesSnapshotsInOrder) {
+    FakeGroup group;
+    {
+        AsyncWriter writer(4);
+        Eigen::MatrixXd data(2, 3);
+        for (int ii = 0; ii < 20; ++ii) {
+            data.setConstant(ii);
+            writer.write(group, std::to_string(ii), data);
+            ASSERT_LE(writer.size(), 4);
+        }
+    }
+    ASSERT_EQ(group.order.size(), 20);
+    for (int ii = 0; ii < 20; ++ii) {
+        ASSERT_EQ(group.order[ii], std::to_string(ii));
+        ASSERT_TRUE(group.written[std::to_string(ii)].isConstant(ii));
+    }
+}
+
+TEST(TestAsyncWriter, RethrowsTaskError) {
+    AsyncWriter writer;
+    writer.push([]() { throw std::runtime_error("disk full"); });
+    ASSERT_THROW(writer.close(), std::runtime_error);
+    ASSERT_NO_THROW(writer.close());
+    ASSERT_THROW(writer.push([]() {}), std::logic_error);
+}
+
+TEST(TestAsyncWriter, FlushesDuringUnwinding) {
+    FakeGroup group;
+    try {
+        AsyncWriter writer(2);
+        for (int ii = 0; ii < 5; ++ii) {
+            writer.write(group, std::to_string(ii), Eigen::RowVector3d::Constant(ii));
+        }
+        throw std::runtime_error("simulation failed");
+    } catch (const std::runtime_error&) {
+    }
+    ASSERT_EQ(group.order.size(), 5);
+}
@@ -119,3 +119,111 @@ TEST_F(TestRayCaster, InitMeshNoIntersection) {
 
     ASSERT_FALSE(caster.intersection(psource, ptarget));  
 }
+
+TEST_F(TestRayCaster, PoseMatchesRotatedMesh) {
+    std::shared_ptr<MeshData> mesh = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Eigen::Matrix3d Ra;
+    Ra = Eigen::AngleAxisd(0.7, Eigen::Vector3d::UnitZ())
+        * Eigen::AngleAxisd(-0.3, Eigen::Vector3d::UnitX());
+    
+    RayCaster posed(mesh);
+    posed.set_pose(Ra);
+    Eigen::Matrix<double, Eigen::Dynamic, 3> V_rot = (Ra * mesh->get_verts().transpose()).transpose();
+    RayCaster rotated(V_rot, mesh->get_faces());
+    
+    Eigen::Vector3d psource(3, 1, 0.5);
+    Eigen::Matrix<double, Eigen::Dynamic, 3> targets(3, 3);
+    targets << 0, 0, 0,
+               0.1, -0.2, 0.1,
+               10, 0, 0;
+    Eigen::Matrix<double, Eigen::Dynamic, 3> posed_int = posed.castarray(psource, targets);
+    Eigen::Matrix<double, Eigen::Dynamic, 3> rotated_int = rotated.castarray(psource, targets);
+    
+    ASSERT_TRUE(posed_int.topRows(2).isApprox(rotated_int.topRows(2), 1e-9));
+    ASSERT_TRUE(posed_int.row(2).isZero());
+    ASSERT_NEAR(posed.minimum_distance(psource), rotated.minimum_distance(psource), 1e-9);
+}
+
+TEST_F(TestRayCaster, BundleMatchesCastray) {
+    std::shared_ptr<MeshData> mesh = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    RayCaster caster(mesh);
+    
+    // two sources with 50 rays each, one ray of each misses
+    Eigen::Matrix<double, Eigen::Dynamic, 3> sources(2, 3);
+    sources << 3, 0, 0,
+               0, -3, 1;
+    Eigen::Matrix<double, Eigen::Dynamic, 3> targets = 0.1 * Eigen::MatrixXd::Random(100, 3);
+    targets.row(0) << 5, 0, 0;
+    targets.row(50) << 0, -5, 1;
+    
+    Eigen::Matrix<double, Eigen::Dynamic, 3> intersections;
+    Eigen::VectorXi faces;
+    Eigen::VectorXd ranges;
+    std::tie(intersections, faces, ranges) = caster.castbundle(sources, targets);
+    
+    for (int ii = 0; ii < 100; ++ii) {
+        Eigen::Vector3d source = sources.row(ii / 50).transpose();
+        Eigen::RowVector3d single = caster.castray(source, targets.row(ii).transpose());
+        if (faces(ii) < 0) {
+            // castray keeps its zero row, the bundle uses NaN like cast
+            ASSERT_TRUE(single.isZero());
+            ASSERT_TRUE(intersections.row(ii).array().isNaN().all());
+            ASSERT_TRUE(std::isnan(ranges(ii)));
+        } else {
+            ASSERT_TRUE(intersections.row(ii) == single);
+            ASSERT_NEAR(ranges(ii), (intersections.row(ii) - source.transpose()).norm(), 1e-12);
+            // the hit lies in the plane of the face it reports
+            Face_index fd(faces(ii));
+            double offset = mesh->get_face_normal(fd).dot(
+                    intersections.row(ii).transpose() - mesh->get_face_center(fd));
+            ASSERT_NEAR(offset, 0, 1e-9);
+        }
+    }
+    ASSERT_EQ(faces(0), -1);
+    ASSERT_EQ(faces(50), -1);
+    ASSERT_EQ((faces.array() >= 0).count(), 98);
+}
+
+TEST_F(TestRayCaster, BundleSizeMismatch) {
+    std::shared_ptr<MeshData> mesh = Loader::load(input_file);
+    RayCaster caster(mesh);
+    Eigen::Matrix<double, Eigen::Dynamic, 3> sources = Eigen::MatrixXd::Ones(2, 3);
+    Eigen::Matrix<double, Eigen::Dynamic, 3> targets = Eigen::MatrixXd::Zero(3, 3);
+    ASSERT_THROW(caster.castbundle(sources, targets), std::invalid_argument);
+}
+
+TEST_F(TestRayCaster, CastResultCube) {
+    std::shared_ptr<MeshData> mesh = Loader::load(input_file);
+    RayCaster caster(mesh);
+    Eigen::Matrix3d Ra;
+    Ra = Eigen::AngleAxisd(0.4, Eigen::Vector3d::UnitZ());
+    caster.set_pose(Ra);
+
+    // straight at the +x face, oblique to it, and a miss
+    Eigen::Matrix<double, Eigen::Dynamic, 3> sources(1, 3);
+    sources.row(0) = (Ra * Eigen::Vector3d(2, 0, 0)).transpose();
+    Eigen::Matrix<double, Eigen::Dynamic, 3> targets(3, 3);
+    targets.row(0) = (Ra * Eigen::Vector3d(0, 0, 0)).transpose();
+    targets.row(1) = (Ra * Eigen::Vector3d(1, 0.2, 0.1)).transpose();
+    targets.row(2) = (Ra * Eigen::Vector3d(3, 0, 0)).transpose();
+    
+    // results in the cube frame
+    RayCastResult result = caster.cast(sources, targets, Ra.transpose());
+    
+    ASSERT_TRUE(result.hit(0));
+    ASSERT_TRUE(result.hit(1));
+    ASSERT_FALSE(result.hit(2));
+
+    EXPECT_TRUE(result.intersections.row(0).isApprox(Eigen::RowVector3d(0.5, 0, 0)));
+    EXPECT_NEAR(result.ranges(0), 1.5, 1e-12);
+    EXPECT_NEAR(result.incidence(0), 0, 1e-6);
+    EXPECT_NEAR(result.incidence(1), std::acos(1.0 / std::sqrt(1.05)), 1e-6);
+    EXPECT_TRUE(result.intersections.row(1).isApprox(Eigen::RowVector3d(0.5, 0.3, 0.15)));
+
+    EXPECT_EQ(result.faces(2), -1);
+    EXPECT_TRUE(std::isnan(result.ranges(2)));
+    EXPECT_TRUE(result.intersections.row(2).hasNaN());
+    
+    // the face that was hit has its normal along +x
+    EXPECT_TRUE(mesh->get_face_normal(Face_index(result.faces(0))).isApprox(Eigen::Vector3d::UnitX()));
+}
@@ -0,0 +1,87 @@
+#include "eoms.hpp"
+#include "potential.hpp"
+#include "loader.hpp"
+#include "mesh.hpp"
+
+#include "gtest/gtest.h"
+
+#include <cmath>
+
+TEST(TestDumbbell, MatchesPythonDumbbell) {
+    Dumbbell dum;
+    ASSERT_TRUE(dum.J.diagonal().isApprox(Eigen::Vector3d(8e-5, 5.3e-4, 5.3e-4), 1e-12));
+    ASSERT_NEAR(dum.kR, 8.398997755288576, 1e-12);
+    ASSERT_NEAR(dum.kW, 4.0, 1e-12);
+    ASSERT_NEAR(dum.kx, 0.16797995510577152, 1e-12);
+    ASSERT_NEAR(dum.kv, 8.0, 1e-12);
+}
+
+TEST(TestControlledDumbbell, TracksCommandFeedforward) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./integration/cube.obj");
+    std::shared_ptr<Asteroid> ast = std::make_shared<Asteroid>("cube", mesh_data);
+    ControlledDumbbell eoms(ast, Dumbbell());
+
+    // sitting on the command the controllers cancel gravity and leave the
+    // desired accelerations
+    DesiredState command;
+    command.Rd = Eigen::AngleAxisd(0.3, Eigen::Vector3d(1, 2, 3).normalized()).toRotationMatrix();
+    command.posd << 3, 1, 0.5;
+    command.acceld << 1e-6, -2e-6, 3e-6;
+    command.ang_vel_d_dot << 1e-3, 2e-3, -1e-3;
+    eoms.set_command(command);
+
+    ControlledDumbbell::StateVector state = ControlledDumbbell::StateVector::Zero();
+    state.segment<3>(0) = command.posd;
+    Eigen::Map<Eigen::Matrix<double, 3, 3, Eigen::RowMajor> >(state.data() + 6) = command.Rd;
+
+    ControlledDumbbell::StateVector state_dot = eoms(0, state);
+    ASSERT_TRUE(state_dot.segment<3>(0).isZero());
+    ASSERT_TRUE(state_dot.segment<3>(3).isApprox(command.acceld, 1e-9));
+    ASSERT_TRUE(state_dot.segment<9>(6).isZero());
+    ASSERT_TRUE(state_dot.segment<3>(15).isApprox(command.ang_vel_d_dot, 1e-9));
+}
+
+TEST(TestDormandPrince, KeplerOrbit) {
+    auto kepler = [](const double& t, const Eigen::Ref<const Eigen::VectorXd>& y) {
+        const double r3 = std::pow(y.head<2>().norm(), 3);
+        Eigen::VectorXd y_dot(4);
+        y_dot << y(2), y(3), -y(0) / r3, -y(1) / r3;
+        return y_dot;
+    };
+    // eccentricity 0.5 with a period of 2 pi
+    Eigen::VectorXd y0(4);
+    y0 << 0.5, 0, 0, std::sqrt(3.0);
+    Eigen::VectorXd times = Eigen::VectorXd::LinSpaced(13, 0, 2 * kPI);
+
+    DormandPrince dp(1e-12, 1e-12);
+    Eigen::MatrixXd y = dp.integrate(kepler, 0, y0, times);
+    ASSERT_EQ(y.rows(), 13);
+    ASSERT_TRUE(y.row(0).transpose().isApprox(y0));
+    ASSERT_LT((y.row(12).transpose() - y0).norm(), 1e-8);
+    for (int ii = 0; ii < y.rows(); ++ii) {
+        const double energy = 0.5 * y.row(ii).tail<2>().squaredNorm() - 1 / y.row(ii).head<2>().norm();
+        ASSERT_NEAR(energy, -0.5, 1e-10);
+    }
+    ASSERT_EQ(dp.get_num_rejected(), 0);
+}
+
+TEST(TestDormandPrince, DenseOutputCostsNoSteps) {
+    auto oscillator = [](const double& t, const Eigen::Ref<const Eigen::VectorXd>& y) {
+        Eigen::VectorXd y_dot(2);
+        y_dot << y(1), -y(0);
+        return y_dot;
+    };
+    Eigen::VectorXd y0(2);
+    y0 << 1, 0;
+
+    DormandPrince dense(1e-8, 1e-8), single(1e-8, 1e-8);
+    Eigen::VectorXd times = Eigen::VectorXd::LinSpaced(1001, 0, 10);
+    Eigen::MatrixXd y = dense.integrate(oscillator, 0, y0, times);
+    Eigen::MatrixXd y_end = single.integrate(oscillator, 0, y0, times.tail(1));
+
+    ASSERT_EQ(dense.get_num_evals(), single.get_num_evals());
+    ASSERT_TRUE(y.bottomRows(1).isApprox(y_end));
+    for (int ii = 0; ii < times.size(); ++ii) {
+        ASSERT_NEAR(y(ii, 0), std::cos(times(ii)), 1e-6);
+    }
+}
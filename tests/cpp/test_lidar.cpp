@@ -1,8 +1,12 @@
 #include "lidar.hpp"
+#include "cgal.hpp"
+#include "loader.hpp"
 
 #include <gtest/gtest.h>
 
+#include <cmath>
 #include <iostream>
+#include <stdexcept>
 
 TEST(TestLidar, ObjectCreation) {
 	Lidar sensor;
@@ -92,3 +96,132 @@ TEST(TestLidar, SingleTarget) {
     target_true << 6.5, 0, 0;
     ASSERT_TRUE(target.isApprox(target_true));
 }
+
+TEST(TestLidar, TrajectoryTargets) {
+    Lidar sensor;
+    Eigen::Matrix<double, Eigen::Dynamic, 18, Eigen::RowMajor> state(4, 18);
+    state.setRandom();
+    for (int ii = 0; ii < state.rows(); ++ii) {
+        Eigen::Matrix<double, 3, 3, Eigen::RowMajor> R;
+        R = Eigen::AngleAxis<double>(0.4 * ii, Eigen::Vector3d(0, 1, 1).normalized());
+        state.block<1, 9>(ii, 6) = Eigen::Map<Eigen::Matrix<double, 1, 9> >(R.data());
+    }
+    
+    Eigen::Matrix<double, Eigen::Dynamic, 3> targets = sensor.define_trajectory_targets(state);
+    ASSERT_EQ(targets.rows(), 4 * 9);
+    for (int ii = 0; ii < state.rows(); ++ii) {
+        Eigen::Matrix<double, 3, 3> R 
+            = Eigen::Map<Eigen::Matrix<double, 3, 3, Eigen::RowMajor> >(state.row(ii).data() + 6);
+        Eigen::RowVector3d pos = state.block<1, 3>(ii, 0);
+        ASSERT_TRUE(targets.middleRows(9 * ii, 9).isApprox(
+                    sensor.define_targets(pos, R, pos.norm())));
+    }
+}
+
+TEST(TestLidar, TargetsBatchMismatch) {
+    Lidar sensor;
+    Eigen::Matrix<double, Eigen::Dynamic, 3> pos(3, 3);
+    pos.setRandom();
+    Eigen::Matrix<double, Eigen::Dynamic, 9, Eigen::RowMajor> R_b2f(3, 9);
+    R_b2f.setRandom();
+    Eigen::VectorXd dist = Eigen::VectorXd::Ones(3);
+    ASSERT_EQ(sensor.define_targets_batch(pos, R_b2f, dist).rows(), 3 * 9);
+    
+    // checked in release builds too, the arrays usually come from Python
+    ASSERT_THROW(sensor.define_targets_batch(pos, R_b2f.topRows(2), dist), std::invalid_argument);
+    ASSERT_THROW(sensor.define_targets_batch(pos, R_b2f, dist.head(2)), std::invalid_argument);
+}
+
+TEST(TestLidar, ScanPatternsInFov) {
+    Lidar raster;
+    raster.num_steps(5);
+    const double max_angle = std::sqrt(2.0) * raster.get_fov()(0) / 2 + 1e-6;
+    for (ScanPattern pattern : {ScanPattern::RASTER, ScanPattern::SPIRAL, 
+            ScanPattern::LISSAJOUS, ScanPattern::RANDOM}) {
+        Lidar sensor;
+        sensor.num_steps(5).scan_pattern(pattern);
+        Eigen::Matrix<double, Eigen::Dynamic, 3> arr = sensor.get_lidar_array();
+        ASSERT_EQ(arr.rows(), 25);
+        ASSERT_TRUE(arr.rowwise().norm().isApproxToConstant(1));
+        ASSERT_TRUE((arr.col(0).array().acos() < max_angle).all());
+    }
+}
+
+TEST(TestLidar, RandomPatternSeeded) {
+    Lidar first, second, other;
+    first.scan_pattern(ScanPattern::RANDOM).seed(3);
+    second.scan_pattern(ScanPattern::RANDOM).seed(3);
+    other.scan_pattern(ScanPattern::RANDOM).seed(4);
+    ASSERT_TRUE(first.get_lidar_array() == second.get_lidar_array());
+    ASSERT_FALSE(first.get_lidar_array() == other.get_lidar_array());
+    
+    // an unseeded Lidar draws its noise from the seed it reports
+    Lidar unseeded, zero;
+    unseeded.range_noise(RangeNoise::GAUSSIAN);
+    zero.range_noise(RangeNoise::GAUSSIAN).seed(0);
+    ASSERT_EQ(unseeded.get_seed(), 0u);
+    ASSERT_TRUE(unseeded.sample_range_noise(10) == zero.sample_range_noise(10));
+}
+
+TEST(TestLidar, RangeNoise) {
+    Lidar sensor;
+    sensor.sigma(0.03).range_noise(RangeNoise::GAUSSIAN).seed(1);
+    Eigen::Matrix<double, 2, 3> sources;
+    sources << 2, 0, 0,
+               0, 2, 0;
+    Eigen::Matrix<double, Eigen::Dynamic, 3> ints(6, 3);
+    ints << 1, 0, 0,
+            1, 0.1, 0,
+            0, 0, 0,
+            0, 1, 0,
+            std::nan(""), 0, 0,
+            0, 1.1, 0;
+    Eigen::Matrix<double, Eigen::Dynamic, 3> measured = sensor.add_range_noise(sources, ints);
+    
+    // the error is along the ray
+    Eigen::RowVector3d err = measured.row(1) - ints.row(1);
+    Eigen::RowVector3d ray = ints.row(1) - sources.row(0);
+    ASSERT_NEAR(err.cross(ray).norm(), 0, 1e-12);
+    ASSERT_LT(err.norm(), 0.1);
+    
+    // misses from castarray (zero) and castbundle (NaN) are left alone
+    ASSERT_TRUE(measured.row(2).isZero(0));
+    ASSERT_TRUE(std::isnan(measured(4, 0)));
+    ASSERT_EQ(measured(4, 1), 0);
+    ASSERT_NEAR((measured.row(5) - ints.row(5)).cross(ints.row(5) - sources.row(1)).norm(), 0, 1e-12);
+    
+    Eigen::VectorXd noise = sensor.sample_range_noise(100000);
+    ASSERT_NEAR(noise.mean(), 0, 1e-3);
+    ASSERT_NEAR(std::sqrt(noise.squaredNorm() / noise.size()), 0.01, 1e-3);
+    
+    sensor.range_noise(RangeNoise::NONE);
+    ASSERT_TRUE(sensor.add_range_noise(sources, ints).topRows(4) == ints.topRows(4));
+    
+    // checked in release builds too
+    ASSERT_THROW(sensor.add_range_noise(sources.topRows(0), ints), std::invalid_argument);
+    ASSERT_THROW(sensor.add_range_noise(sources, ints.topRows(5)), std::invalid_argument);
+}
+
+TEST(TestLidar, RangeNoiseCastbundleMiss) {
+    std::shared_ptr<MeshData> mesh = Loader::load("./integration/cube.obj");
+    RayCaster caster(mesh);
+    Lidar sensor;
+    sensor.sigma(0.03).range_noise(RangeNoise::UNIFORM).seed(2);
+
+    // one ray at the cube and one away from it
+    Eigen::Matrix<double, Eigen::Dynamic, 3> sources(1, 3);
+    sources << 2, 0, 0;
+    Eigen::Matrix<double, Eigen::Dynamic, 3> targets(2, 3);
+    targets << 0, 0, 0,
+               3, 0, 0;
+    
+    Eigen::Matrix<double, Eigen::Dynamic, 3> intersections;
+    Eigen::VectorXi faces;
+    std::tie(intersections, faces, std::ignore) = caster.castbundle(sources, targets);
+    ASSERT_EQ(faces(1), -1);
+
+    Eigen::Matrix<double, Eigen::Dynamic, 3> measured = sensor.add_range_noise(sources, intersections);
+    ASSERT_FALSE(measured.row(0) == intersections.row(0));
+    ASSERT_NEAR(measured(0, 1), 0, 1e-12);
+    ASSERT_TRUE(measured.row(1).array().isNaN().all());
+}
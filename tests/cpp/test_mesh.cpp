@@ -272,3 +272,28 @@ TEST(TestMeshDataItokawa, SymmetricEdgeDyad) {
     }
 }
 
+
+TEST(TestMeshDataCastalia, DirtyVerticesMatchRebuild) {
+    std::shared_ptr<MeshData> mesh = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    // move a vertex and its neighbors so the dirty faces overlap
+    Vertex_index vd(0);
+    mesh->move_vertex(vd, 1.05 * mesh->get_vertex(vd).transpose());
+    for (Vertex_index vn : vertices_around_target(mesh->surface_mesh.halfedge(vd), mesh->surface_mesh)) {
+        mesh->move_vertex(vn, 0.95 * mesh->get_vertex(vn).transpose());
+    }
+    ASSERT_TRUE(mesh->has_dirty_vertices());
+    std::size_t num_dirty = mesh->number_of_dirty_vertices();
+    ASSERT_EQ(mesh->update_dirty_properties(), num_dirty);
+    ASSERT_FALSE(mesh->has_dirty_vertices());
+
+    MeshData rebuilt(mesh->get_verts(), mesh->get_faces());
+    for (Face_index fd : mesh->faces()) {
+        EXPECT_TRUE(mesh->get_face_normal(fd).isApprox(rebuilt.get_face_normal(fd)));
+    }
+    for (Halfedge_index hd : mesh->halfedges()) {
+        EXPECT_TRUE(mesh->get_halfedge_normal(hd).isApprox(rebuilt.get_halfedge_normal(hd)));
+    }
+    for (Edge_index ed : mesh->edges()) {
+        EXPECT_LT((mesh->get_edge_dyad(ed) - rebuilt.get_edge_dyad(ed)).norm(), 1e-10);
+    }
+}
@@ -4,7 +4,11 @@
 
 #include "gtest/gtest.h"
 
+#include <cmath>
 #include <iostream>
+#include <stdexcept>
+#include <tuple>
+#include <vector>
 
 TEST(TestAsteroid, CubeGravity) {
     std::shared_ptr<MeshData> mesh_data = Loader::load("./integration/cube.obj");
@@ -105,3 +109,313 @@ TEST(TestAsteroid, CastaliaSurfaceSlope) {
     EXPECT_NEAR(face_slope.maxCoeff(), 0.669671, 1e-3);
     EXPECT_NEAR(face_slope.minCoeff(), 0.00451144, 1e-3);
 }
+
+TEST(TestAsteroid, CastaliaBatchGravity) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Asteroid ast("castalia", mesh_data);
+    
+    Eigen::Matrix<double, Eigen::Dynamic, 3> states(4, 3);
+    states << 1, 2, 3,
+              -2, 0.5, 1,
+              0, 0, 5,
+              0, 0, 0;
+
+    Eigen::VectorXd U, Ulaplace;
+    Eigen::Matrix<double, Eigen::Dynamic, 3> U_grad;
+    Eigen::Matrix<double, Eigen::Dynamic, 9> U_grad_mat;
+    std::tie(U, U_grad, U_grad_mat, Ulaplace) = ast.polyhedron_potential_batch(states);
+    
+    ASSERT_EQ(U.size(), 4);
+    for (int ii = 0; ii < states.rows(); ++ii) {
+        Eigen::Vector3d state = states.row(ii).transpose();
+        ast.polyhedron_potential(state);
+        Eigen::Matrix3d grad_mat;
+        grad_mat << U_grad_mat.block(ii, 0, 1, 3),
+                    U_grad_mat.block(ii, 3, 1, 3),
+                    U_grad_mat.block(ii, 6, 1, 3);
+
+        EXPECT_NEAR(U(ii), ast.get_potential(), 1e-14);
+        EXPECT_TRUE(U_grad.row(ii).transpose().isApprox(ast.get_acceleration(), 1e-9));
+        EXPECT_TRUE(grad_mat.isApprox(ast.get_gradient_mat(), 1e-9));
+        EXPECT_NEAR(Ulaplace(ii), ast.get_laplace(), 1e-14);
+    }
+}
+
+TEST(TestAsteroid, CubeEvaluatePotentialReentrant) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./integration/cube.obj");
+    const Asteroid ast("cube", mesh_data);
+    Eigen::Vector3d state;
+    state << 1, 2, 3;
+
+    PotentialResult expected = ast.evaluate_potential(state);
+    ASSERT_FALSE(expected.inside);
+    ASSERT_NEAR(expected.U, 1.7834673284883827e-08, 1e-12 * std::abs(expected.U));
+    
+    // evaluate the same asteroid from many threads at once
+    const int num_evals = 64;
+    std::vector<PotentialResult> results(num_evals);
+    #pragma omp parallel for
+    for (int ii = 0; ii < num_evals; ++ii) {
+        results[ii] = ast.evaluate_potential(state);
+    }
+
+    for (const PotentialResult& result : results) {
+        EXPECT_EQ(result.U, expected.U);
+        EXPECT_TRUE(result.U_grad.isApprox(expected.U_grad));
+        EXPECT_TRUE(result.U_grad_mat.isApprox(expected.U_grad_mat));
+    }
+    
+    Eigen::Vector3d origin = Eigen::Vector3d::Zero();
+    PotentialResult inside = ast.evaluate_potential(origin);
+    EXPECT_TRUE(inside.inside);
+    EXPECT_EQ(inside.U, 0);
+}
+
+TEST(TestAsteroid, CubeGarbageThrows) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./integration/cube.obj");
+    const Asteroid ast("cube", mesh_data);
+    Eigen::Vector3d state;
+    state << 1, 2, 3;
+
+    // the index based traversal would skip or misread the removed face
+    mesh_data->surface_mesh.remove_face(Face_index(0));
+    ASSERT_TRUE(mesh_data->surface_mesh.has_garbage());
+    EXPECT_THROW(ast.evaluate_potential(state), std::runtime_error);
+    EXPECT_THROW(ast.polyhedron_potential_batch(state.transpose()), std::runtime_error);
+}
+
+TEST(TestAsteroid, CubeGarbageGravityGrid) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./integration/cube.obj");
+    Asteroid ast("cube", mesh_data);
+
+    // must throw before the nodes are sampled in parallel, not terminate
+    mesh_data->surface_mesh.remove_face(Face_index(0));
+    EXPECT_THROW(ast.build_gravity_grid(2, 0.5), std::runtime_error);
+    EXPECT_FALSE(ast.has_gravity_grid());
+}
+
+TEST(TestAsteroid, CastaliaGravityKernel) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Asteroid ast("castalia", mesh_data);
+    
+    Eigen::Vector3d state;
+    state << 1, 2, 3;
+    PotentialResult mesh_result = ast.evaluate_potential(state);
+    
+    ast.build_gravity_kernel();
+    ASSERT_TRUE(ast.has_gravity_kernel());
+    PotentialResult kernel_result = ast.evaluate_potential(state);
+
+    EXPECT_NEAR(kernel_result.U, mesh_result.U, 1e-14);
+    EXPECT_TRUE(kernel_result.U_grad.isApprox(mesh_result.U_grad, 1e-9));
+    EXPECT_TRUE(kernel_result.U_grad_mat.isApprox(mesh_result.U_grad_mat, 1e-9));
+    EXPECT_FALSE(kernel_result.inside);
+
+    Eigen::Vector3d origin = Eigen::Vector3d::Zero();
+    EXPECT_TRUE(ast.evaluate_potential(origin).inside);
+
+    ast.clear_gravity_kernel();
+    ASSERT_FALSE(ast.has_gravity_kernel());
+}
+
+TEST(TestAsteroid, CastaliaGravityKernelFollowsMesh) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Asteroid ast("castalia", mesh_data);
+    Asteroid exact("castalia", mesh_data);
+    ast.build_gravity_kernel();
+    
+    Vertex_index vd(0);
+    Eigen::Vector3d vertex = mesh_data->get_vertex(vd).transpose();
+    Eigen::Vector3d state = 1.5 * vertex;
+    ast.polyhedron_potential(state);
+    const Eigen::Vector3d before = ast.get_acceleration();
+
+    // a radial move flushed by the mesh owner leaves no dirty vertices
+    mesh_data->move_vertex(vd, 1.2 * vertex);
+    mesh_data->update_dirty_properties();
+    ASSERT_FALSE(mesh_data->has_dirty_vertices());
+
+    ast.polyhedron_potential(state);
+    exact.polyhedron_potential(state);
+    ASSERT_TRUE(ast.has_gravity_kernel());
+    EXPECT_FALSE(ast.get_acceleration().isApprox(before, 1e-6));
+    EXPECT_NEAR(ast.get_potential(), exact.get_potential(), 1e-14);
+    EXPECT_TRUE(ast.get_acceleration().isApprox(exact.get_acceleration(), 1e-9));
+    
+    // an edit which bumps the revision, refreshed before the batch
+    mesh_data->set_vertex(vd, 1.1 * vertex);
+    ast.refresh();
+    Eigen::Matrix<double, 2, 3> states;
+    states << state.transpose(), 
+              2 * state.transpose();
+    auto kernel_batch = ast.polyhedron_potential_batch(states);
+    auto exact_batch = exact.polyhedron_potential_batch(states);
+    EXPECT_TRUE(std::get<1>(kernel_batch).isApprox(std::get<1>(exact_batch), 1e-9));
+    
+    // the const evaluations skip a stale kernel rather than rebuild it
+    mesh_data->move_vertex(vd, vertex);
+    EXPECT_THROW(ast.polyhedron_potential_batch(states), std::runtime_error);
+    EXPECT_THROW(exact.evaluate_potential(state), std::runtime_error);
+    EXPECT_TRUE(mesh_data->has_dirty_vertices());
+    mesh_data->update_dirty_properties();
+    EXPECT_TRUE(ast.evaluate_potential(state).U_grad.isApprox(
+                exact.evaluate_potential(state).U_grad, 1e-9));
+    
+    // once refreshed many threads can share the asteroid
+    ast.refresh();
+    Eigen::Matrix<double, Eigen::Dynamic, 3> many = states.replicate(50, 1);
+    std::vector<Eigen::Matrix<double, Eigen::Dynamic, 3> > grads(4);
+    #pragma omp parallel for num_threads(4)
+    for (int ii = 0; ii < 4; ++ii) {
+        grads[ii] = std::get<1>(ast.polyhedron_potential_batch(many));
+    }
+    for (int ii = 0; ii < 4; ++ii) {
+        EXPECT_TRUE(grads[ii] == grads[0]);
+    }
+    EXPECT_TRUE(grads[0].topRows(2).isApprox(std::get<1>(exact.polyhedron_potential_batch(states)), 1e-9));
+}
+
+TEST(TestMeshParam, CastaliaMovedVertices) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    MeshParam param(mesh_data);
+    
+    // neighboring radial moves, as done by ReconstructMesh::update
+    for (std::size_t ii : {0, 1, 2, 100, 2000}) {
+        Vertex_index vd(ii);
+        mesh_data->move_vertex(vd, 1.05 * mesh_data->get_vertex(vd).transpose());
+    }
+    mesh_data->update_dirty_properties();
+    
+    std::vector<int> faces = param.update_moved_vertices();
+    ASSERT_FALSE(faces.empty());
+    ASSERT_LT(faces.size(), param.num_f / 10);
+
+    MeshParam rebuilt(mesh_data);
+    EXPECT_TRUE(param.normal_face.isApprox(rebuilt.normal_face, 1e-14));
+    EXPECT_TRUE(param.center_face.isApprox(rebuilt.center_face, 1e-14));
+    for (std::size_t ii = 0; ii < param.num_f; ++ii) {
+        EXPECT_TRUE((param.F_face[ii] - rebuilt.F_face[ii]).isZero(1e-14));
+        EXPECT_TRUE((param.E1_edge[ii] - rebuilt.E1_edge[ii]).isZero(1e-14));
+        EXPECT_TRUE((param.E2_edge[ii] - rebuilt.E2_edge[ii]).isZero(1e-14));
+        EXPECT_TRUE((param.E3_edge[ii] - rebuilt.E3_edge[ii]).isZero(1e-14));
+    }
+    
+    // nothing moved since
+    EXPECT_TRUE(param.update_moved_vertices().empty());
+}
+
+TEST(TestAsteroid, CastaliaGravityKernelMovedVertices) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Asteroid ast("castalia", mesh_data);
+    ast.build_gravity_kernel();
+    
+    for (std::size_t ii : {0, 1, 2, 100, 2000}) {
+        Vertex_index vd(ii);
+        mesh_data->move_vertex(vd, 0.95 * mesh_data->get_vertex(vd).transpose());
+    }
+    ast.refresh();
+    
+    // same as a kernel built from scratch for the moved mesh
+    Asteroid rebuilt("castalia", mesh_data);
+    rebuilt.build_gravity_kernel();
+    Eigen::Matrix<double, 3, 3> states;
+    states << 1, 0.5, 0.2,
+              0.3, -2, 0.1,
+              1.5 * mesh_data->get_vertex(Vertex_index(0));
+    for (int ii = 0; ii < 3; ++ii) {
+        PotentialResult updated = ast.evaluate_potential(states.row(ii).transpose());
+        PotentialResult expected = rebuilt.evaluate_potential(states.row(ii).transpose());
+        EXPECT_NEAR(updated.U, expected.U, 1e-12 * std::abs(expected.U));
+        EXPECT_TRUE(updated.U_grad.isApprox(expected.U_grad, 1e-12));
+        EXPECT_TRUE(updated.U_grad_mat.isApprox(expected.U_grad_mat, 1e-12));
+    }
+}
+
+TEST(TestAsteroid, CastaliaThreadPolicy) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Asteroid ast("castalia", mesh_data);
+    ASSERT_EQ(ast.get_thread_policy(), ThreadPolicy::CALLER_MANAGED);
+
+    Eigen::Vector3d state;
+    state << 1, 2, 3;
+    
+    for (bool use_kernel : {false, true}) {
+        if (use_kernel) {
+            ast.build_gravity_kernel();
+        }
+        ast.set_thread_policy(ThreadPolicy::SERIAL);
+        PotentialResult serial = ast.evaluate_potential(state);
+
+        for (ThreadPolicy policy : {ThreadPolicy::PARALLEL_FACES, ThreadPolicy::CALLER_MANAGED}) {
+            ast.set_thread_policy(policy);
+            PotentialResult result = ast.evaluate_potential(state);
+            EXPECT_NEAR(result.U, serial.U, 1e-15);
+            EXPECT_TRUE(result.U_grad.isApprox(serial.U_grad, 1e-12));
+            EXPECT_TRUE(result.U_grad_mat.isApprox(serial.U_grad_mat, 1e-12));
+            EXPECT_EQ(result.inside, serial.inside);
+        }
+    }
+}
+
+TEST(TestAsteroid, CastaliaGravityGrid) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Asteroid ast("castalia", mesh_data);
+    Asteroid exact("castalia", mesh_data);
+    
+    const double error_bound = ast.build_gravity_grid(1.5, 0.15);
+    ASSERT_TRUE(ast.has_gravity_grid());
+    EXPECT_GT(error_bound, 0);
+    EXPECT_LT(error_bound, 1e-2);
+
+    // inside the body and outside the grid fall back to the polyhedron
+    Eigen::Vector3d origin = Eigen::Vector3d::Zero();
+    EXPECT_TRUE(ast.evaluate_potential(origin).inside);
+    Eigen::Vector3d far;
+    far << 3, 0, 0;
+    EXPECT_EQ(ast.evaluate_potential(far).U, exact.evaluate_potential(far).U);
+
+    Eigen::Vector3d state;
+    state << 1.2, 0.3, 0.1;
+    PotentialResult interp = ast.evaluate_potential(state);
+    PotentialResult truth = exact.evaluate_potential(state);
+    EXPECT_LT((interp.U_grad - truth.U_grad).norm(), 2 * error_bound * truth.U_grad.norm());
+
+    ast.save_gravity_grid("/tmp/castalia_grid.hdf5");
+    Asteroid loaded("castalia", mesh_data);
+    loaded.load_gravity_grid("/tmp/castalia_grid.hdf5");
+    EXPECT_TRUE(loaded.evaluate_potential(state).U_grad.isApprox(interp.U_grad));
+
+    ast.clear_gravity_grid();
+    ASSERT_FALSE(ast.has_gravity_grid());
+}
+
+TEST(TestAsteroid, CastaliaGravityGridIdentity) {
+    std::shared_ptr<MeshData> mesh_data = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Asteroid ast("castalia", mesh_data);
+    ast.build_gravity_grid(1.5, 0.3);
+    ast.save_gravity_grid("/tmp/castalia_grid_key.hdf5");
+
+    Asteroid denser("castalia", Loader::load("./data/shape_model/CASTALIA/castalia.obj"));
+    denser.set_sigma(2 * denser.get_sigma());
+    EXPECT_THROW(denser.load_gravity_grid("/tmp/castalia_grid_key.hdf5"), std::runtime_error);
+    EXPECT_FALSE(denser.has_gravity_grid());
+    
+    Asteroid rotated("castalia", Loader::load("./data/shape_model/CASTALIA/castalia.obj"));
+    rotated.update_rotation(1000);
+    EXPECT_THROW(rotated.load_gravity_grid("/tmp/castalia_grid_key.hdf5"), std::runtime_error);
+
+    Asteroid same("castalia", Loader::load("./data/shape_model/CASTALIA/castalia.obj"));
+    same.load_gravity_grid("/tmp/castalia_grid_key.hdf5");
+    EXPECT_TRUE(same.has_gravity_grid());
+
+    // editing the shared mesh drops the grid
+    Vertex_index vd(0);
+    mesh_data->move_vertex(vd, 1.1 * mesh_data->get_vertex(vd).transpose());
+    mesh_data->update_dirty_properties();
+    Eigen::Vector3d state;
+    state << 1.2, 0.3, 0.1;
+    Asteroid exact("castalia", mesh_data);
+    EXPECT_EQ(ast.evaluate_potential(state).U, exact.evaluate_potential(state).U);
+    ast.polyhedron_potential(state);
+    EXPECT_FALSE(ast.has_gravity_grid());
+}
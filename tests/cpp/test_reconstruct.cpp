@@ -1,9 +1,13 @@
 #include "reconstruct.hpp"
 #include "mesh.hpp"
 #include "loader.hpp"
+#include "geodesic.hpp"
 
 #include <gtest/gtest.h>
 
+#include <algorithm>
+#include <cmath>
+
 // The fixture for testing class Foo.
 class TestReconstruct: public ::testing::Test {
  protected:
@@ -134,3 +138,81 @@ TEST_F(TestReconstruct, UpdateManyVertices) {
     EXPECT_TRUE(reconstruct_mesh.get_verts().row(0).isApprox(pts.row(1)));
     
 }
+
+TEST_F(TestReconstruct, UpdateRefreshesMeshProperties) {
+    std::shared_ptr<MeshData> mesh;
+    mesh = Loader::load("./integration/cube.obj");
+    ReconstructMesh reconstruct_mesh(mesh);
+
+    Eigen::MatrixXd pts(2, 3);
+    pts << 1, 1, 1, -1, -1, -1;
+    reconstruct_mesh.update(pts, 1.0);
+    ASSERT_FALSE(mesh->has_dirty_vertices());
+    
+    MeshData rebuilt(mesh->get_verts(), mesh->get_faces());
+    for (Face_index fd : mesh->faces()) {
+        EXPECT_TRUE(mesh->get_face_normal(fd).isApprox(rebuilt.get_face_normal(fd)));
+        EXPECT_TRUE(mesh->get_face_center(fd).isApprox(rebuilt.get_face_center(fd)));
+    }
+    for (Edge_index ed : mesh->edges()) {
+        EXPECT_LT((mesh->get_edge_dyad(ed) - rebuilt.get_edge_dyad(ed)).norm(), 1e-10);
+    }
+}
+
+TEST(TestUnitSphereGrid, QueryIsSupersetOfCone) {
+    std::shared_ptr<MeshData> mesh = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    Eigen::Matrix<double, Eigen::Dynamic, 3> uvec = mesh->get_verts().rowwise().normalized();
+    UnitSphereGrid grid(uvec);
+    ASSERT_EQ(grid.size(), (std::size_t)uvec.rows());
+
+    for (double max_angle : {0.05, 0.2, 1.0}) {
+        for (int ii = 0; ii < 20; ++ii) {
+            Eigen::Vector3d pt_uvec = Eigen::Vector3d::Random().normalized();
+            std::vector<int> candidates = grid.query(pt_uvec, max_angle);
+            ASSERT_TRUE(std::is_sorted(candidates.begin(), candidates.end()));
+            for (int jj = 0; jj < uvec.rows(); ++jj) {
+                if (single_central_angle(pt_uvec, uvec.row(jj).transpose()) < max_angle) {
+                    ASSERT_TRUE(std::binary_search(candidates.begin(), candidates.end(), jj));
+                }
+            }
+        }
+    }
+}
+
+TEST_F(TestReconstruct, IndexRebuiltAfterRemesh) {
+    std::shared_ptr<MeshData> mesh = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    ReconstructMesh reconstruct_mesh(mesh);
+    Eigen::Vector3d pt(1, 0, 0);
+    reconstruct_mesh.single_update(pt.transpose(), 0.2);
+
+    // new vertices have to be found by the next indexed update
+    mesh->remesh_faces_in_view(pt, 0.3, 0.02);
+    reconstruct_mesh.update_parallel(2 * pt.transpose(), 0.05);
+    Eigen::MatrixXd verts = reconstruct_mesh.get_verts();
+    for (int ii = 0; ii < verts.rows(); ++ii) {
+        Eigen::Vector3d vert = verts.row(ii).transpose();
+        if (single_central_angle(pt, vert.normalized()) < 0.05) {
+            ASSERT_GT(vert.norm(), 1.0);
+        }
+    }
+}
+
+TEST_F(TestReconstruct, ParallelMatchesSerial) {
+    std::shared_ptr<MeshData> serial_mesh = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    std::shared_ptr<MeshData> parallel_mesh = Loader::load("./data/shape_model/CASTALIA/castalia.obj");
+    ReconstructMesh serial(serial_mesh), parallel(parallel_mesh);
+    
+    // overlapping measurements so vertices see several of them
+    Eigen::Matrix<double, Eigen::Dynamic, 3> pts 
+        = 0.6 * Eigen::Matrix<double, Eigen::Dynamic, 3>::Random(500, 3).rowwise().normalized();
+    pts(7, 0) = std::nan("");
+
+    serial.update(pts, 0.2);
+    parallel.update_parallel(pts, 0.2);
+    
+    ASSERT_TRUE(serial.get_verts() == parallel.get_verts());
+    ASSERT_TRUE(serial.get_weights() == parallel.get_weights());
+    for (Face_index fd : serial_mesh->faces()) {
+        ASSERT_TRUE(serial_mesh->get_face_normal(fd) == parallel_mesh->get_face_normal(fd));
+    }
+}
@@ -3,7 +3,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import numpy as np
 
 import dynamics.asteroid
-from point_cloud import wavefront
+from point_cloud import wavefront, polyhedron
 
 
 class TestAsteroidItokawa32():
@@ -1195,3 +1195,59 @@ class TestAsteroidMeshLoading():
         np.testing.assert_almost_equal(self.Ulaplace, 0)
 
 
+
+def loop_potential(ast, state):
+    """Potential, attraction and gradient matrix from the face and edge
+    contributions, independent of potential_batch
+    """
+    r_v = ast.V - state
+    grav = ast.asteroid_grav
+    w_face = polyhedron.laplacian_factor(r_v, grav['Fa'], grav['Fb'], grav['Fc'])
+    U_face, U_grad_face, U_grad_mat_face = polyhedron.face_contribution(
+        r_v, grav['Fa'], grav['F_face'], w_face)
+    L1, L2, L3 = polyhedron.edge_factor(r_v, grav['e1'], grav['e2'], grav['e3'],
+                                        grav['e1_vertex_map'], grav['e2_vertex_map'],
+                                        grav['e3_vertex_map'])
+    U_edge, U_grad_edge, U_grad_mat_edge = polyhedron.edge_contribution(
+        state, grav['e_vertex_map'], grav['unique_index'], ast.V,
+        grav['E1_edge'], grav['E2_edge'], grav['E3_edge'], L1, L2, L3)
+
+    G_sigma = ast.G * ast.sigma
+    U = 1 / 2 * G_sigma * (U_edge - U_face)
+    U_grad = G_sigma * (U_grad_face - U_grad_edge)
+    U_grad_mat = G_sigma * (U_grad_mat_edge - U_grad_mat_face)
+    return U, U_grad, U_grad_mat
+
+class TestAsteroidPotentialBatch():
+
+    ast = dynamics.asteroid.Asteroid('castalia', 1024, 'mat')
+    states = np.vstack((np.random.uniform(1, 2, (9, 3)), np.zeros(3)))
+
+    U, U_grad, U_grad_mat, Ulaplace = ast.polyhedron_potential_batch(states, chunk_size=3)
+    single = list(map(ast.polyhedron_potential, states))
+    # every state but the last is outside of the body
+    loop = list(map(loop_potential, [ast] * (len(states) - 1), states[:-1]))
+
+    def test_shapes(self):
+        np.testing.assert_allclose(self.U.shape, (10,))
+        np.testing.assert_allclose(self.U_grad.shape, (10, 3))
+        np.testing.assert_allclose(self.U_grad_mat.shape, (10, 3, 3))
+        np.testing.assert_allclose(self.Ulaplace.shape, (10,))
+
+    def test_potential(self):
+        np.testing.assert_allclose(self.U[:-1], [l[0] for l in self.loop])
+
+    def test_gradient(self):
+        np.testing.assert_allclose(self.U_grad[:-1], [l[1] for l in self.loop])
+
+    def test_gradient_matrix(self):
+        np.testing.assert_allclose(self.U_grad_mat[:-1], [l[2] for l in self.loop])
+
+    def test_single_matches_batch(self):
+        np.testing.assert_allclose(self.U, [s[0] for s in self.single])
+        np.testing.assert_allclose(self.U_grad, [s[1] for s in self.single])
+        np.testing.assert_allclose(self.U_grad_mat, [s[2] for s in self.single])
+
+    def test_inside_is_zero(self):
+        np.testing.assert_equal(self.U[-1], 0)
+        np.testing.assert_allclose(self.U_grad[-1], np.zeros(3))
@@ -0,0 +1,184 @@
+"""Test the cached inertia and output buffers of the dumbbell EOMs
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import numpy as np
+
+from dynamics import asteroid, dumbbell, eoms
+from kinematics import attitude
+
+ast = asteroid.Asteroid('castalia', 32)
+
+R = attitude.rot1(0.7).dot(attitude.rot3(2.1))
+state = np.hstack((np.array([2.1, 2.3, 2.2]), np.array([0.1, 0.2, 0.3]),
+                   R.reshape(9), np.array([0.3, -0.1, 0.2])))
+t = 35.0
+
+def inertial_reference(dum, t, state, ast):
+    """Inertial EOMs inverting J every call like the original implementation
+    """
+    pos, vel, R, ang_vel = state[0:3], state[3:6], state[6:15].reshape((3, 3)), state[15:18]
+    Ra = attitude.rot3(ast.omega*t, 'c')
+    U1_grad = ast.polyhedron_potential(Ra.T.dot(pos + R.dot(dum.zeta1)))[1]
+    U2_grad = ast.polyhedron_potential(Ra.T.dot(pos + R.dot(dum.zeta2)))[1]
+    M = (dum.m1 * attitude.hat_map(dum.zeta1).dot(R.T.dot(Ra).dot(U1_grad))
+         + dum.m2 * attitude.hat_map(dum.zeta2).dot(R.T.dot(Ra).dot(U2_grad)))
+    vel_dot = Ra.dot(dum.m1*U1_grad + dum.m2*U2_grad) / (dum.m1 + dum.m2)
+    ang_vel_dot = np.linalg.inv(dum.J).dot(M - np.cross(ang_vel, dum.J.dot(ang_vel)))
+    return np.hstack((vel, vel_dot, R.dot(attitude.hat_map(ang_vel)).reshape(9), ang_vel_dot))
+
+def relative_reference(dum, t, state, ast):
+    """Relative EOMs inverting Jr = R J R^T every call
+    """
+    pos, vel, R, w = state[0:3], state[3:6], state[6:15].reshape((3, 3)), state[15:18]
+    Jr = R.dot(dum.J).dot(R.T)
+    Wa_hat = attitude.hat_map(ast.omega*np.array([0, 0, 1]))
+    U1_grad = ast.polyhedron_potential(pos + R.dot(dum.zeta1))[1]
+    U2_grad = ast.polyhedron_potential(pos + R.dot(dum.zeta2))[1]
+    M = (dum.m1*attitude.hat_map(R.dot(dum.zeta1)).dot(U1_grad)
+         + dum.m2*attitude.hat_map(R.dot(dum.zeta2)).dot(U2_grad))
+    pos_dot = vel - Wa_hat.dot(pos)
+    vel_dot = (dum.m1*U1_grad + dum.m2*U2_grad) / (dum.m1 + dum.m2) - Wa_hat.dot(vel)
+    R_dot = attitude.hat_map(w).dot(R) - Wa_hat.dot(R)
+    w_dot = np.linalg.inv(Jr).dot(M - Jr.dot(Wa_hat).dot(w))
+    return np.hstack((pos_dot, vel_dot, R_dot.reshape(9), w_dot))
+
+class HeldCommand(object):
+    def get_Rd(self):
+        return attitude.rot2(0.1)
+
+    def get_Rd_dot(self):
+        return np.zeros((3, 3))
+
+    def get_ang_vel_d(self):
+        return np.array([0, 0, 1e-3])
+
+    def get_ang_vel_d_dot(self):
+        return np.zeros(3)
+
+    def get_posd(self):
+        return np.array([2, 2, 2])
+
+    def get_veld(self):
+        return np.zeros(3)
+
+    def get_acceld(self):
+        return np.zeros(3)
+
+class TestDumbbellCache():
+    dum = dumbbell.Dumbbell(m1=100, m2=120, l=0.004)
+
+    def test_inverse_inertia(self):
+        np.testing.assert_allclose(self.dum.Jinv.dot(self.dum.J), np.eye(3), atol=1e-12)
+
+    def test_zeta_hat(self):
+        v = np.array([0.3, -1.2, 0.7])
+        np.testing.assert_allclose(self.dum.zeta1_hat.dot(v), np.cross(self.dum.zeta1, v))
+        np.testing.assert_allclose(self.dum.zeta2_hat.dot(v), np.cross(self.dum.zeta2, v))
+
+    def test_cross(self):
+        a, b = np.array([0.1, 2, -3]), np.array([4, -0.5, 6])
+        np.testing.assert_allclose(dumbbell.cross(a, b), np.cross(a, b))
+
+class TestDumbbellRHS():
+    dum = dumbbell.Dumbbell(m1=100, m2=120, l=0.004)
+
+    def test_inertial_matches_reference(self):
+        np.testing.assert_allclose(self.dum.eoms_inertial_ode(t, state, ast),
+                                   inertial_reference(self.dum, t, state, ast),
+                                   rtol=1e-9, atol=1e-15)
+
+    def test_relative_matches_reference(self):
+        np.testing.assert_allclose(self.dum.eoms_relative_ode(t, state, ast),
+                                   relative_reference(self.dum, t, state, ast),
+                                   rtol=1e-9, atol=1e-15)
+
+    def test_odeint_order(self):
+        np.testing.assert_array_equal(self.dum.eoms_inertial(state, t, ast),
+                                      self.dum.eoms_inertial_ode(t, state, ast))
+        np.testing.assert_array_equal(self.dum.eoms_relative(state, t, ast),
+                                      self.dum.eoms_relative_ode(t, state, ast))
+        np.testing.assert_array_equal(self.dum.eoms_hamilton_relative(state, t, ast),
+                                      self.dum.eoms_hamilton_relative_ode(t, state, ast))
+
+    def test_out_buffer_is_filled_and_returned(self):
+        for eom in (self.dum.eoms_inertial_ode, self.dum.eoms_relative_ode,
+                    self.dum.eoms_hamilton_relative_ode, self.dum.eoms_inertial_control_ode):
+            out = np.full(18, np.nan)
+            statedot = eom(t, state, ast, out=out)
+            assert statedot is out
+            np.testing.assert_array_equal(out, eom(t, state, ast))
+
+    def test_strided_out_buffer(self):
+        # a column of a 2D buffer is not contiguous so reshape would copy
+        for eom in (self.dum.eoms_inertial_ode, self.dum.eoms_relative_ode,
+                    self.dum.eoms_hamilton_relative_ode, self.dum.eoms_inertial_control_ode):
+            buf = np.full((18, 2), np.nan)
+            eom(t, state, ast, out=buf[:, 0])
+            np.testing.assert_array_equal(buf[:, 0], eom(t, state, ast))
+            assert np.all(np.isnan(buf[:, 1]))
+
+    def test_hamilton_matches_relative(self):
+        # angular momentum Jr w gives the same attitude kinematics
+        Rm = state[6:15].reshape((3, 3))
+        Jr = Rm.dot(self.dum.J).dot(Rm.T)
+        ham_state = state.copy()
+        ham_state[3:6] = (self.dum.m1 + self.dum.m2) * state[3:6]
+        ham_state[15:18] = Jr.dot(state[15:18])
+        rel = self.dum.eoms_relative_ode(t, state, ast)
+        ham = self.dum.eoms_hamilton_relative_ode(t, ham_state, ast)
+        np.testing.assert_allclose(ham[0:3], rel[0:3])
+        np.testing.assert_allclose(ham[6:15], rel[6:15], rtol=1e-9, atol=1e-15)
+
+class PythonAsteroid(object):
+    """The Python polyhedron model with the getters of the C++ Asteroid
+    """
+    def __init__(self, ast):
+        self.ast = ast
+
+    def polyhedron_potential(self, z):
+        self.result = self.ast.polyhedron_potential(z)
+
+    def get_potential(self):
+        return self.result[0]
+
+    def get_acceleration(self):
+        return self.result[1]
+
+    def rot_ast2int(self, t):
+        return attitude.rot3(self.ast.omega*t, 'c')
+
+class TestHeldRHS():
+    dum = dumbbell.Dumbbell()
+    cpp_ast = PythonAsteroid(ast)
+    guidance = HeldCommand()
+
+    def test_held_out_buffer(self):
+        out = np.full(18, np.nan)
+        statedot = eoms.eoms_controlled_inertial_held(t, state, self.cpp_ast, self.dum,
+                                                      self.guidance, out=out)
+        assert statedot is out
+        np.testing.assert_array_equal(
+            out, eoms.eoms_controlled_inertial_held(t, state, self.cpp_ast, self.dum,
+                                                    self.guidance))
+
+    def test_control_cost_held_out_buffer(self):
+        out = np.full(18, np.nan)
+        statedot = eoms.eoms_controlled_inertial_control_cost_held(
+            t, state, self.cpp_ast, self.dum, self.guidance, self.cpp_ast, out=out)
+        assert statedot is out
+        np.testing.assert_array_equal(
+            out, eoms.eoms_controlled_inertial_control_cost_held(
+                t, state, self.cpp_ast, self.dum, self.guidance, self.cpp_ast))
+
+    def test_held_strided_out_buffer(self):
+        buf = np.full((18, 2), np.nan)
+        eoms.eoms_controlled_inertial_held(t, state, self.cpp_ast, self.dum, self.guidance,
+                                           out=buf[:, 0])
+        np.testing.assert_array_equal(
+            buf[:, 0], eoms.eoms_controlled_inertial_held(t, state, self.cpp_ast, self.dum,
+                                                          self.guidance))
+        eoms.eoms_controlled_inertial_control_cost_held(
+            t, state, self.cpp_ast, self.dum, self.guidance, self.cpp_ast, out=buf[:, 1])
+        np.testing.assert_array_equal(
+            buf[:, 1], eoms.eoms_controlled_inertial_control_cost_held(
+                t, state, self.cpp_ast, self.dum, self.guidance, self.cpp_ast))
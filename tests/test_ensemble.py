@@ -0,0 +1,106 @@
+"""Test the batched dumbbell propagation
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import os
+import tempfile
+
+import h5py
+import numpy as np
+import pytest
+from scipy import integrate
+
+from dynamics import asteroid, dumbbell, ensemble
+from kinematics import attitude
+
+ast = asteroid.Asteroid('castalia', 32)
+dum = dumbbell.Dumbbell(m1=500, m2=500, l=0.003)
+
+rng = np.random.RandomState(5)
+num = 5
+periodic_pos = np.array([1.495746722510590, 0.000001002669660, 0.006129720493607])
+periodic_vel = np.array([0.000000302161724, -0.000899607989820, -0.000000013286327])
+
+states = np.zeros((num, 18))
+for k in range(num):
+    R = attitude.rot1(rng.rand()).dot(attitude.rot3(rng.rand()))
+    states[k, 0:3] = periodic_pos + 1e-3 * rng.randn(3)
+    states[k, 3:6] = periodic_vel + np.cross([0, 0, ast.omega], periodic_pos) + 1e-6 * rng.randn(3)
+    states[k, 6:15] = R.reshape(9)
+    states[k, 15:18] = 1e-2 * rng.rand(3)
+
+def hamilton_state(state):
+    R = state[6:15].reshape((3, 3))
+    return np.hstack((state[0:3], (dum.m1 + dum.m2) * state[3:6], state[6:15],
+                      R.dot(dum.J).dot(state[15:18])))
+
+ham_states = np.array([hamilton_state(s) for s in states])
+time = np.linspace(0, 500, 11)
+
+def test_hat_map_batch():
+    vec = rng.randn(4, 3)
+    hat = ensemble.hat_map_batch(vec)
+    for v, h in zip(vec, hat):
+        np.testing.assert_allclose(h, attitude.hat_map(v))
+
+class TestBatchEOMs():
+    t = 17.0
+
+    def test_inertial_matches_single(self):
+        np.testing.assert_allclose(ensemble.eoms_inertial_batch(self.t, states, dum, ast),
+                                   [dum.eoms_inertial_ode(self.t, s, ast) for s in states],
+                                   rtol=1e-9, atol=1e-20)
+
+    def test_hamilton_relative_matches_single(self):
+        np.testing.assert_allclose(
+            ensemble.eoms_hamilton_relative_batch(self.t, ham_states, dum, ast),
+            [dum.eoms_hamilton_relative_ode(self.t, s, ast) for s in ham_states],
+            rtol=1e-9, atol=1e-20)
+
+    def test_single_state(self):
+        np.testing.assert_allclose(ensemble.eoms_inertial_batch(self.t, states[0], dum, ast)[0],
+                                   dum.eoms_inertial_ode(self.t, states[0], ast))
+
+class TestPropagateBatch():
+    batch = ensemble.propagate_batch(states, time, ast, dum)
+
+    def test_shape(self):
+        np.testing.assert_equal(self.batch.shape, (num, len(time), 18))
+
+    def test_matches_odeint(self):
+        for k in (0, num - 1):
+            single = integrate.odeint(dum.eoms_inertial, states[k], time, args=(ast,),
+                                      atol=1e-9, rtol=1e-9)
+            np.testing.assert_allclose(self.batch[k], single, rtol=0, atol=1e-6)
+
+    def test_initial_state(self):
+        np.testing.assert_array_equal(self.batch[:, 0, :], states)
+
+class TestPropagateEnsemble():
+
+    def test_file_matches_batch(self):
+        filename = os.path.join(tempfile.mkdtemp(), 'ensemble.hdf5')
+        ensemble.propagate_ensemble(filename, ham_states, time, ast, dum,
+                                    eoms='hamilton_relative', batch_size=2)
+        with h5py.File(filename, 'r') as hf:
+            np.testing.assert_array_equal(hf['time'][()], time)
+            np.testing.assert_array_equal(hf['initial_state'][()], ham_states)
+            np.testing.assert_equal(hf['state'].chunks, (1, len(time), 18))
+            assert hf['state'].attrs['eoms'] == 'hamilton_relative'
+            np.testing.assert_allclose(
+                hf['state'][2:4],
+                ensemble.propagate_batch(ham_states[2:4], time, ast, dum,
+                                         eoms='hamilton_relative'))
+
+    def test_processes_match(self):
+        directory = tempfile.mkdtemp()
+        serial = os.path.join(directory, 'serial.hdf5')
+        pool = os.path.join(directory, 'pool.hdf5')
+        ensemble.propagate_ensemble(serial, states, time, ast, dum, batch_size=2)
+        ensemble.propagate_ensemble(pool, states, time, ast, dum, batch_size=2, processes=2)
+        with h5py.File(serial, 'r') as a, h5py.File(pool, 'r') as b:
+            np.testing.assert_array_equal(a['state'][()], b['state'][()])
+
+    def test_unknown_eoms(self):
+        with pytest.raises(ValueError):
+            ensemble.propagate_ensemble(os.path.join(tempfile.mkdtemp(), 'bad.hdf5'),
+                                        states, time, ast, dum, eoms='relative')
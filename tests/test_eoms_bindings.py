@@ -0,0 +1,104 @@
+"""Compare the compiled equations of motion to the Python ones
+
+Notes
+-----
+These tests need the C++ bindings to be built first. exploration_sim only
+integrates lib.eoms with --native_eoms, and the Python right hand side
+stays the default until these pass
+
+Author
+------
+Shankar Kulumani		GWU		skulumani@gwu.edu
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import numpy as np
+import pytest
+
+from point_cloud import wavefront
+from dynamics import dumbbell, eoms
+from kinematics import attitude
+
+mesh_data = pytest.importorskip('lib.mesh_data')
+asteroid = pytest.importorskip('lib.asteroid')
+eoms_cpp = pytest.importorskip('lib.eoms')
+
+class HeldCommands(object):
+    """Fixed commands read by the Python _held equations of motion
+    """
+    Rd = attitude.rot3(0.3).dot(attitude.rot1(0.2))
+    Rd_dot = attitude.hat_map(np.array([0.01, -0.02, 0.03])).dot(Rd)
+    ang_vel_d = np.array([0.01, -0.02, 0.03])
+    ang_vel_d_dot = np.array([1e-4, 2e-4, -1e-4])
+    posd = np.array([1.2, 0.4, -0.1])
+    veld = np.array([1e-3, -2e-3, 5e-4])
+    acceld = np.array([1e-6, 0, -1e-6])
+
+    def get_Rd(self):
+        return self.Rd
+
+    def get_Rd_dot(self):
+        return self.Rd_dot
+
+    def get_ang_vel_d(self):
+        return self.ang_vel_d
+
+    def get_ang_vel_d_dot(self):
+        return self.ang_vel_d_dot
+
+    def get_posd(self):
+        return self.posd
+
+    def get_veld(self):
+        return self.veld
+
+    def get_acceld(self):
+        return self.acceld
+
+    def commands(self):
+        return (self.Rd, self.Rd_dot, self.ang_vel_d, self.ang_vel_d_dot,
+                self.posd, self.veld, self.acceld)
+
+class TestControlledDumbbell():
+    v, f = wavefront.read_obj('./data/shape_model/CASTALIA/castalia.obj')
+    true_ast = asteroid.Asteroid('castalia', mesh_data.MeshData(v, f))
+    # the tracking controllers see a slightly larger shape
+    est_ast = asteroid.Asteroid('castalia', mesh_data.MeshData(1.02 * v, f))
+    dum = dumbbell.Dumbbell(m1=500, m2=500, l=0.003)
+    guidance = HeldCommands()
+
+    t = 12.5
+    state = np.hstack((np.array([1.5, 0.2, -0.3]), np.array([1e-3, -2e-3, 3e-4]),
+                       attitude.rot2(0.1).dot(attitude.rot3(np.pi / 2)).reshape(-1),
+                       np.array([1e-3, 2e-3, -1e-3])))
+
+    def native(self, est_ast=None):
+        rhs = eoms_cpp.ControlledDumbbell(self.true_ast,
+                                          eoms_cpp.Dumbbell(self.dum.m1, self.dum.m2, self.dum.l),
+                                          est_ast)
+        rhs.set_command(*self.guidance.commands())
+        return rhs
+
+    def test_dumbbell(self):
+        dum_cpp = eoms_cpp.Dumbbell(self.dum.m1, self.dum.m2, self.dum.l)
+        np.testing.assert_allclose(dum_cpp.J, self.dum.J)
+        np.testing.assert_allclose(dum_cpp.zeta1, self.dum.zeta1)
+        np.testing.assert_allclose(dum_cpp.zeta2, self.dum.zeta2)
+
+    def test_held(self):
+        expected = eoms.eoms_controlled_inertial_held(self.t, self.state, self.true_ast,
+                                                      self.dum, self.guidance)
+        actual = self.native()(self.t, self.state)
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-15)
+
+    def test_control_cost_held(self):
+        expected = eoms.eoms_controlled_inertial_control_cost_held(self.t, self.state,
+                                                                   self.true_ast, self.dum,
+                                                                   self.guidance, self.est_ast)
+        actual = self.native(self.est_ast)(self.t, self.state)
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-15)
+
+    def test_estimate_changes_control(self):
+        # otherwise the comparison above could not tell the two apart
+        held = self.native()(self.t, self.state)
+        control_cost = self.native(self.est_ast)(self.t, self.state)
+        assert not np.allclose(held, control_cost, rtol=1e-9, atol=1e-15)
@@ -0,0 +1,104 @@
+"""Test the interpolated gravity grid
+"""
+import os
+import tempfile
+
+import numpy as np
+from dynamics import asteroid, gravity_grid
+
+class TestCastaliaGravityGrid():
+    ast = asteroid.Asteroid('castalia', 32, 'mat')
+    grid = gravity_grid.build_grid(ast.potential_param, ast.G, ast.sigma,
+                                   extent=1.2, spacing=0.1, processes=1)
+
+    def test_catmull_rom_partition_of_unity(self):
+        t = np.random.rand(10)
+        np.testing.assert_allclose(np.sum(gravity_grid._catmull_rom(t), axis=-1), 1)
+
+    def test_interpolates_nodes(self):
+        state = self.grid.origin + self.grid.spacing * np.array([[2, 3, 20]])
+        assert gravity_grid.contains(state, self.grid)[0]
+        U, U_grad, _, _ = gravity_grid.potential_batch(state, self.grid)
+        np.testing.assert_allclose(U[0], self.grid.values[2, 3, 20, 0])
+        np.testing.assert_allclose(U_grad[0], self.grid.values[2, 3, 20, 1:4])
+
+    def test_contains(self):
+        states = np.array([[0, 0, 0], [1.05, 0, 0], [5, 0, 0], [0.05, 0.05, 0.05]])
+        np.testing.assert_array_equal(gravity_grid.contains(states, self.grid),
+                                      [False, True, False, False])
+
+    def test_error_bound(self):
+        assert 0 < self.grid.error_bound < 1e-2
+
+    def test_error_bound_seeded(self):
+        grids = [gravity_grid.build_grid(self.ast.potential_param, self.ast.G, self.ast.sigma,
+                                         extent=1.2, spacing=0.2, processes=1, num_check=20,
+                                         seed=seed)
+                 for seed in (3, 3, np.random.RandomState(3))]
+        assert grids[0].error_bound == grids[1].error_bound == grids[2].error_bound
+
+    def test_stencil_valid(self):
+        node_valid = np.random.rand(9, 8, 7) > 0.1
+        node_valid[2:6, 1:5, 3:7] = True
+        cell_valid = gravity_grid._stencil_valid(node_valid)
+        assert cell_valid.shape == (6, 5, 4)
+        assert cell_valid[2, 1, 3]
+        for index in np.ndindex(*cell_valid.shape):
+            stencil = node_valid[index[0]:index[0] + 4, index[1]:index[1] + 4,
+                                 index[2]:index[2] + 4]
+            assert cell_valid[index] == np.all(stencil)
+
+    def test_matches_polyhedron(self):
+        states = np.random.uniform(-1.1, 1.1, size=(200, 3))
+        states = states[gravity_grid.contains(states, self.grid)]
+        U, U_grad, U_grad_mat, _ = gravity_grid.potential_batch(states, self.grid)
+        U_true, U_grad_true, _, _ = self.ast.polyhedron_potential_batch(states)
+
+        np.testing.assert_allclose(U, U_true, rtol=1e-2)
+        err = np.linalg.norm(U_grad - U_grad_true, axis=1) / np.linalg.norm(U_grad_true, axis=1)
+        np.testing.assert_array_less(err, 2 * self.grid.error_bound)
+        np.testing.assert_allclose(U_grad_mat, np.transpose(U_grad_mat, (0, 2, 1)))
+
+    def test_save_load(self):
+        filename = os.path.join(tempfile.mkdtemp(), 'grid.npz')
+        gravity_grid.save_grid(filename, self.grid)
+        grid = gravity_grid.load_grid(filename)
+        np.testing.assert_array_equal(grid.values, self.grid.values)
+        np.testing.assert_array_equal(grid.cell_valid, self.grid.cell_valid)
+        assert grid.key == self.grid.key
+
+class TestAsteroidGravityGrid():
+    filename = os.path.join(tempfile.mkdtemp(), 'castalia_grid.npz')
+    ast = asteroid.Asteroid('castalia', 32, 'mat')
+    exact = asteroid.Asteroid('castalia', 32, 'mat')
+    err = ast.enable_grid(1.2, 0.1, filename=filename, processes=1)
+    states = np.array([[0.05, 0, 0], [0.9, 0.3, 0.1], [3, 0, 0]])
+
+    def test_cache_file_written(self):
+        assert os.path.isfile(self.filename)
+
+    def test_cache_reused(self):
+        ast = asteroid.Asteroid('castalia', 32, 'mat')
+        ast.enable_grid(1.2, 0.1, filename=self.filename, processes=1)
+        np.testing.assert_array_equal(ast.gravity_grid.values, self.ast.gravity_grid.values)
+
+    def test_cache_rejected_for_other_shape(self):
+        ast = asteroid.Asteroid('castalia', 64, 'mat')
+        key = ast.potential_param
+        grid = gravity_grid.load_grid(self.filename)
+        assert grid.key != gravity_grid.grid_key(key, ast.G, ast.sigma, 1.2, 0.1)
+
+    def test_mask(self):
+        np.testing.assert_array_equal(self.ast.use_grid(self.states), [False, True, False])
+
+    def test_fallback_matches_polyhedron(self):
+        for state in self.states[[0, 2]]:
+            np.testing.assert_array_equal(self.ast.polyhedron_potential(state)[1],
+                                          self.exact.polyhedron_potential(state)[1])
+
+    def test_batch_matches_single(self):
+        U, U_grad, _, _ = self.ast.polyhedron_potential_batch(self.states)
+        for ii, state in enumerate(self.states):
+            single = self.ast.polyhedron_potential(state)
+            np.testing.assert_allclose(U[ii], single[0])
+            np.testing.assert_allclose(U_grad[ii], single[1])
@@ -0,0 +1,81 @@
+"""Test the zero order hold of the exploration commands
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import numpy as np
+
+from dynamics import controller
+from kinematics import attitude
+
+class PlanRecorder(object):
+    """Stands in for the C++ Controller and records each plan
+    """
+    def __init__(self):
+        self.calls = []
+        self.posd = np.zeros(3)
+
+    def explore_asteroid(self, *args):
+        self.calls.append(args)
+        self.posd = self.posd + 1
+
+    def get_Rd(self):
+        return np.eye(3)
+
+    def get_Rd_dot(self):
+        return np.zeros((3, 3))
+
+    def get_ang_vel_d(self):
+        return np.zeros(3)
+
+    def get_ang_vel_d_dot(self):
+        return np.zeros(3)
+
+    def get_posd(self):
+        return self.posd
+
+    def get_veld(self):
+        return np.zeros(3)
+
+    def get_acceld(self):
+        return np.zeros(3)
+
+class Rotating(object):
+    def rot_ast2int(self, t):
+        return attitude.rot3(0.1 * t)
+
+class TestExploreGuidance():
+    state = np.hstack((np.array([3, 0, 0]), np.zeros(3), np.eye(3).reshape(-1), np.zeros(3)))
+
+    def test_held_between_periods(self):
+        planner = PlanRecorder()
+        guidance = controller.ExploreGuidance(planner, None, Rotating(), period=2.0)
+        updates = [guidance.step(t, self.state) for t in np.arange(0, 10, 0.5)]
+        assert guidance.num_updates == 5 == len(planner.calls)
+        assert sum(updates) == 5
+        np.testing.assert_array_equal(guidance.get_posd(), 5 * np.ones(3))
+
+    def test_snapshot(self):
+        planner = PlanRecorder()
+        guidance = controller.ExploreGuidance(planner, None, Rotating())
+        guidance.update(0, self.state)
+        planner.posd = np.full(3, 10.0)
+        np.testing.assert_array_equal(guidance.get_posd(), np.ones(3))
+        np.testing.assert_array_equal(guidance.commands()[4], np.ones(3))
+
+    def test_asteroid_frame_state(self):
+        planner = PlanRecorder()
+        ast = Rotating()
+        guidance = controller.ExploreGuidance(planner, 'rmesh', ast)
+        guidance.update(5, self.state)
+        state_ast, rmesh = planner.calls[0]
+        Ra = ast.rot_ast2int(5)
+        np.testing.assert_allclose(state_ast[0:3], Ra.T.dot(self.state[0:3]))
+        np.testing.assert_allclose(state_ast[6:15], Ra.T.reshape(-1))
+        assert rmesh == 'rmesh'
+
+    def test_control_cost_plan(self):
+        planner = PlanRecorder()
+        guidance = controller.ExploreGuidance(planner, 'rmesh', Rotating(), est_ast='est')
+        guidance.update(5, self.state)
+        t, state, rmesh, est_ast = planner.calls[0]
+        assert t == 5 and est_ast == 'est'
+        np.testing.assert_array_equal(state, self.state)
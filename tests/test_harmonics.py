@@ -0,0 +1,94 @@
+"""Test the spherical harmonic far field gravity model
+"""
+import numpy as np
+from dynamics import asteroid, harmonics
+
+class TestSolidHarmonics():
+    states = np.random.uniform(-3, 3, size=(20, 3))
+    R = 0.9
+    degree = 10
+    E = harmonics.solid_harmonics(states, R, degree)
+
+    def test_shape(self):
+        np.testing.assert_equal(self.E.shape, (20, self.degree + 1, self.degree + 1))
+
+    def test_point_matches_batch(self):
+        E_point = np.concatenate([harmonics.solid_harmonics(s, self.R, self.degree)
+                                  for s in self.states])
+        np.testing.assert_allclose(E_point, self.E, rtol=1e-10)
+
+    def test_zonal_degree_one(self):
+        r = np.linalg.norm(self.states, axis=1)
+        np.testing.assert_allclose(self.E[:, 1, 0],
+                                   self.R**2 * self.states[:, 2] / r**3)
+
+    def test_sectorial_degree_one(self):
+        r = np.linalg.norm(self.states, axis=1)
+        np.testing.assert_allclose(self.E[:, 1, 1],
+                                   self.R**2 * (self.states[:, 0] + 1j * self.states[:, 1]) / r**3)
+
+class TestCastaliaHarmonics():
+    ast = asteroid.Asteroid('castalia', 1024, 'mat')
+    brillouin_radius = np.max(np.linalg.norm(ast.V, axis=1))
+    hparam = harmonics.fit_coefficients(ast.potential_param, ast.G, ast.sigma,
+                                        degree=12, fit_radius=2 * brillouin_radius)
+    states = 2.5 * hparam.brillouin_radius * harmonics.fibonacci_sphere(50)
+    U, U_grad, U_grad_mat, Ulaplace = harmonics.potential_batch(states, hparam)
+    U_true, U_grad_true, U_grad_mat_true, _ = ast.polyhedron_potential_batch(states)
+
+    def test_potential(self):
+        np.testing.assert_allclose(self.U, self.U_true, rtol=1e-6)
+
+    def test_attraction(self):
+        err = np.linalg.norm(self.U_grad - self.U_grad_true, axis=1)
+        np.testing.assert_array_less(err, 1e-5 * np.linalg.norm(self.U_grad_true, axis=1))
+
+    def test_gradient_matrix(self):
+        np.testing.assert_allclose(self.U_grad_mat, self.U_grad_mat_true,
+                                   atol=1e-4 * np.max(np.abs(self.U_grad_mat_true)))
+
+    def test_laplace_zero(self):
+        np.testing.assert_allclose(self.Ulaplace, 0, atol=1e-10 * np.max(np.abs(self.U_grad_mat)))
+
+    def test_gradient_mat_symmetric(self):
+        np.testing.assert_allclose(self.U_grad_mat, np.transpose(self.U_grad_mat, (0, 2, 1)))
+
+    def test_attraction_finite_difference(self):
+        h = 1e-6
+        state = self.states[0]
+        fd = np.array([(harmonics.potential_batch(state + h * e, self.hparam)[0][0]
+                        - harmonics.potential_batch(state - h * e, self.hparam)[0][0]) / (2 * h)
+                       for e in np.eye(3)])
+        np.testing.assert_allclose(fd, self.U_grad[0], rtol=1e-6)
+
+class TestAsteroidHarmonics():
+    ast = asteroid.Asteroid('castalia', 1024, 'mat')
+    exact = asteroid.Asteroid('castalia', 1024, 'mat')
+    err = ast.enable_harmonics(degree=8, radius_factor=2)
+    near = np.array([0.5, 0.6, 0.1]) * ast.harmonic_radius
+    far = np.array([1.1, 0.2, -0.3]) * ast.harmonic_radius
+
+    def test_error_reported(self):
+        np.testing.assert_array_less(self.err, 1e-3)
+
+    def test_mask(self):
+        np.testing.assert_array_equal(self.ast.use_harmonics(np.stack((self.near, self.far))),
+                                      [False, True])
+
+    def test_near_uses_polyhedron(self):
+        U = self.ast.polyhedron_potential(self.near)
+        U_true = self.exact.polyhedron_potential(self.near)
+        np.testing.assert_array_equal(U[1], U_true[1])
+
+    def test_far_close_to_polyhedron(self):
+        U = self.ast.polyhedron_potential(self.far)
+        U_true = self.exact.polyhedron_potential(self.far)
+        np.testing.assert_allclose(U[1], U_true[1], rtol=1e-3)
+
+    def test_batch_matches_single(self):
+        states = np.stack((self.near, self.far))
+        U, U_grad, _, _ = self.ast.polyhedron_potential_batch(states)
+        for ii, state in enumerate(states):
+            single = self.ast.polyhedron_potential(state)
+            np.testing.assert_allclose(U[ii], single[0])
+            np.testing.assert_allclose(U_grad[ii], single[1])
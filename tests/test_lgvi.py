@@ -0,0 +1,143 @@
+"""Test the Lie group variational integrator
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import numpy as np
+import pytest
+from scipy import integrate
+
+from dynamics import asteroid, dumbbell, eoms, lgvi
+from kinematics import attitude
+
+ast = asteroid.Asteroid('castalia', 32)
+dum = dumbbell.Dumbbell(m1=500, m2=500, l=0.003)
+
+periodic_pos = np.array([1.495746722510590, 0.000001002669660, 0.006129720493607])
+periodic_vel = np.array([0.000000302161724, -0.000899607989820, -0.000000013286327])
+
+R = attitude.rot1(0.4).dot(attitude.rot3(1.1))
+initial_state = np.hstack((periodic_pos, periodic_vel + np.cross([0, 0, ast.omega], periodic_pos),
+                           R.reshape(9), np.array([0.01, 0.02, 0.015])))
+
+def orthogonality_error(states):
+    return max(np.max(np.abs(Rk.reshape((3, 3)).T.dot(Rk.reshape((3, 3))) - np.eye(3)))
+               for Rk in states[:, 6:15])
+
+class TestCayley():
+    J = dum.J
+    g = np.array([2e-3, -1e-3, 3e-3]) * np.trace(dum.J)
+    F = lgvi.cayley_solve(g, dum.J)
+
+    def test_orthogonal(self):
+        np.testing.assert_allclose(self.F.T.dot(self.F), np.eye(3), atol=1e-14)
+        np.testing.assert_allclose(np.linalg.det(self.F), 1)
+
+    def test_discrete_equation(self):
+        Jd = np.trace(self.J) / 2 * np.eye(3) - self.J
+        np.testing.assert_allclose(self.F.dot(Jd) - Jd.dot(self.F.T), attitude.hat_map(self.g),
+                                   rtol=0, atol=1e-12 * np.max(np.abs(self.g)))
+
+    def test_zero_momentum(self):
+        np.testing.assert_allclose(lgvi.cayley_solve(np.zeros(3), self.J), np.eye(3))
+
+class TestIntegrateInertial():
+    time = np.linspace(0, 1000, 11)
+    reference = integrate.odeint(dum.eoms_inertial, initial_state, time, args=(ast,),
+                                 atol=1e-12, rtol=1e-12)
+
+    def test_second_order(self):
+        coarse = lgvi.integrate_inertial(initial_state, self.time, ast, dum, step=10)
+        fine = lgvi.integrate_inertial(initial_state, self.time, ast, dum, step=5)
+        coarse_error = np.max(np.abs(coarse[:, 0:3] - self.reference[:, 0:3]))
+        fine_error = np.max(np.abs(fine[:, 0:3] - self.reference[:, 0:3]))
+        np.testing.assert_allclose(coarse_error / fine_error, 4, rtol=0.2)
+
+    def test_initial_state(self):
+        states = lgvi.integrate_inertial(initial_state, self.time, ast, dum, step=20)
+        np.testing.assert_array_equal(states[0], initial_state)
+
+    def test_step_splits_interval(self):
+        # 100 sec intervals in steps of 40 are three steps of 100/3
+        split = lgvi.integrate_inertial(initial_state, self.time[:2], ast, dum, step=40)
+        state = initial_state
+        loads = None
+        for ii in range(3):
+            state, loads = lgvi.inertial_step(ii * 100 / 3, state, 100 / 3, dum, ast, loads)
+        np.testing.assert_allclose(split[-1], state)
+
+    def test_bad_step(self):
+        with pytest.raises(ValueError):
+            lgvi.integrate_inertial(initial_state, self.time, ast, dum, step=0)
+
+    def test_bad_time(self):
+        with pytest.raises(ValueError):
+            lgvi.integrate_inertial(initial_state, self.time[::-1], ast, dum)
+
+class TestConservation():
+    # energy is only conserved in the inertial frame about a fixed asteroid
+    fixed_ast = asteroid.Asteroid('castalia', 32)
+    fixed_ast.omega = 0
+    time = np.linspace(0, 2e4, 101)
+    states = lgvi.integrate_inertial(initial_state, time, fixed_ast, dum, step=20)
+
+    def test_orthogonal(self):
+        assert orthogonality_error(self.states) < 1e-13
+
+    def test_energy_bounded(self):
+        KE, PE = dum.inertial_energy(self.time, self.states, self.fixed_ast)
+        E = KE + PE
+        error = np.abs(E - E[0]) / np.abs(E[0])
+        assert np.max(error) < 1e-5
+        # no drift from the first half to the second
+        half = len(error) // 2
+        assert np.max(error[half:]) < 2 * np.max(error[:half])
+
+class TestHamiltonRelative():
+    t = 250.0
+    ham_state = lgvi.inertial_to_hamilton_relative(t, initial_state, ast, dum)
+
+    def test_round_trip(self):
+        np.testing.assert_allclose(
+            lgvi.hamilton_relative_to_inertial(self.t, self.ham_state, ast, dum), initial_state,
+            rtol=1e-12, atol=1e-15)
+
+    def test_matches_hamilton_eoms(self):
+        time = np.linspace(0, 500, 6)
+        ham_state = lgvi.inertial_to_hamilton_relative(0, initial_state, ast, dum)
+        states = lgvi.integrate_hamilton_relative(ham_state, time, ast, dum, step=5)
+        reference = integrate.odeint(dum.eoms_hamilton_relative, ham_state, time, args=(ast,),
+                                     atol=1e-12, rtol=1e-12)
+        np.testing.assert_allclose(states[:, 0:3], reference[:, 0:3], rtol=0, atol=1e-7)
+
+    def test_same_steps_as_inertial(self):
+        time = np.linspace(0, 500, 6)
+        inertial = lgvi.integrate_inertial(initial_state, time, ast, dum, step=5)
+        states = lgvi.integrate_hamilton_relative(
+            lgvi.inertial_to_hamilton_relative(0, initial_state, ast, dum), time, ast, dum, step=5)
+        for t, state, ham_state in zip(time, inertial, states):
+            np.testing.assert_allclose(lgvi.hamilton_relative_to_inertial(t, ham_state, ast, dum),
+                                       state, rtol=1e-10, atol=1e-14)
+
+class TestDriver():
+    time = np.linspace(0, 200, 5)
+
+    def test_inertial_lgvi(self):
+        _, _, _, body_state = eoms.inertial_eoms_driver(initial_state, self.time, ast, dum,
+                                                        method='lgvi', step=10)
+        np.testing.assert_array_equal(
+            body_state, lgvi.integrate_inertial(initial_state, self.time, ast, dum, step=10))
+
+    def test_hamilton_lgvi(self):
+        ham_state = lgvi.inertial_to_hamilton_relative(0, initial_state, ast, dum)
+        _, _, _, ast_state = eoms.hamilton_eoms_driver(ham_state, self.time, ast, dum,
+                                                       method='lgvi', step=10)
+        np.testing.assert_array_equal(
+            ast_state, lgvi.integrate_hamilton_relative(ham_state, self.time, ast, dum, step=10))
+
+    def test_hamilton_odeint(self):
+        ham_state = lgvi.inertial_to_hamilton_relative(0, initial_state, ast, dum)
+        _, _, _, ast_state = eoms.hamilton_eoms_driver(ham_state, self.time, ast, dum)
+        np.testing.assert_array_equal(ast_state[0], ham_state)
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            eoms.inertial_eoms_driver(initial_state, self.time, ast, dum, method='rk4')
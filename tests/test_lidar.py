@@ -35,3 +35,30 @@ def test_rotation():
     rot_arr = raycaster.Lidar().rotate_fov(R)
     np.testing.assert_array_almost_equal(rot_arr, R.dot(sensor_x.lidar_arr.T).T)
 
+
+class TestBatchTargets():
+    sensor = raycaster.Lidar(num_step=4)
+    num_steps = 5
+    state = np.zeros((num_steps, 18))
+    state[:, 0:3] = np.random.rand(num_steps, 3) + 1
+    for ii in range(num_steps):
+        state[ii, 6:15] = attitude.rot3(0.3 * ii).dot(attitude.rot1(0.1 * ii)).reshape(-1)
+
+    def test_shape(self):
+        targets = self.sensor.define_trajectory_targets(self.state)
+        np.testing.assert_equal(targets.shape, (self.num_steps, 16, 3))
+
+    def test_matches_single_pose(self):
+        targets = self.sensor.define_trajectory_targets(self.state)
+        for ii, state in enumerate(self.state):
+            np.testing.assert_allclose(targets[ii],
+                                       self.sensor.define_targets(state[0:3],
+                                                                  state[6:15].reshape((3, 3)),
+                                                                  np.linalg.norm(state[0:3])))
+
+    def test_scalar_dist(self):
+        targets = self.sensor.define_targets_batch(self.state[:, 0:3],
+                                                   self.state[:, 6:15].reshape((-1, 3, 3)), 2)
+        np.testing.assert_allclose(targets[3],
+                                   self.sensor.define_targets(self.state[3, 0:3],
+                                                              self.state[3, 6:15], 2))
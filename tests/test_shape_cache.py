@@ -0,0 +1,83 @@
+"""Test the on disk cache of the polyhedron shape parameters
+"""
+import os
+import tempfile
+
+import numpy as np
+from dynamics import asteroid, shape_cache
+
+def assert_grav_equal(a, b):
+    assert set(a.keys()) == set(b.keys())
+    for key in a:
+        if isinstance(a[key], tuple):
+            assert len(a[key]) == len(b[key])
+            for x, y in zip(a[key], b[key]):
+                np.testing.assert_array_equal(x, y)
+        elif isinstance(a[key], list):
+            assert a[key] == b[key]
+        else:
+            np.testing.assert_array_equal(a[key], b[key])
+
+class TestShapeKey():
+    V = np.random.rand(10, 3)
+    F = np.random.randint(0, 10, size=(16, 3))
+
+    def test_repeatable(self):
+        assert shape_cache.shape_key('a', self.V, self.F) == shape_cache.shape_key('a', self.V.copy(), self.F)
+
+    def test_name(self):
+        assert shape_cache.shape_key('a', self.V, self.F) != shape_cache.shape_key('b', self.V, self.F)
+
+    def test_vertices(self):
+        V = self.V.copy()
+        V[0, 0] += 1e-12
+        assert shape_cache.shape_key('a', self.V, self.F) != shape_cache.shape_key('a', V, self.F)
+
+    def test_dtype(self):
+        assert (shape_cache.shape_key('a', self.V, self.F)
+                != shape_cache.shape_key('a', self.V, self.F.astype(np.int32)))
+
+class TestSaveLoad():
+    grav = {'array': np.arange(6).reshape((2, 3)),
+            'tuple': (np.zeros(3), np.ones((2, 2))),
+            'ragged': [[0, 1], [], [4, 5, 6]],
+            'number': 7}
+    directory = os.path.join(tempfile.mkdtemp(), 'shape')
+    shape_cache.save(directory, grav)
+    loaded = shape_cache.load(directory)
+
+    def test_round_trip(self):
+        assert_grav_equal(self.grav, self.loaded)
+
+    def test_memory_mapped(self):
+        assert isinstance(self.loaded['array'], np.memmap)
+        assert not self.loaded['array'].flags.writeable
+
+    def test_second_save_keeps_first(self):
+        shape_cache.save(self.directory, {'number': 8})
+        assert shape_cache.load(self.directory)['number'] == 7
+
+class TestAsteroidCache():
+    cache_dir = tempfile.mkdtemp()
+    first = asteroid.Asteroid('castalia', 64, 'mat', cache_dir=cache_dir)
+    second = asteroid.Asteroid('castalia', 64, 'mat', cache_dir=cache_dir)
+    uncached = asteroid.Asteroid('castalia', 64, 'mat', cache_dir=None)
+
+    def test_one_entry(self):
+        assert len(os.listdir(self.cache_dir)) == 1
+
+    def test_loaded_from_disk(self):
+        assert isinstance(self.second.asteroid_grav['F_face'], np.memmap)
+
+    def test_parameters_match(self):
+        assert_grav_equal(self.second.asteroid_grav, self.uncached.asteroid_grav)
+
+    def test_potential_match(self):
+        state = np.array([1.0, 0.5, 0.2])
+        for a, b in zip(self.second.polyhedron_potential(state),
+                        self.uncached.polyhedron_potential(state)):
+            np.testing.assert_array_equal(a, b)
+
+    def test_other_shape_new_entry(self):
+        asteroid.Asteroid('castalia', 128, 'mat', cache_dir=self.cache_dir)
+        assert len(os.listdir(self.cache_dir)) == 2
@@ -0,0 +1,192 @@
+"""Test the time series layout of the simulation output
+"""
+import os
+import tempfile
+
+import h5py
+import numpy as np
+import pytest
+
+import telemetry
+
+class TestTimeSeriesWriter():
+    filename = os.path.join(tempfile.mkdtemp(), 'sim.hdf5')
+    num_steps = 25
+    state = np.random.rand(num_steps, 18)
+    verts = np.random.rand(num_steps, 10, 3)
+    time = 100.0 + np.arange(num_steps)
+
+    with h5py.File(filename, 'w') as hf:
+        hf.create_dataset('time', data=time)
+        sim = hf.create_group('refinement')
+        with telemetry.TimeSeriesWriter(sim, buffer_steps=7) as writer:
+            for ii in range(num_steps):
+                writer.append(ii + 1, state=state[ii], reconstructed_vertex=verts[ii])
+                writer.append(time[ii], Ra=np.eye(3) * ii)
+
+        # the old layout, one dataset per step
+        for ii in range(num_steps):
+            hf.create_dataset('state/' + str(ii + 1), data=state[ii])
+
+    def test_layout(self):
+        with h5py.File(self.filename, 'r') as hf:
+            assert telemetry.is_timeseries(hf['refinement/state'])
+            assert hf['refinement/reconstructed_vertex/data'].shape == (self.num_steps, 10, 3)
+            assert hf['refinement/state/data'].maxshape == (None, 18)
+            np.testing.assert_array_equal(hf['refinement/state/data'][()], self.state)
+
+    def test_per_step(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            np.testing.assert_array_equal(hf['refinement/state/' + str(12)][()], self.state[11])
+            np.testing.assert_array_equal(hf['refinement/reconstructed_vertex/25'], self.verts[24])
+            group = hf['refinement/Ra']
+            np.testing.assert_array_equal(group[str(self.time[-1])], np.eye(3) * 24)
+
+    def test_keys_in_order(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            keys = list(hf['refinement/state'].keys())
+            assert keys == [str(ii + 1) for ii in range(self.num_steps)]
+            assert len(hf['refinement']['state']) == self.num_steps
+
+    def test_old_layout(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            np.testing.assert_array_equal(hf['state/3'][()], self.state[2])
+            assert len(list(hf['state'].keys())) == self.num_steps
+            np.testing.assert_array_equal(hf['time'][()], self.time)
+
+    def test_missing_step(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            with pytest.raises(KeyError):
+                hf['refinement/state/0']
+
+    def test_shape_change(self):
+        with h5py.File(os.path.join(tempfile.mkdtemp(), 'bad.hdf5'), 'w') as hf:
+            writer = telemetry.TimeSeriesWriter(hf)
+            writer.append(0, vertex=np.zeros((4, 3)))
+            writer.append(1, vertex=np.zeros((5, 3)))
+            with pytest.raises(ValueError):
+                writer.close()
+
+    def test_dtype_change(self):
+        filename = os.path.join(tempfile.mkdtemp(), 'dtype.hdf5')
+        with h5py.File(filename, 'w') as hf:
+            # chunks of 4 steps, so each flush has partial and whole chunks
+            writer = telemetry.TimeSeriesWriter(hf, buffer_steps=7, chunk_bytes=4 * 16)
+            for ii in range(30):
+                value = np.full(2, ii) if ii >= 7 else np.full(2, ii + 0.5)
+                writer.append(ii, x=value)
+            writer.close()
+            assert hf['x/data'].chunks == (4, 2)
+
+        with telemetry.File(filename, 'r') as hf:
+            data = hf['x'].data[()]
+            assert data.dtype == np.float64
+            np.testing.assert_array_equal(data[:7, 0], np.arange(7) + 0.5)
+            np.testing.assert_array_equal(data[7:, 0], np.arange(7, 30))
+
+class TestAsyncWriter():
+    filename = os.path.join(tempfile.mkdtemp(), 'async.hdf5')
+    num_steps = 230
+    verts = np.random.rand(num_steps, 50, 3)
+
+    with h5py.File(filename, 'w') as hf:
+        with telemetry.AsyncWriter(telemetry.TimeSeriesWriter(hf, buffer_steps=64),
+                                   max_queue=4) as writer:
+            vertex = np.zeros((50, 3))
+            for ii in range(num_steps):
+                # the same array is changed after each append
+                vertex[:] = verts[ii]
+                writer.append(ii, reconstructed_vertex=vertex)
+
+    def test_snapshots(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            series = hf['reconstructed_vertex']
+            assert len(series) == self.num_steps
+            np.testing.assert_array_equal(series.data[()], self.verts)
+            np.testing.assert_array_equal(series['229'], self.verts[-1])
+
+    def test_flush_on_exception(self):
+        filename = os.path.join(tempfile.mkdtemp(), 'error.hdf5')
+        with h5py.File(filename, 'w') as hf:
+            with pytest.raises(RuntimeError):
+                with telemetry.AsyncWriter(telemetry.TimeSeriesWriter(hf)) as writer:
+                    for ii in range(10):
+                        writer.append(ii, state=np.full(18, ii))
+                    raise RuntimeError('simulation failed')
+
+        with telemetry.File(filename, 'r') as hf:
+            assert list(hf['state'].keys()) == [str(ii) for ii in range(10)]
+
+    def test_writer_error(self):
+        with h5py.File(os.path.join(tempfile.mkdtemp(), 'bad.hdf5'), 'w') as hf:
+            writer = telemetry.AsyncWriter(telemetry.TimeSeriesWriter(hf, buffer_steps=1))
+            writer.append(0, vertex=np.zeros((4, 3)))
+            writer.append(1, vertex=np.zeros((5, 3)))
+            with pytest.raises(ValueError):
+                writer.close()
+            with pytest.raises(ValueError):
+                writer.append(2, vertex=np.zeros((4, 3)))
+
+class TestDeltaSeries():
+    filename = os.path.join(tempfile.mkdtemp(), 'delta.hdf5')
+    num_steps = 57
+    np.random.seed(5)
+    verts, faces, weights = [], [], []
+    v = np.random.rand(40, 3)
+    f = np.random.randint(0, 40, (60, 3))
+    w = np.ones(40)
+    for ii in range(num_steps):
+        moved = np.random.randint(0, v.shape[0], 3)
+        v[moved] = np.random.rand(3, 3)
+        w[moved] = w[moved] / 2
+        if ii == 30:
+            # remesh with more vertices and faces
+            v = np.vstack((v, np.random.rand(5, 3)))
+            w = np.append(w, np.ones(5))
+            f = np.random.randint(0, 45, (70, 3))
+        verts.append(v.copy())
+        faces.append(f.copy())
+        weights.append(w.copy())
+
+    with h5py.File(filename, 'w') as hf:
+        names = ('reconstructed_vertex', 'reconstructed_face', 'reconstructed_weight')
+        with telemetry.TimeSeriesWriter(hf, buffer_steps=8, delta=names,
+                                        keyframe_steps=10) as writer:
+            for ii in range(num_steps):
+                writer.append(ii, reconstructed_vertex=verts[ii],
+                              reconstructed_face=faces[ii],
+                              reconstructed_weight=weights[ii], state=np.zeros(18))
+
+    def test_layout(self):
+        with h5py.File(self.filename, 'r') as hf:
+            assert hf['reconstructed_vertex'].attrs['layout'] == telemetry.DELTA_LAYOUT
+            assert telemetry.is_timeseries(hf['reconstructed_vertex'])
+            # keyframes every 10 steps and at the remesh
+            np.testing.assert_array_equal(hf['reconstructed_vertex/keyframe_step'][()],
+                                          [0, 10, 20, 30, 40, 50])
+            # the faces only change at the remesh
+            assert hf['reconstructed_face/index'].shape == (0,)
+            assert hf['reconstructed_vertex/index'].shape[0] <= 3 * self.num_steps
+
+    def test_every_step(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            rv, rf, rw = (hf['reconstructed_vertex'], hf['reconstructed_face'],
+                          hf['reconstructed_weight'])
+            assert rv.keys() == [str(ii) for ii in range(self.num_steps)]
+            for ii in range(self.num_steps):
+                np.testing.assert_array_equal(rv[str(ii)], self.verts[ii])
+                np.testing.assert_array_equal(rf[str(ii)], self.faces[ii])
+                np.testing.assert_array_equal(rw[str(ii)], self.weights[ii])
+
+    def test_random_access(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            for ii in np.random.permutation(self.num_steps):
+                np.testing.assert_array_equal(hf['reconstructed_vertex/' + str(ii)],
+                                              self.verts[ii])
+
+    def test_returns_copy(self):
+        with telemetry.File(self.filename, 'r') as hf:
+            rv = hf['reconstructed_vertex']
+            v = rv['5']
+            v[:] = 0
+            np.testing.assert_array_equal(rv['6'], self.verts[6])
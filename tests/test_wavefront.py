@@ -605,6 +605,42 @@ class TestEdgeSearchingCastaliaMat4092():
         cof = wavefront.center_of_face(self.v, self.f)
         np.testing.assert_allclose(cof, self.center_face)
 
+class TestEdgeMatchingCastaliaMat1024():
+    mat = scipy.io.loadmat('./data/shape_model/CASTALIA/castalia_model.mat')
+    f = mat['F_1024'] - 1
+    v = mat['V_1024']
+
+    Fa, Fb, Fc = f[:, 0], f[:, 1], f[:, 2]
+    e1_vertex_map = np.vstack((Fb, Fa)).T
+    e2_vertex_map = np.vstack((Fc, Fb)).T
+    e3_vertex_map = np.vstack((Fa, Fc)).T
+
+    ind_search = wavefront.search_edge_vertex_map(e1_vertex_map, e2_vertex_map,
+                                                  e3_vertex_map)
+    ind_match = wavefront.match_edge_vertex_map(e1_vertex_map, e2_vertex_map,
+                                                e3_vertex_map)
+
+    def test_matches_search(self):
+        for a, b in zip(self.ind_search, self.ind_match):
+            np.testing.assert_array_equal(a, b)
+
+    def test_num_v_argument(self):
+        ind = wavefront.match_edge_vertex_map(self.e1_vertex_map, self.e2_vertex_map,
+                                              self.e3_vertex_map, self.v.shape[0])
+        for a, b in zip(ind, self.ind_match):
+            np.testing.assert_array_equal(a, b)
+
+    def test_one_match_per_edge(self):
+        count = np.sum(np.stack(self.ind_match) != -1, axis=0)
+        np.testing.assert_array_equal(count, np.full(self.f.shape[0], 3))
+
+    def test_vertex_face_map_order(self):
+        expected = [list() for _ in range(self.v.shape[0])]
+        for face, verts in enumerate(self.f):
+            for vert in verts:
+                expected[vert].append(face)
+        assert wavefront.vertex_face_map(self.v, self.f) == expected
+
 class TestDistArray():
     pt = np.array([5, 0, 0])
     array = np.array([[0, 0, 0],
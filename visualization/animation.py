@@ -12,6 +12,7 @@ from kinematics import attitude
 from visualization import graphics
 from point_cloud import wavefront
 import utilities
+import telemetry
 
 
 def test_asteroid():
@@ -173,7 +174,7 @@ def inertial_asteroid_trajectory_cpp(time, state, inertial_intersections,
     
     pc_sources = pc_points.mlab_source
     
-    with h5py.File(hdf5_file, 'r') as hf:
+    with telemetry.File(hdf5_file, 'r') as hf:
         # oriignal vertices
         est_initial_vertices = hf['simulation_parameters/estimate_asteroid/initial_vertices'][()]
         num_vert = est_initial_vertices.shape[0]
@@ -271,7 +272,7 @@ def inertial_asteroid_landing_cpp(time, state, filename, mayavi_objects,
     ms = mesh.mlab_source
     ts = com.mlab_source
 
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         v = hf['landing/vertices'][()]
         f = hf['landing/faces'][()]
 
@@ -332,7 +333,7 @@ def inertial_asteroid_refinement_cpp(time, state, inertial_intersections,
     
     pc_sources = pc_points.mlab_source
     
-    with h5py.File(hdf5_file, 'r') as hf:
+    with telemetry.File(hdf5_file, 'r') as hf:
         # oriignal vertices
         est_initial_vertices = hf['simulation_parameters/estimate_asteroid/initial_vertices'][()]
         num_vert = est_initial_vertices.shape[0]
@@ -412,7 +413,7 @@ def inertial_asteroid_landing_cpp_save(time, state, filename, mayavi_objects,
     ms = mesh.mlab_source
     ts = com.mlab_source
 
-    with h5py.File(filename, 'r') as hf:
+    with telemetry.File(filename, 'r') as hf:
         v = hf['landing/vertices'][()]
         f = hf['landing/faces'][()]
 
@@ -467,7 +468,7 @@ def inertial_asteroid_trajectory_cpp_save(time, state, inertial_intersections,
     ts = com.mlab_source
     pc_sources = pc_points.mlab_source
 
-    with h5py.File(hdf5_file, 'r') as hf:
+    with telemetry.File(hdf5_file, 'r') as hf:
         rv_group = hf['reconstructed_vertex']
         rf_group = hf['reconstructed_face']
         rw_group = hf['reconstructed_weight']
@@ -556,7 +557,7 @@ def inertial_asteroid_refinement_cpp_save(time, state, inertial_intersections,
     
     pc_sources = pc_points.mlab_source
     
-    with h5py.File(hdf5_file, 'r') as hf:
+    with telemetry.File(hdf5_file, 'r') as hf:
         # oriignal vertices
         est_initial_vertices = hf['simulation_parameters/estimate_asteroid/initial_vertices'][()]
         num_vert = est_initial_vertices.shape[0]